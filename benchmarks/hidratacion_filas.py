@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Filas por segundo al convertir resultados de SQLite en objetos del modelo.
+
+Recorre con los iter_* de DBManager (fetchmany por lotes) los libros, los
+ejemplares, los usuarios y los préstamos detallados de una base de datos de
+prueba y mide cuántas filas por segundo se hidratan. Es la cifra que mejoran
+los mapeadores compilados de database/mapeo.py.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.hidratacion_filas
+    python -m benchmarks.hidratacion_filas --libros 20000 --db /tmp/catalogo.db
+
+Para comparar dos versiones del código basta con ejecutarlo en cada una
+contra la misma base de datos (--db): solo usa la API pública de DBManager.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.memoria_modelos import crear_catalogo
+from database.db_manager import DBManager
+
+USUARIOS = 500
+
+
+def crear_prestamos(db: DBManager, prestamos: int):
+    """Registra préstamos sobre los primeros ejemplares; uno de cada tres se devuelve."""
+    usuarios = [db.insertar_usuario(f"Lector {i}", f"lector{i}@bench.local") for i in range(USUARIOS)]
+    for i, ejemplar in enumerate(db.iter_ejemplares(orden='id')):
+        if i >= prestamos:
+            break
+        prestamo_id = db.insertar_prestamo(ejemplar.id, usuarios[i % USUARIOS], dias_prestamo=i % 30 - 10)
+        if i % 3 == 0:
+            db.devolver_prestamo(prestamo_id)
+
+
+def medir(recorrido, repeticiones: int) -> dict:
+    """Mejor de varias pasadas completas del recorrido."""
+    mejor = None
+    filas = 0
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        filas = sum(1 for _ in recorrido())
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return {'filas': filas, 'segundos': mejor, 'filas_por_segundo': filas / mejor if mejor else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filas por segundo hidratadas por DBManager")
+    parser.add_argument("--libros", type=int, default=100_000, help="Libros del catálogo de prueba")
+    parser.add_argument("--autores", type=int, default=2_000, help="Autores distintos")
+    parser.add_argument("--generos", type=int, default=20, help="Géneros distintos")
+    parser.add_argument("--prestamos", type=int, default=20_000,
+                        help="Préstamos a registrar si la base no tiene ninguno")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Pasadas por recorrido (se toma la mejor)")
+    parser.add_argument("--db", help="Base de datos a usar; si no existe se crea con el catálogo de prueba")
+    args = parser.parse_args()
+
+    ruta = args.db or os.path.join(tempfile.mkdtemp(), "hidratacion_filas.db")
+    nueva = not os.path.exists(ruta)
+    db = DBManager(db_file=ruta, perfil='bulk-import')
+    try:
+        if nueva:
+            print(f"📦 Creando catálogo de {args.libros:,} libros en {ruta}...")
+            crear_catalogo(db, args.libros, args.autores, args.generos)
+        if args.prestamos and not db.get_todos_prestamos(limite=1):
+            print(f"📦 Registrando {args.prestamos:,} préstamos...")
+            crear_prestamos(db, args.prestamos)
+
+        recorridos = {
+            "libros (resumen)": lambda: db.iter_libros(resumen=True),
+            "libros + ejemplares": lambda: db.iter_libros(),
+            "ejemplares": lambda: db.iter_ejemplares(),
+            "usuarios": lambda: db.iter_usuarios(solo_activos=False),
+            "préstamos detallados": lambda: db.iter_prestamos_detallados(),
+        }
+        for nombre, recorrido in recorridos.items():
+            r = medir(recorrido, args.repeticiones)
+            print(f"📊 {nombre:<22} {r['filas']:>8,} filas  {r['segundos']:>6.2f} s  "
+                  f"{r['filas_por_segundo']:>10,.0f} filas/s")
+    finally:
+        db.cerrar()
+
+
+if __name__ == "__main__":
+    main()
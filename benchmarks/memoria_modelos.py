@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Memoria por Libro hidratado en un catálogo grande.
+
+Crea (o reutiliza) una base de datos de prueba con N libros de un ejemplar
+cada uno, repartidos entre unos pocos miles de autores, y mide con
+tracemalloc los bytes que ocupan los libros devueltos por
+get_todos_los_libros, en modo resumen y con ejemplares.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.memoria_modelos
+    python -m benchmarks.memoria_modelos --libros 20000 --db /tmp/catalogo.db
+
+Para comparar dos versiones del código basta con ejecutarlo en cada una
+contra la misma base de datos (--db): solo usa la API pública de DBManager.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DBManager
+
+CAPACIDAD_ESTANTERIA = 150
+LOTE = 5000
+
+
+def crear_catalogo(db: DBManager, libros: int, autores: int, generos: int,
+                   titulo: Optional[Callable[[int], str]] = None):
+    """Carga libros sintéticos con un ejemplar cada uno (titulo: i -> título del libro i)."""
+    estanterias = []
+    for i in range(-(-libros // CAPACIDAD_ESTANTERIA)):
+        estanterias.append(db.insertar_estanteria(f"Bench {i:05d}", CAPACIDAD_ESTANTERIA))
+    mapas = db.get_mapas_importacion()
+    lote = []
+    for i in range(libros):
+        lote.append({
+            'codigo': f"BENCH-{i:07d}", 'titulo': titulo(i) if titulo else f"Libro de prueba {i}", 'anio': 1950 + i % 70,
+            'autor_nombre': f"Nombre{i % autores}", 'autor_apellido': f"Apellido{i % autores}",
+            'genero': f"Género {i % generos}", 'estanteria_id': estanterias[i // CAPACIDAD_ESTANTERIA],
+            'cantidad_ejemplares': 1, 'isbn': None, 'editorial': "Editorial de prueba",
+        })
+        if len(lote) >= LOTE:
+            db.insertar_lote_catalogo(lote, mapas['autores'], mapas['generos'])
+            lote = []
+    if lote:
+        db.insertar_lote_catalogo(lote, mapas['autores'], mapas['generos'])
+
+
+def medir(db: DBManager, resumen: bool) -> dict:
+    """Bytes retenidos por la lista de libros hidratados y tiempo de la consulta."""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    libros = db.get_todos_los_libros(resumen=resumen)
+    segundos = time.perf_counter() - inicio
+    gc.collect()
+    retenidos, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'libros': len(libros),
+        'bytes_por_libro': retenidos / len(libros) if libros else 0,
+        'pico_mb': pico / 1024 / 1024,
+        'segundos': segundos,
+        'autores_distintos': len({id(libro.autor) for libro in libros}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por Libro hidratado")
+    parser.add_argument("--libros", type=int, default=100_000, help="Libros del catálogo de prueba")
+    parser.add_argument("--autores", type=int, default=2_000, help="Autores distintos")
+    parser.add_argument("--generos", type=int, default=20, help="Géneros distintos")
+    parser.add_argument("--db", help="Base de datos a usar; si no existe se crea con el catálogo de prueba")
+    args = parser.parse_args()
+
+    ruta = args.db or os.path.join(tempfile.mkdtemp(), "memoria_modelos.db")
+    nueva = not os.path.exists(ruta)
+    db = DBManager(db_file=ruta, perfil='bulk-import')
+    try:
+        if nueva:
+            print(f"📦 Creando catálogo de {args.libros:,} libros en {ruta}...")
+            crear_catalogo(db, args.libros, args.autores, args.generos)
+
+        for resumen in (True, False):
+            r = medir(db, resumen)
+            modo = "resumen" if resumen else "con ejemplares"
+            print(f"📊 {modo:<15} {r['libros']:>8,} libros  {r['bytes_por_libro']:>7,.0f} bytes/libro  "
+                  f"pico {r['pico_mb']:>7,.1f} MB  {r['segundos']:>6.2f} s  "
+                  f"{r['autores_distintos']:,} objetos Autor")
+    finally:
+        db.cerrar()
+
+
+if __name__ == "__main__":
+    main()
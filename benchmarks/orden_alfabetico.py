@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Listados alfabéticos con la collation "es" sobre un catálogo grande.
+
+Crea (o reutiliza) una base de datos de prueba con títulos en castellano
+(tildes, mayúsculas y eñes) y mide:
+
+* Cuánto tarda en construirse idx_libros_titulo_es frente a un índice
+  binario: es donde se paga comparar_es, una vez por cada comparación del
+  ordenamiento.
+* La primera página y una página del medio de get_pagina_libros por título,
+  que salen en orden del índice sin ordenar el catálogo.
+* Las mismas consultas con el índice desactivado (NOT INDEXED), que obligan
+  a SQLite a ordenar todo el resultado en un B-tree temporal.
+* El recorrido completo ordenado de iter_libros.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.orden_alfabetico
+    python -m benchmarks.orden_alfabetico --libros 100000 --db /tmp/catalogo_es.db
+"""
+
+import argparse
+import gc
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.memoria_modelos import crear_catalogo
+from database.db_manager import DBManager
+from database.normalizacion import comparar_es, registrar_funciones
+from database.paginacion import codificar_cursor, firma_orden
+
+PALABRAS = [
+    "árbol", "Árbol", "arboleda", "Álamo", "alamo", "canción", "cañón", "canon", "casa", "Casa",
+    "niño", "Niño", "nube", "Ñandú", "ñu", "ópalo", "Ópera", "ostra", "Ángel", "ángulo",
+    "de", "la", "el", "los", "del", "mar", "Montaña", "noche", "Historia", "crónica",
+]
+PAGINA = 50
+
+
+def titulo_es(i: int) -> str:
+    """Título reproducible de 3 a 5 palabras con un número al final (títulos distintos)."""
+    azar = random.Random(i)
+    return f"{' '.join(azar.choices(PALABRAS, k=azar.randint(3, 5)))} {i}"
+
+
+def cronometrar(funcion, repeticiones: int = 1) -> float:
+    """Mejor tiempo en segundos de varias ejecuciones."""
+    mejor = None
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return mejor
+
+
+def medir_indices(conn: sqlite3.Connection):
+    """Reconstruye el índice "es" y crea (y descarta) uno binario para comparar."""
+    conn.execute("DROP INDEX IF EXISTS idx_libros_titulo_es")
+    segundos_es = cronometrar(lambda: conn.execute("CREATE INDEX idx_libros_titulo_es ON libros (titulo COLLATE es)"))
+    segundos_binario = cronometrar(lambda: conn.execute("CREATE INDEX bench_libros_titulo_binario ON libros (titulo)"))
+    conn.execute("DROP INDEX bench_libros_titulo_binario")
+    conn.commit()
+    print(f"📊 {'índice collation es':<30} {segundos_es:>8.2f} s")
+    print(f"📊 {'índice binario (referencia)':<30} {segundos_binario:>8.2f} s")
+
+
+def medir_paginas(db: DBManager, conn: sqlite3.Connection, repeticiones: int):
+    """Primera página y página del medio: por el índice y forzando el ordenamiento."""
+    total = conn.execute("SELECT COUNT(*) FROM libros").fetchone()[0]
+    medio = conn.execute("SELECT titulo, id FROM libros ORDER BY titulo COLLATE es, id LIMIT 1 OFFSET ?",
+                         (total // 2,)).fetchone()
+    cursor_medio = codificar_cursor(firma_orden('titulo', False), tuple(medio))
+
+    for nombre, cursor in (("primera página", None), ("página del medio", cursor_medio)):
+        segundos = cronometrar(lambda: db.get_pagina_libros(tamanio=PAGINA, cursor=cursor, resumen=True),
+                               repeticiones)
+        print(f"📊 {nombre + ' (índice)':<30} {segundos * 1000:>8.2f} ms")
+
+    # La misma lectura sin el índice: SQLite ordena las filas en un B-tree temporal
+    sin_indice = "SELECT id, titulo FROM libros NOT INDEXED {donde} ORDER BY titulo COLLATE es, id LIMIT ?"
+    consultas = (
+        ("primera página", sin_indice.format(donde=""), [PAGINA]),
+        ("página del medio", sin_indice.format(donde="WHERE (titulo COLLATE es, id) > (?, ?)"),
+         [medio[0], medio[1], PAGINA]),
+    )
+    for nombre, sql, parametros in consultas:
+        segundos = cronometrar(lambda: conn.execute(sql, parametros).fetchall(), repeticiones)
+        print(f"📊 {nombre + ' (ordenando)':<30} {segundos * 1000:>8.2f} ms")
+
+
+def comprobar_orden(db: DBManager) -> int:
+    """Recorre el catálogo por título y devuelve cuántos pares consecutivos están fuera de orden."""
+    fuera_de_orden = 0
+    anterior = None
+    for libro in db.iter_libros(orden='titulo', resumen=True):
+        if anterior is not None and comparar_es(anterior, libro.titulo) > 0:
+            fuera_de_orden += 1
+        anterior = libro.titulo
+    return fuera_de_orden
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listados alfabéticos con la collation es")
+    parser.add_argument("--libros", type=int, default=500_000, help="Libros del catálogo de prueba")
+    parser.add_argument("--autores", type=int, default=2_000, help="Autores distintos")
+    parser.add_argument("--generos", type=int, default=20, help="Géneros distintos")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones por consulta (se toma la mejor)")
+    parser.add_argument("--db", help="Base de datos a usar; si no existe se crea con el catálogo de prueba")
+    args = parser.parse_args()
+
+    ruta = args.db or os.path.join(tempfile.mkdtemp(), "orden_alfabetico.db")
+    nueva = not os.path.exists(ruta)
+    db = DBManager(db_file=ruta, perfil='bulk-import')
+    conn = sqlite3.connect(ruta)
+    registrar_funciones(conn)
+    try:
+        if nueva:
+            print(f"📦 Creando catálogo de {args.libros:,} libros en {ruta}...")
+            crear_catalogo(db, args.libros, args.autores, args.generos, titulo=titulo_es)
+
+        medir_indices(conn)
+        medir_paginas(db, conn, args.repeticiones)
+
+        inicio = time.perf_counter()
+        fuera_de_orden = comprobar_orden(db)
+        segundos = time.perf_counter() - inicio
+        print(f"📊 {'recorrido completo por título':<30} {segundos:>8.2f} s  "
+              f"({fuera_de_orden} pares fuera de orden)")
+    finally:
+        conn.close()
+        db.cerrar()
+
+
+if __name__ == "__main__":
+    main()
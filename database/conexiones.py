@@ -0,0 +1,286 @@
+"""
+Gestor de conexiones SQLite de BiblioHub.
+
+SQLite en modo WAL admite un único escritor y varios lectores simultáneos.
+Este módulo reproduce ese modelo:
+
+* Una conexión escritora, compartida entre hilos y serializada con un RLock.
+  Todas las transacciones pasan por ella.
+* Un pool acotado de conexiones de solo lectura (mode=ro). Cada hilo toma
+  una al entrar en `lectura()` y la reutiliza si vuelve a entrar (lecturas
+  anidadas, p. ej. la hidratación de un libro), devolviéndola al salir del
+  bloque más externo.
+
+Si el hilo está dentro de una transacción, o la base es ':memory:' (que no
+se puede abrir desde otra conexión), las lecturas usan la conexión
+escritora para ver los datos sin confirmar.
+
+Una lectura larga que ya no hace falta (p. ej. la búsqueda de una tecla
+anterior) se puede cortar desde otro hilo con una Interrupcion: ver
+`GestorConexiones.interrumpible()`.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+
+class Interrupcion:
+    """
+    Permite cortar desde otro hilo la lectura hecha dentro de
+    GestorConexiones.interrumpible(). interrumpir() llama a
+    sqlite3.Connection.interrupt() sobre la conexión solo mientras el bloque
+    la tiene tomada, así que nunca alcanza a otra consulta que la reutilice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conexion: Optional[sqlite3.Connection] = None
+        self.cancelada = False
+
+    def interrumpir(self):
+        with self._lock:
+            self.cancelada = True
+            if self._conexion is not None:
+                self._conexion.interrupt()
+
+
+class GestorConexiones:
+    """Una conexión escritora serializada y un pool acotado de lectoras."""
+
+    def __init__(self, db_file: str,
+                 configurar: Optional[Callable[[sqlite3.Connection, bool], None]] = None,
+                 max_lectores: int = 4,
+                 timeout_lectura: float = 30.0,
+                 detect_types: int = 0):
+        """
+        Args:
+            db_file (str): Ruta de la base de datos.
+            configurar (Optional[Callable]): Se llama con (conexión, solo_lectura)
+                cada vez que se abre una conexión; aplica PRAGMAs, funciones, etc.
+            max_lectores (int): Máximo de conexiones de lectura abiertas a la vez.
+            timeout_lectura (float): Segundos de espera por una lectora libre.
+            detect_types (int): Se pasa a sqlite3.connect en todas las conexiones
+                (p. ej. PARSE_DECLTYPES para aplicar los conversores registrados).
+        """
+        if max_lectores < 1:
+            raise ValueError("El pool necesita al menos una conexión de lectura")
+
+        self.db_file = db_file
+        self._configurar = configurar
+        self._timeout_lectura = timeout_lectura
+        self._detect_types = detect_types
+        self._en_memoria = db_file in (':memory:', '') or db_file.startswith('file::memory:')
+
+        self._lock_escritor = threading.RLock()
+        self.escritor = sqlite3.connect(db_file, check_same_thread=False, detect_types=detect_types)
+        self.escritor.row_factory = sqlite3.Row
+        if configurar:
+            configurar(self.escritor, False)
+
+        self.max_lectores = max_lectores
+        self._cupos = threading.BoundedSemaphore(max_lectores)
+        self._libres = queue.LifoQueue()
+        self._lock_pool = threading.Lock()
+        self._lectores_abiertos = 0
+        # Lectoras prestadas ahora mismo: cerrar() interrumpe sus consultas
+        self._en_uso = set()
+        # Las lectoras creadas antes de un reconfigurar() se descartan al devolverse
+        self._generacion = 0
+        self._local = threading.local()
+        self._cerrado = False
+
+    # ============ ESCRITURA ============
+    @contextmanager
+    def escritura(self):
+        """Entrega la conexión escritora con acceso exclusivo (re-entrante por hilo)."""
+        with self._lock_escritor:
+            self._local.escribiendo = getattr(self._local, 'escribiendo', 0) + 1
+            try:
+                yield self.escritor
+            finally:
+                self._local.escribiendo -= 1
+
+    @contextmanager
+    def escritura_si_libre(self):
+        """Como escritura(), pero entrega None en lugar de esperar si otro hilo la tiene tomada."""
+        if not self._lock_escritor.acquire(blocking=False):
+            yield None
+            return
+        try:
+            with self.escritura() as conn:
+                yield conn
+        finally:
+            self._lock_escritor.release()
+
+    # ============ LECTURA ============
+    @contextmanager
+    def lectura(self):
+        """Entrega una conexión de lectura para el hilo actual."""
+        if self._cerrado:
+            raise RuntimeError("El gestor de conexiones está cerrado")
+
+        if self._en_memoria or getattr(self._local, 'escribiendo', 0):
+            with self.escritura() as conn:
+                yield conn
+            return
+
+        actual = getattr(self._local, 'lector', None)
+        if actual is not None:
+            # Lectura anidada en el mismo hilo: reutilizar la conexión ya tomada
+            self._local.profundidad += 1
+            try:
+                yield actual[0]
+            finally:
+                self._local.profundidad -= 1
+            return
+
+        conn, generacion = self._tomar_lector()
+        self._local.lector = (conn, generacion)
+        self._local.profundidad = 1
+        try:
+            yield conn
+        finally:
+            self._local.lector = None
+            self._local.profundidad = 0
+            self._devolver_lector(conn, generacion)
+
+    @contextmanager
+    def interrumpible(self, interrupcion: Interrupcion):
+        """
+        Lectura que interrupcion.interrumpir() puede cortar desde otro hilo:
+        la consulta en curso falla con sqlite3.OperationalError ('interrupted').
+        Las lecturas anidadas dentro del bloque reutilizan la misma conexión,
+        así que los métodos de DBManager llamados dentro quedan cubiertos.
+        La escritora (base en memoria o transacción en curso) no se interrumpe.
+
+        Raises:
+            sqlite3.OperationalError: Si la interrupción llegó antes de empezar.
+        """
+        with self.lectura() as conn:
+            with interrupcion._lock:
+                if interrupcion.cancelada:
+                    raise sqlite3.OperationalError("interrupted")
+                if conn is not self.escritor:
+                    interrupcion._conexion = conn
+            try:
+                yield conn
+            finally:
+                with interrupcion._lock:
+                    interrupcion._conexion = None
+
+    def _tomar_lector(self):
+        if not self._cupos.acquire(timeout=self._timeout_lectura):
+            raise RuntimeError(
+                f"No hay conexiones de lectura libres tras {self._timeout_lectura:.0f}s "
+                f"(máximo {self.max_lectores})"
+            )
+        try:
+            while True:
+                try:
+                    conn, generacion = self._libres.get_nowait()
+                except queue.Empty:
+                    conn, generacion = self._abrir_lector(), self._generacion
+                    break
+                if generacion == self._generacion and self._esta_sana(conn):
+                    break
+                self._descartar(conn)
+        except Exception:
+            self._cupos.release()
+            raise
+        with self._lock_pool:
+            if not self._cerrado:
+                self._en_uso.add(conn)
+                return conn, generacion
+        # cerrar() llegó mientras se tomaba: ya no interrumpiría esta lectora
+        self._devolver_lector(conn, generacion)
+        raise RuntimeError("El gestor de conexiones está cerrado")
+
+    def _devolver_lector(self, conn, generacion):
+        with self._lock_pool:
+            self._en_uso.discard(conn)
+        try:
+            if self._cerrado or generacion != self._generacion:
+                self._descartar(conn)
+            else:
+                # Una lectura interrumpida puede dejar una transacción abierta
+                if conn.in_transaction:
+                    conn.rollback()
+                self._libres.put((conn, generacion))
+        finally:
+            self._cupos.release()
+
+    def _abrir_lector(self) -> sqlite3.Connection:
+        uri = Path(self.db_file).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, detect_types=self._detect_types)
+        conn.row_factory = sqlite3.Row
+        if self._configurar:
+            self._configurar(conn, True)
+        with self._lock_pool:
+            self._lectores_abiertos += 1
+        return conn
+
+    def _esta_sana(self, conn) -> bool:
+        """Comprobación de salud antes de entregar una conexión del pool."""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock_pool:
+            self._lectores_abiertos -= 1
+
+    # ============ ADMINISTRACIÓN ============
+    def reconfigurar(self):
+        """
+        Vuelve a aplicar la configuración a la escritora y renueva las lectoras
+        (las que están en uso se cierran al devolverse). Se usa al cambiar el
+        perfil de rendimiento.
+        """
+        with self.escritura() as conn:
+            if self._configurar:
+                self._configurar(conn, False)
+        self._generacion += 1
+        self._vaciar_libres()
+
+    def _vaciar_libres(self):
+        while True:
+            try:
+                conn, _ = self._libres.get_nowait()
+            except queue.Empty:
+                return
+            self._descartar(conn)
+
+    def get_estado(self) -> dict:
+        """Resumen del pool para diagnósticos."""
+        return {
+            "max_lectores": self.max_lectores,
+            "lectores_abiertos": self._lectores_abiertos,
+            "lectores_libres": self._libres.qsize(),
+            "solo_escritor": self._en_memoria,
+        }
+
+    def cerrar(self):
+        """
+        Cierra las lectoras libres y la escritora. Las consultas en curso en
+        las lectoras en uso se interrumpen (fallan con 'interrupted') y esas
+        lectoras se cierran al devolverse. Una escritura en curso termina antes.
+        """
+        if self._cerrado:
+            return
+        self._cerrado = True
+        with self._lock_pool:
+            for conn in self._en_uso:
+                conn.interrupt()
+        self._vaciar_libres()
+        with self._lock_escritor:
+            self.escritor.close()
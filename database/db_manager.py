@@ -1,21 +1,117 @@
 import sqlite3
 import configparser
-from typing import List, Optional, Tuple
+import json
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import date, timedelta
-from logic.models import Libro, Estanteria, Usuario, Autor, Genero, Ejemplar, Prestamo
+from logic.models import (Libro, Estanteria, Usuario, Autor, Genero, Ejemplar, Prestamo, PrestamoDetalle,
+                          MapaIdentidad)
+from database.migraciones import (aplicar_migraciones, version_esquema, recalcular_ocupacion,
+                                  recalcular_conteos_libros, recalcular_circulacion,
+                                  recalcular_estadisticas, avanzar_corte_vencidos, recalcular_claves_busqueda,
+                                  ESTADISTICAS, SQL_ESTADISTICAS_REALES)
+from database.perfiles import cargar_perfiles, perfil_configurado, aplicar_perfil, leer_ajustes
+from database.conexiones import GestorConexiones, Interrupcion
+from database.normalizacion import normalizar, registrar_funciones, clave_autor, clave_genero
+from database.mapeo import (registrar_conversores, mapeador, mapear_uno, mapear_todos, mapear_filas,
+                            USUARIO, AUTOR, GENERO, ESTANTERIA, EJEMPLAR, PRESTAMO, PRESTAMO_DETALLE, LIBRO)
+from database.ubicaciones import asignar_ubicaciones, reubicar_libro
+from database.refinamiento import refinar_libros, refinar_ejemplares, refinar_usuarios, SEPARADORES_TELEFONO
+from database.paginacion import (Pagina, TAMANIO_PAGINA, TAMANIO_LOTE, firma_orden, decodificar_cursor,
+                                 condicion_despues_de, parametros_despues_de, armar_pagina, iterar_lotes)
 
 class EstanteriaLlenaError(Exception):
     pass
 
+# Claves de orden admitidas por get_prestamos_detallados:
+# clave -> (expresión SQL, atributo de PrestamoDetalle usado como cursor)
+ORDENES_PRESTAMOS = {
+    'fecha_prestamo': ("p.fecha_prestamo", 'fecha_prestamo'),
+    'vencimiento': ("p.fecha_devolucion_esperada", 'fecha_devolucion_esperada'),
+    'devolucion': ("COALESCE(p.fecha_devolucion_real, '')", 'fecha_devolucion_real'),
+    'usuario': ("COALESCE(u.nombre, '') COLLATE es", 'usuario_nombre'),
+    'titulo': ("COALESCE(l.titulo, '') COLLATE es", 'libro_titulo'),
+}
+
+ESTADOS_PRESTAMOS = ('activo', 'vencido', 'devuelto')
+
+# Claves de orden de los listados paginados (get_pagina_* / iter_*): clave -> expresión SQL.
+# El id de cada tabla se agrega siempre como desempate. Los textos ordenan
+# con la collation "es" (database/normalizacion.comparar_es), la misma de sus
+# índices; los códigos son ASCII y ordenan en binario.
+ORDENES_LIBROS = {'titulo': "l.titulo COLLATE es", 'codigo': "l.codigo", 'id': "l.id"}
+ORDENES_EJEMPLARES = {'codigo': "e.codigo_ejemplar", 'id': "e.id"}
+ORDENES_USUARIOS = {'nombre': "u.nombre COLLATE es", 'id': "u.id"}
+
+# Ejemplares con el nombre de la estantería de su hueco, para armar el texto de ubicación
+SQL_EJEMPLARES = """
+    SELECT e.*, s.nombre AS ubicacion_estanteria
+    FROM ejemplares e
+    LEFT JOIN estanterias s ON s.id = e.estanteria_id
+"""
+
+# Ejemplares de una lista de libros. Los ids viajan como un único parámetro JSON
+# (json_each) en lugar de un placeholder por id: no choca con el límite de
+# parámetros de SQLite y la sentencia es siempre la misma, así que se prepara una vez.
+SQL_EJEMPLARES_DE_LIBROS = SQL_EJEMPLARES + " WHERE e.libro_id IN (SELECT value FROM json_each(?))"
+
+# Libros con el nombre de su autor y de su género, para hidratarlos sin más consultas
+SQL_LIBROS = """
+    SELECT l.*,
+           a.nombre AS autor_nombre, a.apellido AS autor_apellido,
+           g.nombre AS genero_nombre
+    FROM libros l
+    LEFT JOIN autores a ON l.autor_id = a.id
+    LEFT JOIN generos g ON l.genero_id = g.id
+"""
+
+def _sql_telefono_indexado(columna: str) -> str:
+    """
+    Expresión SQL con el teléfono tal cual, sus dígitos seguidos y los dígitos
+    que siguen al primer espacio (sin prefijo de país).
+    """
+    def sin_separadores(expresion: str) -> str:
+        for separador in SEPARADORES_TELEFONO:
+            expresion = f"replace({expresion}, '{separador}', '')"
+        return expresion
+    local = f"CASE WHEN instr({columna}, ' ') > 0 THEN substr({columna}, instr({columna}, ' ') + 1) ELSE '' END"
+    return f"{columna} || ' ' || {sin_separadores(columna)} || ' ' || {sin_separadores(local)}"
+
 class DBManager:
-    def __init__(self):
+    def __init__(self, db_file: Optional[str] = None, perfil: Optional[str] = None):
+        """
+        Args:
+            db_file (Optional[str]): Ruta de la base de datos. Si no se indica,
+                se toma de config.ini (sección [database]).
+            perfil (Optional[str]): Perfil de rendimiento a aplicar. Si no se
+                indica, se usa el de [database.performance] en config.ini.
+        """
         config = configparser.ConfigParser()
         config.read('config.ini')
-        self.conn = sqlite3.connect(config['database']['db_file'])
-        self.conn.row_factory = sqlite3.Row
-        
-        # Auto-inicializar tablas si no existen
+        if db_file is None:
+            db_file = config['database']['db_file']
+        self.db_file = db_file
+        self.perfiles = cargar_perfiles(config)
+        self.perfil = self._validar_nombre_perfil(perfil or perfil_configurado(config))
+        self.fts_disponible = False
+        self._suscriptores: List[Callable[[str, Optional[int]], None]] = []
+
+        # Una conexión escritora serializada y un pool de lectoras (ver database/conexiones.py).
+        # self.conn es la escritora: las transacciones deben pasar por execute_transaction.
+        # Las columnas DATE se leen como datetime.date (ver database/mapeo.py)
+        registrar_conversores()
+        self.conexiones = GestorConexiones(
+            db_file,
+            configurar=self._configurar_conexion,
+            max_lectores=config.getint('database.performance', 'lectores', fallback=4),
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        self.conn = self.conexiones.escritor
+
+        # Auto-inicializar tablas si no existen y llevar el esquema a la última versión
         self._verificar_e_inicializar_tablas()
+        aplicar_migraciones(self.conn)
+        self._asegurar_indice_busqueda()
 
     def _verificar_e_inicializar_tablas(self):
         """Verifica si las tablas existen y las crea si es necesario."""
@@ -39,8 +135,8 @@ class DBManager:
                       termino: Optional[str] = None,
                       estanteria_id: Optional[int] = None,
                       estado_ejemplar: Optional[str] = None,
-                      ordenar_por: Optional[str] = None,
-                      limite: Optional[int] = None) -> List[Libro]:
+                      limite: Optional[int] = None,
+                      resumen: bool = False) -> List[Libro]:
         """
         Función de búsqueda unificada y avanzada para libros.
 
@@ -48,8 +144,9 @@ class DBManager:
             termino (Optional[str]): Término de búsqueda para título, autor, ISBN, etc.
             estanteria_id (Optional[int]): ID de la estantería para filtrar.
             estado_ejemplar (Optional[str]): 'disponible' o 'prestado'.
-            ordenar_por (Optional[str]): 'mas_prestado'.
             limite (Optional[int]): Limita el número de resultados.
+            resumen (bool): Si es True no se cargan los ejemplares; cada libro
+                trae solo sus contadores (Libro.conteos), mantenidos por triggers.
 
         Returns:
             List[Libro]: Lista de libros que coinciden con los criterios.
@@ -57,44 +154,54 @@ class DBManager:
 
         params = []
 
+        # Si hay índice FTS5, el término se resuelve contra él en lugar de con LIKE
+        expresion_fts = None
+        if termino and not termino.isdigit() and self.fts_disponible:
+            expresion_fts = self._construir_expresion_fts(termino)
+
         # SELECT y JOINs base
         sql = """
-            SELECT DISTINCT l.*,
+            SELECT l.*,
                    a.nombre as autor_nombre, a.apellido as autor_apellido,
                    g.nombre as genero_nombre
         """
-        # Añadir conteo de préstamos solo si se necesita ordenar por ello
-        if ordenar_por == 'mas_prestado':
-            sql += ", COUNT(p.id) as total_prestamos\n"
-
         sql += """
             FROM libros l
+        """
+        if expresion_fts:
+            # El LIMIT -1 evita que SQLite aplane la subconsulta: bm25() solo
+            # puede evaluarse dentro del recorrido del índice FTS
+            sql += """
+            JOIN (SELECT rowid AS libro_id,
+                         bm25(libros_fts, 10.0, 8.0, 8.0, 4.0) AS relevancia
+                  FROM libros_fts
+                  WHERE libros_fts MATCH ?
+                  LIMIT -1) fts ON fts.libro_id = l.id
+            """
+            params.append(expresion_fts)
+        sql += """
             LEFT JOIN autores a ON l.autor_id = a.id
             LEFT JOIN generos g ON l.genero_id = g.id
         """
 
-        # JOINs condicionales
-        if estado_ejemplar or ordenar_por == 'mas_prestado':
-            sql += "LEFT JOIN ejemplares e ON l.id = e.libro_id\n"
-        if ordenar_por == 'mas_prestado':
-            sql += "LEFT JOIN prestamos p ON e.id = p.ejemplar_id\n"
-
         # Cláusula WHERE
         where_clauses = []
-        if termino:
+        # Título y autor se comparan por sus claves normalizadas (sin acentos ni mayúsculas)
+        termino_norm = normalizar(termino) if termino else None
+        if termino and not expresion_fts:
             # Si el término es un número, buscar solo por código
             if termino.isdigit():
                 where_clauses.append("LOWER(l.codigo) LIKE LOWER(?)")
                 params.append(f"%{termino}%")
             else:
-                termino_like = f"%{termino}%"
+                termino_like = f"%{termino_norm}%"
                 where_clauses.append("""
-                    (LOWER(l.titulo) LIKE LOWER(?)
-                     OR LOWER(l.codigo) LIKE LOWER(?)
-                     OR LOWER(l.isbn) LIKE LOWER(?)
-                     OR LOWER(a.nombre) LIKE LOWER(?)
-                     OR LOWER(a.apellido) LIKE LOWER(?)
-                     OR LOWER(a.nombre || ' ' || a.apellido) LIKE LOWER(?))
+                    (l.titulo_norm LIKE ?
+                     OR LOWER(l.codigo) LIKE ?
+                     OR LOWER(l.isbn) LIKE ?
+                     OR a.nombre_norm LIKE ?
+                     OR a.apellido_norm LIKE ?
+                     OR a.nombre_norm || ' ' || a.apellido_norm LIKE ?)
                 """)
                 params.extend([termino_like] * 6)
 
@@ -103,83 +210,118 @@ class DBManager:
             params.append(estanteria_id)
 
         if estado_ejemplar:
-            # JOIN con ejemplares
-            if "LEFT JOIN ejemplares" not in sql:
-                 sql += "LEFT JOIN ejemplares e ON l.id = e.libro_id\n"
-            where_clauses.append("e.estado = ?")
+            # EXISTS en lugar de JOIN: cada libro sale una sola vez y no hace falta agrupar
+            where_clauses.append("EXISTS (SELECT 1 FROM ejemplares e WHERE e.libro_id = l.id AND e.estado = ?)")
             params.append(estado_ejemplar)
 
         if where_clauses:
             sql += " WHERE " + " AND ".join(where_clauses)
 
-        # GROUP BY
-        sql += " GROUP BY l.id, a.id, g.id"
-
-        # ORDER BY
-        if ordenar_por == 'mas_prestado':
-            sql += " ORDER BY total_prestamos DESC"
-        elif termino:
-            sql += """
+        # ORDER BY (sin término, el catálogo completo sale directamente en el
+        # orden de idx_libros_titulo_es, sin ordenar en memoria)
+        if termino:
+            # Las coincidencias exactas siguen teniendo prioridad; dentro de cada
+            # grupo decide la relevancia bm25 cuando la búsqueda usa FTS
+            sql += f"""
                 ORDER BY
-                    CASE WHEN LOWER(l.titulo) = LOWER(?) THEN 1
+                    CASE WHEN l.titulo_norm = ? THEN 1
                          WHEN LOWER(l.codigo) = LOWER(?) THEN 2
-                         WHEN LOWER(a.nombre || ' ' || a.apellido) = LOWER(?) THEN 3
+                         WHEN a.nombre_norm || ' ' || a.apellido_norm = ? THEN 3
                          ELSE 4 END,
-                    l.titulo
+                    {'fts.relevancia,' if expresion_fts else ''}
+                    l.titulo COLLATE es, l.id
             """
-            params.extend([termino] * 3)
+            params.extend([termino_norm, termino, termino_norm])
         else:
-            sql += " ORDER BY l.titulo"
+            sql += " ORDER BY l.titulo COLLATE es"
+
+        return self.consultar_libros(sql, params, limite=limite, resumen=resumen)
 
-        # LIMIT
+    def consultar_libros(self, sql: str, parametros: Sequence = (), limite: Optional[int] = None,
+                         resumen: bool = False) -> List[Libro]:
+        """
+        Ejecuta una consulta de libros ya armada (buscar_libros, o un plan de
+        logic/consulta_catalogo.py) e hidrata el resultado. La consulta debe
+        traer l.* y las columnas autor_nombre, autor_apellido y genero_nombre.
+        """
+        parametros = list(parametros)
         if limite:
             sql += " LIMIT ?"
-            params.append(limite)
-
-        cursor = self.conn.cursor()
-        rows = cursor.execute(sql, tuple(params)).fetchall()
-
-        if not rows:
-            return []
-
-        # 1. Obtener todos los IDs de libros de la consulta principal
-        libro_ids = [row['id'] for row in rows]
-
-        # 2. Realizar UNA consulta para obtener TODOS los ejemplares necesarios
-        placeholders = ','.join('?' for _ in libro_ids)
-        ejemplares_rows = cursor.execute(f"SELECT * FROM ejemplares WHERE libro_id IN ({placeholders})", libro_ids).fetchall()
+            parametros.append(limite)
+
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, parametros)
+
+            # Los ejemplares se cargan por lotes de libros (una consulta por lote),
+            # así el mapa de ejemplares nunca abarca el resultado completo
+            libros = []
+            identidad = MapaIdentidad()
+            for rows in iterar_lotes(cursor):
+                libros.extend(self._hidratar_libros(conn, rows, con_ejemplares=not resumen,
+                                                    identidad=identidad))
+            return libros
+
+    def explicar_consulta(self, sql: str, parametros: Sequence = ()) -> List[str]:
+        """Pasos de EXPLAIN QUERY PLAN de una consulta, sangrados según su anidamiento."""
+        with self._lectura() as conn:
+            filas = conn.execute("EXPLAIN QUERY PLAN " + sql, list(parametros)).fetchall()
+        niveles = {0: 0}
+        pasos = []
+        for fila in filas:
+            nivel = niveles.get(fila['parent'], 0) + 1
+            niveles[fila['id']] = nivel
+            pasos.append("   " * (nivel - 1) + fila['detail'])
+        return pasos
 
-        # 3. Agrupar ejemplares por libro_id para acceso rápido
-        ejemplares_map = {}
-        for ej_row in ejemplares_rows:
-            ej_obj = Ejemplar(
-                id=ej_row['id'], libro_id=ej_row['libro_id'], codigo_ejemplar=ej_row['codigo_ejemplar'],
-                estado=ej_row['estado'], observaciones=ej_row['observaciones'],
-                fecha_adquisicion=ej_row['fecha_adquisicion'], ubicacion_fisica=ej_row['ubicacion_fisica']
-            )
-            if ej_row['libro_id'] not in ejemplares_map:
-                ejemplares_map[ej_row['libro_id']] = []
-            ejemplares_map[ej_row['libro_id']].append(ej_obj)
+    def execute_transaction(self, func):
+        """Ejecuta una función dentro de una transacción y devuelve el resultado."""
+        with self.conexiones.escritura() as conn:
+            try:
+                cursor = conn.cursor()
+                result = func(cursor)
+                conn.commit()
+                return result
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+    # ============ AVISOS DE CAMBIOS ============
+    def suscribir_cambios(self, callback: Callable[[str, Optional[int]], None]):
+        """
+        Registra un callback que se llama con (tabla, id) cada vez que un método
+        de escritura confirma su transacción. id es None si el cambio abarca
+        varias filas o no se conoce.
+        """
+        self._suscriptores.append(callback)
 
-        # 4. Hidratar resultados pasando el mapa de ejemplares
-        libros = [self._hidratar_libro(row, ejemplares_map=ejemplares_map) for row in rows]
+    def _notificar_cambio(self, tabla: str, id: Optional[int] = None):
+        for callback in list(self._suscriptores):
+            callback(tabla, id)
 
-        # Filtrado post-consulta para 'mas_prestado' si no hay préstamos
-        if ordenar_por == 'mas_prestado':
-            libros = [libro for libro in libros if libro.historial_prestamos > 0]
+    def version_datos(self) -> Optional[int]:
+        """
+        PRAGMA data_version de la conexión escritora. Solo cambia cuando otra
+        conexión (otro proceso, una herramienta externa) confirma cambios en
+        el archivo, así que sirve para detectar escrituras ajenas a este
+        DBManager. Devuelve None si la escritora está ocupada.
+        """
+        with self.conexiones.escritura_si_libre() as conn:
+            if conn is None:
+                return None
+            return conn.execute("PRAGMA data_version").fetchone()[0]
 
-        return libros
+    def _lectura(self):
+        """Conexión de lectura para el hilo actual (la escritora si hay una transacción en curso)."""
+        return self.conexiones.lectura()
 
-    def execute_transaction(self, func):
-        """Ejecuta una función dentro de una transacción y devuelve el resultado."""
-        try:
-            cursor = self.conn.cursor()
-            result = func(cursor)
-            self.conn.commit()
-            return result
-        except Exception as e:
-            self.conn.rollback()
-            raise e
+    def lectura_interrumpible(self, interrupcion: Interrupcion):
+        """
+        Bloque en el que las consultas de este DBManager hechas desde el hilo
+        actual se pueden cortar con interrupcion.interrumpir() (ver
+        GestorConexiones.interrumpible).
+        """
+        return self.conexiones.interrumpible(interrupcion)
 
     def inicializar(self):
         """Inicializa las tablas de la base de datos."""
@@ -257,13 +399,242 @@ class DBManager:
         )''')
         self.conn.commit()
 
+    # ============ PERFIL DE RENDIMIENTO ============
+    def cambiar_perfil(self, nombre: str):
+        """
+        Aplica un perfil de rendimiento (PRAGMAs de SQLite) a la conexión.
+
+        Raises:
+            ValueError: Si el perfil no existe.
+            RuntimeError: Si hay una transacción en curso.
+        """
+        self._validar_nombre_perfil(nombre)
+        if self.conn.in_transaction:
+            raise RuntimeError("No se puede cambiar el perfil con una transacción en curso")
+        self.perfil = nombre
+        # Reaplica a la escritora y renueva las lectoras del pool
+        self.conexiones.reconfigurar()
+
+    def _validar_nombre_perfil(self, nombre: str) -> str:
+        if nombre not in self.perfiles:
+            raise ValueError(
+                f"Perfil de rendimiento '{nombre}' desconocido "
+                f"(disponibles: {', '.join(sorted(self.perfiles))})"
+            )
+        return nombre
+
+    def _configurar_conexion(self, conn: sqlite3.Connection, solo_lectura: bool):
+        """Aplica el perfil activo a cada conexión que abre el gestor de conexiones."""
+        # La collation "es" la usan los índices de orden alfabético (migración 10)
+        registrar_funciones(conn)
+        ajustes = dict(self.perfiles[self.perfil])
+        if solo_lectura:
+            # El modo de journal es propiedad del archivo; lo fija la escritora
+            ajustes.pop('journal_mode', None)
+        aplicar_perfil(conn, ajustes)
+
+    @contextmanager
+    def perfil_temporal(self, nombre: str):
+        """
+        Aplica un perfil solo durante el bloque 'with' y restaura el anterior,
+        por ejemplo para una importación masiva.
+        """
+        anterior = self.perfil
+        self.cambiar_perfil(nombre)
+        try:
+            yield self
+        finally:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.cambiar_perfil(anterior)
+
+    def get_diagnostico(self) -> dict:
+        """Devuelve el perfil activo, los ajustes efectivos y el estado del pool de conexiones."""
+        with self.conexiones.escritura() as conn:
+            return {
+                "db_file": self.db_file,
+                "sqlite_version": sqlite3.sqlite_version,
+                "version_esquema": version_esquema(conn),
+                "perfil": self.perfil,
+                "perfil_configurado": dict(self.perfiles[self.perfil]),
+                "ajustes_efectivos": leer_ajustes(conn),
+                "fts_disponible": self.fts_disponible,
+                "conexiones": self.conexiones.get_estado(),
+            }
+
+    def verificar_integridad(self) -> List[str]:
+        """
+        PRAGMA integrity_check con la collation "es" y normalizar()
+        registradas, que el cliente sqlite3 no tiene. Devuelve ['ok'] si la
+        base de datos está íntegra, o los problemas encontrados.
+        """
+        with self.conexiones.escritura() as conn:
+            return [fila[0] for fila in conn.execute("PRAGMA integrity_check")]
+
+    # ============ ÍNDICE DE BÚSQUEDA (FTS5) ============
+    def _asegurar_indice_busqueda(self):
+        """
+        Crea los índices FTS5 del catálogo (título, código, ISBN y autor) y
+        del directorio de usuarios (nombre, email y teléfono), con los
+        triggers que los mantienen sincronizados. Si la instalación de SQLite
+        no incluye FTS5, la búsqueda sigue funcionando con LIKE.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name IN ('libros_fts', 'usuarios_fts')")
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        if {'libros_fts', 'usuarios_fts'} <= existentes:
+            self.fts_disponible = True
+            return
+
+        try:
+            if 'libros_fts' not in existentes:
+                self._crear_indice_libros(cursor)
+            if 'usuarios_fts' not in existentes:
+                self._crear_indice_usuarios(cursor)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ FTS5 no disponible, se usará búsqueda por LIKE: {e}")
+            self.fts_disponible = False
+            return
+        self.conn.commit()
+        self.fts_disponible = True
+
+        # Poblar los índices nuevos con las filas que ya existían
+        if 'libros_fts' not in existentes:
+            self.reconstruir_indice_busqueda()
+        if 'usuarios_fts' not in existentes:
+            self.reconstruir_indice_usuarios()
+
+    def _crear_indice_libros(self, cursor):
+        cursor.execute('''CREATE VIRTUAL TABLE libros_fts USING fts5(
+            titulo, codigo, isbn, autor,
+            tokenize = "unicode61 remove_diacritics 2"
+        )''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS libros_fts_insert AFTER INSERT ON libros BEGIN
+            INSERT INTO libros_fts (rowid, titulo, codigo, isbn, autor)
+            SELECT new.id, new.titulo, new.codigo, new.isbn,
+                   (SELECT nombre || ' ' || apellido FROM autores WHERE id = new.autor_id);
+        END''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS libros_fts_delete AFTER DELETE ON libros BEGIN
+            DELETE FROM libros_fts WHERE rowid = old.id;
+        END''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS libros_fts_update
+        AFTER UPDATE OF titulo, codigo, isbn, autor_id ON libros BEGIN
+            DELETE FROM libros_fts WHERE rowid = old.id;
+            INSERT INTO libros_fts (rowid, titulo, codigo, isbn, autor)
+            SELECT new.id, new.titulo, new.codigo, new.isbn,
+                   (SELECT nombre || ' ' || apellido FROM autores WHERE id = new.autor_id);
+        END''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS autores_fts_update
+        AFTER UPDATE OF nombre, apellido ON autores BEGIN
+            UPDATE libros_fts SET autor = new.nombre || ' ' || new.apellido
+            WHERE rowid IN (SELECT id FROM libros WHERE autor_id = new.id);
+        END''')
+
+    def _crear_indice_usuarios(self, cursor):
+        # El teléfono se indexa tal cual y también solo con sus dígitos, para
+        # que "600 123", "600123" y "624147" encuentren "600-123-456" y "+34 624-147-999"
+        cursor.execute('''CREATE VIRTUAL TABLE usuarios_fts USING fts5(
+            nombre, email, telefono,
+            tokenize = "unicode61 remove_diacritics 2"
+        )''')
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS usuarios_fts_insert AFTER INSERT ON usuarios BEGIN
+            INSERT INTO usuarios_fts (rowid, nombre, email, telefono)
+            VALUES (new.id, new.nombre, new.email, {_sql_telefono_indexado('new.telefono')});
+        END''')
+        cursor.execute('''CREATE TRIGGER IF NOT EXISTS usuarios_fts_delete AFTER DELETE ON usuarios BEGIN
+            DELETE FROM usuarios_fts WHERE rowid = old.id;
+        END''')
+        cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS usuarios_fts_update
+        AFTER UPDATE OF nombre, email, telefono ON usuarios BEGIN
+            DELETE FROM usuarios_fts WHERE rowid = old.id;
+            INSERT INTO usuarios_fts (rowid, nombre, email, telefono)
+            VALUES (new.id, new.nombre, new.email, {_sql_telefono_indexado('new.telefono')});
+        END''')
+
+    def reconstruir_indice_busqueda(self) -> int:
+        """
+        Regenera por completo el índice FTS5 a partir de las tablas libros y autores.
+        Útil para bases de datos existentes o si el índice quedó desincronizado.
+
+        Returns:
+            int: Cantidad de libros indexados.
+        """
+        if not self.fts_disponible:
+            raise RuntimeError("El índice de búsqueda FTS5 no está disponible en esta instalación de SQLite")
+
+        def _rebuild(cursor):
+            cursor.execute("DELETE FROM libros_fts")
+            cursor.execute("""
+                INSERT INTO libros_fts (rowid, titulo, codigo, isbn, autor)
+                SELECT l.id, l.titulo, l.codigo, l.isbn, a.nombre || ' ' || a.apellido
+                FROM libros l
+                LEFT JOIN autores a ON l.autor_id = a.id
+            """)
+            total = cursor.rowcount
+            cursor.execute("INSERT INTO libros_fts (libros_fts) VALUES ('optimize')")
+            return total
+        return self.execute_transaction(_rebuild)
+
+    def reconstruir_indice_usuarios(self) -> int:
+        """
+        Regenera por completo el índice FTS5 del directorio de usuarios.
+
+        Returns:
+            int: Cantidad de usuarios indexados.
+        """
+        if not self.fts_disponible:
+            raise RuntimeError("El índice de búsqueda FTS5 no está disponible en esta instalación de SQLite")
+
+        def _rebuild(cursor):
+            cursor.execute("DELETE FROM usuarios_fts")
+            cursor.execute(f"""
+                INSERT INTO usuarios_fts (rowid, nombre, email, telefono)
+                SELECT id, nombre, email, {_sql_telefono_indexado('telefono')}
+                FROM usuarios
+            """)
+            total = cursor.rowcount
+            cursor.execute("INSERT INTO usuarios_fts (usuarios_fts) VALUES ('optimize')")
+            return total
+        return self.execute_transaction(_rebuild)
+
+    def reparar_claves_busqueda(self) -> int:
+        """
+        Recalcula las claves normalizadas (titulo_norm, nombre_norm, ...) de
+        libros, autores, usuarios, géneros y estanterías. Las escrituras de la
+        aplicación ya las calculan; esto corrige filas escritas desde fuera.
+
+        Returns:
+            int: Cantidad de filas cuyas claves se corrigieron.
+        """
+        return self.execute_transaction(recalcular_claves_busqueda)
+
+    def refinar_busqueda_libros(self, libros: List[Libro], anterior: str, nuevo: str) -> Optional[List[Libro]]:
+        """
+        Resultado de buscar_libros(nuevo) filtrando en memoria el de
+        buscar_libros(anterior) (sin limite), o None si no se
+        puede deducir (ver database/refinamiento.py).
+        """
+        return refinar_libros(libros, anterior, nuevo, self.fts_disponible)
+
+    def _construir_expresion_fts(self, termino: str) -> Optional[str]:
+        """
+        Convierte el término libre en una consulta FTS5: cada palabra se busca
+        como prefijo y todas deben aparecer (AND implícito).
+        """
+        palabras = [p for p in termino.split() if any(c.isalnum() for c in p)]
+        if not palabras:
+            return None
+        return ' '.join('"' + p.replace('"', '""') + '"*' for p in palabras)
+
     def insertar_estanteria(self, nombre: str, capacidad: int) -> int:
         """Inserta una nueva estantería en la base de datos."""
         def _insert(cursor):
-            cursor.execute("INSERT INTO estanterias (nombre, capacidad) VALUES (?, ?)", 
-                         (nombre, capacidad))
+            cursor.execute("INSERT INTO estanterias (nombre, nombre_norm, capacidad) VALUES (?, ?, ?)",
+                         (nombre, normalizar(nombre), capacidad))
             return cursor.lastrowid
-        return self.execute_transaction(_insert)
+        estanteria_id = self.execute_transaction(_insert)
+        self._notificar_cambio('estanterias', estanteria_id)
+        return estanteria_id
 
     def eliminar_estanteria(self, id: int):
         def _delete(cursor):
@@ -274,23 +645,19 @@ class DBManager:
             if cursor.rowcount == 0:
                 raise ValueError(f"No se encontró estantería con id {id}")
         self.execute_transaction(_delete)
+        self._notificar_cambio('estanterias', id)
 
     def modificar_estanteria(self, id: int, nombre: str, capacidad: int):
         """Modifica una estantería existente."""
         def _update(cursor):
             # Verificar que la estantería existe
-            cursor.execute("SELECT * FROM estanterias WHERE id = ?", (id,))
-            if not cursor.fetchone():
+            cursor.execute("SELECT ocupacion FROM estanterias WHERE id = ?", (id,))
+            row = cursor.fetchone()
+            if not row:
                 raise ValueError(f"No se encontró estantería con id {id}")
             
             # Verificar que la nueva capacidad no sea menor a los ejemplares actuales
-            cursor.execute("""
-                SELECT COUNT(e.id) 
-                FROM ejemplares e 
-                JOIN libros l ON e.libro_id = l.id 
-                WHERE l.estanteria_id = ?
-            """, (id,))
-            ejemplares_actuales = cursor.fetchone()[0]
+            ejemplares_actuales = row['ocupacion']
             
             if capacidad < ejemplares_actuales:
                 raise ValueError(
@@ -301,36 +668,68 @@ class DBManager:
             # Actualizar estantería
             cursor.execute("""
                 UPDATE estanterias 
-                SET nombre = ?, capacidad = ? 
+                SET nombre = ?, nombre_norm = ?, capacidad = ? 
                 WHERE id = ?
-            """, (nombre, capacidad, id))
+            """, (nombre, normalizar(nombre), capacidad, id))
             
             if cursor.rowcount == 0:
                 raise ValueError(f"No se pudo actualizar la estantería con id {id}")
         
         self.execute_transaction(_update)
+        self._notificar_cambio('estanterias', id)
 
     def get_libro_por_codigo(self, codigo: str) -> Optional[Libro]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM libros WHERE codigo = ?", (codigo,))
-        row = cursor.fetchone()
-        if row:
-            return self._hidratar_libro(row)
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{SQL_LIBROS} WHERE l.codigo = ?", (codigo,))
+            libros = self._hidratar_libros(conn, cursor.fetchall())
+            return libros[0] if libros else None
 
     def get_estanteria(self, id: int) -> Optional[Estanteria]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM estanterias WHERE id = ?", (id,))
-        row = cursor.fetchone()
-        if row:
-            return Estanteria(row['id'], row['nombre'], row['capacidad'])
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM estanterias WHERE id = ?", (id,))
+            return mapear_uno(cursor, ESTANTERIA)
 
     def get_count_ejemplares_en_estanteria(self, estanteria_id: int) -> int:
         """Cuenta el número de ejemplares en una estantería específica."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(e.id) FROM ejemplares e JOIN libros l ON e.libro_id = l.id WHERE l.estanteria_id = ?", (estanteria_id,))
-        return cursor.fetchone()[0]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ocupacion FROM estanterias WHERE id = ?", (estanteria_id,))
+            row = cursor.fetchone()
+            return row['ocupacion'] if row else 0
+
+    def get_ocupacion_estanterias(self) -> Dict[int, Estanteria]:
+        """
+        Capacidad y ocupación de todas las estanterías en una sola consulta.
+
+        Returns:
+            Dict[int, Estanteria]: Estanterías por id, con ocupados y libres.
+        """
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM estanterias ORDER BY nombre COLLATE es")
+            return {estanteria.id: estanteria for estanteria in mapear_todos(cursor, ESTANTERIA)}
+
+    def reparar_ocupacion_estanterias(self) -> int:
+        """
+        Recalcula los contadores de ocupación a partir de los ejemplares.
+
+        Returns:
+            int: Cantidad de estanterías cuyo contador se corrigió.
+        """
+        corregidas = self.execute_transaction(recalcular_ocupacion)
+        self._notificar_cambio('estanterias')
+        return corregidas
+
+    def reparar_conteos_libros(self) -> int:
+        """
+        Recalcula los contadores de ejemplares de cada libro.
+
+        Returns:
+            int: Cantidad de libros cuyos contadores se corrigieron.
+        """
+        return self.execute_transaction(recalcular_conteos_libros)
 
     def get_libros_por_estanteria(self, estanteria_id: int) -> List[Libro]:
         return self.buscar_libros(estanteria_id=estanteria_id)
@@ -342,323 +741,425 @@ class DBManager:
         return self.buscar_libros(estado_ejemplar='prestado')
 
     def get_libro_mas_prestado(self) -> Optional[Libro]:
-        libros = self.buscar_libros(ordenar_por='mas_prestado', limite=1)
+        libros = self.get_top_prestados(1)
         return libros[0] if libros else None
 
+    def get_top_prestados(self, k: int = 10, desde=None, hasta=None,
+                          genero_id: Optional[int] = None) -> List[Libro]:
+        """
+        Los k libros con más préstamos, leídos de la circulación mantenida por
+        triggers en lugar de agrupar el historial de préstamos.
+
+        Sin período, el ranking (general o de un género) sale en orden de los
+        índices de circulacion_libro y solo se leen k filas. Con período se
+        suman los buckets mensuales de cada libro prestado en esos meses: el
+        coste crece con los libros que tuvieron préstamos en el período, no
+        con k, y el género se filtra después de sumar.
+
+        Args:
+            k (int): Cantidad de libros del ranking.
+            desde, hasta: Fechas (date o 'AAAA-MM-DD') que acotan el período.
+                Se cuentan meses completos: el período abarca desde el mes de
+                'desde' hasta el mes de 'hasta', ambos incluidos.
+            genero_id (Optional[int]): Limita el ranking a un género.
+
+        Returns:
+            List[Libro]: Libros en modo resumen, con historial_prestamos
+            igual a los préstamos del período.
+        """
+        if k < 1:
+            return []
+        params = []
+        condiciones = []
+        if desde is None and hasta is None:
+            # idx_circulacion_libro_total o, con género, idx_circulacion_libro_genero
+            # ya están en el orden del ranking: el LIMIT corta tras k filas
+            origen = "circulacion_libro c"
+            condiciones.append("c.total_prestamos > 0")
+            if genero_id:
+                condiciones.append("c.genero_id = ?")
+                params.append(genero_id)
+        else:
+            meses = []
+            if desde is not None:
+                meses.append("mes >= ?")
+                params.append(str(desde)[:7])
+            if hasta is not None:
+                meses.append("mes <= ?")
+                params.append(str(hasta)[:7])
+            origen = f"""(SELECT libro_id, SUM(prestamos) AS total_prestamos
+                          FROM circulacion_mensual WHERE {' AND '.join(meses)}
+                          GROUP BY libro_id HAVING SUM(prestamos) > 0) c"""
+            if genero_id:
+                condiciones.append("l.genero_id = ?")
+                params.append(genero_id)
+
+        sql = f"""
+            SELECT l.*, a.nombre AS autor_nombre, a.apellido AS autor_apellido,
+                   g.nombre AS genero_nombre, c.total_prestamos
+            FROM {origen}
+            JOIN libros l ON l.id = c.libro_id
+            LEFT JOIN autores a ON l.autor_id = a.id
+            LEFT JOIN generos g ON l.genero_id = g.id
+        """
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY c.total_prestamos DESC, c.libro_id DESC LIMIT ?"
+        params.append(k)
+
+        with self._lectura() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            return self._hidratar_libros(conn, rows, con_ejemplares=False)
+
+    def reparar_circulacion(self) -> int:
+        """
+        Reconstruye la circulación por libro y por mes desde los préstamos.
+
+        Returns:
+            int: Cantidad de libros con préstamos registrados.
+        """
+        return self.execute_transaction(recalcular_circulacion)
+
     def get_todas_las_estanterias(self) -> List[Estanteria]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM estanterias ORDER BY nombre")
-        return [Estanteria(row['id'], row['nombre'], row['capacidad']) for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM estanterias ORDER BY nombre COLLATE es")
+            return mapear_todos(cursor, ESTANTERIA)
 
     def cerrar(self):
-        self.conn.close()
+        self.conexiones.cerrar()
 
     # ============ FUNCIÓN DE HIDRATACIÓN ============
-    def _hidratar_libro(self, row, ejemplares_map: Optional[dict] = None) -> 'Libro':
+    def _hidratar_libros(self, conn, rows, con_ejemplares: bool = True,
+                         identidad: Optional[MapaIdentidad] = None) -> List[Libro]:
         """
-        Convierte una fila de base de datos en un objeto Libro completo.
-        Acepta un mapa de ejemplares pre-cargados para evitar consultas N+1.
+        Hidrata varias filas de libros cargando los ejemplares de todos ellos
+        en UNA consulta, agrupados por libro_id (evita consultas N+1).
+        Con con_ejemplares=False los libros quedan solo con sus contadores.
+        Los autores y géneros repetidos se comparten a través de `identidad`;
+        una consulta que hidrata por lotes pasa el mismo mapa a todos ellos.
         """
-        from logic.models import Libro
-        
-        row_dict = dict(row)
-        
-        libro = Libro(
-            id=row_dict['id'],
-            codigo=row_dict['codigo'],
-            titulo=row_dict['titulo'],
-            isbn=row_dict.get('isbn'),
-            anio=row_dict['anio'],
-            editorial=row_dict.get('editorial'),
-            numero_paginas=row_dict.get('numero_paginas'),
-            descripcion=row_dict.get('descripcion'),
-            autor_id=row_dict['autor_id'],
-            genero_id=row_dict.get('genero_id'),
-            estanteria_id=row_dict['estanteria_id'],
-            fecha_adquisicion=row_dict.get('fecha_adquisicion')
-        )
-        
-        try:
-            if 'autor_nombre' in row_dict and 'autor_apellido' in row_dict:
-                from logic.models import Autor
-                libro.autor = Autor(
-                    id=libro.autor_id,
-                    nombre=row_dict['autor_nombre'],
-                    apellido=row_dict['autor_apellido']
-                )
-            elif libro.autor_id:
-                libro.autor = self.get_autor(libro.autor_id)
-            
-            if 'genero_nombre' in row_dict and row_dict['genero_nombre']:
-                from logic.models import Genero
-                libro.genero = Genero(
-                    id=libro.genero_id,
-                    nombre=row_dict['genero_nombre']
-                )
-            elif libro.genero_id:
-                libro.genero = self.get_genero(libro.genero_id)
-            
-            # --- Lógica de hidratación de ejemplares optimizada ---
-            if ejemplares_map is not None:
-                # Usar el mapa pre-cargado
+        if not rows:
+            return []
+        if identidad is None:
+            identidad = MapaIdentidad()
+        mapear = mapeador(LIBRO, rows[0].keys())
+        libros = [mapear(row, identidad) for row in rows]
+        if con_ejemplares:
+            libro_ids = json.dumps([libro.id for libro in libros])
+            ejemplares_map = {}
+            for ejemplar in mapear_todos(conn.execute(SQL_EJEMPLARES_DE_LIBROS, (libro_ids,)), EJEMPLAR):
+                ejemplares_map.setdefault(ejemplar.libro_id, []).append(ejemplar)
+            for libro in libros:
                 libro.ejemplares = ejemplares_map.get(libro.id, [])
-            elif libro.id:
-                # Caer de vuelta a la consulta individual si no hay mapa
-                libro.ejemplares = self.get_ejemplares_por_libro(libro.id)
-            
-            if 'total_prestamos' in row_dict:
-                libro.historial_prestamos = row_dict['total_prestamos']
-                
-        except Exception as e:
-            print(f"⚠️ Error poblando datos relacionados para libro {libro.codigo}: {e}")
-            # Continúa con libro básico si hay error
-        
-        return libro
+        return libros
 
     # ============ FUNCIONES PARA USUARIOS ============
     def insertar_usuario(self, nombre: str, email: Optional[str] = None, 
                         telefono: Optional[str] = None, direccion: Optional[str] = None) -> int:
         def _insert(cursor):
-            cursor.execute("""INSERT INTO usuarios (nombre, email, telefono, direccion) 
-                            VALUES (?, ?, ?, ?)""", (nombre, email, telefono, direccion))
+            cursor.execute("""INSERT INTO usuarios (nombre, nombre_norm, email, telefono, direccion) 
+                            VALUES (?, ?, ?, ?, ?)""", (nombre, normalizar(nombre), email, telefono, direccion))
             return cursor.lastrowid
-        return self.execute_transaction(_insert)
+        usuario_id = self.execute_transaction(_insert)
+        self._notificar_cambio('usuarios', usuario_id)
+        return usuario_id
 
     def get_usuario(self, id: int) -> Optional[Usuario]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM usuarios WHERE id = ?", (id,))
-        row = cursor.fetchone()
-        if row:
-            return Usuario(row['id'], row['nombre'], row['email'], row['telefono'], 
-                         row['direccion'], row['fecha_registro'], row['activo'])
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM usuarios WHERE id = ?", (id,))
+            return mapear_uno(cursor, USUARIO)
 
     def insertar_libro_con_ejemplares(self, libro_info: dict, autor_id: int, genero_id: Optional[int], cantidad_ejemplares: int) -> int:
         """
         Inserta un libro y sus ejemplares en una única transacción.
-        Calcula automáticamente la ubicación de cada ejemplar.
+        Los ejemplares se ubican en los huecos libres más bajos de la estantería.
         """
         def _insert(cursor):
             # 1. Insertar el libro principal
             cursor.execute("""
-                INSERT INTO libros (codigo, titulo, isbn, anio, editorial, autor_id, genero_id, estanteria_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO libros (codigo, titulo, titulo_norm, isbn, anio, editorial, autor_id, genero_id,
+                                    estanteria_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
-                libro_info['codigo'], libro_info['titulo'], libro_info.get('isbn'),
+                libro_info['codigo'], libro_info['titulo'], normalizar(libro_info['titulo']), libro_info.get('isbn'),
                 libro_info['anio'], libro_info.get('editorial'), autor_id,
                 genero_id, libro_info['estanteria_id']
             ))
             libro_id = cursor.lastrowid
 
-            # 2. Insertar cada ejemplar, generando su ubicación
+            # 2. Insertar los ejemplares
+            ejemplar_ids = []
             for i in range(cantidad_ejemplares):
                 codigo_ejemplar = f"{libro_info['codigo']}-{i+1:03d}"
-
-                # Usar el método centralizado para la ubicación
-                ubicacion_auto = self._generar_ubicacion_automatica(libro_id)
-
                 cursor.execute("""
-                    INSERT INTO ejemplares (libro_id, codigo_ejemplar, ubicacion_fisica, estado)
-                    VALUES (?, ?, ?, ?)
-                """, (libro_id, codigo_ejemplar, ubicacion_auto, 'disponible'))
+                    INSERT INTO ejemplares (libro_id, codigo_ejemplar, estado)
+                    VALUES (?, ?, ?)
+                """, (libro_id, codigo_ejemplar, 'disponible'))
+                ejemplar_ids.append(cursor.lastrowid)
+
+            # 3. Ubicarlos todos de una vez
+            asignar_ubicaciones(cursor, libro_info['estanteria_id'], ejemplar_ids)
 
             return libro_id
 
-        return self.execute_transaction(_insert)
+        libro_id = self.execute_transaction(_insert)
+        self._notificar_cambio('libros', libro_id)
+        return libro_id
 
     def get_todos_usuarios(self) -> List[Usuario]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM usuarios WHERE activo = 1 ORDER BY nombre")
-        return [Usuario(row['id'], row['nombre'], row['email'], row['telefono'], 
-                       row['direccion'], row['fecha_registro'], row['activo']) 
-                for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM usuarios WHERE activo = 1 ORDER BY nombre COLLATE es")
+            return mapear_todos(cursor, USUARIO)
+
+    def buscar_usuarios(self, termino: str, limite: Optional[int] = 20,
+                        solo_activos: bool = True) -> List[Usuario]:
+        """
+        Busca usuarios por nombre, email o teléfono.
+
+        Con FTS5 cada palabra del término se busca como prefijo de una palabra
+        indexada en usuarios_fts; sin él, el término completo como subcadena.
+        Primero salen las coincidencias exactas de nombre o email, luego los
+        nombres que empiezan por el término y, dentro de cada grupo, decide
+        la relevancia bm25 (nombre > email > teléfono).
+
+        Args:
+            termino (str): Texto a buscar; si está vacío no se devuelve nada.
+            limite (Optional[int]): Máximo de resultados (None = todos).
+            solo_activos (bool): Excluye a los usuarios dados de baja.
+
+        Returns:
+            List[Usuario]: Usuarios encontrados, los más relevantes primero.
+        """
+        termino = termino.strip()
+        if not termino:
+            return []
+
+        params = []
+        condiciones = []
+        expresion_fts = self._construir_expresion_fts(termino) if self.fts_disponible else None
+
+        sql = "SELECT u.* FROM usuarios u"
+        if expresion_fts:
+            # LIMIT -1: como en buscar_libros, bm25() solo se evalúa dentro del recorrido FTS
+            sql += """
+            JOIN (SELECT rowid AS usuario_id,
+                         bm25(usuarios_fts, 10.0, 5.0, 2.0) AS relevancia
+                  FROM usuarios_fts
+                  WHERE usuarios_fts MATCH ?
+                  LIMIT -1) fts ON fts.usuario_id = u.id
+            """
+            params.append(expresion_fts)
+        else:
+            termino_like = f"%{normalizar(termino)}%"
+            condiciones.append("""
+                (u.nombre_norm LIKE ?
+                 OR LOWER(u.email) LIKE ?
+                 OR u.telefono LIKE ?)
+            """)
+            params.extend([termino_like] * 3)
+
+        if solo_activos:
+            condiciones.append("u.activo = 1")
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+
+        sql += f"""
+            ORDER BY
+                CASE WHEN u.nombre_norm = ? OR LOWER(u.email) = ? THEN 1
+                     WHEN substr(u.nombre_norm, 1, length(?)) = ? THEN 2
+                     ELSE 3 END,
+                {'fts.relevancia,' if expresion_fts else ''}
+                u.nombre COLLATE es, u.id
+        """
+        params.extend([normalizar(termino)] * 4)
+
+        if limite:
+            sql += " LIMIT ?"
+            params.append(limite)
+
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, tuple(params))
+            return mapear_todos(cursor, USUARIO)
+
+    def refinar_busqueda_usuarios(self, usuarios: List[Usuario], anterior: str,
+                                  nuevo: str) -> Optional[List[Usuario]]:
+        """
+        Resultado de buscar_usuarios(nuevo) filtrando en memoria el de
+        buscar_usuarios(anterior), o None si no se puede deducir (ver
+        database/refinamiento.py).
+        """
+        return refinar_usuarios(usuarios, anterior, nuevo, self.fts_disponible)
 
     # ============ FUNCIONES PARA AUTORES ============
     def insertar_autor(self, nombre: str, apellido: str, nacionalidad: Optional[str] = None,
                       fecha_nacimiento: Optional[date] = None, biografia: Optional[str] = None) -> int:
         def _insert(cursor):
-            cursor.execute("""INSERT INTO autores (nombre, apellido, nacionalidad, fecha_nacimiento, biografia) 
-                            VALUES (?, ?, ?, ?, ?)""", 
-                          (nombre, apellido, nacionalidad, fecha_nacimiento, biografia))
+            cursor.execute("""INSERT INTO autores (nombre, apellido, nombre_norm, apellido_norm,
+                                                   nacionalidad, fecha_nacimiento, biografia) 
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", 
+                          (nombre, apellido, *clave_autor(nombre, apellido),
+                           nacionalidad, fecha_nacimiento, biografia))
             return cursor.lastrowid
-        return self.execute_transaction(_insert)
+        autor_id = self.execute_transaction(_insert)
+        self._notificar_cambio('autores', autor_id)
+        return autor_id
 
     def get_autor(self, id: int) -> Optional[Autor]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM autores WHERE id = ?", (id,))
-        row = cursor.fetchone()
-        if row:
-            return Autor(row['id'], row['nombre'], row['apellido'], row['nacionalidad'], 
-                        row['fecha_nacimiento'], row['biografia'])
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM autores WHERE id = ?", (id,))
+            return mapear_uno(cursor, AUTOR)
 
     def get_todos_autores(self) -> List[Autor]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM autores ORDER BY apellido, nombre")
-        return [Autor(row['id'], row['nombre'], row['apellido'], row['nacionalidad'], 
-                     row['fecha_nacimiento'], row['biografia']) 
-                for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM autores ORDER BY apellido COLLATE es, nombre COLLATE es")
+            return mapear_todos(cursor, AUTOR)
 
     def find_autor_by_name(self, nombre: str, apellido: str) -> Optional[Autor]:
         """Busca un autor por su nombre y apellido."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM autores WHERE nombre = ? AND apellido = ?", (nombre, apellido))
-        row = cursor.fetchone()
-        if row:
-            return Autor(row['id'], row['nombre'], row['apellido'], row['nacionalidad'],
-                        row['fecha_nacimiento'], row['biografia'])
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            # Sin distinguir acentos ni mayúsculas; si hay varios, primero el idéntico
+            cursor.execute("""SELECT * FROM autores
+                              WHERE apellido_norm = ? AND nombre_norm = ?
+                              ORDER BY apellido = ? AND nombre = ? DESC, id
+                              LIMIT 1""", (normalizar(apellido), normalizar(nombre), apellido, nombre))
+            return mapear_uno(cursor, AUTOR)
 
     # ============ FUNCIONES PARA GÉNEROS ============
     def insertar_genero(self, nombre: str, descripcion: Optional[str] = None) -> int:
         def _insert(cursor):
-            cursor.execute("INSERT INTO generos (nombre, descripcion) VALUES (?, ?)", 
-                          (nombre, descripcion))
+            cursor.execute("INSERT INTO generos (nombre, nombre_norm, descripcion) VALUES (?, ?, ?)", 
+                          (nombre, clave_genero(nombre), descripcion))
             return cursor.lastrowid
-        return self.execute_transaction(_insert)
+        genero_id = self.execute_transaction(_insert)
+        self._notificar_cambio('generos', genero_id)
+        return genero_id
 
     def get_genero(self, id: int) -> Optional[Genero]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM generos WHERE id = ?", (id,))
-        row = cursor.fetchone()
-        if row:
-            return Genero(row['id'], row['nombre'], row['descripcion'])
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM generos WHERE id = ?", (id,))
+            return mapear_uno(cursor, GENERO)
 
     def get_todos_generos(self) -> List[Genero]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM generos ORDER BY nombre")
-        return [Genero(row['id'], row['nombre'], row['descripcion']) 
-                for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM generos ORDER BY nombre COLLATE es")
+            return mapear_todos(cursor, GENERO)
 
     def find_genero_by_name(self, nombre: str) -> Optional[Genero]:
         """Busca un género por su nombre."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM generos WHERE nombre = ?", (nombre,))
-        row = cursor.fetchone()
-        if row:
-            return Genero(row['id'], row['nombre'], row['descripcion'])
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT * FROM generos
+                              WHERE nombre_norm = ?
+                              ORDER BY nombre = ? DESC, id
+                              LIMIT 1""", (normalizar(nombre), nombre))
+            return mapear_uno(cursor, GENERO)
 
     # ============ FUNCIONES PARA EJEMPLARES ============
-    def _generar_ubicacion_automatica(self, libro_id: int) -> str:
-        """Genera una ubicación automática para un ejemplar basada en la estantería del libro."""
-        cursor = self.conn.cursor()
-        
-        # Obtener información del libro y estantería
-        cursor.execute("""
-            SELECT l.estanteria_id, e.nombre as estanteria_nombre
-            FROM libros l
-            JOIN estanterias e ON l.estanteria_id = e.id
-            WHERE l.id = ?
-        """, (libro_id,))
-        
-        libro_info = cursor.fetchone()
-        if not libro_info:
-            return "Ubicación no especificada"
-        
-        estanteria_nombre = libro_info['estanteria_nombre']
-        
-        # Contar ejemplares existentes en la misma estantería para generar posición
-        cursor.execute("""
-            SELECT COUNT(*) as total
-            FROM ejemplares ej
-            JOIN libros l ON ej.libro_id = l.id
-            WHERE l.estanteria_id = ?
-        """, (libro_info['estanteria_id'],))
-        
-        total_ejemplares = cursor.fetchone()['total'] + 1 
-        
-        # Calcular nivel y posición (10 libros por nivel)
-        nivel = ((total_ejemplares - 1) // 10) + 1
-        posicion = ((total_ejemplares - 1) % 10) + 1
-        
-        return f"Estantería {estanteria_nombre} - Nivel {nivel} - Pos {posicion}"
-
     def insertar_ejemplar(self, libro_id: int, codigo_ejemplar: str, 
                          ubicacion_fisica: Optional[str] = None, 
                          observaciones: Optional[str] = None) -> int:
         def _insert(cursor):
-            # Si no se especifica ubicación, generar una automática
-            if ubicacion_fisica is None:
-                ubicacion_auto = self._generar_ubicacion_automatica(libro_id)
-            else:
-                ubicacion_auto = ubicacion_fisica
-                
             cursor.execute("""INSERT INTO ejemplares (libro_id, codigo_ejemplar, ubicacion_fisica, observaciones) 
                             VALUES (?, ?, ?, ?)""", 
-                          (libro_id, codigo_ejemplar, ubicacion_auto, observaciones))
-            return cursor.lastrowid
-        return self.execute_transaction(_insert)
+                          (libro_id, codigo_ejemplar, ubicacion_fisica, observaciones))
+            ejemplar_id = cursor.lastrowid
+
+            # Si no se especifica ubicación, se le asigna el primer hueco libre de su estantería
+            if ubicacion_fisica is None:
+                cursor.execute("SELECT estanteria_id FROM libros WHERE id = ?", (libro_id,))
+                libro_row = cursor.fetchone()
+                if libro_row:
+                    asignar_ubicaciones(cursor, libro_row['estanteria_id'], [ejemplar_id])
+                else:
+                    cursor.execute("UPDATE ejemplares SET ubicacion_fisica = ? WHERE id = ?",
+                                   ("Ubicación no especificada", ejemplar_id))
+            return ejemplar_id
+        ejemplar_id = self.execute_transaction(_insert)
+        self._notificar_cambio('ejemplares', ejemplar_id)
+        return ejemplar_id
 
     def get_ejemplar(self, id: int) -> Optional[Ejemplar]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM ejemplares WHERE id = ?", (id,))
-        row = cursor.fetchone()
-        if row:
-            return Ejemplar(row['id'], row['libro_id'], row['codigo_ejemplar'], 
-                          row['estado'], row['observaciones'], row['fecha_adquisicion'], 
-                          row['ubicacion_fisica'])
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{SQL_EJEMPLARES} WHERE e.id = ?", (id,))
+            return mapear_uno(cursor, EJEMPLAR)
 
     def get_ejemplar_por_codigo(self, codigo_ejemplar: str) -> Optional[Ejemplar]:
         """Busca un ejemplar específico por su código único."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM ejemplares WHERE codigo_ejemplar = ?", (codigo_ejemplar,))
-        row = cursor.fetchone()
-        if row:
-            return Ejemplar(
-                id=row['id'], libro_id=row['libro_id'], codigo_ejemplar=row['codigo_ejemplar'],
-                estado=row['estado'], observaciones=row['observaciones'],
-                fecha_adquisicion=row['fecha_adquisicion'], ubicacion_fisica=row['ubicacion_fisica']
-            )
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{SQL_EJEMPLARES} WHERE e.codigo_ejemplar = ?", (codigo_ejemplar,))
+            return mapear_uno(cursor, EJEMPLAR)
 
     def get_ejemplares_por_libro(self, libro_id: int) -> List[Ejemplar]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM ejemplares WHERE libro_id = ? ORDER BY codigo_ejemplar", 
-                      (libro_id,))
-        return [Ejemplar(row['id'], row['libro_id'], row['codigo_ejemplar'], 
-                        row['estado'], row['observaciones'], row['fecha_adquisicion'], 
-                        row['ubicacion_fisica']) for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{SQL_EJEMPLARES} WHERE e.libro_id = ? ORDER BY e.codigo_ejemplar", 
+                          (libro_id,))
+            return mapear_todos(cursor, EJEMPLAR)
 
-    def buscar_ejemplares_disponibles(self, termino: str) -> List[Tuple[Ejemplar, str]]:
+    def get_ejemplares_en_estanteria(self, estanteria_id: int, nivel: Optional[int] = None) -> List[Ejemplar]:
+        """
+        Ejemplares ubicados en una estantería (o en uno de sus niveles),
+        ordenados por nivel y posición.
+        """
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            sql = f"{SQL_EJEMPLARES} WHERE e.estanteria_id = ?"
+            params = [estanteria_id]
+            if nivel is not None:
+                sql += " AND e.nivel = ?"
+                params.append(nivel)
+            cursor.execute(sql + " ORDER BY e.nivel, e.posicion", params)
+            return mapear_todos(cursor, EJEMPLAR)
+
+    def buscar_ejemplares_disponibles(self, termino: str, limite: int = 10) -> List[Tuple[Ejemplar, str]]:
         """
         Busca ejemplares disponibles por código de ejemplar o título de libro.
-        Devuelve una lista de tuplas (Ejemplar, titulo_libro).
+        Devuelve una lista de tuplas (Ejemplar, titulo_libro), como mucho `limite`.
         """
-        cursor = self.conn.cursor()
-        termino_like = f"%{termino}%"
-
-        cursor.execute("""
-            SELECT e.*, l.titulo as libro_titulo
-            FROM ejemplares e
-            JOIN libros l ON e.libro_id = l.id
-            WHERE e.estado = 'disponible' AND (
-                LOWER(e.codigo_ejemplar) LIKE LOWER(?) OR
-                LOWER(l.titulo) LIKE LOWER(?)
-            )
-            ORDER BY l.titulo, e.codigo_ejemplar
-            LIMIT 10
-        """, (termino_like, termino_like))
-
-        resultados = []
-        for row in cursor.fetchall():
-            ejemplar = Ejemplar(
-                id=row['id'], libro_id=row['libro_id'], codigo_ejemplar=row['codigo_ejemplar'],
-                estado=row['estado'], observaciones=row['observaciones'],
-                fecha_adquisicion=row['fecha_adquisicion'], ubicacion_fisica=row['ubicacion_fisica']
-            )
-            resultados.append((ejemplar, row['libro_titulo']))
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            termino_like = f"%{normalizar(termino)}%"
+
+            cursor.execute("""
+                SELECT e.*, l.titulo as libro_titulo, s.nombre AS ubicacion_estanteria
+                FROM ejemplares e
+                JOIN libros l ON e.libro_id = l.id
+                LEFT JOIN estanterias s ON s.id = e.estanteria_id
+                WHERE e.estado = 'disponible' AND (
+                    LOWER(e.codigo_ejemplar) LIKE ? OR
+                    l.titulo_norm LIKE ?
+                )
+                ORDER BY l.titulo COLLATE es, e.codigo_ejemplar
+                LIMIT ?
+            """, (termino_like, termino_like, limite))
+
+            filas = cursor.fetchall()
+            return list(zip(mapear_filas(filas, EJEMPLAR), (row['libro_titulo'] for row in filas)))
 
-        return resultados
+    def refinar_busqueda_ejemplares(self, resultados: List[Tuple[Ejemplar, str]], anterior: str,
+                                    nuevo: str) -> Optional[List[Tuple[Ejemplar, str]]]:
+        """
+        Resultado de buscar_ejemplares_disponibles(nuevo) filtrando en memoria
+        el de (anterior), o None si no se puede deducir (ver database/refinamiento.py).
+        """
+        return refinar_ejemplares(resultados, anterior, nuevo)
 
     def get_ejemplares_disponibles(self) -> List[Ejemplar]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM ejemplares WHERE estado = 'disponible' ORDER BY codigo_ejemplar")
-        return [Ejemplar(row['id'], row['libro_id'], row['codigo_ejemplar'], 
-                        row['estado'], row['observaciones'], row['fecha_adquisicion'], 
-                        row['ubicacion_fisica']) for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{SQL_EJEMPLARES} WHERE e.estado = 'disponible' ORDER BY e.codigo_ejemplar")
+            return mapear_todos(cursor, EJEMPLAR)
 
     def eliminar_ejemplar_por_id(self, ejemplar_id: int):
         """Elimina un ejemplar específico por su ID."""
@@ -667,6 +1168,120 @@ class DBManager:
             if cursor.rowcount == 0:
                 raise ValueError(f"No se encontró ejemplar con id {ejemplar_id}")
         self.execute_transaction(_delete)
+        self._notificar_cambio('ejemplares', ejemplar_id)
+
+    # ============ IMPORTACIÓN MASIVA ============
+    def get_mapas_importacion(self) -> dict:
+        """
+        Datos que un importador masivo necesita tener en memoria, leídos una vez.
+
+        Returns:
+            dict: 'autores' {(nombre, apellido): id} y 'generos' {nombre: id}
+                con las claves normalizadas (ver clave_autor / clave_genero),
+                'codigos' y 'isbns' (conjuntos de los ya usados en libros).
+        """
+        # Entre claves repetidas se queda el autor/género más antiguo, como en find_*_by_name
+        autores: Dict[Tuple[str, str], int] = {}
+        generos: Dict[str, int] = {}
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            for row in cursor.execute("SELECT id, nombre_norm, apellido_norm FROM autores"):
+                clave = (row['nombre_norm'], row['apellido_norm'])
+                autores[clave] = min(row['id'], autores.get(clave, row['id']))
+            for row in cursor.execute("SELECT id, nombre_norm FROM generos"):
+                clave = row['nombre_norm']
+                generos[clave] = min(row['id'], generos.get(clave, row['id']))
+            return {
+                'autores': autores,
+                'generos': generos,
+                'codigos': {row[0] for row in cursor.execute("SELECT codigo FROM libros")},
+                'isbns': {row[0] for row in cursor.execute("SELECT isbn FROM libros WHERE isbn IS NOT NULL")},
+            }
+
+    def insertar_lote_catalogo(self, libros: List[dict], autores: Dict[Tuple[str, str], int],
+                               generos: Dict[str, int]) -> int:
+        """
+        Inserta un lote de libros ya validados con sus ejemplares en una sola transacción.
+
+        Cada libro es un dict con codigo, titulo, anio, autor_nombre, autor_apellido,
+        estanteria_id y cantidad_ejemplares (isbn, editorial y genero opcionales).
+        Autores y géneros se resuelven con los mapas recibidos, por sus claves
+        normalizadas ("Garcia Marquez" es el mismo autor que "García Márquez");
+        los que falten se crean y se agregan a los mapas solo si la transacción
+        se confirma.
+
+        Returns:
+            int: Cantidad de ejemplares insertados.
+        """
+        autores_nuevos = {}
+        generos_nuevos = {}
+
+        def _insert(cursor):
+            # 1. Autores y géneros que todavía no existen
+            for libro in libros:
+                clave = clave_autor(libro['autor_nombre'], libro['autor_apellido'])
+                if clave not in autores and clave not in autores_nuevos:
+                    cursor.execute("INSERT INTO autores (nombre, apellido, nombre_norm, apellido_norm) "
+                                   "VALUES (?, ?, ?, ?)",
+                                   (libro['autor_nombre'], libro['autor_apellido'], *clave))
+                    autores_nuevos[clave] = cursor.lastrowid
+                genero = libro.get('genero')
+                if genero:
+                    clave = clave_genero(genero)
+                    if clave not in generos and clave not in generos_nuevos:
+                        cursor.execute("INSERT INTO generos (nombre, nombre_norm) VALUES (?, ?)", (genero, clave))
+                        generos_nuevos[clave] = cursor.lastrowid
+
+            def autor_id(libro):
+                clave = clave_autor(libro['autor_nombre'], libro['autor_apellido'])
+                return autores.get(clave) or autores_nuevos[clave]
+
+            def genero_id(libro):
+                genero = libro.get('genero')
+                if not genero:
+                    return None
+                clave = clave_genero(genero)
+                return generos.get(clave) or generos_nuevos.get(clave)
+
+            # 2. Libros
+            cursor.executemany("""
+                INSERT INTO libros (codigo, titulo, titulo_norm, isbn, anio, editorial, autor_id, genero_id,
+                                    estanteria_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(libro['codigo'], libro['titulo'], normalizar(libro['titulo']), libro.get('isbn'), libro['anio'],
+                   libro.get('editorial'), autor_id(libro), genero_id(libro), libro['estanteria_id'])
+                  for libro in libros])
+
+            cursor.execute("SELECT id, codigo FROM libros WHERE codigo IN (SELECT value FROM json_each(?))",
+                           (json.dumps([libro['codigo'] for libro in libros]),))
+            ids_por_codigo = {row['codigo']: row['id'] for row in cursor.fetchall()}
+
+            # 3. Ejemplares, con el mismo formato de código que insertar_libro_con_ejemplares
+            ejemplares = [(ids_por_codigo[libro['codigo']], f"{libro['codigo']}-{i + 1:03d}", 'disponible')
+                          for libro in libros for i in range(libro['cantidad_ejemplares'])]
+            cursor.executemany("INSERT INTO ejemplares (libro_id, codigo_ejemplar, estado) VALUES (?, ?, ?)",
+                               ejemplares)
+
+            # 4. Ubicaciones: una asignación por estantería para todo el lote
+            cursor.execute("""SELECT e.id, l.estanteria_id FROM ejemplares e
+                              JOIN libros l ON e.libro_id = l.id
+                              WHERE e.libro_id IN (SELECT value FROM json_each(?))
+                              ORDER BY e.libro_id, e.codigo_ejemplar""",
+                           (json.dumps(list(ids_por_codigo.values())),))
+            por_estanteria = {}
+            for row in cursor.fetchall():
+                por_estanteria.setdefault(row['estanteria_id'], []).append(row['id'])
+            for estanteria_id, ejemplar_ids in por_estanteria.items():
+                asignar_ubicaciones(cursor, estanteria_id, ejemplar_ids)
+
+            return len(ejemplares)
+
+        insertados = self.execute_transaction(_insert)
+        for tabla in ('libros', 'autores', 'generos'):
+            self._notificar_cambio(tabla)
+        autores.update(autores_nuevos)
+        generos.update(generos_nuevos)
+        return insertados
 
     # ============ FUNCIONES PARA PRÉSTAMOS ============
     def insertar_prestamo(self, ejemplar_id: int, usuario_id: int, 
@@ -679,7 +1294,9 @@ class DBManager:
             # Actualizar estado del ejemplar
             cursor.execute("UPDATE ejemplares SET estado = 'prestado' WHERE id = ?", (ejemplar_id,))
             return cursor.lastrowid
-        return self.execute_transaction(_insert)
+        prestamo_id = self.execute_transaction(_insert)
+        self._notificar_cambio('prestamos', prestamo_id)
+        return prestamo_id
 
     def devolver_prestamo(self, prestamo_id: int) -> bool:
         def _devolver(cursor):
@@ -699,7 +1316,9 @@ class DBManager:
             # Actualizar ejemplar
             cursor.execute("UPDATE ejemplares SET estado = 'disponible' WHERE id = ?", (ejemplar_id,))
             return True
-        return self.execute_transaction(_devolver)
+        resultado = self.execute_transaction(_devolver)
+        self._notificar_cambio('prestamos', prestamo_id)
+        return resultado
     
     def devolver_ejemplar_por_id(self, ejemplar_id: int) -> bool:
         """Devuelve un ejemplar específico por su ID, buscando automáticamente el préstamo activo."""
@@ -720,63 +1339,36 @@ class DBManager:
             # Actualizar ejemplar
             cursor.execute("UPDATE ejemplares SET estado = 'disponible' WHERE id = ?", (ejemplar_id,))
             return True
-        return self.execute_transaction(_devolver)
+        resultado = self.execute_transaction(_devolver)
+        self._notificar_cambio('prestamos')
+        return resultado
 
     def get_prestamo(self, id: int) -> Optional[Prestamo]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM prestamos WHERE id = ?", (id,))
-        row = cursor.fetchone()
-        if row:
-            return self._crear_prestamo_from_row(row)
-        return None
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM prestamos WHERE id = ?", (id,))
+            return mapear_uno(cursor, PRESTAMO)
 
     def get_prestamos_activos(self) -> List[Prestamo]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM prestamos WHERE estado = 'activo' ORDER BY fecha_prestamo")
-        return [self._crear_prestamo_from_row(row) for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM prestamos WHERE estado = 'activo' ORDER BY fecha_prestamo")
+            return mapear_todos(cursor, PRESTAMO)
     
-    def _crear_prestamo_from_row(self, row) -> 'Prestamo':
-        """Crea un objeto Prestamo desde una fila de base de datos, convirtiendo fechas correctamente."""
-        from logic.models import Prestamo
-        from datetime import datetime, date
-        
-        def parse_date(date_str):
-            """Convierte string de fecha a objeto date."""
-            if date_str is None:
-                return None
-            if isinstance(date_str, date):
-                return date_str
-            if isinstance(date_str, str):
-                try:
-                    return datetime.strptime(date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    return None
-            return None
-        
-        return Prestamo(
-            id=row['id'],
-            ejemplar_id=row['ejemplar_id'],
-            usuario_id=row['usuario_id'],
-            fecha_prestamo=parse_date(row['fecha_prestamo']),
-            fecha_devolucion_esperada=parse_date(row['fecha_devolucion_esperada']),
-            fecha_devolucion_real=parse_date(row['fecha_devolucion_real']),
-            estado=row['estado'],
-            observaciones=row['observaciones'],
-            renovaciones=row['renovaciones'] or 0
-        )
-
     def get_prestamos_vencidos(self) -> List[Prestamo]:
-        cursor = self.conn.cursor()
-        cursor.execute("""SELECT * FROM prestamos 
-                         WHERE estado = 'activo' AND fecha_devolucion_esperada < CURRENT_DATE 
-                         ORDER BY fecha_devolucion_esperada""")
-        return [self._crear_prestamo_from_row(row) for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT * FROM prestamos 
+                             WHERE estado = 'activo' AND fecha_devolucion_esperada < CURRENT_DATE 
+                             ORDER BY fecha_devolucion_esperada""")
+            return mapear_todos(cursor, PRESTAMO)
 
     def get_prestamos_por_usuario(self, usuario_id: int) -> List[Prestamo]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM prestamos WHERE usuario_id = ? ORDER BY fecha_prestamo DESC", 
-                      (usuario_id,))
-        return [self._crear_prestamo_from_row(row) for row in cursor.fetchall()]
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM prestamos WHERE usuario_id = ? ORDER BY fecha_prestamo DESC", 
+                          (usuario_id,))
+            return mapear_todos(cursor, PRESTAMO)
 
     def get_todos_prestamos(self, limite: Optional[int] = None, solo_devueltos: bool = False) -> List[Prestamo]:
         """
@@ -789,58 +1381,334 @@ class DBManager:
         Returns:
             Lista de préstamos ordenados por fecha (más recientes primero)
         """
-        cursor = self.conn.cursor()
-        
-        sql = "SELECT * FROM prestamos"
+        with self._lectura() as conn:
+            cursor = conn.cursor()
         
-        if solo_devueltos:
-            sql += " WHERE estado = 'devuelto'"
+            sql = "SELECT * FROM prestamos"
         
-        sql += " ORDER BY fecha_prestamo DESC"
+            if solo_devueltos:
+                sql += " WHERE estado = 'devuelto'"
         
+            sql += " ORDER BY fecha_prestamo DESC"
+
+            parametros = []
+            if limite:
+                sql += " LIMIT ?"
+                parametros.append(int(limite))
+
+            cursor.execute(sql, parametros)
+            return mapear_todos(cursor, PRESTAMO)
+
+    def get_prestamos_detallados(self, estado: Optional[str] = None, usuario_id: Optional[int] = None,
+                                 desde: Optional[date] = None, hasta: Optional[date] = None,
+                                 orden: str = 'fecha_prestamo', descendente: bool = False,
+                                 limite: Optional[int] = None,
+                                 despues_de: Optional[PrestamoDetalle] = None) -> List[PrestamoDetalle]:
+        """
+        Lista préstamos con usuario, ejemplar, libro y autor en una sola consulta.
+
+        Args:
+            estado: 'activo', 'vencido' (activo y fuera de plazo), 'devuelto' o None (todos)
+            usuario_id: Solo los préstamos de este usuario
+            desde / hasta: Rango inclusivo sobre la fecha de préstamo
+            orden: Clave de ORDENES_PRESTAMOS
+            descendente: Invierte el orden
+            limite: Tamaño de página (None = todos)
+            despues_de: Última fila de la página anterior; la consulta continúa
+                a partir de ella (paginación por cursor, sin OFFSET)
+
+        Returns:
+            Lista de PrestamoDetalle
+        """
+        clave = None
+        if despues_de is not None:
+            if orden not in ORDENES_PRESTAMOS:
+                raise ValueError(f"Orden de préstamos no válido: {orden}")
+            valor = getattr(despues_de, ORDENES_PRESTAMOS[orden][1])
+            clave = ("" if valor is None else str(valor), despues_de.id)
+        sql, parametros = self._sql_prestamos_detallados(estado, usuario_id, desde, hasta,
+                                                         orden, descendente, clave)
         if limite:
-            sql += f" LIMIT {limite}"
-        
-        cursor.execute(sql)
-        return [self._crear_prestamo_from_row(row) for row in cursor.fetchall()]
+            sql += " LIMIT ?"
+            parametros.append(int(limite))
 
-    def get_libro_por_id(self, libro_id: int) -> Optional[Libro]:
-        """Obtiene un libro por su ID con datos relacionados."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT l.*, 
-                   a.nombre as autor_nombre, a.apellido as autor_apellido,
-                   g.nombre as genero_nombre
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, parametros)
+            return mapear_todos(cursor, PRESTAMO_DETALLE)
+
+    def _sql_prestamos_detallados(self, estado: Optional[str], usuario_id: Optional[int],
+                                  desde: Optional[date], hasta: Optional[date], orden: str,
+                                  descendente: bool, clave: Optional[Tuple]) -> Tuple[str, list]:
+        """
+        Arma la consulta de los listados detallados de préstamos. La columna
+        clave_orden lleva el valor de orden de cada fila para los cursores.
+
+        Args:
+            clave: (valor de orden, id) de la última fila ya entregada, o None
+        """
+        if estado is not None and estado not in ESTADOS_PRESTAMOS:
+            raise ValueError(f"Estado de préstamo no válido: {estado}")
+        if orden not in ORDENES_PRESTAMOS:
+            raise ValueError(f"Orden de préstamos no válido: {orden}")
+
+        columna_orden = ORDENES_PRESTAMOS[orden][0]
+        condiciones = []
+        parametros = []
+
+        if estado == 'vencido':
+            condiciones.append("p.estado = 'activo' AND p.fecha_devolucion_esperada < CURRENT_DATE")
+        elif estado:
+            condiciones.append("p.estado = ?")
+            parametros.append(estado)
+        if usuario_id is not None:
+            condiciones.append("p.usuario_id = ?")
+            parametros.append(usuario_id)
+        if desde:
+            condiciones.append("p.fecha_prestamo >= ?")
+            parametros.append(str(desde))
+        if hasta:
+            condiciones.append("p.fecha_prestamo <= ?")
+            parametros.append(str(hasta))
+        if clave is not None:
+            condiciones.append(condicion_despues_de(columna_orden, "p.id", descendente))
+            parametros.extend(parametros_despues_de(columna_orden, "p.id", clave))
+
+        sentido = "DESC" if descendente else "ASC"
+        sql = f"""
+            SELECT p.*,
+                   u.nombre AS usuario_nombre, u.email AS usuario_email,
+                   u.telefono AS usuario_telefono, u.direccion AS usuario_direccion,
+                   e.codigo_ejemplar, e.libro_id,
+                   l.codigo AS libro_codigo, l.titulo AS libro_titulo,
+                   TRIM(a.nombre || ' ' || COALESCE(a.apellido, '')) AS autor_nombre_completo,
+                   {columna_orden} AS clave_orden
+            FROM prestamos p
+            LEFT JOIN usuarios u ON u.id = p.usuario_id
+            LEFT JOIN ejemplares e ON e.id = p.ejemplar_id
+            LEFT JOIN libros l ON l.id = e.libro_id
+            LEFT JOIN autores a ON a.id = l.autor_id
+        """
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += f" ORDER BY {columna_orden} {sentido}, p.id {sentido}"
+        return sql, parametros
+
+    def get_libro_por_id(self, libro_id: int, resumen: bool = False) -> Optional[Libro]:
+        """Obtiene un libro por su ID con datos relacionados (resumen=True: sin sus ejemplares)."""
+        with self._lectura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{SQL_LIBROS} WHERE l.id = ?", (libro_id,))
+            libros = self._hidratar_libros(conn, cursor.fetchall(), con_ejemplares=not resumen)
+            return libros[0] if libros else None
+
+    def get_todos_los_libros(self, resumen: bool = False) -> List[Libro]:
+        """Obtiene todos los libros de la base de datos con datos relacionados."""
+        return self.buscar_libros(resumen=resumen)
+
+    # ============ PAGINACIÓN Y RECORRIDOS ============
+    # get_pagina_* devuelve una Pagina con el cursor opaco de la siguiente;
+    # iter_* recorre el listado completo con fetchmany sin cargarlo en memoria.
+    # Ambos comparten la consulta y el orden estable (clave de orden, id).
+    def _sql_paginado(self, sql: str, condiciones: list, parametros: list, ordenes: dict,
+                      orden: str, columna_id: str, descendente: bool,
+                      cursor: Optional[str]) -> Tuple[str, list, str]:
+        """
+        Completa una consulta con el filtro del cursor y el ORDER BY estable.
+
+        Returns:
+            Tuple[str, list, str]: SQL, parámetros y firma del orden para los cursores.
+        """
+        if orden not in ordenes:
+            raise ValueError(f"Orden no válido: {orden}. Opciones: {', '.join(ordenes)}")
+        columna = ordenes[orden]
+        firma = firma_orden(orden, descendente)
+        condiciones = list(condiciones)
+        parametros = list(parametros)
+        if cursor:
+            clave = decodificar_cursor(cursor, firma)
+            condiciones.append(condicion_despues_de(columna, columna_id, descendente))
+            parametros.extend(parametros_despues_de(columna, columna_id, clave))
+
+        sql = sql.replace("{clave_orden}", columna)
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sentido = "DESC" if descendente else "ASC"
+        if columna == columna_id:
+            sql += f" ORDER BY {columna_id} {sentido}"
+        else:
+            sql += f" ORDER BY {columna} {sentido}, {columna_id} {sentido}"
+        return sql, parametros, firma
+
+    def _consultar_pagina(self, sql: str, parametros: list, firma: str, tamanio: int, convertir) -> Pagina:
+        """Pide tamanio + 1 filas: la de más solo indica si hay otra página."""
+        if tamanio < 1:
+            raise ValueError("El tamaño de página debe ser un entero positivo")
+        with self._lectura() as conn:
+            filas = conn.execute(sql + " LIMIT ?", parametros + [tamanio + 1]).fetchall()
+            return armar_pagina(filas, tamanio, firma, lambda filas: convertir(conn, filas))
+
+    def _iterar_consulta(self, sql: str, parametros: list, tamanio_lote: int, convertir) -> Iterator:
+        """
+        Recorre una consulta por lotes de fetchmany. La conexión de lectura y
+        su instantánea quedan tomadas hasta que el recorrido termina o se cierra.
+        """
+        if tamanio_lote < 1:
+            raise ValueError("El tamaño de lote debe ser un entero positivo")
+        with self._lectura() as conn:
+            resultado = conn.execute(sql, parametros)
+            for filas in iterar_lotes(resultado, tamanio_lote):
+                yield from convertir(conn, filas)
+
+    def _sql_libros(self, orden: str, descendente: bool, cursor: Optional[str],
+                    estanteria_id: Optional[int], estado_ejemplar: Optional[str]) -> Tuple[str, list, str]:
+        condiciones = []
+        parametros = []
+        if estanteria_id is not None:
+            condiciones.append("l.estanteria_id = ?")
+            parametros.append(estanteria_id)
+        if estado_ejemplar:
+            # EXISTS en lugar de JOIN + GROUP BY: cada libro sale una vez y en orden de índice
+            condiciones.append("EXISTS (SELECT 1 FROM ejemplares e WHERE e.libro_id = l.id AND e.estado = ?)")
+            parametros.append(estado_ejemplar)
+        sql = """
+            SELECT l.*,
+                   a.nombre AS autor_nombre, a.apellido AS autor_apellido,
+                   g.nombre AS genero_nombre,
+                   {clave_orden} AS clave_orden
             FROM libros l
             LEFT JOIN autores a ON l.autor_id = a.id
             LEFT JOIN generos g ON l.genero_id = g.id
-            WHERE l.id = ?
-        """, (libro_id,))
-        row = cursor.fetchone()
-        if row:
-            return self._hidratar_libro(row)
-        return None
-
-    def get_todos_los_libros(self) -> List[Libro]:
-        """Obtiene todos los libros de la base de datos con datos relacionados."""
-        return self.buscar_libros()
+        """
+        return self._sql_paginado(sql, condiciones, parametros, ORDENES_LIBROS, orden, "l.id",
+                                  descendente, cursor)
+
+    def get_pagina_libros(self, tamanio: int = TAMANIO_PAGINA, cursor: Optional[str] = None,
+                          orden: str = 'titulo', descendente: bool = False,
+                          estanteria_id: Optional[int] = None,
+                          estado_ejemplar: Optional[str] = None,
+                          resumen: bool = False) -> Pagina:
+        """
+        Página del catálogo con autor, género y ejemplares de cada libro.
 
-    def get_resumen_dashboard(self) -> dict:
-        """Obtiene un resumen de estadísticas para el dashboard."""
-        cursor = self.conn.cursor()
+        Args:
+            tamanio: Libros por página
+            cursor: Pagina.siguiente de la página anterior (None = primera página)
+            orden: Clave de ORDENES_LIBROS
+            estanteria_id: Solo los libros de esta estantería
+            estado_ejemplar: Solo los libros con algún ejemplar en este estado
+            resumen: Solo contadores por libro, sin cargar los ejemplares
+
+        Raises:
+            ValueError: Si el orden no existe o el cursor no corresponde a él.
+        """
+        sql, parametros, firma = self._sql_libros(orden, descendente, cursor, estanteria_id, estado_ejemplar)
+        return self._consultar_pagina(sql, parametros, firma, tamanio,
+                                      lambda conn, rows: self._hidratar_libros(conn, rows, not resumen))
+
+    def iter_libros(self, orden: str = 'titulo', descendente: bool = False,
+                    estanteria_id: Optional[int] = None, estado_ejemplar: Optional[str] = None,
+                    resumen: bool = False, tamanio_lote: int = TAMANIO_LOTE) -> Iterator[Libro]:
+        """Recorre el catálogo completo; los ejemplares se cargan lote a lote."""
+        sql, parametros, _ = self._sql_libros(orden, descendente, None, estanteria_id, estado_ejemplar)
+        identidad = MapaIdentidad()
+        return self._iterar_consulta(sql, parametros, tamanio_lote,
+                                     lambda conn, rows: self._hidratar_libros(conn, rows, not resumen,
+                                                                              identidad))
+
+    def _sql_ejemplares(self, orden: str, descendente: bool, cursor: Optional[str],
+                        libro_id: Optional[int], estanteria_id: Optional[int],
+                        estado: Optional[str]) -> Tuple[str, list, str]:
+        condiciones = []
+        parametros = []
+        if libro_id is not None:
+            condiciones.append("e.libro_id = ?")
+            parametros.append(libro_id)
+        if estanteria_id is not None:
+            condiciones.append("e.estanteria_id = ?")
+            parametros.append(estanteria_id)
+        if estado:
+            condiciones.append("e.estado = ?")
+            parametros.append(estado)
+        sql = SQL_EJEMPLARES.replace("SELECT e.*,", "SELECT e.*, {clave_orden} AS clave_orden,", 1)
+        return self._sql_paginado(sql, condiciones, parametros, ORDENES_EJEMPLARES, orden, "e.id",
+                                  descendente, cursor)
+
+    def _crear_ejemplares_from_rows(self, conn, rows) -> List[Ejemplar]:
+        return mapear_filas(rows, EJEMPLAR)
+
+    def get_pagina_ejemplares(self, tamanio: int = TAMANIO_PAGINA, cursor: Optional[str] = None,
+                              orden: str = 'codigo', descendente: bool = False,
+                              libro_id: Optional[int] = None, estanteria_id: Optional[int] = None,
+                              estado: Optional[str] = None) -> Pagina:
+        """Página de ejemplares, filtrable por libro, estantería (ubicación física) y estado."""
+        sql, parametros, firma = self._sql_ejemplares(orden, descendente, cursor, libro_id, estanteria_id, estado)
+        return self._consultar_pagina(sql, parametros, firma, tamanio, self._crear_ejemplares_from_rows)
+
+    def iter_ejemplares(self, orden: str = 'codigo', descendente: bool = False,
+                        libro_id: Optional[int] = None, estanteria_id: Optional[int] = None,
+                        estado: Optional[str] = None, tamanio_lote: int = TAMANIO_LOTE) -> Iterator[Ejemplar]:
+        sql, parametros, _ = self._sql_ejemplares(orden, descendente, None, libro_id, estanteria_id, estado)
+        return self._iterar_consulta(sql, parametros, tamanio_lote, self._crear_ejemplares_from_rows)
+
+    def _sql_usuarios(self, orden: str, descendente: bool, cursor: Optional[str],
+                      solo_activos: bool) -> Tuple[str, list, str]:
+        condiciones = ["u.activo = 1"] if solo_activos else []
+        sql = "SELECT u.*, {clave_orden} AS clave_orden FROM usuarios u"
+        return self._sql_paginado(sql, condiciones, [], ORDENES_USUARIOS, orden, "u.id",
+                                  descendente, cursor)
+
+    def _crear_usuarios_from_rows(self, conn, rows) -> List[Usuario]:
+        return mapear_filas(rows, USUARIO)
+
+    def get_pagina_usuarios(self, tamanio: int = TAMANIO_PAGINA, cursor: Optional[str] = None,
+                            orden: str = 'nombre', descendente: bool = False,
+                            solo_activos: bool = True) -> Pagina:
+        """Página de usuarios (por defecto solo los activos, ordenados por nombre)."""
+        sql, parametros, firma = self._sql_usuarios(orden, descendente, cursor, solo_activos)
+        return self._consultar_pagina(sql, parametros, firma, tamanio, self._crear_usuarios_from_rows)
+
+    def iter_usuarios(self, orden: str = 'nombre', descendente: bool = False, solo_activos: bool = True,
+                      tamanio_lote: int = TAMANIO_LOTE) -> Iterator[Usuario]:
+        sql, parametros, _ = self._sql_usuarios(orden, descendente, None, solo_activos)
+        return self._iterar_consulta(sql, parametros, tamanio_lote, self._crear_usuarios_from_rows)
+
+    def _crear_prestamos_detalle_from_rows(self, conn, rows) -> List[PrestamoDetalle]:
+        return mapear_filas(rows, PRESTAMO_DETALLE)
+
+    def get_pagina_prestamos(self, tamanio: int = TAMANIO_PAGINA, cursor: Optional[str] = None,
+                             estado: Optional[str] = None, usuario_id: Optional[int] = None,
+                             desde: Optional[date] = None, hasta: Optional[date] = None,
+                             orden: str = 'fecha_prestamo', descendente: bool = False) -> Pagina:
+        """Página de get_prestamos_detallados con cursor opaco (mismos filtros y órdenes)."""
+        firma = firma_orden(orden, descendente)
+        clave = decodificar_cursor(cursor, firma) if cursor else None
+        sql, parametros = self._sql_prestamos_detallados(estado, usuario_id, desde, hasta,
+                                                         orden, descendente, clave)
+        return self._consultar_pagina(sql, parametros, firma, tamanio, self._crear_prestamos_detalle_from_rows)
+
+    def iter_prestamos_detallados(self, estado: Optional[str] = None, usuario_id: Optional[int] = None,
+                                  desde: Optional[date] = None, hasta: Optional[date] = None,
+                                  orden: str = 'fecha_prestamo', descendente: bool = False,
+                                  tamanio_lote: int = TAMANIO_LOTE) -> Iterator[PrestamoDetalle]:
+        sql, parametros = self._sql_prestamos_detallados(estado, usuario_id, desde, hasta,
+                                                         orden, descendente, None)
+        return self._iterar_consulta(sql, parametros, tamanio_lote, self._crear_prestamos_detalle_from_rows)
 
-        # Ejecutar todas las consultas de conteo de una vez
-        cursor.execute("""
-            SELECT
-                (SELECT COUNT(*) FROM libros) as total_libros,
-                (SELECT COUNT(*) FROM ejemplares) as total_ejemplares,
-                (SELECT COUNT(*) FROM ejemplares WHERE estado = 'disponible') as ejemplares_disponibles,
-                (SELECT COUNT(*) FROM prestamos WHERE estado = 'activo') as prestamos_activos,
-                (SELECT COUNT(*) FROM prestamos WHERE estado = 'activo' AND fecha_devolucion_esperada < CURRENT_DATE) as prestamos_vencidos,
-                (SELECT COUNT(*) FROM usuarios WHERE activo = 1) as usuarios_activos
-        """)
+    def get_resumen_dashboard(self) -> dict:
+        """
+        Obtiene un resumen de estadísticas para el dashboard.
 
-        stats = cursor.fetchone()
+        Lee la fila única de estadisticas, mantenida por triggers. La primera
+        lectura de cada día avanza antes la fecha de corte de los vencidos.
+        """
+        hoy = date.today().isoformat()
+        with self._lectura() as conn:
+            stats = conn.execute("SELECT * FROM estadisticas WHERE id = 1").fetchone()
+        if str(stats['fecha_corte']) != hoy:
+            self.execute_transaction(lambda cursor: avanzar_corte_vencidos(cursor, hoy))
+            with self._lectura() as conn:
+                stats = conn.execute("SELECT * FROM estadisticas WHERE id = 1").fetchone()
 
         return {
             "total_libros": stats['total_libros'],
@@ -852,19 +1720,52 @@ class DBManager:
             "usuarios_activos": stats['usuarios_activos']
         }
 
+    def avanzar_corte_vencidos(self) -> int:
+        """
+        Pasa a contar como vencidos los préstamos que vencieron desde la
+        última fecha de corte. Es idempotente dentro del mismo día.
+
+        Returns:
+            int: Préstamos que pasaron a contarse como vencidos.
+        """
+        return self.execute_transaction(avanzar_corte_vencidos)
+
+    def verificar_estadisticas(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Compara los contadores de estadisticas con los conteos reales.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: (guardado, real) de cada contador desfasado.
+        """
+        def _verificar(cursor):
+            hoy = date.today().isoformat()
+            avanzar_corte_vencidos(cursor, hoy)
+            reales = cursor.execute(SQL_ESTADISTICAS_REALES, {'hoy': hoy}).fetchone()
+            guardados = cursor.execute("SELECT * FROM estadisticas WHERE id = 1").fetchone()
+            return {campo: (guardados[campo], reales[campo]) for campo in ESTADISTICAS
+                    if guardados[campo] != reales[campo]}
+        return self.execute_transaction(_verificar)
+
+    def reparar_estadisticas(self) -> int:
+        """
+        Recalcula los contadores de estadisticas a partir de las tablas.
+
+        Returns:
+            int: Cantidad de contadores que se corrigieron.
+        """
+        return self.execute_transaction(recalcular_estadisticas)
+
     # función mover_libro para que chequee la cantidad de ejemplares
     def mover_libro(self, libro_id: int, nueva_estanteria_id: int):
         def _mover(cursor):
             
-            cursor.execute("SELECT COUNT(e.id) FROM ejemplares e JOIN libros l ON e.libro_id = l.id WHERE l.estanteria_id = ?", (nueva_estanteria_id,))
-            count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT capacidad, nombre FROM estanterias WHERE id = ?", (nueva_estanteria_id,))
+            cursor.execute("SELECT capacidad, nombre, ocupacion FROM estanterias WHERE id = ?", (nueva_estanteria_id,))
             row_estanteria = cursor.fetchone()
             if not row_estanteria:
                 raise ValueError(f"Estantería {nueva_estanteria_id} no existe")
             capacidad = row_estanteria['capacidad']
             nueva_estanteria_nombre = row_estanteria['nombre']
+            count = row_estanteria['ocupacion']
             
             cursor.execute("SELECT COUNT(*) FROM ejemplares WHERE libro_id = ?", (libro_id,))
             ejemplares_a_mover = cursor.fetchone()[0]
@@ -887,20 +1788,11 @@ class DBManager:
                 raise ValueError(f"No se encontró libro con id {libro_id}")
 
 
-            # Obtenemos todos los ejemplares del libro que se movió
-            cursor.execute("SELECT id, codigo_ejemplar FROM ejemplares WHERE libro_id = ? ORDER BY codigo_ejemplar", (libro_id,))
-            ejemplares = cursor.fetchall()
-            
-            # Re-calculamos y actualizamos la ubicación para cada uno
-            for i, ejemplar in enumerate(ejemplares, 1):
-                nivel = ((i - 1) // 10) + 1
-                posicion = ((i - 1) % 10) + 1
-                
-                nueva_ubicacion = f"Estantería {nueva_estanteria_nombre} - Nivel {nivel} - Pos {posicion}"
-                
-                cursor.execute("UPDATE ejemplares SET ubicacion_fisica = ? WHERE id = ?", (nueva_ubicacion, ejemplar['id']))
+            # Liberamos sus huecos y los ubicamos en los libres de la nueva estantería
+            reubicar_libro(cursor, libro_id, nueva_estanteria_id)
 
         self.execute_transaction(_mover)
+        self._notificar_cambio('libros', libro_id)
     
     def eliminar_libro_por_id(self, libro_id: int):
         def _delete(cursor):
@@ -908,6 +1800,7 @@ class DBManager:
             if cursor.rowcount == 0:
                 raise ValueError(f"No se encontró libro con id {libro_id}")
         self.execute_transaction(_delete)
+        self._notificar_cambio('libros', libro_id)
     
     def modificar_libro_completo(self, libro_id: int, cambios: dict) -> bool:
         """Modifica un libro completamente incluyendo autor, género y estantería."""
@@ -919,8 +1812,10 @@ class DBManager:
                 if 'autor_nombre' in cambios and 'autor_apellido' in cambios:
                     cursor.execute("""
                         SELECT id FROM autores 
-                        WHERE LOWER(nombre) = LOWER(?) AND LOWER(apellido) = LOWER(?)
-                    """, (cambios['autor_nombre'], cambios['autor_apellido']))
+                        WHERE apellido_norm = ? AND nombre_norm = ?
+                        ORDER BY apellido = ? AND nombre = ? DESC, id
+                    """, (normalizar(cambios['autor_apellido']), normalizar(cambios['autor_nombre']),
+                          cambios['autor_apellido'], cambios['autor_nombre']))
                     
                     autor_row = cursor.fetchone()
                     if autor_row:
@@ -928,17 +1823,19 @@ class DBManager:
                     else:
                         # Crear nuevo autor
                         cursor.execute("""
-                            INSERT INTO autores (nombre, apellido)
-                            VALUES (?, ?)
-                        """, (cambios['autor_nombre'], cambios['autor_apellido']))
+                            INSERT INTO autores (nombre, apellido, nombre_norm, apellido_norm)
+                            VALUES (?, ?, ?, ?)
+                        """, (cambios['autor_nombre'], cambios['autor_apellido'],
+                              *clave_autor(cambios['autor_nombre'], cambios['autor_apellido'])))
                         autor_id = cursor.lastrowid
                 
                 # 2. Verificar/crear género
                 genero_id = None
                 if cambios.get('genero'):
                     cursor.execute("""
-                        SELECT id FROM generos WHERE LOWER(nombre) = LOWER(?)
-                    """, (cambios['genero'],))
+                        SELECT id FROM generos WHERE nombre_norm = ?
+                        ORDER BY nombre = ? DESC, id
+                    """, (normalizar(cambios['genero']), cambios['genero']))
                     
                     genero_row = cursor.fetchone()
                     if genero_row:
@@ -946,17 +1843,21 @@ class DBManager:
                     else:
                         # Crear nuevo género
                         cursor.execute("""
-                            INSERT INTO generos (nombre) VALUES (?)
-                        """, (cambios['genero'],))
+                            INSERT INTO generos (nombre, nombre_norm) VALUES (?, ?)
+                        """, (cambios['genero'], clave_genero(cambios['genero'])))
                         genero_id = cursor.lastrowid
                 
+                cursor.execute("SELECT estanteria_id FROM libros WHERE id = ?", (libro_id,))
+                libro_row = cursor.fetchone()
+                estanteria_anterior = libro_row['estanteria_id'] if libro_row else None
+
                 # 3. Actualizar libro
                 update_fields = []
                 update_values = []
                 
                 if 'titulo' in cambios:
-                    update_fields.append("titulo = ?")
-                    update_values.append(cambios['titulo'])
+                    update_fields.append("titulo = ?, titulo_norm = ?")
+                    update_values.extend([cambios['titulo'], normalizar(cambios['titulo'])])
                     
                 if 'isbn' in cambios:
                     update_fields.append("isbn = ?")
@@ -999,32 +1900,17 @@ class DBManager:
                         WHERE id = ?
                     """, update_values)
                 
-                # 4. Si cambió la estantería, actualizar ubicaciones de ejemplares
-                if 'estanteria_id' in cambios:
-                    # Obtener nombre de la nueva estantería
-                    cursor.execute("SELECT nombre FROM estanterias WHERE id = ?", (cambios['estanteria_id'],))
-                    estanteria_row = cursor.fetchone()
-                    nueva_estanteria_nombre = estanteria_row['nombre'] if estanteria_row else f"ID-{cambios['estanteria_id']}"
-                    
-                    # Obtener ejemplares del libro
-                    cursor.execute("SELECT id, codigo_ejemplar FROM ejemplares WHERE libro_id = ? ORDER BY codigo_ejemplar", (libro_id,))
-                    ejemplares = cursor.fetchall()
-                    
-                    # Actualizar ubicación de cada ejemplar
-                    for i, ejemplar in enumerate(ejemplares, 1):
-                        nivel = ((i - 1) // 10) + 1
-                        posicion = ((i - 1) % 10) + 1
-                        nueva_ubicacion = f"Estantería {nueva_estanteria_nombre} - Nivel {nivel} - Pos {posicion}"
-                        
-                        cursor.execute("""
-                            UPDATE ejemplares 
-                            SET ubicacion_fisica = ?
-                            WHERE id = ?
-                        """, (nueva_ubicacion, ejemplar['id']))
+                # 4. Si cambió la estantería, reubicar los ejemplares en sus huecos libres
+                if 'estanteria_id' in cambios and cambios['estanteria_id'] != estanteria_anterior:
+                    reubicar_libro(cursor, libro_id, cambios['estanteria_id'])
                 
                 return True
             
-            return self.execute_transaction(transaction)
+            resultado = self.execute_transaction(transaction)
+            # Puede haber creado un autor o un género, o cambiado de estantería
+            for tabla in ('libros', 'autores', 'generos'):
+                self._notificar_cambio(tabla, libro_id if tabla == 'libros' else None)
+            return resultado
             
         except Exception as e:
             print(f"Error modificando libro: {e}")
@@ -0,0 +1,189 @@
+"""
+Conversión de filas de SQLite en objetos del modelo.
+
+Leer una sqlite3.Row por nombre (row['titulo']) recorre la descripción de
+columnas en cada acceso. En lugar de eso, para cada forma de consulta (la
+tupla de nombres de cursor.description) se compila una única vez un
+mapeador que lee las columnas por posición con operator.itemgetter y
+construye el objeto. Los mapeadores compilados se guardan por
+(fábrica, columnas); las consultas de DBManager tienen formas fijas, así que
+la tabla queda pequeña.
+
+Las fechas las convierte SQLite al leer: con detect_types=PARSE_DECLTYPES y
+el conversor registrado aquí, toda columna declarada DATE llega como
+datetime.date, sin volver a parsear texto en Python fila por fila.
+"""
+
+import sqlite3
+from datetime import date
+from operator import itemgetter
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from database.ubicaciones import texto_ubicacion
+from logic.models import (Autor, Ejemplar, Estanteria, Genero, Libro, MapaIdentidad, Prestamo,
+                          PrestamoDetalle, Usuario)
+
+# Columnas que recibe el constructor de cada modelo, en su orden
+COLUMNAS_USUARIO = ('id', 'nombre', 'email', 'telefono', 'direccion', 'fecha_registro', 'activo')
+COLUMNAS_AUTOR = ('id', 'nombre', 'apellido', 'nacionalidad', 'fecha_nacimiento', 'biografia')
+COLUMNAS_GENERO = ('id', 'nombre', 'descripcion')
+COLUMNAS_ESTANTERIA = ('id', 'nombre', 'capacidad', 'ocupacion')
+COLUMNAS_PRESTAMO = ('id', 'ejemplar_id', 'usuario_id', 'fecha_prestamo', 'fecha_devolucion_esperada',
+                     'fecha_devolucion_real', 'estado', 'observaciones', 'renovaciones')
+COLUMNAS_PRESTAMO_DETALLE = COLUMNAS_PRESTAMO + (
+    'usuario_nombre', 'usuario_email', 'usuario_telefono', 'usuario_direccion', 'codigo_ejemplar',
+    'libro_id', 'libro_codigo', 'libro_titulo', 'autor_nombre_completo')
+COLUMNAS_LIBRO = ('id', 'codigo', 'titulo', 'isbn', 'anio', 'editorial', 'numero_paginas',
+                  'descripcion', 'autor_id', 'genero_id', 'estanteria_id', 'fecha_adquisicion')
+COLUMNAS_CONTEOS = ('ejemplares_total', 'ejemplares_disponibles', 'ejemplares_prestados')
+
+_MAPEADORES: Dict[Tuple[Callable, Tuple[str, ...]], Callable] = {}
+
+
+# ============ CONVERSORES ============
+def convertir_fecha(valor: bytes):
+    """
+    Conversor de las columnas DATE. Acepta 'AAAA-MM-DD' con o sin hora; un
+    texto que no es una fecha se devuelve tal cual en lugar de perderse.
+    """
+    texto = valor.decode()
+    try:
+        return date.fromisoformat(texto[:10])
+    except ValueError:
+        return texto
+
+
+def registrar_conversores():
+    """
+    Registra el conversor DATE y el adaptador de date en el módulo sqlite3.
+    Rige para las conexiones abiertas con detect_types=PARSE_DECLTYPES.
+    """
+    sqlite3.register_converter('DATE', convertir_fecha)
+    sqlite3.register_adapter(date, date.isoformat)
+
+
+# ============ MAPEADORES ============
+def mapeador(fabrica: Callable[[Dict[str, int]], Callable], columnas: Sequence[str]) -> Callable:
+    """
+    Devuelve el mapeador compilado por `fabrica` para una forma de consulta,
+    compilándolo la primera vez.
+
+    Args:
+        fabrica: Recibe {columna: posición} y devuelve la función que
+            convierte una fila en objeto.
+        columnas: Nombres de las columnas del resultado, en orden.
+
+    Raises:
+        KeyError: Si a la consulta le falta una columna que el modelo necesita.
+    """
+    clave = (fabrica, tuple(columnas))
+    funcion = _MAPEADORES.get(clave)
+    if funcion is None:
+        posiciones = {}
+        for i, nombre in enumerate(clave[1]):
+            # Como sqlite3.Row, ante nombres repetidos gana la primera columna
+            posiciones.setdefault(nombre, i)
+        funcion = _MAPEADORES[clave] = fabrica(posiciones)
+    return funcion
+
+
+def columnas_de(cursor: sqlite3.Cursor) -> Tuple[str, ...]:
+    return tuple(descripcion[0] for descripcion in cursor.description)
+
+
+def mapear_uno(cursor: sqlite3.Cursor, fabrica: Callable):
+    """Convierte la siguiente fila del cursor, o devuelve None si no hay."""
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    return mapeador(fabrica, columnas_de(cursor))(fila)
+
+
+def mapear_todos(cursor: sqlite3.Cursor, fabrica: Callable) -> list:
+    """Convierte todas las filas pendientes del cursor."""
+    filas = cursor.fetchall()
+    if not filas:
+        return []
+    return list(map(mapeador(fabrica, columnas_de(cursor)), filas))
+
+
+def mapear_filas(filas: List[sqlite3.Row], fabrica: Callable) -> list:
+    """Convierte filas ya leídas (p. ej. un lote de fetchmany)."""
+    if not filas:
+        return []
+    return list(map(mapeador(fabrica, filas[0].keys()), filas))
+
+
+def _por_posicion(clase: type, columnas: Tuple[str, ...]) -> Callable:
+    """Fábrica que pasa las columnas indicadas, en orden, al constructor de la clase."""
+    def fabrica(posiciones: Dict[str, int]) -> Callable:
+        valores = itemgetter(*(posiciones[columna] for columna in columnas))
+
+        def mapear(fila):
+            return clase(*valores(fila))
+        return mapear
+    fabrica.__qualname__ = f"_por_posicion({clase.__name__})"
+    return fabrica
+
+
+USUARIO = _por_posicion(Usuario, COLUMNAS_USUARIO)
+AUTOR = _por_posicion(Autor, COLUMNAS_AUTOR)
+GENERO = _por_posicion(Genero, COLUMNAS_GENERO)
+ESTANTERIA = _por_posicion(Estanteria, COLUMNAS_ESTANTERIA)
+PRESTAMO = _por_posicion(Prestamo, COLUMNAS_PRESTAMO)
+PRESTAMO_DETALLE = _por_posicion(PrestamoDetalle, COLUMNAS_PRESTAMO_DETALLE)
+
+
+def _ejemplar(posiciones: Dict[str, int]) -> Callable:
+    """
+    Fila de SQL_EJEMPLARES: el texto de ubicación se arma con el nombre de la
+    estantería (ubicacion_estanteria) si no hay una ubicación escrita a mano.
+    """
+    inicio = itemgetter(*(posiciones[c] for c in ('id', 'libro_id', 'codigo_ejemplar', 'estado',
+                                                   'observaciones', 'fecha_adquisicion')))
+    hueco = itemgetter(posiciones['estanteria_id'], posiciones['nivel'], posiciones['posicion'])
+    i_manual = posiciones['ubicacion_fisica']
+    i_estanteria = posiciones['ubicacion_estanteria']
+
+    def mapear(fila) -> Ejemplar:
+        estanteria_id, nivel, posicion = hueco(fila)
+        ubicacion = fila[i_manual] or None
+        if ubicacion is None and nivel is not None and fila[i_estanteria] is not None:
+            ubicacion = texto_ubicacion(fila[i_estanteria], nivel, posicion)
+        return Ejemplar(*inicio(fila), ubicacion, estanteria_id, nivel, posicion)
+    return mapear
+
+
+def _libro(posiciones: Dict[str, int]) -> Callable:
+    """
+    Fila de libros con las columnas opcionales autor_nombre/autor_apellido,
+    genero_nombre, total_prestamos y los contadores de ejemplares. El
+    mapeador recibe además el MapaIdentidad con el que se comparten autores
+    y géneros; los ejemplares los agrega quien hidrata.
+    """
+    valores = itemgetter(*(posiciones[columna] for columna in COLUMNAS_LIBRO))
+    i_autor = posiciones.get('autor_nombre')
+    i_apellido = posiciones.get('autor_apellido')
+    i_genero = posiciones.get('genero_nombre')
+    i_total = posiciones.get('total_prestamos')
+    conteos = None
+    if all(columna in posiciones for columna in COLUMNAS_CONTEOS):
+        conteos = itemgetter(*(posiciones[columna] for columna in COLUMNAS_CONTEOS))
+    con_autor = i_autor is not None and i_apellido is not None
+
+    def mapear(fila, identidad: MapaIdentidad) -> Libro:
+        libro = Libro(*valores(fila))
+        if con_autor:
+            libro.autor = identidad.autor(libro.autor_id, fila[i_autor], fila[i_apellido])
+        if i_genero is not None and fila[i_genero]:
+            libro.genero = identidad.genero(libro.genero_id, fila[i_genero])
+        if i_total is not None:
+            libro.historial_prestamos = fila[i_total]
+        if conteos is not None:
+            libro.conteos = conteos(fila)
+        return libro
+    return mapear
+
+
+EJEMPLAR = _ejemplar
+LIBRO = _libro
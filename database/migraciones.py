@@ -0,0 +1,799 @@
+"""
+Migraciones versionadas del esquema de BiblioHub.
+
+La versión del esquema se guarda en PRAGMA user_version. Cada migración es
+una función que recibe un cursor y se ejecuta dentro de su propia
+transacción junto con el cambio de versión, de modo que una migración
+fallida no deja la base de datos a medio actualizar. Las migraciones deben
+ser idempotentes (CREATE ... IF NOT EXISTS, etc.) para tolerar bases de
+datos creadas a mano o con versiones antiguas de la aplicación.
+
+Para agregar una migración nueva basta con escribir la función y añadirla
+al final de MIGRACIONES con el siguiente número de versión.
+"""
+
+import re
+import sqlite3
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database.normalizacion import normalizar
+
+
+# ============ MIGRACIONES ============
+def _m001_indices_tablas_principales(cursor):
+    """Índices compuestos y parciales para las consultas habituales."""
+    # Ejemplares de un libro (hidratación, conteos, mover_libro)
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_ejemplares_libro
+                      ON ejemplares (libro_id, codigo_ejemplar)""")
+    # Listado de ejemplares disponibles: índice parcial, solo contiene las copias en sala
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_ejemplares_disponibles
+                      ON ejemplares (codigo_ejemplar) WHERE estado = 'disponible'""")
+    # Filtros por estado en buscar_libros y conteos del dashboard
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_ejemplares_estado
+                      ON ejemplares (estado, libro_id)""")
+
+    # Préstamo activo de un ejemplar (devoluciones)
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_prestamos_ejemplar
+                      ON prestamos (ejemplar_id, estado)""")
+    # Historial de un usuario ordenado por fecha
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_prestamos_usuario
+                      ON prestamos (usuario_id, fecha_prestamo)""")
+    # Préstamos activos / vencidos
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_prestamos_estado_vencimiento
+                      ON prestamos (estado, fecha_devolucion_esperada)""")
+    # Historial general ordenado por fecha
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_prestamos_fecha
+                      ON prestamos (fecha_prestamo)""")
+
+    # Libros por estantería (ocupación, capacidad) y por autor
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_libros_estanteria
+                      ON libros (estanteria_id)""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_libros_autor
+                      ON libros (autor_id)""")
+    # Listado del catálogo ordenado por título
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_libros_titulo
+                      ON libros (titulo)""")
+
+    # Selector de autores ordenado por apellido
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_autores_apellido_nombre
+                      ON autores (apellido, nombre)""")
+
+    # Selector de usuarios activos ordenado por nombre
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_usuarios_activos_nombre
+                      ON usuarios (nombre) WHERE activo = 1""")
+
+
+def _m002_indice_prestamos_estado_fecha(cursor):
+    """Listados detallados de préstamos por estado ordenados por fecha de préstamo."""
+    # Sirve el ORDER BY fecha_prestamo, id y el cursor de paginación sin ordenar en memoria
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_prestamos_estado_fecha
+                      ON prestamos (estado, fecha_prestamo)""")
+
+
+def recalcular_ocupacion(cursor) -> int:
+    """
+    Recalcula estanterias.ocupacion contando los ejemplares de cada estantería.
+
+    Returns:
+        int: Cantidad de estanterías cuyo contador estaba desfasado.
+    """
+    conteo = """(SELECT COUNT(e.id) FROM ejemplares e
+                 JOIN libros l ON e.libro_id = l.id
+                 WHERE l.estanteria_id = estanterias.id)"""
+    cursor.execute(f"UPDATE estanterias SET ocupacion = {conteo} WHERE ocupacion IS NOT {conteo}")
+    return cursor.rowcount
+
+
+def _m003_ocupacion_estanterias(cursor):
+    """Contador de ejemplares por estantería mantenido por triggers."""
+    columnas = {fila[1] for fila in cursor.execute("PRAGMA table_info(estanterias)")}
+    if 'ocupacion' not in columnas:
+        cursor.execute("ALTER TABLE estanterias ADD COLUMN ocupacion INTEGER NOT NULL DEFAULT 0")
+
+    # Un ejemplar ocupa lugar en la estantería de su libro
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ocupacion_ejemplar_insert
+                      AFTER INSERT ON ejemplares BEGIN
+                          UPDATE estanterias SET ocupacion = ocupacion + 1
+                          WHERE id = (SELECT estanteria_id FROM libros WHERE id = new.libro_id);
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ocupacion_ejemplar_delete
+                      AFTER DELETE ON ejemplares BEGIN
+                          UPDATE estanterias SET ocupacion = ocupacion - 1
+                          WHERE id = (SELECT estanteria_id FROM libros WHERE id = old.libro_id);
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ocupacion_ejemplar_libro
+                      AFTER UPDATE OF libro_id ON ejemplares
+                      WHEN old.libro_id IS NOT new.libro_id BEGIN
+                          UPDATE estanterias SET ocupacion = ocupacion - 1
+                          WHERE id = (SELECT estanteria_id FROM libros WHERE id = old.libro_id);
+                          UPDATE estanterias SET ocupacion = ocupacion + 1
+                          WHERE id = (SELECT estanteria_id FROM libros WHERE id = new.libro_id);
+                      END""")
+
+    # Mover, crear o borrar un libro traslada todos sus ejemplares
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ocupacion_libro_estanteria
+                      AFTER UPDATE OF estanteria_id ON libros
+                      WHEN old.estanteria_id IS NOT new.estanteria_id BEGIN
+                          UPDATE estanterias
+                          SET ocupacion = ocupacion - (SELECT COUNT(*) FROM ejemplares WHERE libro_id = new.id)
+                          WHERE id = old.estanteria_id;
+                          UPDATE estanterias
+                          SET ocupacion = ocupacion + (SELECT COUNT(*) FROM ejemplares WHERE libro_id = new.id)
+                          WHERE id = new.estanteria_id;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ocupacion_libro_insert
+                      AFTER INSERT ON libros BEGIN
+                          UPDATE estanterias
+                          SET ocupacion = ocupacion + (SELECT COUNT(*) FROM ejemplares WHERE libro_id = new.id)
+                          WHERE id = new.estanteria_id;
+                      END""")
+    # Sin claves foráneas activas los ejemplares de un libro borrado quedan
+    # huérfanos y dejan de contar (igual que en el COUNT con JOIN)
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ocupacion_libro_delete
+                      AFTER DELETE ON libros BEGIN
+                          UPDATE estanterias
+                          SET ocupacion = ocupacion - (SELECT COUNT(*) FROM ejemplares WHERE libro_id = old.id)
+                          WHERE id = old.estanteria_id;
+                      END""")
+
+    recalcular_ocupacion(cursor)
+
+
+def _m004_ubicaciones_ejemplares(cursor):
+    """Huecos ocupados por estantería para asignar ubicaciones de ejemplares."""
+    cursor.execute("""CREATE TABLE IF NOT EXISTS ubicaciones (
+                          estanteria_id INTEGER NOT NULL,
+                          hueco INTEGER NOT NULL,
+                          ejemplar_id INTEGER NOT NULL UNIQUE,
+                          PRIMARY KEY (estanteria_id, hueco)
+                      ) WITHOUT ROWID""")
+
+    # Un ejemplar eliminado (o huérfano por borrar su libro) libera su hueco
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ubicaciones_ejemplar_delete
+                      AFTER DELETE ON ejemplares BEGIN
+                          DELETE FROM ubicaciones WHERE ejemplar_id = old.id;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ubicaciones_libro_delete
+                      AFTER DELETE ON libros BEGIN
+                          DELETE FROM ubicaciones
+                          WHERE ejemplar_id IN (SELECT id FROM ejemplares WHERE libro_id = old.id);
+                      END""")
+
+    # Carga inicial: se respetan las ubicaciones existentes que se puedan
+    # interpretar y no choquen; el resto se ubica en los huecos libres
+    cursor.execute("""SELECT e.id, e.ubicacion_fisica, l.estanteria_id, s.nombre
+                      FROM ejemplares e
+                      JOIN libros l ON e.libro_id = l.id
+                      JOIN estanterias s ON l.estanteria_id = s.id
+                      WHERE e.id NOT IN (SELECT ejemplar_id FROM ubicaciones)
+                      ORDER BY l.estanteria_id, e.codigo_ejemplar""")
+    filas = cursor.fetchall()
+    ocupados = {}
+    for estanteria_id, hueco in cursor.execute("SELECT estanteria_id, hueco FROM ubicaciones"):
+        ocupados.setdefault(estanteria_id, set()).add(hueco)
+
+    asignados = []
+    pendientes = []
+    for ejemplar_id, ubicacion, estanteria_id, nombre in filas:
+        huecos = ocupados.setdefault(estanteria_id, set())
+        coincidencia = re.search(r'Nivel\s+(\d+)\s*-\s*Pos\s+(\d+)', ubicacion or '')
+        if coincidencia:
+            nivel, posicion = int(coincidencia.group(1)), int(coincidencia.group(2))
+            hueco = (nivel - 1) * 10 + posicion - 1
+            if nivel >= 1 and 1 <= posicion <= 10 and hueco not in huecos:
+                huecos.add(hueco)
+                asignados.append((estanteria_id, hueco, ejemplar_id, None))
+                continue
+        pendientes.append((ejemplar_id, estanteria_id, nombre))
+
+    for ejemplar_id, estanteria_id, nombre in pendientes:
+        huecos = ocupados[estanteria_id]
+        hueco = 0
+        while hueco in huecos:
+            hueco += 1
+        huecos.add(hueco)
+        texto = f"Estantería {nombre} - Nivel {hueco // 10 + 1} - Pos {hueco % 10 + 1}"
+        asignados.append((estanteria_id, hueco, ejemplar_id, texto))
+
+    cursor.executemany("INSERT INTO ubicaciones (estanteria_id, hueco, ejemplar_id) VALUES (?, ?, ?)",
+                       [fila[:3] for fila in asignados])
+    cursor.executemany("UPDATE ejemplares SET ubicacion_fisica = ? WHERE id = ?",
+                       [(texto, ejemplar_id) for _, _, ejemplar_id, texto in asignados if texto])
+
+
+def _m005_columnas_ubicacion_ejemplares(cursor):
+    """Ubicación estructurada (estantería, nivel, posición) en la tabla ejemplares."""
+    columnas = {fila[1] for fila in cursor.execute("PRAGMA table_info(ejemplares)")}
+    for columna in ('estanteria_id', 'nivel', 'posicion'):
+        if columna not in columnas:
+            cursor.execute(f"ALTER TABLE ejemplares ADD COLUMN {columna} INTEGER")
+
+    # Los huecos de la migración 4 ya salieron de interpretar los textos
+    # existentes; se trasladan a las columnas y el texto pasa a armarse al leer
+    tablas = {fila[0] for fila in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'ubicaciones' in tablas:
+        cursor.execute("""UPDATE ejemplares
+                          SET (estanteria_id, nivel, posicion, ubicacion_fisica) = (
+                              SELECT u.estanteria_id, u.hueco / 10 + 1, u.hueco % 10 + 1, NULL
+                              FROM ubicaciones u WHERE u.ejemplar_id = ejemplares.id)
+                          WHERE id IN (SELECT ejemplar_id FROM ubicaciones)""")
+        cursor.execute("DROP TRIGGER IF EXISTS ubicaciones_ejemplar_delete")
+        cursor.execute("DROP TRIGGER IF EXISTS ubicaciones_libro_delete")
+        cursor.execute("DROP TABLE ubicaciones")
+
+    # Un hueco por ejemplar; también sirve los recorridos por estantería y nivel
+    cursor.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_ejemplares_ubicacion
+                      ON ejemplares (estanteria_id, nivel, posicion)""")
+    # Los ejemplares que quedan huérfanos al borrar su libro liberan su hueco
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS ubicaciones_libro_delete
+                      AFTER DELETE ON libros BEGIN
+                          UPDATE ejemplares SET estanteria_id = NULL, nivel = NULL, posicion = NULL
+                          WHERE libro_id = old.id;
+                      END""")
+
+
+def recalcular_conteos_libros(cursor) -> int:
+    """
+    Recalcula los contadores de ejemplares de cada libro (total, disponibles
+    y prestados) a partir de la tabla ejemplares.
+
+    Returns:
+        int: Cantidad de libros cuyos contadores estaban desfasados.
+    """
+    conteos = """(SELECT COUNT(*), COUNT(CASE WHEN estado = 'disponible' THEN 1 END),
+                         COUNT(CASE WHEN estado = 'prestado' THEN 1 END)
+                  FROM ejemplares WHERE libro_id = libros.id)"""
+    cursor.execute(f"""UPDATE libros
+                       SET (ejemplares_total, ejemplares_disponibles, ejemplares_prestados) = {conteos}
+                       WHERE (ejemplares_total, ejemplares_disponibles, ejemplares_prestados) IS NOT {conteos}""")
+    return cursor.rowcount
+
+
+def _m006_conteos_ejemplares_libros(cursor):
+    """Contadores de ejemplares por libro y estado mantenidos por triggers."""
+    columnas = {fila[1] for fila in cursor.execute("PRAGMA table_info(libros)")}
+    for columna in ('ejemplares_total', 'ejemplares_disponibles', 'ejemplares_prestados'):
+        if columna not in columnas:
+            cursor.execute(f"ALTER TABLE libros ADD COLUMN {columna} INTEGER NOT NULL DEFAULT 0")
+
+    # Cada ejemplar suma en el total de su libro y en el contador de su estado
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS conteos_ejemplar_insert
+                      AFTER INSERT ON ejemplares BEGIN
+                          UPDATE libros
+                          SET ejemplares_total = ejemplares_total + 1,
+                              ejemplares_disponibles = ejemplares_disponibles + (new.estado IS 'disponible'),
+                              ejemplares_prestados = ejemplares_prestados + (new.estado IS 'prestado')
+                          WHERE id = new.libro_id;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS conteos_ejemplar_delete
+                      AFTER DELETE ON ejemplares BEGIN
+                          UPDATE libros
+                          SET ejemplares_total = ejemplares_total - 1,
+                              ejemplares_disponibles = ejemplares_disponibles - (old.estado IS 'disponible'),
+                              ejemplares_prestados = ejemplares_prestados - (old.estado IS 'prestado')
+                          WHERE id = old.libro_id;
+                      END""")
+    # Préstamos, devoluciones y reasignaciones de libro
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS conteos_ejemplar_update
+                      AFTER UPDATE OF estado, libro_id ON ejemplares
+                      WHEN old.estado IS NOT new.estado OR old.libro_id IS NOT new.libro_id BEGIN
+                          UPDATE libros
+                          SET ejemplares_total = ejemplares_total - 1,
+                              ejemplares_disponibles = ejemplares_disponibles - (old.estado IS 'disponible'),
+                              ejemplares_prestados = ejemplares_prestados - (old.estado IS 'prestado')
+                          WHERE id = old.libro_id;
+                          UPDATE libros
+                          SET ejemplares_total = ejemplares_total + 1,
+                              ejemplares_disponibles = ejemplares_disponibles + (new.estado IS 'disponible'),
+                              ejemplares_prestados = ejemplares_prestados + (new.estado IS 'prestado')
+                          WHERE id = new.libro_id;
+                      END""")
+
+    recalcular_conteos_libros(cursor)
+
+
+def recalcular_circulacion(cursor) -> int:
+    """
+    Reconstruye la circulación por libro (total y último préstamo) y los
+    buckets mensuales a partir de la tabla prestamos.
+
+    Returns:
+        int: Cantidad de libros con préstamos registrados.
+    """
+    cursor.execute("DELETE FROM circulacion_libro")
+    cursor.execute("DELETE FROM circulacion_mensual")
+    cursor.execute("""INSERT INTO circulacion_libro (libro_id, total_prestamos, ultimo_prestamo)
+                      SELECT e.libro_id, COUNT(*), MAX(p.fecha_prestamo)
+                      FROM prestamos p JOIN ejemplares e ON e.id = p.ejemplar_id
+                      GROUP BY e.libro_id""")
+    libros = cursor.rowcount
+    cursor.execute("""INSERT INTO circulacion_mensual (mes, libro_id, prestamos)
+                      SELECT strftime('%Y-%m', p.fecha_prestamo), e.libro_id, COUNT(*)
+                      FROM prestamos p JOIN ejemplares e ON e.id = p.ejemplar_id
+                      WHERE p.fecha_prestamo IS NOT NULL
+                      GROUP BY 1, 2""")
+    # genero_id llega con la migración 14; la 7 reconstruye la tabla antes de tenerlo
+    columnas = {fila[1] for fila in cursor.execute("PRAGMA table_info(circulacion_libro)")}
+    if 'genero_id' in columnas:
+        cursor.execute("""UPDATE circulacion_libro
+                          SET genero_id = (SELECT genero_id FROM libros WHERE id = circulacion_libro.libro_id)""")
+    return libros
+
+
+def _m007_circulacion_libros(cursor):
+    """Préstamos por libro (total y por mes) mantenidos por triggers."""
+    cursor.execute("""CREATE TABLE IF NOT EXISTS circulacion_libro (
+                          libro_id INTEGER PRIMARY KEY,
+                          total_prestamos INTEGER NOT NULL DEFAULT 0,
+                          ultimo_prestamo DATE
+                      )""")
+    # El ranking de popularidad recorre este índice de mayor a menor
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_circulacion_libro_total
+                      ON circulacion_libro(total_prestamos, libro_id)""")
+    # Un bucket por mes y libro ('AAAA-MM'): los rankings por período suman
+    # solo los meses pedidos en lugar de agrupar todo el historial
+    cursor.execute("""CREATE TABLE IF NOT EXISTS circulacion_mensual (
+                          mes TEXT NOT NULL,
+                          libro_id INTEGER NOT NULL,
+                          prestamos INTEGER NOT NULL DEFAULT 0,
+                          PRIMARY KEY (mes, libro_id)
+                      ) WITHOUT ROWID""")
+
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS circulacion_prestamo_insert
+                      AFTER INSERT ON prestamos BEGIN
+                          INSERT INTO circulacion_libro (libro_id, total_prestamos, ultimo_prestamo)
+                          SELECT libro_id, 1, new.fecha_prestamo FROM ejemplares WHERE id = new.ejemplar_id
+                          ON CONFLICT (libro_id) DO UPDATE
+                          SET total_prestamos = total_prestamos + 1,
+                              ultimo_prestamo = COALESCE(MAX(ultimo_prestamo, excluded.ultimo_prestamo),
+                                                        ultimo_prestamo, excluded.ultimo_prestamo);
+                          INSERT INTO circulacion_mensual (mes, libro_id, prestamos)
+                          SELECT strftime('%Y-%m', new.fecha_prestamo), libro_id, 1
+                          FROM ejemplares WHERE id = new.ejemplar_id AND new.fecha_prestamo IS NOT NULL
+                          ON CONFLICT (mes, libro_id) DO UPDATE SET prestamos = prestamos + 1;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS circulacion_prestamo_delete
+                      AFTER DELETE ON prestamos BEGIN
+                          UPDATE circulacion_libro SET total_prestamos = total_prestamos - 1
+                          WHERE libro_id = (SELECT libro_id FROM ejemplares WHERE id = old.ejemplar_id);
+                          UPDATE circulacion_mensual SET prestamos = prestamos - 1
+                          WHERE mes = strftime('%Y-%m', old.fecha_prestamo)
+                            AND libro_id = (SELECT libro_id FROM ejemplares WHERE id = old.ejemplar_id);
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS circulacion_libro_delete
+                      AFTER DELETE ON libros BEGIN
+                          DELETE FROM circulacion_libro WHERE libro_id = old.id;
+                          DELETE FROM circulacion_mensual WHERE libro_id = old.id;
+                      END""")
+
+    recalcular_circulacion(cursor)
+
+
+# Contadores de la fila única de estadisticas, en el orden de SQL_ESTADISTICAS_REALES
+ESTADISTICAS = ('total_libros', 'total_ejemplares', 'ejemplares_disponibles',
+                'prestamos_activos', 'prestamos_vencidos', 'usuarios_activos')
+
+# Conteo real de cada estadística; :hoy es la fecha de corte de los vencidos
+SQL_ESTADISTICAS_REALES = """
+    SELECT (SELECT COUNT(*) FROM libros) AS total_libros,
+           (SELECT COUNT(*) FROM ejemplares) AS total_ejemplares,
+           (SELECT COUNT(*) FROM ejemplares WHERE estado = 'disponible') AS ejemplares_disponibles,
+           (SELECT COUNT(*) FROM prestamos WHERE estado = 'activo') AS prestamos_activos,
+           (SELECT COUNT(*) FROM prestamos
+            WHERE estado = 'activo' AND fecha_devolucion_esperada < :hoy) AS prestamos_vencidos,
+           (SELECT COUNT(*) FROM usuarios WHERE activo = 1) AS usuarios_activos
+"""
+
+
+def recalcular_estadisticas(cursor, hoy: Optional[str] = None) -> int:
+    """
+    Recalcula la fila de estadisticas a partir de las tablas y deja la fecha
+    de corte de los préstamos vencidos en hoy.
+
+    Returns:
+        int: Cantidad de contadores que estaban desfasados.
+    """
+    hoy = hoy or date.today().isoformat()
+    reales = cursor.execute(SQL_ESTADISTICAS_REALES, {'hoy': hoy}).fetchone()
+    guardados = cursor.execute(f"SELECT {', '.join(ESTADISTICAS)}, fecha_corte "
+                               f"FROM estadisticas WHERE id = 1").fetchone()
+    desfasados = sum(1 for i in range(len(ESTADISTICAS))
+                     if guardados is None or guardados[i] != reales[i])
+    asignaciones = ', '.join(f"{campo} = ?" for campo in ESTADISTICAS)
+    cursor.execute(f"UPDATE estadisticas SET {asignaciones}, fecha_corte = ? WHERE id = 1",
+                   (*reales, hoy))
+    return desfasados
+
+
+def avanzar_corte_vencidos(cursor, hoy: Optional[str] = None) -> int:
+    """
+    Mueve la fecha de corte de los préstamos vencidos hasta hoy: suma solo
+    los préstamos activos que vencieron entre el corte anterior y hoy (o los
+    resta si el reloj retrocedió), recorriendo ese tramo del índice.
+
+    Returns:
+        int: Préstamos que pasaron a contarse como vencidos (negativo si se restaron).
+    """
+    hoy = hoy or date.today().isoformat()
+    fila = cursor.execute("SELECT fecha_corte FROM estadisticas WHERE id = 1").fetchone()
+    # Con detect_types la columna DATE llega como date; se compara como texto
+    corte = str(fila[0]) if fila is not None else None
+    if corte is None or corte == hoy:
+        return 0
+    desde, hasta, signo = (corte, hoy, 1) if corte < hoy else (hoy, corte, -1)
+    cursor.execute("""SELECT COUNT(*) FROM prestamos
+                      WHERE estado = 'activo' AND fecha_devolucion_esperada >= ?
+                        AND fecha_devolucion_esperada < ?""", (desde, hasta))
+    cambio = signo * cursor.fetchone()[0]
+    cursor.execute("""UPDATE estadisticas SET prestamos_vencidos = prestamos_vencidos + ?,
+                                              fecha_corte = ?
+                      WHERE id = 1""", (cambio, hoy))
+    return cambio
+
+
+def _m008_estadisticas_dashboard(cursor):
+    """Estadísticas del dashboard en una fila mantenida por triggers."""
+    cursor.execute("""CREATE TABLE IF NOT EXISTS estadisticas (
+                          id INTEGER PRIMARY KEY CHECK (id = 1),
+                          total_libros INTEGER NOT NULL DEFAULT 0,
+                          total_ejemplares INTEGER NOT NULL DEFAULT 0,
+                          ejemplares_disponibles INTEGER NOT NULL DEFAULT 0,
+                          prestamos_activos INTEGER NOT NULL DEFAULT 0,
+                          prestamos_vencidos INTEGER NOT NULL DEFAULT 0,
+                          usuarios_activos INTEGER NOT NULL DEFAULT 0,
+                          fecha_corte DATE NOT NULL DEFAULT CURRENT_DATE
+                      )""")
+    cursor.execute("INSERT OR IGNORE INTO estadisticas (id) VALUES (1)")
+
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_libro_insert
+                      AFTER INSERT ON libros BEGIN
+                          UPDATE estadisticas SET total_libros = total_libros + 1 WHERE id = 1;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_libro_delete
+                      AFTER DELETE ON libros BEGIN
+                          UPDATE estadisticas SET total_libros = total_libros - 1 WHERE id = 1;
+                      END""")
+
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_ejemplar_insert
+                      AFTER INSERT ON ejemplares BEGIN
+                          UPDATE estadisticas
+                          SET total_ejemplares = total_ejemplares + 1,
+                              ejemplares_disponibles = ejemplares_disponibles + (new.estado IS 'disponible')
+                          WHERE id = 1;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_ejemplar_delete
+                      AFTER DELETE ON ejemplares BEGIN
+                          UPDATE estadisticas
+                          SET total_ejemplares = total_ejemplares - 1,
+                              ejemplares_disponibles = ejemplares_disponibles - (old.estado IS 'disponible')
+                          WHERE id = 1;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_ejemplar_update
+                      AFTER UPDATE OF estado ON ejemplares
+                      WHEN old.estado IS NOT new.estado BEGIN
+                          UPDATE estadisticas
+                          SET ejemplares_disponibles = ejemplares_disponibles
+                                  + (new.estado IS 'disponible') - (old.estado IS 'disponible')
+                          WHERE id = 1;
+                      END""")
+
+    # Un préstamo cuenta como vencido si está activo y venció antes de fecha_corte;
+    # el paso de los días lo aplica avanzar_corte_vencidos
+    vencido = "({0}.estado IS 'activo' AND {0}.fecha_devolucion_esperada < fecha_corte)"
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS estadisticas_prestamo_insert
+                      AFTER INSERT ON prestamos BEGIN
+                          UPDATE estadisticas
+                          SET prestamos_activos = prestamos_activos + (new.estado IS 'activo'),
+                              prestamos_vencidos = prestamos_vencidos + IFNULL({vencido.format('new')}, 0)
+                          WHERE id = 1;
+                      END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS estadisticas_prestamo_delete
+                      AFTER DELETE ON prestamos BEGIN
+                          UPDATE estadisticas
+                          SET prestamos_activos = prestamos_activos - (old.estado IS 'activo'),
+                              prestamos_vencidos = prestamos_vencidos - IFNULL({vencido.format('old')}, 0)
+                          WHERE id = 1;
+                      END""")
+    # Devoluciones y renovaciones
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS estadisticas_prestamo_update
+                      AFTER UPDATE OF estado, fecha_devolucion_esperada ON prestamos BEGIN
+                          UPDATE estadisticas
+                          SET prestamos_activos = prestamos_activos
+                                  + (new.estado IS 'activo') - (old.estado IS 'activo'),
+                              prestamos_vencidos = prestamos_vencidos
+                                  + IFNULL({vencido.format('new')}, 0) - IFNULL({vencido.format('old')}, 0)
+                          WHERE id = 1;
+                      END""")
+
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_usuario_insert
+                      AFTER INSERT ON usuarios BEGIN
+                          UPDATE estadisticas SET usuarios_activos = usuarios_activos + (new.activo IS 1)
+                          WHERE id = 1;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_usuario_delete
+                      AFTER DELETE ON usuarios BEGIN
+                          UPDATE estadisticas SET usuarios_activos = usuarios_activos - (old.activo IS 1)
+                          WHERE id = 1;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS estadisticas_usuario_update
+                      AFTER UPDATE OF activo ON usuarios
+                      WHEN old.activo IS NOT new.activo BEGIN
+                          UPDATE estadisticas
+                          SET usuarios_activos = usuarios_activos + (new.activo IS 1) - (old.activo IS 1)
+                          WHERE id = 1;
+                      END""")
+
+    recalcular_estadisticas(cursor)
+
+
+# Columnas *_norm de cada tabla: tabla -> {columna normalizada: columna de origen}.
+# DBManager y el importador las calculan en Python al escribir (migración 13)
+CLAVES_NORMALIZADAS = {
+    'libros': {'titulo_norm': 'titulo'},
+    'autores': {'nombre_norm': 'nombre', 'apellido_norm': 'apellido'},
+    'usuarios': {'nombre_norm': 'nombre'},
+    'generos': {'nombre_norm': 'nombre'},
+    'estanterias': {'nombre_norm': 'nombre'},
+}
+
+# Las tablas que tenían claves mantenidas por triggers en la migración 9
+_CLAVES_M009 = {tabla: CLAVES_NORMALIZADAS[tabla] for tabla in ('libros', 'autores', 'usuarios')}
+
+
+def recalcular_claves_busqueda(cursor, claves: Optional[Dict[str, Dict[str, str]]] = None) -> int:
+    """
+    Recalcula en Python las columnas *_norm (normalizar() de su columna de
+    origen). Es la reparación para filas escritas desde fuera de la
+    aplicación, que no calculan las claves.
+
+    Returns:
+        int: Cantidad de filas cuyas claves estaban desfasadas.
+    """
+    desfasadas = 0
+    for tabla, columnas in (claves or CLAVES_NORMALIZADAS).items():
+        normas, origenes = list(columnas), list(columnas.values())
+        filas = cursor.execute(f"SELECT id, {', '.join(origenes + normas)} FROM {tabla}").fetchall()
+        cambios = []
+        for fila in filas:
+            nuevas = tuple(normalizar(fila[1 + i]) for i in range(len(origenes)))
+            if nuevas != tuple(fila[1 + len(origenes):]):
+                cambios.append(nuevas + (fila[0],))
+        asignaciones = ', '.join(f"{norm} = ?" for norm in normas)
+        cursor.executemany(f"UPDATE {tabla} SET {asignaciones} WHERE id = ?", cambios)
+        desfasadas += len(cambios)
+    return desfasadas
+
+
+def _m009_claves_normalizadas(cursor):
+    """Claves de búsqueda sin acentos ni mayúsculas (normalizar()) con sus índices."""
+    for tabla, columnas in _CLAVES_M009.items():
+        existentes = {fila[1] for fila in cursor.execute(f"PRAGMA table_info({tabla})")}
+        for norm in columnas:
+            if norm not in existentes:
+                cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {norm} TEXT")
+
+        # Se recalculan al insertar y al cambiar la columna de origen; el
+        # UPDATE de la clave no vuelve a disparar el trigger (no es columna de origen)
+        asignaciones = ', '.join(f"{norm} = normalizar(new.{origen})" for norm, origen in columnas.items())
+        origenes = ', '.join(columnas.values())
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS claves_{tabla}_insert
+                           AFTER INSERT ON {tabla} BEGIN
+                               UPDATE {tabla} SET {asignaciones} WHERE id = new.id;
+                           END""")
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS claves_{tabla}_update
+                           AFTER UPDATE OF {origenes} ON {tabla} BEGIN
+                               UPDATE {tabla} SET {asignaciones} WHERE id = new.id;
+                           END""")
+
+    recalcular_claves_busqueda(cursor, _CLAVES_M009)
+
+    # Título exacto o por prefijo, autor por apellido y nombre, usuario por nombre
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_libros_titulo_norm ON libros (titulo_norm)")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_autores_apellido_nombre_norm
+                      ON autores (apellido_norm, nombre_norm)""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_nombre_norm ON usuarios (nombre_norm)")
+    # Los géneros son pocos: basta un índice por expresión, sin columna guardada
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_generos_nombre_norm ON generos (normalizar(nombre))")
+
+
+def _m010_orden_alfabetico_es(cursor):
+    """
+    Índices de orden alfabético con la collation "es" (comparar_es). Los
+    listados ordenan con ella, así que los índices binarios de la migración 1
+    ya no les sirven y se reemplazan. Necesita la collation registrada en la
+    conexión (registrar_funciones).
+
+    Cada comparación llama a comparar_es en Python: el índice de títulos
+    tarda unos 30 s por cada 500.000 libros (frente a menos de 1 s binario,
+    ver benchmarks/orden_alfabetico.py), durante los que la aplicación no
+    termina de abrir.
+    """
+    libros = cursor.execute("SELECT COUNT(*) FROM libros").fetchone()[0]
+    if libros >= 50_000:
+        print(f"⏳ Construyendo los índices de orden alfabético de {libros:,} libros "
+              f"(unos {max(1, round(libros * 30 / 500_000))} s)...")
+
+    # Catálogo por título: listados paginados, buscar_libros e iter_libros
+    cursor.execute("DROP INDEX IF EXISTS idx_libros_titulo")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_libros_titulo_es
+                      ON libros (titulo COLLATE es)""")
+
+    # Selector de autores ordenado por apellido y nombre
+    cursor.execute("DROP INDEX IF EXISTS idx_autores_apellido_nombre")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_autores_apellido_nombre_es
+                      ON autores (apellido COLLATE es, nombre COLLATE es)""")
+
+    # Selector y listado de usuarios activos ordenados por nombre
+    cursor.execute("DROP INDEX IF EXISTS idx_usuarios_activos_nombre")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_usuarios_activos_nombre_es
+                      ON usuarios (nombre COLLATE es) WHERE activo = 1""")
+
+    # Estanterías y géneros: su UNIQUE (nombre) es binario y no sirve al orden "es"
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_estanterias_nombre_es
+                      ON estanterias (nombre COLLATE es)""")
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_generos_nombre_es
+                      ON generos (nombre COLLATE es)""")
+
+
+def _m011_indices_consulta_catalogo(cursor):
+    """
+    Índices que usan las cláusulas de la consulta con campos del catálogo
+    (logic/consulta_catalogo.py) para conducir la búsqueda.
+    """
+    # anio:1940..1960
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_libros_anio ON libros (anio)")
+    # genero:ensayo (el género se resuelve con idx_generos_nombre_norm)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_libros_genero ON libros (genero_id)")
+    # estante:"Literatura Clásica": nombre sin acentos ni mayúsculas, como los géneros
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_estanterias_nombre_norm
+                      ON estanterias (normalizar(nombre))""")
+
+
+def _m012_claves_isbn_codigo(cursor):
+    """
+    Claves de isbn: y codigo: de la consulta con campos: el ISBN sin guiones
+    ni espacios y el código sin distinguir mayúsculas.
+    """
+    # isbn:9788437604947 encuentra 978-84-376-0494-7 (la expresión debe coincidir
+    # con la de logic/consulta_catalogo.py para que SQLite use el índice)
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_libros_isbn_sin_guiones
+                      ON libros (upper(replace(replace(isbn, '-', ''), ' ', '')))""")
+    # codigo:LIB encuentra lib002: un solo rango sobre el código en NOCASE
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_libros_codigo_nocase
+                      ON libros (codigo COLLATE NOCASE)""")
+
+
+def _m013_claves_normalizadas_en_python(cursor):
+    """
+    Las claves *_norm pasan a calcularse en Python al escribir (DBManager y el
+    importador) en lugar de con triggers que llaman a normalizar(). Géneros y
+    estanterías guardan su nombre_norm en una columna en lugar de un índice
+    por expresión sobre normalizar(nombre). Así ninguna escritura ni
+    PRAGMA integrity_check necesita la función registrada en la conexión.
+    """
+    for tabla in _CLAVES_M009:
+        cursor.execute(f"DROP TRIGGER IF EXISTS claves_{tabla}_insert")
+        cursor.execute(f"DROP TRIGGER IF EXISTS claves_{tabla}_update")
+
+    # Los índices por expresión de las migraciones 9 y 11 se reemplazan por
+    # índices sobre la columna, con el mismo nombre
+    cursor.execute("DROP INDEX IF EXISTS idx_generos_nombre_norm")
+    cursor.execute("DROP INDEX IF EXISTS idx_estanterias_nombre_norm")
+    claves = {tabla: CLAVES_NORMALIZADAS[tabla] for tabla in ('generos', 'estanterias')}
+    for tabla in claves:
+        existentes = {fila[1] for fila in cursor.execute(f"PRAGMA table_info({tabla})")}
+        if 'nombre_norm' not in existentes:
+            cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN nombre_norm TEXT")
+    recalcular_claves_busqueda(cursor, claves)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_generos_nombre_norm ON generos (nombre_norm)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_estanterias_nombre_norm ON estanterias (nombre_norm)")
+
+
+def _m014_circulacion_por_genero(cursor):
+    """
+    Copia el genero_id de cada libro en circulacion_libro para que el ranking
+    de un género lea sus k primeros de un índice (genero_id, total_prestamos)
+    en lugar de recorrer la circulación de todos los libros.
+    """
+    columnas = {fila[1] for fila in cursor.execute("PRAGMA table_info(circulacion_libro)")}
+    if 'genero_id' not in columnas:
+        cursor.execute("ALTER TABLE circulacion_libro ADD COLUMN genero_id INTEGER")
+
+    # El primer préstamo de un libro crea su fila ya con el género
+    cursor.execute("DROP TRIGGER IF EXISTS circulacion_prestamo_insert")
+    cursor.execute("""CREATE TRIGGER circulacion_prestamo_insert
+                      AFTER INSERT ON prestamos BEGIN
+                          INSERT INTO circulacion_libro (libro_id, genero_id, total_prestamos, ultimo_prestamo)
+                          SELECT e.libro_id, l.genero_id, 1, new.fecha_prestamo
+                          FROM ejemplares e JOIN libros l ON l.id = e.libro_id
+                          WHERE e.id = new.ejemplar_id
+                          ON CONFLICT (libro_id) DO UPDATE
+                          SET total_prestamos = total_prestamos + 1,
+                              ultimo_prestamo = COALESCE(MAX(ultimo_prestamo, excluded.ultimo_prestamo),
+                                                        ultimo_prestamo, excluded.ultimo_prestamo);
+                          INSERT INTO circulacion_mensual (mes, libro_id, prestamos)
+                          SELECT strftime('%Y-%m', new.fecha_prestamo), libro_id, 1
+                          FROM ejemplares WHERE id = new.ejemplar_id AND new.fecha_prestamo IS NOT NULL
+                          ON CONFLICT (mes, libro_id) DO UPDATE SET prestamos = prestamos + 1;
+                      END""")
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS circulacion_libro_genero
+                      AFTER UPDATE OF genero_id ON libros BEGIN
+                          UPDATE circulacion_libro SET genero_id = new.genero_id WHERE libro_id = new.id;
+                      END""")
+
+    recalcular_circulacion(cursor)
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_circulacion_libro_genero
+                      ON circulacion_libro(genero_id, total_prestamos, libro_id)""")
+
+
+# (versión, descripción, función). Siempre en orden creciente de versión.
+MIGRACIONES: List[Tuple[int, str, Callable]] = [
+    (1, "Índices de ejemplares, préstamos, libros, autores y usuarios", _m001_indices_tablas_principales),
+    (2, "Índice de préstamos por estado y fecha de préstamo", _m002_indice_prestamos_estado_fecha),
+    (3, "Contador de ocupación de estanterías mantenido por triggers", _m003_ocupacion_estanterias),
+    (4, "Tabla de huecos para la ubicación física de los ejemplares", _m004_ubicaciones_ejemplares),
+    (5, "Columnas estanteria_id/nivel/posicion en ejemplares", _m005_columnas_ubicacion_ejemplares),
+    (6, "Contadores de ejemplares por libro mantenidos por triggers", _m006_conteos_ejemplares_libros),
+    (7, "Circulación por libro y por mes mantenida por triggers", _m007_circulacion_libros),
+    (8, "Estadísticas del dashboard mantenidas por triggers", _m008_estadisticas_dashboard),
+    (9, "Claves de búsqueda normalizadas (sin acentos ni mayúsculas) e índices", _m009_claves_normalizadas),
+    (10, "Índices de orden alfabético en castellano (collation es); en catálogos grandes tarda "
+         "(unos 30 s por 500.000 libros)", _m010_orden_alfabetico_es),
+    (11, "Índices de año, género y nombre de estantería para la consulta con campos", _m011_indices_consulta_catalogo),
+    (12, "Índices de ISBN sin guiones y de código sin mayúsculas para la consulta con campos", _m012_claves_isbn_codigo),
+    (13, "Claves normalizadas calculadas al escribir, sin triggers ni índices sobre normalizar()", _m013_claves_normalizadas_en_python),
+    (14, "Género del libro en circulacion_libro para el ranking por género", _m014_circulacion_por_genero),
+]
+
+
+# ============ APLICACIÓN ============
+def version_esquema(conn: sqlite3.Connection) -> int:
+    """Devuelve la versión de esquema registrada en la base de datos."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def version_objetivo() -> int:
+    """Versión de esquema que alcanza la última migración conocida."""
+    return MIGRACIONES[-1][0] if MIGRACIONES else 0
+
+
+def migraciones_pendientes(conn: sqlite3.Connection) -> List[Tuple[int, str, Callable]]:
+    """Lista las migraciones que aún no se aplicaron, en orden."""
+    actual = version_esquema(conn)
+    return [m for m in MIGRACIONES if m[0] > actual]
+
+
+def aplicar_migraciones(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """
+    Aplica en orden las migraciones pendientes.
+
+    Returns:
+        List[Tuple[int, str]]: (versión, descripción) de cada migración aplicada.
+
+    Raises:
+        RuntimeError: Si la base de datos tiene una versión más nueva que la
+            aplicación, o si alguna migración falla (se revierte solo esa).
+    """
+    actual = version_esquema(conn)
+    if actual > version_objetivo():
+        raise RuntimeError(
+            f"La base de datos está en la versión de esquema {actual}, "
+            f"pero esta versión de BiblioHub solo conoce hasta la {version_objetivo()}"
+        )
+
+    aplicadas = []
+    for version, descripcion, migracion in migraciones_pendientes(conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            migracion(cursor)
+            # PRAGMA no admite parámetros; version siempre es un int de MIGRACIONES
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise RuntimeError(f"Falló la migración {version} ({descripcion}): {e}") from e
+        print(f"🔧 Migración {version} aplicada: {descripcion}")
+        aplicadas.append((version, descripcion))
+    return aplicadas
@@ -0,0 +1,106 @@
+"""
+Claves de búsqueda normalizadas.
+
+LOWER() de SQLite solo convierte letras ASCII: "GARCÍA" queda "garcÍa" y
+"garcia" no encuentra "García". normalizar() descompone el texto (NFKD),
+quita los diacríticos y aplica casefold, de modo que "García", "GARCIA" y
+"garcía" comparten la misma clave.
+
+Las columnas *_norm de libros, autores, usuarios, géneros y estanterías
+guardan esa clave. DBManager y el importador la calculan en Python al
+escribir (migración 13 en database/migraciones.py), así que el esquema no
+depende de la función: una herramienta externa puede escribir en esas
+tablas, pero las filas que agregue o cambie quedan con la clave desfasada
+hasta `mantenimiento_db.py reconstruir-indice`. registrar_funciones() la
+sigue registrando como determinista para las migraciones 9 y 11, que la
+usaban.
+
+La misma función registra la collation "es" (comparar_es), el orden
+alfabético en castellano: las tildes y las mayúsculas solo desempatan
+("alamo" < "Álamo" < "árbol") y la ñ va entre la n y la o ("nube" < "Ñandú"
+< "ópalo"). Los índices de títulos, autores, nombres de usuario,
+estanterías y géneros se declaran con ella (migración 10); una conexión que
+no la registra (el cliente sqlite3, otra herramienta) falla con "no such
+collation sequence: es" al escribir en esas tablas y en PRAGMA
+integrity_check. `mantenimiento_db.py shell` abre una consola SQL con las
+funciones registradas.
+"""
+
+import sqlite3
+import unicodedata
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# La ñ ordena detrás de toda la n: "n" + el último punto de código de Unicode
+_ENE = str.maketrans({'ñ': 'n\U0010ffff'})
+
+
+def normalizar(texto: Optional[str]) -> Optional[str]:
+    """Clave de comparación de un texto: sin diacríticos y con casefold (None se conserva)."""
+    if texto is None:
+        return None
+    if not isinstance(texto, str):
+        texto = str(texto)
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def clave_autor(nombre: str, apellido: str) -> Tuple[str, str]:
+    """Clave con la que se identifica un autor: (nombre, apellido) normalizados."""
+    return normalizar(nombre), normalizar(apellido)
+
+
+def clave_genero(nombre: str) -> str:
+    """Clave con la que se identifica un género: su nombre normalizado."""
+    return normalizar(nombre)
+
+
+@lru_cache(maxsize=1 << 16)
+def clave_orden_es(texto: str) -> Tuple[str, str, str]:
+    """
+    Clave de orden alfabético en castellano: letras base (con la ñ como
+    letra propia), después tildes y por último mayúsculas.
+    """
+    plegado = unicodedata.normalize('NFC', texto).casefold()
+    base = unicodedata.normalize('NFKD', plegado.translate(_ENE))
+    return ''.join(c for c in base if not unicodedata.combining(c)), plegado, texto
+
+
+def comparar_es(a: str, b: str) -> int:
+    """
+    Collation "es". Construir un índice la llama O(n log n) veces, así que
+    los textos ASCII (la mayoría) se comparan sin armar su clave.
+    """
+    if a.isascii() and b.isascii():
+        a_min, b_min = a.lower(), b.lower()
+        if a_min != b_min:
+            return -1 if a_min < b_min else 1
+    elif a != b:
+        clave_a, clave_b = clave_orden_es(a), clave_orden_es(b)
+        if clave_a != clave_b:
+            return -1 if clave_a < clave_b else 1
+    return 0 if a == b else (-1 if a < b else 1)
+
+
+def explicar_error_funciones(error: sqlite3.Error) -> Optional[str]:
+    """
+    Mensaje claro para el error de una conexión que no registró la collation
+    "es" ni normalizar(); None si el error es otro.
+    """
+    texto = str(error)
+    if 'collation sequence: es' not in texto and 'function: normalizar' not in texto:
+        return None
+    return (f"{texto}. La base de datos usa la collation \"es\" y normalizar(), que solo existen "
+            f"en las conexiones que las registran (registrar_funciones en database/normalizacion.py). "
+            f"Para consultarla o corregirla fuera de la aplicación use 'python mantenimiento_db.py shell'.")
+
+
+def registrar_funciones(conn: sqlite3.Connection):
+    """
+    Registra normalizar() (deterministic=True permite usarla en índices) y
+    la collation "es" en la conexión.
+    """
+    conn.create_function('normalizar', 1, normalizar, deterministic=True)
+    conn.create_collation('es', comparar_es)
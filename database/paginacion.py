@@ -0,0 +1,113 @@
+"""
+Paginación por cursor (keyset) y recorrido por lotes de resultados.
+
+En lugar de LIMIT/OFFSET, cada página continúa a partir de la clave de orden
+de la última fila de la anterior: WHERE (columna, id) > (?, ?) ORDER BY
+columna, id. El costo de pedir una página no crece con su posición y un alta
+o baja entre dos páginas no duplica ni salta filas. El id desempata filas con
+el mismo valor de orden, así que el orden es estable.
+
+El cursor que recibe la interfaz es opaco (JSON en base64): guarda el orden
+con el que se generó para rechazarlo si se usa con otro.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Iterator, List, Optional, Sequence
+
+TAMANIO_PAGINA = 50
+TAMANIO_LOTE = 500
+
+
+class Pagina:
+    """Una página de resultados y el cursor para pedir la siguiente."""
+
+    def __init__(self, elementos: List[Any], siguiente: Optional[str] = None):
+        self.elementos = elementos
+        self.siguiente = siguiente
+
+    @property
+    def hay_mas(self) -> bool:
+        return self.siguiente is not None
+
+    def __iter__(self):
+        return iter(self.elementos)
+
+    def __len__(self):
+        return len(self.elementos)
+
+
+def firma_orden(orden: str, descendente: bool) -> str:
+    """Identifica el orden de un listado dentro del cursor."""
+    return f"{orden}:{'desc' if descendente else 'asc'}"
+
+
+def codificar_cursor(firma: str, clave: Sequence[Any]) -> str:
+    """Convierte la clave de orden de la última fila en un cursor opaco."""
+    datos = json.dumps({'o': firma, 'k': list(clave)}, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(datos.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str, firma: str) -> List[Any]:
+    """
+    Devuelve la clave de orden guardada en un cursor.
+
+    Raises:
+        ValueError: Si el cursor está dañado o se generó con otro orden.
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+        clave = datos['k']
+        firma_cursor = datos['o']
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise ValueError("Cursor de paginación no válido")
+    if firma_cursor != firma:
+        raise ValueError(f"El cursor corresponde a otro orden ({firma_cursor}), no a {firma}")
+    return clave
+
+
+def condicion_despues_de(columna: str, columna_id: str, descendente: bool) -> str:
+    """
+    Condición WHERE que continúa después de la clave (valor, id) de un cursor.
+    Si se ordena por el propio id basta con compararlo a él.
+
+    SQLite no busca en el índice con una comparación de row values cuya
+    columna lleva COLLATE ("titulo COLLATE es"): la recorre desde el
+    principio. La cota previa sobre la columna sola (>= o <=) sí se resuelve
+    con el índice, y la comparación completa solo descarta los empates.
+    """
+    operador = '<' if descendente else '>'
+    if columna == columna_id:
+        return f"{columna_id} {operador} ?"
+    return f"{columna} {operador}= ? AND ({columna}, {columna_id}) {operador} (?, ?)"
+
+
+def parametros_despues_de(columna: str, columna_id: str, clave: Sequence[Any]) -> List[Any]:
+    """Parámetros de condicion_despues_de para una clave (valor, id)."""
+    return [clave[1]] if columna == columna_id else [clave[0], clave[0], clave[1]]
+
+
+def armar_pagina(filas: list, tamanio: int, firma: str, convertir) -> Pagina:
+    """
+    Arma una Pagina a partir de tamanio + 1 filas consultadas: la fila de más
+    solo indica que hay otra página. Las filas deben traer las columnas
+    clave_orden e id.
+    """
+    hay_mas = len(filas) > tamanio
+    filas = filas[:tamanio]
+    siguiente = None
+    if hay_mas:
+        ultima = filas[-1]
+        siguiente = codificar_cursor(firma, (ultima['clave_orden'], ultima['id']))
+    return Pagina(convertir(filas), siguiente)
+
+
+def iterar_lotes(cursor, tamanio_lote: int = TAMANIO_LOTE) -> Iterator[list]:
+    """Recorre el resultado de un cursor ya ejecutado en lotes de fetchmany."""
+    while True:
+        filas = cursor.fetchmany(tamanio_lote)
+        if not filas:
+            return
+        yield filas
@@ -0,0 +1,140 @@
+"""
+Perfiles de rendimiento de SQLite para BiblioHub.
+
+Un perfil es un conjunto de PRAGMAs que se aplican a la conexión al abrirla
+(o al cambiar de perfil en caliente, por ejemplo para una importación
+masiva). Los perfiles predefinidos pueden ajustarse o ampliarse desde
+config.ini:
+
+    [database.performance]
+    perfil = desktop
+
+    [database.performance.bulk-import]
+    cache_size = -131072
+"""
+
+import configparser
+import sqlite3
+from typing import Dict, Optional
+
+
+# Orden en que se aplican los PRAGMAs. journal_mode va primero porque no
+# puede cambiarse dentro de una transacción.
+PRAGMAS_PERFIL = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+
+VALORES_PERMITIDOS = {
+    'journal_mode': ('delete', 'truncate', 'persist', 'memory', 'wal', 'off'),
+    'synchronous': ('off', 'normal', 'full', 'extra'),
+    'temp_store': ('default', 'file', 'memory'),
+}
+
+PERFIL_POR_DEFECTO = 'desktop'
+
+PERFILES_PREDEFINIDOS: Dict[str, Dict[str, str]] = {
+    # Uso normal de la GUI: WAL con synchronous=NORMAL (solo fsync en checkpoints)
+    'desktop': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'cache_size': '-16384',      # 16 MiB (negativo = KiB)
+        'mmap_size': '67108864',     # 64 MiB
+        'temp_store': 'memory',
+        'busy_timeout': '5000',
+    },
+    # Mostrador de préstamos: cada préstamo/devolución debe sobrevivir a un corte de luz
+    'circulation-desk': {
+        'journal_mode': 'wal',
+        'synchronous': 'full',
+        'cache_size': '-8192',
+        'mmap_size': '33554432',
+        'temp_store': 'memory',
+        'busy_timeout': '10000',
+    },
+    # Cargas masivas: se prioriza velocidad; ante un corte se repite la importación
+    'bulk-import': {
+        'journal_mode': 'wal',
+        'synchronous': 'off',
+        'cache_size': '-65536',
+        'mmap_size': '268435456',
+        'temp_store': 'memory',
+        'busy_timeout': '30000',
+    },
+}
+
+
+def cargar_perfiles(config: Optional[configparser.ConfigParser] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Devuelve los perfiles disponibles: los predefinidos combinados con las
+    secciones [database.performance.<nombre>] de config.ini.
+    """
+    perfiles = {nombre: dict(ajustes) for nombre, ajustes in PERFILES_PREDEFINIDOS.items()}
+    if config is None:
+        return perfiles
+
+    prefijo = 'database.performance.'
+    for seccion in config.sections():
+        if not seccion.startswith(prefijo):
+            continue
+        nombre = seccion[len(prefijo):]
+        # Un perfil nuevo parte del perfil por defecto
+        base = perfiles.get(nombre, PERFILES_PREDEFINIDOS[PERFIL_POR_DEFECTO])
+        ajustes = dict(base)
+        for clave, valor in config[seccion].items():
+            ajustes[clave] = valor
+        perfiles[nombre] = validar_perfil(nombre, ajustes)
+    return perfiles
+
+
+def perfil_configurado(config: Optional[configparser.ConfigParser] = None) -> str:
+    """Nombre del perfil indicado en [database.performance], o el por defecto."""
+    if config is not None and config.has_section('database.performance'):
+        return config['database.performance'].get('perfil', PERFIL_POR_DEFECTO).strip()
+    return PERFIL_POR_DEFECTO
+
+
+def validar_perfil(nombre: str, ajustes: Dict[str, str]) -> Dict[str, str]:
+    """
+    Comprueba que el perfil solo use PRAGMAs conocidos con valores válidos.
+
+    Raises:
+        ValueError: Si hay un PRAGMA desconocido o un valor inválido.
+    """
+    validados = {}
+    for clave, valor in ajustes.items():
+        if clave not in PRAGMAS_PERFIL:
+            raise ValueError(f"Perfil '{nombre}': PRAGMA '{clave}' no soportado")
+        valor = str(valor).strip().lower()
+        if clave in VALORES_PERMITIDOS:
+            if valor not in VALORES_PERMITIDOS[clave]:
+                raise ValueError(
+                    f"Perfil '{nombre}': valor '{valor}' inválido para {clave} "
+                    f"(opciones: {', '.join(VALORES_PERMITIDOS[clave])})"
+                )
+        else:
+            try:
+                int(valor)
+            except ValueError:
+                raise ValueError(f"Perfil '{nombre}': {clave} debe ser un número entero, no '{valor}'")
+        validados[clave] = valor
+    return validados
+
+
+def aplicar_perfil(conn: sqlite3.Connection, ajustes: Dict[str, str]):
+    """Aplica los PRAGMAs del perfil a la conexión, en orden."""
+    for clave in PRAGMAS_PERFIL:
+        if clave in ajustes:
+            # Los valores ya pasaron por validar_perfil: solo palabras clave o enteros
+            conn.execute(f"PRAGMA {clave} = {ajustes[clave]}")
+
+
+def leer_ajustes(conn: sqlite3.Connection) -> Dict[str, object]:
+    """Lee los valores efectivos de los PRAGMAs del perfil en la conexión."""
+    nombres_synchronous = {0: 'off', 1: 'normal', 2: 'full', 3: 'extra'}
+    nombres_temp_store = {0: 'default', 1: 'file', 2: 'memory'}
+
+    efectivos = {}
+    for clave in PRAGMAS_PERFIL:
+        row = conn.execute(f"PRAGMA {clave}").fetchone()
+        efectivos[clave] = row[0] if row else None
+    efectivos['synchronous'] = nombres_synchronous.get(efectivos['synchronous'], efectivos['synchronous'])
+    efectivos['temp_store'] = nombres_temp_store.get(efectivos['temp_store'], efectivos['temp_store'])
+    return efectivos
@@ -0,0 +1,155 @@
+"""
+Refinamiento en memoria de búsquedas por texto.
+
+Mientras se escribe, cada término extiende al anterior ("gar" → "garc" →
+"garcía"). Cuando la búsqueda es por subcadena (LIKE), las coincidencias del
+término largo son un subconjunto de las del corto, así que se pueden obtener
+filtrando en memoria el resultado ya consultado en lugar de volver a la
+base de datos.
+
+Las funciones de este módulo aplican a objetos ya cargados el mismo
+criterio y el mismo orden que la consulta SQL correspondiente de DBManager,
+y devuelven None cuando el resultado no se puede deducir del anterior (el
+término no lo extiende, cambia de tipo de búsqueda o usa comodines de
+LIKE). Las búsquedas con FTS5 no se refinan: su orden sale de la relevancia
+bm25 del término nuevo, que depende de las estadísticas de todo el índice y
+no se puede calcular con las filas del resultado anterior.
+"""
+
+import string
+from typing import List, Optional, Tuple
+
+from database.normalizacion import clave_orden_es, normalizar
+from logic.models import Ejemplar, Libro, Usuario
+
+# LOWER() de SQLite solo convierte letras ASCII
+_MINUSCULAS_ASCII = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Separadores que se quitan del teléfono para indexar también sus dígitos seguidos
+SEPARADORES_TELEFONO = " -.()/+"
+
+
+def modo_busqueda_libros(termino: str, fts_disponible: bool) -> str:
+    """Tipo de búsqueda que hace DBManager.buscar_libros: 'codigo', 'fts' o 'like'."""
+    if termino.isdigit():
+        return 'codigo'
+    if fts_disponible and any(any(c.isalnum() for c in palabra) for palabra in termino.split()):
+        return 'fts'
+    return 'like'
+
+
+def _like(texto: Optional[str], termino: str) -> bool:
+    """LOWER(texto) LIKE LOWER('%termino%') para un término sin comodines."""
+    if texto is None:
+        return False
+    return termino.translate(_MINUSCULAS_ASCII) in texto.translate(_MINUSCULAS_ASCII)
+
+
+def _like_norm(texto: Optional[str], termino_norm: str) -> bool:
+    """columna_norm LIKE '%termino_norm%': ambos lados ya pasaron por normalizar()."""
+    if texto is None:
+        return False
+    return termino_norm in normalizar(texto)
+
+
+def _tiene_comodines(termino: str) -> bool:
+    return '%' in termino or '_' in termino
+
+
+def _prioridad_exacta(libro: Libro, termino: str) -> int:
+    """El CASE del ORDER BY de buscar_libros: coincidencia exacta de título, código o autor."""
+    buscado = normalizar(termino)
+    if normalizar(libro.titulo or '') == buscado:
+        return 1
+    if (libro.codigo or '').translate(_MINUSCULAS_ASCII) == termino.translate(_MINUSCULAS_ASCII):
+        return 2
+    if libro.autor and f"{normalizar(libro.autor.nombre)} {normalizar(libro.autor.apellido)}" == buscado:
+        return 3
+    return 4
+
+
+def _coincide_libro(libro: Libro, termino: str, modo: str) -> bool:
+    autor = libro.autor
+    if modo == 'codigo':
+        return _like(libro.codigo, termino)
+    # Título y autor por sus claves normalizadas; código e ISBN con LOWER()
+    termino_norm = normalizar(termino)
+    return (_like_norm(libro.titulo, termino_norm) or _like(libro.codigo, termino_norm)
+            or _like(libro.isbn, termino_norm)
+            or (autor is not None and (_like_norm(autor.nombre, termino_norm)
+                                       or _like_norm(autor.apellido, termino_norm)
+                                       or termino_norm in f"{normalizar(autor.nombre)} {normalizar(autor.apellido)}")))
+
+
+def refinar_libros(libros: List[Libro], anterior: str, nuevo: str,
+                   fts_disponible: bool) -> Optional[List[Libro]]:
+    """
+    Resultado de buscar_libros(nuevo) a partir del de buscar_libros(anterior),
+    ordenado como la consulta: coincidencia exacta, título (collation es) e id.
+    """
+    if not nuevo.startswith(anterior):
+        return None
+    modo = modo_busqueda_libros(nuevo, fts_disponible)
+    if modo == 'fts' or modo != modo_busqueda_libros(anterior, fts_disponible):
+        return None
+    if _tiene_comodines(nuevo):
+        return None
+    encontrados = [libro for libro in libros if _coincide_libro(libro, nuevo, modo)]
+    encontrados.sort(key=lambda libro: (_prioridad_exacta(libro, nuevo), clave_orden_es(libro.titulo or ''),
+                                        libro.id))
+    return encontrados
+
+
+def refinar_ejemplares(resultados: List[Tuple[Ejemplar, str]], anterior: str,
+                       nuevo: str) -> Optional[List[Tuple[Ejemplar, str]]]:
+    """Resultado de buscar_ejemplares_disponibles(nuevo) a partir del de (anterior); conserva el orden."""
+    if not nuevo.startswith(anterior) or _tiene_comodines(nuevo):
+        return None
+    nuevo_norm = normalizar(nuevo)
+    return [(ejemplar, titulo) for ejemplar, titulo in resultados
+            if _like(ejemplar.codigo_ejemplar, nuevo_norm) or _like_norm(titulo, nuevo_norm)]
+
+
+def _modo_busqueda_usuarios(termino: str, fts_disponible: bool) -> str:
+    """Tipo de búsqueda que hace DBManager.buscar_usuarios: 'fts' o 'like'."""
+    if fts_disponible and any(any(c.isalnum() for c in palabra) for palabra in termino.split()):
+        return 'fts'
+    return 'like'
+
+
+def _prioridad_usuario(usuario: Usuario, termino: str) -> int:
+    """El CASE del ORDER BY de buscar_usuarios: nombre o email exactos, luego nombre por prefijo."""
+    buscado = normalizar(termino)
+    nombre = normalizar(usuario.nombre or '')
+    if nombre == buscado or (usuario.email or '').translate(_MINUSCULAS_ASCII) == buscado:
+        return 1
+    if nombre.startswith(buscado):
+        return 2
+    return 3
+
+
+def _coincide_usuario(usuario: Usuario, termino: str) -> bool:
+    termino_norm = normalizar(termino)
+    return (_like_norm(usuario.nombre, termino_norm) or _like(usuario.email, termino_norm)
+            or _like(usuario.telefono, termino_norm))
+
+
+def refinar_usuarios(usuarios: List[Usuario], anterior: str, nuevo: str,
+                     fts_disponible: bool) -> Optional[List[Usuario]]:
+    """
+    Resultado de buscar_usuarios(nuevo) a partir del de buscar_usuarios(anterior),
+    ordenado como la consulta: coincidencia exacta y de prefijo, nombre
+    (collation es) e id.
+    """
+    anterior, nuevo = anterior.strip(), nuevo.strip()
+    if not nuevo.startswith(anterior):
+        return None
+    modo = _modo_busqueda_usuarios(nuevo, fts_disponible)
+    if modo == 'fts' or modo != _modo_busqueda_usuarios(anterior, fts_disponible):
+        return None
+    if _tiene_comodines(nuevo):
+        return None
+    encontrados = [usuario for usuario in usuarios if _coincide_usuario(usuario, nuevo)]
+    encontrados.sort(key=lambda usuario: (_prioridad_usuario(usuario, nuevo),
+                                          clave_orden_es(usuario.nombre or ''), usuario.id))
+    return encontrados
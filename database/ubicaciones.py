@@ -0,0 +1,111 @@
+"""
+Asignación de ubicaciones físicas (nivel y posición) de los ejemplares.
+
+Cada estantería se divide en niveles de POSICIONES_POR_NIVEL posiciones y sus
+huecos se numeran desde 0: hueco = (nivel - 1) * POSICIONES_POR_NIVEL + posicion - 1.
+Cada ejemplar guarda su ubicación en las columnas estanteria_id, nivel y
+posicion (índice único idx_ejemplares_ubicacion); los huecos libres son los
+que ningún ejemplar ocupa. Así, al eliminar o mover un ejemplar su hueco queda
+disponible para el siguiente, en lugar de derivar la posición de un conteo.
+
+El texto "Estantería X - Nivel N - Pos P" no se guarda: se arma al leer
+(texto_ubicacion), por lo que renombrar una estantería no toca sus ejemplares.
+ejemplares.ubicacion_fisica solo conserva ubicaciones escritas a mano.
+
+Las funciones reciben el cursor de una transacción en curso
+(DBManager.execute_transaction) y no hacen commit.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+POSICIONES_POR_NIVEL = 10
+
+
+def nivel_posicion(hueco: int) -> Tuple[int, int]:
+    """Convierte un número de hueco en (nivel, posición), ambos desde 1."""
+    return hueco // POSICIONES_POR_NIVEL + 1, hueco % POSICIONES_POR_NIVEL + 1
+
+
+def texto_ubicacion(nombre_estanteria: str, nivel: int, posicion: int) -> str:
+    """Texto de ubicación que se muestra en la interfaz."""
+    return f"Estantería {nombre_estanteria} - Nivel {nivel} - Pos {posicion}"
+
+
+def hueco(nivel: int, posicion: int) -> int:
+    """Convierte (nivel, posición) en número de hueco."""
+    return (nivel - 1) * POSICIONES_POR_NIVEL + posicion - 1
+
+
+def ubicacion_de_fila(row) -> Optional[str]:
+    """
+    Texto de ubicación de una fila de ejemplares que incluya la columna
+    ubicacion_estanteria (nombre de la estantería, ver DBManager.SQL_EJEMPLARES).
+    """
+    if row['ubicacion_fisica']:
+        return row['ubicacion_fisica']
+    if row['nivel'] is not None and row['ubicacion_estanteria'] is not None:
+        return texto_ubicacion(row['ubicacion_estanteria'], row['nivel'], row['posicion'])
+    return None
+
+
+def huecos_libres(cursor, estanteria_id: int, cantidad: int) -> List[int]:
+    """Devuelve los `cantidad` huecos libres más bajos de una estantería."""
+    cursor.execute("""SELECT nivel, posicion FROM ejemplares
+                      WHERE estanteria_id = ? ORDER BY nivel, posicion""",
+                   (estanteria_id,))
+    libres = []
+    siguiente = 0
+    for ocupado in (hueco(nivel, posicion) for nivel, posicion in cursor.fetchall()):
+        if len(libres) >= cantidad:
+            break
+        libres.extend(range(siguiente, min(ocupado, siguiente + cantidad - len(libres))))
+        siguiente = ocupado + 1
+    libres.extend(range(siguiente, siguiente + cantidad - len(libres)))
+    return libres
+
+
+def liberar_ubicaciones(cursor, ejemplar_ids: Sequence[int]):
+    """Libera los huecos que ocupan los ejemplares indicados."""
+    cursor.executemany("UPDATE ejemplares SET estanteria_id = NULL, nivel = NULL, posicion = NULL WHERE id = ?",
+                       [(ejemplar_id,) for ejemplar_id in ejemplar_ids])
+
+
+def asignar_ubicaciones(cursor, estanteria_id: int, ejemplar_ids: Sequence[int]) -> List[str]:
+    """
+    Ubica los ejemplares en los huecos libres más bajos de la estantería,
+    en el orden recibido. Reemplaza cualquier ubicación escrita a mano.
+
+    Si un ejemplar ya tenía hueco (en esta u otra estantería) se libera antes.
+
+    Returns:
+        List[str]: Texto de ubicación asignado a cada ejemplar.
+
+    Raises:
+        ValueError: Si la estantería no existe.
+    """
+    if not ejemplar_ids:
+        return []
+
+    cursor.execute("SELECT nombre FROM estanterias WHERE id = ?", (estanteria_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise ValueError(f"Estantería {estanteria_id} no existe")
+    nombre_estanteria = row[0]
+
+    liberar_ubicaciones(cursor, ejemplar_ids)
+    ubicaciones = [nivel_posicion(libre)
+                   for libre in huecos_libres(cursor, estanteria_id, len(ejemplar_ids))]
+    cursor.executemany("""UPDATE ejemplares
+                          SET estanteria_id = ?, nivel = ?, posicion = ?, ubicacion_fisica = NULL
+                          WHERE id = ?""",
+                       [(estanteria_id, nivel, posicion, ejemplar_id)
+                        for (nivel, posicion), ejemplar_id in zip(ubicaciones, ejemplar_ids)])
+
+    return [texto_ubicacion(nombre_estanteria, nivel, posicion) for nivel, posicion in ubicaciones]
+
+
+def reubicar_libro(cursor, libro_id: int, estanteria_id: int) -> List[str]:
+    """Mueve todos los ejemplares de un libro a huecos libres de otra estantería."""
+    cursor.execute("SELECT id FROM ejemplares WHERE libro_id = ? ORDER BY codigo_ejemplar", (libro_id,))
+    ejemplar_ids = [row[0] for row in cursor.fetchall()]
+    return asignar_ubicaciones(cursor, estanteria_id, ejemplar_ids)
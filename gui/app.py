@@ -3,6 +3,7 @@ import tkinter as tk
 import os
 from logic.library_manager import GestorBiblioteca
 from gui.frames.main_frame import MainFrame
+from gui.utils.tareas import EjecutorTareas
 
 class App(ctk.CTk):
     def __init__(self):
@@ -23,6 +24,10 @@ class App(ctk.CTk):
         
         self.gestor = GestorBiblioteca()
         
+        # Las consultas de los frames corren en segundo plano; los resultados
+        # vuelven al hilo de Tk a través de este ejecutor
+        self.tareas = EjecutorTareas(self)
+        
         self.current_frame = None
         self.switch_frame(MainFrame)
 
@@ -52,5 +57,6 @@ class App(ctk.CTk):
             pass  
 
     def destroy(self):
+        self.tareas.cerrar()
         self.gestor.cerrar()
         super().destroy()
\ No newline at end of file
@@ -7,7 +7,72 @@ if TYPE_CHECKING:
     from gui.app import App
     from logic.library_manager import GestorBiblioteca
 
-class BaseFrame(ctk.CTkFrame):
+class CargaEnSegundoPlano:
+    """
+    Utilidades para cargar datos sin bloquear la interfaz.
+
+    La consulta corre en el ejecutor de tareas de la App y el resultado se
+    dibuja en el hilo de Tk. Mientras tanto el contenedor muestra un
+    indicador de carga.
+    """
+
+    def _color_carga(self, nombre: str, por_defecto: str) -> str:
+        return getattr(self, 'colors', {}).get(nombre, por_defecto)
+
+    def limpiar_contenedor(self, contenedor):
+        """Destruye todos los widgets hijos del contenedor."""
+        for widget in contenedor.winfo_children():
+            widget.destroy()
+
+    def mostrar_cargando(self, contenedor, texto: str = "⏳ Cargando..."):
+        """Reemplaza el contenido del contenedor por un indicador de carga."""
+        self.limpiar_contenedor(contenedor)
+        ctk.CTkLabel(contenedor,
+                    text=texto,
+                    font=("Segoe UI", 14),
+                    text_color=self._color_carga('secondary', '#64748B')).pack(pady=40)
+
+    def mostrar_error_carga(self, contenedor, error: Exception):
+        """Reemplaza el contenido del contenedor por un mensaje de error."""
+        if not contenedor.winfo_exists():
+            return
+        self.limpiar_contenedor(contenedor)
+        ctk.CTkLabel(contenedor,
+                    text=f"❌ No se pudieron cargar los datos:\n{error}",
+                    font=("Segoe UI", 13),
+                    text_color=self._color_carga('danger', '#F23030'),
+                    wraplength=600).pack(pady=40)
+
+    def cargar_en_segundo_plano(self, funcion, al_terminar, *args, contenedor=None,
+                                texto_carga: str = "⏳ Cargando...", clave: str = None,
+                                al_fallar=None, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) fuera del hilo de Tk y llama a
+        al_terminar(resultado) cuando termina.
+
+        Args:
+            contenedor: Si se indica, muestra un indicador de carga mientras
+                tanto, y el error en él si la consulta falla.
+            clave: Una nueva carga con la misma clave cancela la anterior
+                (p. ej. búsquedas mientras se escribe).
+            al_fallar: Callback de error; por defecto se muestra en el contenedor.
+        """
+        if contenedor is not None:
+            self.mostrar_cargando(contenedor, texto_carga)
+            if al_fallar is None:
+                al_fallar = lambda error: self.mostrar_error_carga(contenedor, error)
+
+        return self.master.tareas.ejecutar(
+            funcion, *args,
+            al_terminar=al_terminar,
+            al_fallar=al_fallar,
+            clave=clave,
+            propietario=self,
+            **kwargs
+        )
+
+
+class BaseFrame(CargaEnSegundoPlano, ctk.CTkFrame):
     """Clase base para todos los frames con fondo de imagen común."""
     
     def __init__(self, master: 'App', gestor: 'GestorBiblioteca', **kwargs):
@@ -15,8 +15,6 @@ class BookFormFrame(BaseFrame):
         self.is_edit_mode = self.libro is not None
 
         self.setup_interface()
-        if self.is_edit_mode:
-            self.load_book_data()
 
     def setup_interface(self):
         """Configura la interfaz del formulario de libro."""
@@ -28,10 +26,23 @@ class BookFormFrame(BaseFrame):
         form_frame.pack(padx=40, pady=10, fill="both", expand=True)
         form_frame.grid_columnconfigure(1, weight=1)
 
-        self.estanterias = self.gestor.get_todas_estanterias()
+        self.estanterias = []
         self.selected_shelf_id = ctk.StringVar()
         self.capacidad_info_label = None
 
+        # El formulario se arma cuando llegan las estanterías
+        self.cargar_en_segundo_plano(
+            self.gestor.get_todas_estanterias,
+            lambda estanterias: self.construir_formulario(form_frame, estanterias),
+            contenedor=form_frame,
+            texto_carga="⏳ Cargando estanterías..."
+        )
+
+    def construir_formulario(self, form_frame, estanterias):
+        """Crea los campos del formulario con las estanterías ya cargadas."""
+        self.limpiar_contenedor(form_frame)
+        self.estanterias = estanterias
+
         # Verificar si hay estanterías antes de mostrar el formulario
         if not self.estanterias and not self.is_edit_mode:
             self.mostrar_advertencia_sin_estanterias(form_frame)
@@ -97,6 +108,9 @@ class BookFormFrame(BaseFrame):
         ctk.CTkButton(button_frame, text="💾 Guardar", command=self.guardar, width=150, height=40).pack(pady=10)
         self.create_back_button()
 
+        if self.is_edit_mode:
+            self.load_book_data()
+
     def load_book_data(self):
         """Carga los datos del libro en el formulario en modo edición."""
         if not self.libro:
@@ -193,31 +207,27 @@ class BookFormFrame(BaseFrame):
         if self.is_edit_mode or not self.capacidad_info_label:
             return
         
-        try:
-            # Buscar la estantería seleccionada
-            estanteria = next((e for e in self.estanterias if e.nombre == shelf_name), None)
-            
-            if not estanteria:
-                self.capacidad_info_label.configure(text="")
-                return
-            
-            # Obtener ejemplares ocupados
-            ocupados = self.gestor.get_count_ejemplares_en_estanteria(estanteria.id)
-            disponibles = estanteria.capacidad - ocupados
-            
-            # Actualizar label con información
-            if disponibles > 0:
-                self.capacidad_info_label.configure(
-                    text=f"📊 Capacidad disponible: {disponibles} ejemplares (máximo a agregar)",
-                    text_color=self.colors['success']
-                )
-            else:
-                self.capacidad_info_label.configure(
-                    text=f"⚠️ Estantería llena (0 espacios disponibles)",
-                    text_color=self.colors['danger']
-                )
-        except Exception as e:
+        # Buscar la estantería seleccionada
+        estanteria = next((e for e in self.estanterias if e.nombre == shelf_name), None)
+        
+        if not estanteria:
             self.capacidad_info_label.configure(text="")
+            return
+
+        # La ocupación llega con la estantería (contador mantenido en la base de datos)
+        disponibles = estanteria.libres
+        
+        # Actualizar label con información
+        if disponibles > 0:
+            self.capacidad_info_label.configure(
+                text=f"📊 Capacidad disponible: {disponibles} ejemplares (máximo a agregar)",
+                text_color=self.colors['success']
+            )
+        else:
+            self.capacidad_info_label.configure(
+                text=f"⚠️ Estantería llena (0 espacios disponibles)",
+                text_color=self.colors['danger']
+            )
 
     def mostrar_advertencia_sin_estanterias(self, parent_frame):
         """Muestra una advertencia amigable cuando no hay estanterías."""
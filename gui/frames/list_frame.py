@@ -1,8 +1,11 @@
 import customtkinter as ctk
 from tkinter import messagebox
-from typing import TYPE_CHECKING, List
-from logic.models import Libro
+from typing import TYPE_CHECKING, List, Optional
+from logic.models import Libro, Ejemplar
+from database.paginacion import Pagina
 from gui.utils.dialogs import confirmar
+from gui.utils.tabla_virtual import TablaVirtual, Columna, Accion
+from .base_frame import CargaEnSegundoPlano
 
 # Importaciones para navegación
 from .book_form_frame import BookFormFrame
@@ -11,107 +14,102 @@ if TYPE_CHECKING:
     from gui.app import App
     from logic.library_manager import GestorBiblioteca
 
-class ListFrame(ctk.CTkFrame):
-    def __init__(self, master: 'App', gestor: 'GestorBiblioteca', titulo: str, libros: List[Libro]):
+class ListFrame(CargaEnSegundoPlano, ctk.CTkFrame):
+    def __init__(self, master: 'App', gestor: 'GestorBiblioteca', titulo: str, libros: List[Libro],
+                 siguiente: Optional[str] = None, estado_ejemplar: Optional[str] = None):
+        """
+        Args:
+            libros: Primera página de libros a mostrar (ordenada por título).
+            siguiente: Cursor de la página siguiente (Pagina.siguiente); las
+                demás páginas se piden solas al desplazarse.
+            estado_ejemplar: Filtro con el que se pidieron las páginas.
+        """
         super().__init__(master)
         self.master = master
         self.gestor = gestor
         self.titulo = titulo 
+        self.estado_ejemplar = estado_ejemplar
 
         # Título dinámico (ej: "Libros Disponibles")
         ctk.CTkLabel(self, text=titulo, font=("Arial", 20, "bold")).pack(pady=20)
 
-        # Frame con scroll para la lista de libros
-        scroll_frame = ctk.CTkScrollableFrame(self)
-        scroll_frame.pack(fill="both", expand=True, padx=20, pady=10)
-
-        # Encabezados de la tabla
-        headers = ["Código", "Título", "Autor", "Disponibles", "Acciones"]
-        for i, header in enumerate(headers):
-            ctk.CTkLabel(scroll_frame, text=header, font=("Arial", 12, "bold")).grid(row=0, column=i, padx=10, pady=5)
-
-        # Llenar la tabla con los libros
-        for row_num, libro in enumerate(libros, start=1):
-            ctk.CTkLabel(scroll_frame, text=libro.codigo).grid(row=row_num, column=0, padx=10)
-            ctk.CTkLabel(scroll_frame, text=libro.titulo).grid(row=row_num, column=1, padx=10)
-            ctk.CTkLabel(scroll_frame, text=libro.autor.nombre_completo if libro.autor else "N/A").grid(row=row_num, column=2, padx=10)
-            
-            # Mostrar disponibles con color según el estado
-            disponibles = libro.cantidad_disponibles
-            prestados = libro.cantidad_prestados
-
-            color_disponibles = "green" if disponibles > 0 else "red"
-            
-            # Creamos el texto a mostrar
-            disponibles_text = f"{disponibles}"
-            if prestados > 0:
-                 disponibles_text += f" (Prestados: {prestados})"
-
-            ctk.CTkLabel(scroll_frame, text=disponibles_text, text_color=color_disponibles).grid(row=row_num, column=3, padx=10)
-
-            # Frame para los botones de acción
-            actions_frame = ctk.CTkFrame(scroll_frame, fg_color="transparent")
-            actions_frame.grid(row=row_num, column=4, padx=10)
-
-            # Botón Prestar - Solo activo si hay ejemplares disponibles
-            if disponibles > 0:
-                prestar_btn = ctk.CTkButton(
-                    actions_frame, 
-                    text="📤 Prestar", 
-                    width=80, 
-                    fg_color="green",
-                    hover_color="darkgreen",
-                    command=lambda l=libro: self.prestar(l)
-                )
-            else:
-                prestar_btn = ctk.CTkButton(
-                    actions_frame, 
-                    text="❌ Agotado", 
-                    width=80, 
-                    fg_color="gray",
-                    hover_color="gray",
-                    state="disabled"
-                )
-            prestar_btn.pack(side="left", padx=2)
-            
-            # Botón Devolver - Solo activo si hay ejemplares prestados
-            if prestados > 0:
-                devolver_btn = ctk.CTkButton(
-                    actions_frame, 
-                    text="📥 Devolver", 
-                    width=80, 
-                    fg_color="orange",
-                    hover_color="darkorange",
-                    command=lambda l=libro: self.devolver(l)
-                )
-            else:
-                devolver_btn = ctk.CTkButton(
-                    actions_frame, 
-                    text="➖ N/A", 
-                    width=80, 
-                    fg_color="gray",
-                    hover_color="gray",
-                    state="disabled"
-                )
-            devolver_btn.pack(side="left", padx=2)
-
-            # Botones de acción
-            ctk.CTkButton(actions_frame, text="📋 Detalles", width=70, fg_color="blue", hover_color="darkblue", command=lambda l=libro: self.ver_ejemplares(l)).pack(side="left", padx=2)
-            ctk.CTkButton(actions_frame, text="✏️ Editar", width=70, fg_color="purple", command=lambda l=libro: self.editar_libro(l)).pack(side="left", padx=2)
-            ctk.CTkButton(actions_frame, text="🗑️ Eliminar", width=70, fg_color="red", command=lambda l=libro: self.eliminar_libro(l)).pack(side="left", padx=2)
+        # Tabla virtualizada: solo existen widgets para las filas visibles
+        self.tabla = TablaVirtual(
+            self, master.tareas,
+            columnas=[
+                Columna("Código", lambda libro: libro.codigo, ancho=110, orden='codigo'),
+                Columna("Título", lambda libro: libro.titulo, ancho=260, orden='titulo'),
+                Columna("Autor", lambda libro: libro.autor.nombre_completo if libro.autor else "N/A", ancho=170),
+                Columna("Disponibles", self._texto_disponibles, ancho=150,
+                        color=lambda libro: "green" if libro.cantidad_disponibles > 0 else "red"),
+            ],
+            acciones=[
+                Accion("📤 Prestar", self.prestar, color="green", color_hover="darkgreen",
+                       activa=lambda libro: libro.cantidad_disponibles > 0, texto_inactiva="❌ Agotado"),
+                Accion("📥 Devolver", self.devolver, color="orange", color_hover="darkorange",
+                       activa=lambda libro: libro.cantidad_prestados > 0, texto_inactiva="➖ N/A"),
+                Accion("📋 Detalles", self.ver_ejemplares, ancho=70, color="blue", color_hover="darkblue"),
+                Accion("✏️ Editar", self.editar_libro, ancho=70, color="purple"),
+                Accion("🗑️ Eliminar", self.eliminar_libro, ancho=70, color="red"),
+            ],
+            proveedor=self._consultar_pagina,
+            orden='titulo',
+            inicial=Pagina(libros, siguiente),
+            texto_vacio="No hay libros para mostrar."
+        )
+        self.tabla.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # Cada acción sobre un libro (aquí o en otra vista) llega como aviso
+        # del gestor y solo se actualiza la fila de ese libro
+        self.gestor.suscribir_libros(self._al_cambiar_libro)
 
         # Botón para volver al menú principal
         ctk.CTkButton(self, text="Volver", fg_color="gray", command=self._go_to_main_frame).pack(pady=20)
 
+    def _consultar_pagina(self, cursor: Optional[str], orden: str, descendente: bool) -> Pagina:
+        return self.gestor.get_pagina_libros(cursor, estado_ejemplar=self.estado_ejemplar, orden=orden,
+                                             descendente=descendente, resumen=True)
+
+    def destroy(self):
+        self.gestor.cancelar_suscripcion_libros(self._al_cambiar_libro)
+        super().destroy()
+
+    def _al_cambiar_libro(self, libro_id: int, resumen: Optional[Libro]):
+        """Actualiza la fila del libro, o la quita si se eliminó o ya no cumple el filtro."""
+        if resumen is None or not self._cumple_filtro(resumen):
+            self.tabla.quitar(libro_id)
+        else:
+            self.tabla.reemplazar(libro_id, resumen)
+
+    def _cumple_filtro(self, libro: Libro) -> bool:
+        if self.estado_ejemplar == 'disponible':
+            return libro.cantidad_disponibles > 0
+        if self.estado_ejemplar == 'prestado':
+            return libro.cantidad_prestados > 0
+        return True
+
+    @staticmethod
+    def _texto_disponibles(libro: Libro) -> str:
+        texto = f"{libro.cantidad_disponibles}"
+        if libro.cantidad_prestados > 0:
+            texto += f" (Prestados: {libro.cantidad_prestados})"
+        return texto
+
     def _go_to_main_frame(self):
         """Navega al MainFrame, usando una importación local para evitar ciclos."""
         from .main_frame import MainFrame
         self.master.switch_frame(MainFrame)
 
     def prestar(self, libro: Libro):
-        # Verificar si hay usuarios registrados
-        usuarios_disponibles = self.gestor.get_todos_usuarios()
-        if not usuarios_disponibles:
+        # Verificar si hay usuarios registrados antes de prestar (con el contador, sin cargarlos)
+        self.cargar_en_segundo_plano(
+            lambda: self.gestor.get_resumen_biblioteca()['usuarios_activos'] > 0,
+            lambda hay_usuarios: self._prestar_con_usuarios(libro, hay_usuarios),
+            al_fallar=lambda e: messagebox.showerror("Error", str(e))
+        )
+
+    def _prestar_con_usuarios(self, libro: Libro, hay_usuarios: bool):
+        if not hay_usuarios:
             respuesta = confirmar(
                 "Sin Usuarios Registrados",
                 "⚠️ No hay usuarios registrados en el sistema.\n\n"
@@ -125,10 +123,9 @@ class ListFrame(ctk.CTkFrame):
             return
         
         try:
+            # La fila se actualiza con el aviso del gestor (_al_cambiar_libro)
             self.gestor.prestar_libro(libro.codigo)
             messagebox.showinfo("Éxito", f"Se ha prestado un ejemplar de '{libro.titulo}'.")
-            # Recargar la vista actual para reflejar el cambio
-            self.recargar_vista_actual()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -136,34 +133,12 @@ class ListFrame(ctk.CTkFrame):
         try:
             self.gestor.devolver_libro(libro.codigo)
             messagebox.showinfo("Éxito", f"Se ha devuelto un ejemplar de '{libro.titulo}'.")
-            # Recargar la vista actual
-            self.recargar_vista_actual()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def recargar_vista_actual(self):
-        """Recarga la vista actual detectando automáticamente qué tipo de lista mostrar."""
-        try:
-            # Detectar qué vista estamos mostrando según el título
-            titulo_actual = self.titulo.lower()
-            
-            if "disponible" in titulo_actual:
-                # Estamos en la vista de libros disponibles
-                libros = self.gestor.get_libros_disponibles()
-                titulo = "Libros Disponibles"
-            elif "prestado" in titulo_actual:
-                # Estamos en la vista de libros prestados
-                libros = self.gestor.get_libros_prestados()
-                titulo = "Libros Prestados"
-            else:
-                # Vista genérica, obtener todos los libros
-                libros = self.gestor.get_todos_los_libros()
-                titulo = self.titulo
-            
-            # Recargar el frame con los datos correctos
-            self.master.switch_frame(self.__class__, titulo=titulo, libros=libros)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al recargar la vista: {str(e)}")
+        """Vuelve a pedir el listado desde la primera página, con el orden y el filtro actuales."""
+        self.tabla.recargar()
 
     def ver_ejemplares(self, libro: Libro):
         """Muestra los ejemplares individuales de un libro en una ventana emergente."""
@@ -180,62 +155,52 @@ class ListFrame(ctk.CTkFrame):
         top_actions_frame = ctk.CTkFrame(ejemplares_window, fg_color="transparent")
         top_actions_frame.pack(pady=5, padx=20, fill="x")
 
-        # Frame para la lista de ejemplares
-        scroll_frame = ctk.CTkScrollableFrame(ejemplares_window)
-        scroll_frame.pack(pady=10, padx=10, fill="both", expand=True)
+        # Tabla de ejemplares, paginada por código de ejemplar
+        tabla = TablaVirtual(
+            ejemplares_window, self.master.tareas,
+            columnas=[
+                Columna("Código", lambda ejemplar: ejemplar.codigo_ejemplar, ancho=130),
+                Columna("Estado", self._texto_estado_ejemplar, ancho=110,
+                        color=lambda ejemplar: 'green' if ejemplar.estado == 'disponible' else 'orange'),
+                Columna("Ubicación", lambda ejemplar: ejemplar.ubicacion_fisica or "N/A", ancho=230),
+                Columna("Adquisición", lambda ejemplar: str(ejemplar.fecha_adquisicion), ancho=100),
+            ],
+            acciones=[
+                Accion("🗑️", lambda ejemplar: self.eliminar_ejemplar_action(ejemplar, libro, tabla),
+                       ancho=30, color="red", activa=lambda ejemplar: ejemplar.estado == 'disponible',
+                       texto_inactiva="🚫"),
+            ],
+            proveedor=lambda cursor, orden, descendente: self.gestor.get_pagina_ejemplares(cursor, libro_id=libro.id),
+            texto_vacio="Este libro no tiene ejemplares."
+        )
+        tabla.pack(pady=10, padx=10, fill="both", expand=True)
 
         ctk.CTkButton(top_actions_frame, text="➕ Añadir Nuevo Ejemplar", fg_color="green",
-                     command=lambda: self.agregar_ejemplar_action(libro, ejemplares_window, scroll_frame)).pack(side="left")
-
-        self.redraw_ejemplares_list(scroll_frame, libro)
+                     command=lambda: self.agregar_ejemplar_action(libro, ejemplares_window, tabla)).pack(side="left")
 
         ctk.CTkButton(ejemplares_window, text="Cerrar", command=ejemplares_window.destroy).pack(pady=10)
 
-    def redraw_ejemplares_list(self, frame, libro):
-        """Limpia y redibuja la lista de ejemplares."""
-        for widget in frame.winfo_children():
-            widget.destroy()
-
-        headers = ["Código", "Estado", "Ubicación", "Adquisición", "Acciones"]
-        for i, header in enumerate(headers):
-            ctk.CTkLabel(frame, text=header, font=("Arial", 12, "bold")).grid(row=0, column=i, padx=10, pady=5)
-
-        ejemplares = self.gestor.get_ejemplares_por_libro(libro.id)
-        for row_num, ejemplar in enumerate(ejemplares, start=1):
-            ctk.CTkLabel(frame, text=ejemplar.codigo_ejemplar).grid(row=row_num, column=0, padx=10, pady=2)
-            
-            estado_color = 'green' if ejemplar.estado == 'disponible' else 'orange'
-            ctk.CTkLabel(frame, text=f"{'✅' if ejemplar.estado == 'disponible' else '📤'} {ejemplar.estado.title()}", text_color=estado_color).grid(row=row_num, column=1, padx=10, pady=2)
-            
-            ctk.CTkLabel(frame, text=ejemplar.ubicacion_fisica or "N/A").grid(row=row_num, column=2, padx=10, pady=2)
-            ctk.CTkLabel(frame, text=str(ejemplar.fecha_adquisicion)).grid(row=row_num, column=3, padx=10, pady=2)
-            
-            actions_frame = ctk.CTkFrame(frame, fg_color="transparent")
-            actions_frame.grid(row=row_num, column=4, padx=10)
-
-            if ejemplar.estado == 'disponible':
-                ctk.CTkButton(actions_frame, text="🗑️", fg_color="red", width=30,
-                             command=lambda e=ejemplar, l=libro, f=frame: self.eliminar_ejemplar_action(e, l, f)).pack()
-            else:
-                ctk.CTkButton(actions_frame, text="🚫", fg_color="gray", width=30, state="disabled").pack()
+    @staticmethod
+    def _texto_estado_ejemplar(ejemplar: Ejemplar) -> str:
+        return f"{'✅' if ejemplar.estado == 'disponible' else '📤'} {ejemplar.estado.title()}"
 
-    def agregar_ejemplar_action(self, libro, window, scroll_frame):
+    def agregar_ejemplar_action(self, libro, window, tabla: TablaVirtual):
         try:
             if confirmar("Confirmar", f"¿Desea añadir un nuevo ejemplar para '{libro.titulo}'?", parent=window):
                 self.gestor.agregar_nuevo_ejemplar(libro.id)
                 messagebox.showinfo("Éxito", "Nuevo ejemplar añadido correctamente.", parent=window)
-                self.redraw_ejemplares_list(scroll_frame, libro) 
+                tabla.recargar()
         except Exception as e:
             messagebox.showerror("Error", str(e), parent=window)
 
-    def eliminar_ejemplar_action(self, ejemplar, libro, frame):
+    def eliminar_ejemplar_action(self, ejemplar, libro, tabla: TablaVirtual):
         try:
-            if confirmar("Confirmar Eliminación", f"¿Está seguro de eliminar el ejemplar {ejemplar.codigo_ejemplar}?", parent=frame):
+            if confirmar("Confirmar Eliminación", f"¿Está seguro de eliminar el ejemplar {ejemplar.codigo_ejemplar}?", parent=tabla):
                 self.gestor.eliminar_ejemplar(ejemplar.id)
-                messagebox.showinfo("Éxito", "Ejemplar eliminado.", parent=frame)
-                self.redraw_ejemplares_list(frame, libro)
+                messagebox.showinfo("Éxito", "Ejemplar eliminado.", parent=tabla)
+                tabla.recargar()
         except Exception as e:
-            messagebox.showerror("Error", str(e), parent=frame)
+            messagebox.showerror("Error", str(e), parent=tabla)
 
     def prestar_ejemplar_individual(self, ejemplar, window):
         """Presta un ejemplar específico."""
@@ -252,11 +217,6 @@ class ListFrame(ctk.CTkFrame):
                            f"📤 Gestionar Préstamos → 📋 Préstamos Activos\n\n"
                            f"Ejemplar: {ejemplar.codigo_ejemplar}")
         window.destroy()
-        try:
-            libros = self.gestor.get_libros_disponibles()
-            self.master.switch_frame(ListFrame, titulo="Libros Disponibles", libros=libros)
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
 
     def editar_libro(self, libro: Libro):
         """Abre la ventana de edición para el libro."""
@@ -273,16 +233,5 @@ class ListFrame(ctk.CTkFrame):
                         parent=self):
                 self.gestor.eliminar_libro_y_ejemplares(libro.id)
                 messagebox.showinfo("Éxito", "Libro eliminado correctamente.")
-                
-                # Recargar la vista según el título actual
-                if "Disponibles" in self.titulo:
-                    libros_actualizados = self.gestor.get_libros_disponibles()
-                elif "Prestados" in self.titulo:
-                    libros_actualizados = self.gestor.get_libros_prestados()
-                else:
-                    # Por defecto, buscar todos
-                    libros_actualizados = self.gestor.get_todos_los_libros()
-                
-                self.master.switch_frame(ListFrame, titulo=self.titulo, libros=libros_actualizados)
         except Exception as e:
-            messagebox.showerror("Error", str(e))
\ No newline at end of file
+            messagebox.showerror("Error", str(e))
@@ -2,14 +2,22 @@ import customtkinter as ctk
 from typing import TYPE_CHECKING, List
 from tkinter import messagebox, ttk
 from datetime import date, timedelta
-from logic.models import Prestamo, Usuario, Ejemplar
+from logic.models import PrestamoDetalle, Usuario, Ejemplar
 from gui.utils.dialogs import confirmar
+from gui.utils.tabla_virtual import TablaVirtual, Columna, Accion
+from gui.utils.autocompletado import Autocompletado, ListaSugerencias
+from .base_frame import CargaEnSegundoPlano
 
 if TYPE_CHECKING:
     from gui.app import App
     from logic.library_manager import GestorBiblioteca
 
-class LoansFrame(ctk.CTkFrame):
+# Usuarios y ejemplares pedidos por búsqueda, y sugerencias que se muestran de ellos
+LIMITE_BUSQUEDA_USUARIOS = 50
+LIMITE_BUSQUEDA_EJEMPLARES = 50
+SUGERENCIAS_VISIBLES = 10
+
+class LoansFrame(CargaEnSegundoPlano, ctk.CTkFrame):
     def __init__(self, master: 'App', gestor: 'GestorBiblioteca'):
         super().__init__(master)
         self.master = master
@@ -54,17 +62,24 @@ class LoansFrame(ctk.CTkFrame):
 
     def mostrar_nuevo_prestamo(self):
         """Muestra el formulario para crear un nuevo préstamo."""
+        def consultar():
+            # Basta con saber si hay alguno: los contadores del dashboard lo dicen sin cargar filas
+            resumen = self.gestor.get_resumen_biblioteca()
+            return resumen['usuarios_activos'] > 0, resumen['ejemplares_disponibles'] > 0
+
+        self.cargar_en_segundo_plano(consultar, lambda datos: self._dibujar_nuevo_prestamo(*datos),
+                                     contenedor=self.content_frame, clave="vista_prestamos")
+
+    def _dibujar_nuevo_prestamo(self, hay_usuarios: bool, hay_ejemplares: bool):
         self.limpiar_content_frame()
         
         # Verificar si hay usuarios registrados
-        usuarios_disponibles = self.gestor.get_todos_usuarios()
-        if not usuarios_disponibles:
+        if not hay_usuarios:
             self.mostrar_advertencia_sin_usuarios()
             return
         
         # Verificar si hay ejemplares disponibles
-        ejemplares_disponibles = self.gestor.db.get_ejemplares_disponibles()
-        if not ejemplares_disponibles:
+        if not hay_ejemplares:
             self.mostrar_advertencia_sin_ejemplares()
             return
         
@@ -79,16 +94,29 @@ class LoansFrame(ctk.CTkFrame):
         ctk.CTkLabel(form_frame, text="Usuario *").grid(row=0, column=0, padx=10, pady=5, sticky="w")
         
         # Campo de búsqueda de usuario con autocompletado
-        self.usuario_entry = ctk.CTkEntry(form_frame, placeholder_text="Buscar por nombre...", width=300)
+        self.usuario_entry = ctk.CTkEntry(form_frame, placeholder_text="Buscar por nombre, email o teléfono...", width=300)
         self.usuario_entry.grid(row=0, column=1, padx=10, pady=5, sticky="w")
 
-        self.sugerencias_frame = ctk.CTkScrollableFrame(form_frame, width=280, height=100)
+        self.sugerencias_frame = ListaSugerencias(form_frame, texto=lambda u: f"{u.id} - {u.nombre}",
+                                                  al_elegir=self.seleccionar_usuario, width=280, height=100)
 
-        self.usuario_entry.bind("<KeyRelease>", self.actualizar_sugerencias_usuario)
-        
         # Variable para almacenar el ID del usuario seleccionado
         self.usuario_seleccionado_id = None
-        self.usuarios_cache = usuarios_disponibles
+
+        # Los usuarios se buscan en el índice a medida que se escribe, sin cargar el padrón
+        self.autocompletado_usuario = Autocompletado(
+            self.usuario_entry, self.master.tareas,
+            buscar=lambda termino: self.gestor.buscar_usuarios(termino, limite=LIMITE_BUSQUEDA_USUARIOS),
+            al_resultados=self.actualizar_sugerencias_usuario,
+            al_vaciar=lambda: self.actualizar_sugerencias_usuario([]),
+            refinar=self.gestor.refinar_busqueda_usuarios,
+            limite=LIMITE_BUSQUEDA_USUARIOS,
+            visibles=SUGERENCIAS_VISIBLES,
+            # El orden pone primero las coincidencias exactas del término nuevo
+            refinar_recortados=False,
+            interrumpible=self.gestor.lectura_interrumpible,
+            al_fallar=lambda e: print(f"Error buscando usuarios: {e}")
+        )
 
         # Búsqueda de ejemplar
         ctk.CTkLabel(form_frame, text="Ejemplar *").grid(row=1, column=0, padx=10, pady=5, sticky="w")
@@ -99,10 +127,23 @@ class LoansFrame(ctk.CTkFrame):
         self.ejemplar_entry = ctk.CTkEntry(self.ejemplar_frame, placeholder_text="Buscar por código o título...", width=300)
         self.ejemplar_entry.pack(side="left")
 
-        self.sugerencias_ejemplar_frame = ctk.CTkScrollableFrame(form_frame, width=280, height=100)
-
-        # Vincular evento de tecleo a la búsqueda
-        self.ejemplar_entry.bind("<KeyRelease>", self.buscar_ejemplar_on_typing)
+        self.sugerencias_ejemplar_frame = ListaSugerencias(
+            form_frame, texto=lambda sugerencia: f"{sugerencia[0].codigo_ejemplar} - {sugerencia[1]}",
+            al_elegir=lambda sugerencia: self.seleccionar_ejemplar(*sugerencia), width=280, height=100)
+
+        # Búsqueda mientras se escribe: se piden más filas de las que se muestran
+        # para que las teclas siguientes se resuelvan filtrando en memoria
+        self.autocompletado_ejemplar = Autocompletado(
+            self.ejemplar_entry, self.master.tareas,
+            buscar=lambda termino: self.gestor.buscar_ejemplares_disponibles(termino, limite=LIMITE_BUSQUEDA_EJEMPLARES),
+            al_resultados=self._mostrar_sugerencias_ejemplar,
+            al_vaciar=lambda: self._mostrar_sugerencias_ejemplar([]),
+            refinar=self.gestor.refinar_busqueda_ejemplares,
+            limite=LIMITE_BUSQUEDA_EJEMPLARES,
+            visibles=SUGERENCIAS_VISIBLES,
+            interrumpible=self.gestor.lectura_interrumpible,
+            al_fallar=lambda e: print(f"Error buscando ejemplares: {e}")
+        )
 
         # Variable para almacenar el ID del ejemplar encontrado
         self.ejemplar_encontrado_id = None
@@ -145,36 +186,16 @@ class LoansFrame(ctk.CTkFrame):
         self.usuario_seleccionado_id = usuario.id
         self.sugerencias_frame.place_forget()
 
-    def actualizar_sugerencias_usuario(self, event):
-        """Filtra y muestra las sugerencias de usuarios según el texto de entrada."""
-        termino = self.usuario_entry.get().lower()
-
-        for widget in self.sugerencias_frame.winfo_children():
-            widget.destroy()
-
-        if not termino:
-            self.sugerencias_frame.place_forget()
-            self.usuario_seleccionado_id = None
-            return
-
-        sugerencias = [u for u in self.usuarios_cache if termino in u.nombre.lower()]
-
+    def actualizar_sugerencias_usuario(self, sugerencias: List[Usuario]):
+        """Muestra las sugerencias de usuarios bajo el campo de búsqueda."""
         if sugerencias:
             entry_x = self.usuario_entry.winfo_x()
             entry_y = self.usuario_entry.winfo_y()
             entry_height = self.usuario_entry.winfo_height()
 
+            self.sugerencias_frame.mostrar(sugerencias)
             self.sugerencias_frame.place(x=entry_x, y=entry_y + entry_height)
             self.sugerencias_frame.lift()
-
-            for usuario in sugerencias:
-                texto = f"{usuario.id} - {usuario.nombre}"
-                ctk.CTkButton(
-                    self.sugerencias_frame,
-                    text=texto,
-                    command=lambda u=usuario: self.seleccionar_usuario(u),
-                    anchor="w"
-                ).pack(fill="x", padx=2, pady=2)
         else:
             self.sugerencias_frame.place_forget()
             self.usuario_seleccionado_id = None
@@ -198,42 +219,19 @@ class LoansFrame(ctk.CTkFrame):
         self.ejemplar_encontrado_id = ejemplar.id
         self.sugerencias_ejemplar_frame.place_forget()
 
-    def buscar_ejemplar_on_typing(self, event):
-        """Filtra y muestra sugerencias de ejemplares."""
-        termino = self.ejemplar_entry.get().strip()
-
-        for widget in self.sugerencias_ejemplar_frame.winfo_children():
-            widget.destroy()
+    def _mostrar_sugerencias_ejemplar(self, sugerencias):
+        """Muestra la lista de ejemplares sugeridos bajo el campo de búsqueda."""
+        if sugerencias:
+            frame_x = self.ejemplar_frame.winfo_x()
+            frame_y = self.ejemplar_frame.winfo_y()
+            entry_height = self.ejemplar_entry.winfo_height()
 
-        if not termino:
+            self.sugerencias_ejemplar_frame.mostrar(sugerencias)
+            self.sugerencias_ejemplar_frame.place(x=frame_x, y=frame_y + entry_height)
+            self.sugerencias_ejemplar_frame.lift()
+        else:
             self.sugerencias_ejemplar_frame.place_forget()
             self.ejemplar_encontrado_id = None
-            return
-
-        try:
-            sugerencias = self.gestor.buscar_ejemplares_disponibles(termino)
-
-            if sugerencias:
-                frame_x = self.ejemplar_frame.winfo_x()
-                frame_y = self.ejemplar_frame.winfo_y()
-                entry_height = self.ejemplar_entry.winfo_height()
-
-                self.sugerencias_ejemplar_frame.place(x=frame_x, y=frame_y + entry_height)
-                self.sugerencias_ejemplar_frame.lift()
-
-                for ejemplar, titulo_libro in sugerencias:
-                    texto = f"{ejemplar.codigo_ejemplar} - {titulo_libro}"
-                    ctk.CTkButton(
-                        self.sugerencias_ejemplar_frame,
-                        text=texto,
-                        command=lambda e=ejemplar, t=titulo_libro: self.seleccionar_ejemplar(e, t),
-                        anchor="w"
-                    ).pack(fill="x", padx=2, pady=2)
-            else:
-                self.sugerencias_ejemplar_frame.place_forget()
-                self.ejemplar_encontrado_id = None
-        except Exception as e:
-            print(f"Error buscando ejemplares: {e}")
 
     def crear_prestamo(self):
         """Crea un nuevo préstamo."""
@@ -269,9 +267,12 @@ class LoansFrame(ctk.CTkFrame):
         """Limpia el formulario de préstamo."""
         self.usuario_entry.delete(0, 'end')
         self.usuario_seleccionado_id = None
-        self.sugerencias_frame.grid_remove()
+        self.autocompletado_usuario.cancelar()
+        self.sugerencias_frame.place_forget()
         self.ejemplar_entry.delete(0, 'end')
         self.ejemplar_encontrado_id = None
+        self.autocompletado_ejemplar.cancelar()
+        self.sugerencias_ejemplar_frame.place_forget()
         self.dias_spinbox.delete(0, 'end')
         self.dias_spinbox.insert(0, "15")
         self.observaciones_text.delete("1.0", "end")
@@ -279,143 +280,95 @@ class LoansFrame(ctk.CTkFrame):
 
     def mostrar_prestamos_activos(self):
         """Muestra la lista de préstamos activos."""
+        self.master.tareas.cancelar("vista_prestamos")
         self.limpiar_content_frame()
         
         ctk.CTkLabel(self.content_frame, text="Préstamos Activos", 
                     font=("Arial", 16, "bold")).pack(pady=10)
         
-        try:
-            prestamos = self.gestor.get_prestamos_activos()
-            
-            if not prestamos:
-                ctk.CTkLabel(self.content_frame, text="No hay préstamos activos.", 
-                           fg_color="blue").pack(pady=20)
-                return
-            
-            # Frame con scroll para la tabla
-            scroll_frame = ctk.CTkScrollableFrame(self.content_frame)
-            scroll_frame.pack(pady=10, padx=10, fill="both", expand=True)
-            
-            # Encabezados
-            headers = ["ID", "Usuario", "Libro/Ejemplar", "Fecha Préstamo", "Vencimiento", "Días Restantes", "Estado", "Acciones"]
-            for i, header in enumerate(headers):
-                ctk.CTkLabel(scroll_frame, text=header, font=("Arial", 12, "bold")).grid(
-                    row=0, column=i, padx=5, pady=5, sticky="w")
-            
-            # Datos de préstamos
-            for row_num, prestamo in enumerate(prestamos, start=1):
-                # Obtener información adicional
-                usuario = self.gestor.get_usuario(prestamo.usuario_id)
-                ejemplar = self.gestor.db.get_ejemplar(prestamo.ejemplar_id)
-                
-                # Obtener información del libro
-                libro_info = "N/A"
-                if ejemplar:
-                    libro = self.gestor.db.get_libro_por_id(ejemplar.libro_id)
-                    if libro:
-                        libro_info = f"{libro.titulo}\n{ejemplar.codigo_ejemplar}"
-                    else:
-                        libro_info = ejemplar.codigo_ejemplar
-                
-                dias_restantes = (prestamo.fecha_devolucion_esperada - date.today()).days
-                
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.id)).grid(row=row_num, column=0, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=usuario.nombre if usuario else "N/A").grid(row=row_num, column=1, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=libro_info, justify="left").grid(row=row_num, column=2, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.fecha_prestamo)).grid(row=row_num, column=3, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.fecha_devolucion_esperada)).grid(row=row_num, column=4, padx=5, pady=2)
-                
-                # Días restantes con color
-                color_dias = "red" if dias_restantes < 0 else ("orange" if dias_restantes <= 3 else "green")
-                ctk.CTkLabel(scroll_frame, text=str(dias_restantes), text_color=color_dias).grid(row=row_num, column=5, padx=5, pady=2)
-                
-                # Estado
-                estado_text = "Vencido" if prestamo.esta_vencido else "Activo"
-                estado_color = "red" if prestamo.esta_vencido else "green"
-                ctk.CTkLabel(scroll_frame, text=estado_text, text_color=estado_color).grid(row=row_num, column=6, padx=5, pady=2)
-                
-                # Botones de acción
-                actions_frame = ctk.CTkFrame(scroll_frame, fg_color="transparent")
-                actions_frame.grid(row=row_num, column=7, padx=5, pady=2)
-                
-                ctk.CTkButton(actions_frame, text="Devolver", width=80,
-                             command=lambda p=prestamo: self.devolver_prestamo(p)).pack(side="left", padx=2)
-                
-                if not prestamo.esta_vencido:
-                    ctk.CTkButton(actions_frame, text="Renovar", width=70, fg_color="orange",
-                                 command=lambda p=prestamo: self.renovar_prestamo(p)).pack(side="left", padx=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar préstamos: {str(e)}")
+        TablaVirtual(
+            self.content_frame, self.master.tareas,
+            columnas=[
+                Columna("ID", lambda p: str(p.id), ancho=50),
+                Columna("Usuario", lambda p: p.usuario_nombre or "N/A", ancho=150, orden='usuario'),
+                Columna("Libro/Ejemplar", self._texto_libro_ejemplar, ancho=220, orden='titulo'),
+                Columna("Fecha Préstamo", lambda p: str(p.fecha_prestamo), ancho=100, orden='fecha_prestamo'),
+                Columna("Vencimiento", lambda p: str(p.fecha_devolucion_esperada), ancho=100, orden='vencimiento'),
+                Columna("Días Restantes", lambda p: str(p.dias_restantes), ancho=90,
+                        color=lambda p: "red" if p.dias_restantes < 0 else ("orange" if p.dias_restantes <= 3 else "green")),
+                Columna("Estado", lambda p: "Vencido" if p.esta_vencido else "Activo", ancho=70,
+                        color=lambda p: "red" if p.esta_vencido else "green"),
+            ],
+            acciones=[
+                Accion("Devolver", self.devolver_prestamo),
+                Accion("Renovar", self.renovar_prestamo, ancho=70, color="orange",
+                       activa=lambda p: not p.esta_vencido),
+            ],
+            proveedor=lambda cursor, orden, descendente: self.gestor.get_pagina_prestamos(
+                cursor, estado='activo', orden=orden, descendente=descendente),
+            orden='fecha_prestamo',
+            texto_vacio="No hay préstamos activos."
+        ).pack(pady=10, padx=10, fill="both", expand=True)
+
+    @staticmethod
+    def _texto_libro_ejemplar(prestamo: PrestamoDetalle) -> str:
+        """Título del libro y código del ejemplar en una sola línea."""
+        if not prestamo.codigo_ejemplar:
+            return "N/A"
+        if prestamo.libro_titulo:
+            return f"{prestamo.libro_titulo} ({prestamo.codigo_ejemplar})"
+        return prestamo.codigo_ejemplar
 
     def mostrar_prestamos_vencidos(self):
         """Muestra la lista de préstamos vencidos."""
+        self.master.tareas.cancelar("vista_prestamos")
         self.limpiar_content_frame()
         
         ctk.CTkLabel(self.content_frame, text="⚠️ Préstamos Vencidos", 
                     font=("Arial", 16, "bold"), text_color="red").pack(pady=10)
         
-        try:
-            prestamos = self.gestor.get_prestamos_vencidos()
-            
-            if not prestamos:
-                ctk.CTkLabel(self.content_frame, text="¡Excelente! No hay préstamos vencidos.", 
-                           fg_color="green").pack(pady=20)
-                return
-            
-            # Alerta
-            alert_frame = ctk.CTkFrame(self.content_frame, fg_color="red")
-            alert_frame.pack(pady=10, padx=20, fill="x")
-            ctk.CTkLabel(alert_frame, text=f"⚠️ Hay {len(prestamos)} préstamos vencidos que requieren atención inmediata", 
-                        text_color="white", font=("Arial", 14, "bold")).pack(pady=10)
-            
-            # Frame con scroll para la tabla
-            scroll_frame = ctk.CTkScrollableFrame(self.content_frame)
-            scroll_frame.pack(pady=10, padx=10, fill="both", expand=True)
-            
-            # Encabezados
-            headers = ["ID", "Usuario", "Ejemplar", "Fecha Préstamo", "Vencimiento", "Días Vencido", "Acciones"]
-            for i, header in enumerate(headers):
-                ctk.CTkLabel(scroll_frame, text=header, font=("Arial", 12, "bold")).grid(
-                    row=0, column=i, padx=5, pady=5, sticky="w")
-            
-            # Datos de préstamos vencidos
-            for row_num, prestamo in enumerate(prestamos, start=1):
-                usuario = self.gestor.get_usuario(prestamo.usuario_id)
-                ejemplar = self.gestor.db.get_ejemplar(prestamo.ejemplar_id)
-                
-                dias_vencido = prestamo.dias_vencimiento
-                
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.id)).grid(row=row_num, column=0, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=usuario.nombre if usuario else "N/A").grid(row=row_num, column=1, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=ejemplar.codigo_ejemplar if ejemplar else "N/A").grid(row=row_num, column=2, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.fecha_prestamo)).grid(row=row_num, column=3, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.fecha_devolucion_esperada)).grid(row=row_num, column=4, padx=5, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(dias_vencido), text_color="red", font=("Arial", 12, "bold")).grid(row=row_num, column=5, padx=5, pady=2)
-                
-                # Botones de acción
-                actions_frame = ctk.CTkFrame(scroll_frame, fg_color="transparent")
-                actions_frame.grid(row=row_num, column=6, padx=5, pady=2)
-                
-                ctk.CTkButton(actions_frame, text="Devolver", width=80, fg_color="red",
-                             command=lambda p=prestamo: self.devolver_prestamo(p)).pack(side="left", padx=2)
-                ctk.CTkButton(actions_frame, text="Contactar", width=80, fg_color="orange",
-                             command=lambda u=usuario: self.contactar_usuario(u)).pack(side="left", padx=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar préstamos vencidos: {str(e)}")
+        # Alerta: la cantidad sale de las estadísticas, sin contar las filas
+        self.alerta_vencidos = ctk.CTkFrame(self.content_frame, fg_color="red")
+        self.cargar_en_segundo_plano(self.gestor.get_resumen_biblioteca, self._mostrar_alerta_vencidos,
+                                     clave="vista_prestamos", al_fallar=lambda e: None)
+        
+        self.tabla_vencidos = TablaVirtual(
+            self.content_frame, self.master.tareas,
+            columnas=[
+                Columna("ID", lambda p: str(p.id), ancho=50),
+                Columna("Usuario", lambda p: p.usuario_nombre or "N/A", ancho=150, orden='usuario'),
+                Columna("Ejemplar", lambda p: p.codigo_ejemplar or "N/A", ancho=120),
+                Columna("Fecha Préstamo", lambda p: str(p.fecha_prestamo), ancho=100, orden='fecha_prestamo'),
+                Columna("Vencimiento", lambda p: str(p.fecha_devolucion_esperada), ancho=100, orden='vencimiento'),
+                Columna("Días Vencido", lambda p: str(p.dias_vencimiento), ancho=90, color=lambda p: "red"),
+            ],
+            acciones=[
+                Accion("Devolver", self.devolver_prestamo, color="red"),
+                Accion("Contactar", self.contactar_usuario, color="orange"),
+            ],
+            proveedor=lambda cursor, orden, descendente: self.gestor.get_pagina_prestamos(
+                cursor, estado='vencido', orden=orden, descendente=descendente),
+            orden='vencimiento',
+            texto_vacio="¡Excelente! No hay préstamos vencidos."
+        )
+        self.tabla_vencidos.pack(pady=10, padx=10, fill="both", expand=True)
+
+    def _mostrar_alerta_vencidos(self, resumen: dict):
+        vencidos = resumen.get('prestamos_vencidos', 0)
+        if not vencidos or not self.alerta_vencidos.winfo_exists():
+            return
+        ctk.CTkLabel(self.alerta_vencidos, text=f"⚠️ Hay {vencidos} préstamos vencidos que requieren atención inmediata", 
+                    text_color="white", font=("Arial", 14, "bold")).pack(pady=10)
+        self.alerta_vencidos.pack(pady=10, padx=20, fill="x", before=self.tabla_vencidos)
 
-    def devolver_prestamo(self, prestamo: Prestamo):
+    def devolver_prestamo(self, prestamo: PrestamoDetalle):
         """Devuelve un préstamo específico."""
         confirmado = False
         try:
-            usuario = self.gestor.get_usuario(prestamo.usuario_id)
-            ejemplar = self.gestor.db.get_ejemplar(prestamo.ejemplar_id)
-            
             confirmado = confirmar(
                 "Confirmar Devolución", 
-                f"¿Confirma la devolución del ejemplar {ejemplar.codigo_ejemplar if ejemplar else 'N/A'} "
-                f"por {usuario.nombre if usuario else 'N/A'}?", 
+                f"¿Confirma la devolución del ejemplar {prestamo.codigo_ejemplar or 'N/A'} "
+                f"por {prestamo.usuario_nombre or 'N/A'}?", 
                 parent=self
             )
             
@@ -433,7 +386,7 @@ class LoansFrame(ctk.CTkFrame):
         finally:
             self.mostrar_prestamos_activos()
 
-    def renovar_prestamo(self, prestamo: Prestamo):
+    def renovar_prestamo(self, prestamo: PrestamoDetalle):
         """Renueva un préstamo por días adicionales."""
         try:
             # Ventana para renovación
@@ -444,13 +397,9 @@ class LoansFrame(ctk.CTkFrame):
             ctk.CTkLabel(renovar_window, text="Renovar Préstamo", 
                         font=("Arial", 16, "bold")).pack(pady=10)
             
-            usuario = self.gestor.get_usuario(prestamo.usuario_id)
-            ejemplar = self.gestor.db.get_ejemplar(prestamo.ejemplar_id)
-            
-            info_text = f"Usuario: {usuario.nombre if usuario else 'N/A'}\n"
-            info_text += f"Ejemplar: {ejemplar.codigo_ejemplar if ejemplar else 'N/A'}\n"
+            info_text = f"Usuario: {prestamo.usuario_nombre or 'N/A'}\n"
+            info_text += f"Ejemplar: {prestamo.codigo_ejemplar or 'N/A'}\n"
             info_text += f"Vencimiento actual: {prestamo.fecha_devolucion_esperada}"
-            
             ctk.CTkLabel(renovar_window, text=info_text).pack(pady=10)
             
             ctk.CTkLabel(renovar_window, text="Días adicionales:").pack(pady=5)
@@ -482,22 +431,23 @@ class LoansFrame(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-    def contactar_usuario(self, usuario: Usuario):
-        """Muestra información de contacto del usuario."""
-        if not usuario:
+    def contactar_usuario(self, prestamo: PrestamoDetalle):
+        """Muestra información de contacto del usuario del préstamo."""
+        if not prestamo.usuario_nombre:
             messagebox.showwarning("Advertencia", "Información de usuario no disponible")
             return
         
         info_text = f"Información de contacto:\n\n"
-        info_text += f"Nombre: {usuario.nombre}\n"
-        info_text += f"Email: {usuario.email or 'No proporcionado'}\n"
-        info_text += f"Teléfono: {usuario.telefono or 'No proporcionado'}\n"
-        info_text += f"Dirección: {usuario.direccion or 'No proporcionada'}"
+        info_text += f"Nombre: {prestamo.usuario_nombre}\n"
+        info_text += f"Email: {prestamo.usuario_email or 'No proporcionado'}\n"
+        info_text += f"Teléfono: {prestamo.usuario_telefono or 'No proporcionado'}\n"
+        info_text += f"Dirección: {prestamo.usuario_direccion or 'No proporcionada'}"
         
-        messagebox.showinfo(f"Contactar a {usuario.nombre}", info_text)
+        messagebox.showinfo(f"Contactar a {prestamo.usuario_nombre}", info_text)
 
     def mostrar_historial_prestamos(self):
         """Muestra el historial completo de préstamos."""
+        self.master.tareas.cancelar("vista_prestamos")
         self.limpiar_content_frame()
         
         ctk.CTkLabel(self.content_frame, text="📊 Historial de Préstamos", 
@@ -511,6 +461,7 @@ class LoansFrame(ctk.CTkFrame):
         
         # Variable para el filtro
         self.filtro_historial = ctk.StringVar(value="todos")
+        self.estado_historial = None
         
         ctk.CTkRadioButton(filtros_frame, text="Todos", variable=self.filtro_historial, 
                           value="todos", command=self.actualizar_historial).pack(side="left", padx=5)
@@ -519,106 +470,64 @@ class LoansFrame(ctk.CTkFrame):
         ctk.CTkRadioButton(filtros_frame, text="Solo Activos", variable=self.filtro_historial, 
                           value="activos", command=self.actualizar_historial).pack(side="left", padx=5)
         
-        # Frame para la tabla
-        self.historial_scroll_frame = ctk.CTkScrollableFrame(self.content_frame)
-        self.historial_scroll_frame.pack(pady=10, padx=10, fill="both", expand=True)
-        
-        # Cargar historial inicial
-        self.actualizar_historial()
+        # Información de resultados
+        self.historial_info_label = ctk.CTkLabel(self.content_frame, text="", font=("Arial", 11, "bold"),
+                                                 fg_color="#E3F2FD", corner_radius=6)
+        self.historial_info_label.pack(pady=(0, 5), padx=20, fill="x")
+        
+        # Tabla del historial, del préstamo más reciente al más antiguo
+        self.tabla_historial = TablaVirtual(
+            self.content_frame, self.master.tareas,
+            columnas=[
+                Columna("ID", lambda p: str(p.id), ancho=50),
+                Columna("Usuario", lambda p: p.usuario_nombre or "N/A", ancho=130, orden='usuario'),
+                Columna("Ejemplar", lambda p: p.codigo_ejemplar or "N/A", ancho=110),
+                Columna("Libro", lambda p: p.libro_titulo or "N/A", ancho=160, orden='titulo'),
+                Columna("Fecha Préstamo", lambda p: str(p.fecha_prestamo), ancho=100, orden='fecha_prestamo'),
+                Columna("Fecha Devolución", lambda p: str(p.fecha_devolucion_real or p.fecha_devolucion_esperada),
+                        ancho=110, orden='devolucion'),
+                Columna("Estado", self._texto_estado_historial, ancho=100, color=self._color_estado_historial),
+                Columna("Días", self._texto_dias_historial, ancho=110),
+            ],
+            proveedor=self._consultar_historial,
+            orden='fecha_prestamo',
+            descendente=True,
+            texto_vacio="No hay préstamos en el historial.",
+            al_cargar=lambda tabla: self.historial_info_label.configure(
+                text=f"📊 Mostrando {len(tabla.elementos)} préstamos{' (desplácese para ver más)' if tabla.hay_mas else ''}")
+        )
+        self.tabla_historial.pack(pady=10, padx=10, fill="both", expand=True)
+
+    def _consultar_historial(self, cursor, orden: str, descendente: bool):
+        """Una página del historial con el filtro de estado elegido."""
+        return self.gestor.get_pagina_prestamos(cursor, estado=self.estado_historial,
+                                                orden=orden, descendente=descendente)
 
     def actualizar_historial(self):
         """Actualiza la tabla de historial según el filtro seleccionado."""
-        # Limpiar tabla
-        for widget in self.historial_scroll_frame.winfo_children():
-            widget.destroy()
-        
-        try:
-            filtro = self.filtro_historial.get()
-            
-            # Obtener préstamos según filtro
-            if filtro == "devueltos":
-                prestamos = self.gestor.get_historial_prestamos(limite=100, solo_devueltos=True)
-            elif filtro == "activos":
-                prestamos = self.gestor.get_prestamos_activos()
-            else:  # todos
-                prestamos = self.gestor.get_historial_prestamos(limite=100)
-            
-            if not prestamos:
-                ctk.CTkLabel(self.historial_scroll_frame, 
-                            text="No hay préstamos en el historial.", 
-                            fg_color="blue").pack(pady=20)
-                return
-            
-            # Información de resultados
-            info_frame = ctk.CTkFrame(self.historial_scroll_frame, fg_color="#E3F2FD")
-            info_frame.grid(row=0, column=0, columnspan=8, sticky="ew", pady=(0, 10))
-            ctk.CTkLabel(info_frame, 
-                        text=f"📊 Mostrando {len(prestamos)} préstamos",
-                        font=("Arial", 11, "bold")).pack(pady=5)
-            
-            # Encabezados
-            headers = ["ID", "Usuario", "Ejemplar", "Libro", "Fecha Préstamo", 
-                      "Fecha Devolución", "Estado", "Días"]
-            for i, header in enumerate(headers):
-                ctk.CTkLabel(self.historial_scroll_frame, text=header, 
-                            font=("Arial", 11, "bold")).grid(
-                    row=1, column=i, padx=5, pady=5, sticky="w")
-            
-            # Datos de préstamos
-            for row_num, prestamo in enumerate(prestamos, start=2):
-                # Obtener información adicional
-                usuario = self.gestor.get_usuario(prestamo.usuario_id)
-                ejemplar = self.gestor.db.get_ejemplar(prestamo.ejemplar_id)
-                
-                # Obtener información del libro
-                libro_titulo = "N/A"
-                if ejemplar:
-                    libro = self.gestor.db.get_libro_por_id(ejemplar.libro_id)
-                    if libro:
-                        libro_titulo = libro.titulo
-                
-                # Calcular días
-                if prestamo.estado == 'devuelto' and prestamo.fecha_devolucion_real:
-                    dias = (prestamo.fecha_devolucion_real - prestamo.fecha_prestamo).days
-                    dias_text = f"{dias} días"
-                else:
-                    dias = (date.today() - prestamo.fecha_prestamo).days
-                    dias_text = f"{dias} días (activo)"
-                
-                # Fecha de devolución
-                fecha_dev = prestamo.fecha_devolucion_real if prestamo.fecha_devolucion_real else prestamo.fecha_devolucion_esperada
-                
-                # Estado con color
-                if prestamo.estado == 'devuelto':
-                    estado_text = "✅ Devuelto"
-                    estado_color = "green"
-                elif prestamo.esta_vencido:
-                    estado_text = "⚠️ Vencido"
-                    estado_color = "red"
-                else:
-                    estado_text = "🔄 Activo"
-                    estado_color = "blue"
-                
-                # Mostrar datos
-                ctk.CTkLabel(self.historial_scroll_frame, text=str(prestamo.id)).grid(
-                    row=row_num, column=0, padx=5, pady=2)
-                ctk.CTkLabel(self.historial_scroll_frame, text=usuario.nombre if usuario else "N/A").grid(
-                    row=row_num, column=1, padx=5, pady=2)
-                ctk.CTkLabel(self.historial_scroll_frame, text=ejemplar.codigo_ejemplar if ejemplar else "N/A").grid(
-                    row=row_num, column=2, padx=5, pady=2)
-                ctk.CTkLabel(self.historial_scroll_frame, text=libro_titulo, wraplength=150).grid(
-                    row=row_num, column=3, padx=5, pady=2)
-                ctk.CTkLabel(self.historial_scroll_frame, text=str(prestamo.fecha_prestamo)).grid(
-                    row=row_num, column=4, padx=5, pady=2)
-                ctk.CTkLabel(self.historial_scroll_frame, text=str(fecha_dev)).grid(
-                    row=row_num, column=5, padx=5, pady=2)
-                ctk.CTkLabel(self.historial_scroll_frame, text=estado_text, text_color=estado_color).grid(
-                    row=row_num, column=6, padx=5, pady=2)
-                ctk.CTkLabel(self.historial_scroll_frame, text=dias_text).grid(
-                    row=row_num, column=7, padx=5, pady=2)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar historial: {str(e)}")
+        estados = {"devueltos": 'devuelto', "activos": 'activo', "todos": None}
+        # El filtro se lee aquí, en el hilo de Tk; la consulta solo usa el estado
+        self.estado_historial = estados[self.filtro_historial.get()]
+        self.historial_info_label.configure(text="")
+        self.tabla_historial.recargar()
+
+    @staticmethod
+    def _texto_estado_historial(prestamo: PrestamoDetalle) -> str:
+        if prestamo.estado == 'devuelto':
+            return "✅ Devuelto"
+        return "⚠️ Vencido" if prestamo.esta_vencido else "🔄 Activo"
+
+    @staticmethod
+    def _color_estado_historial(prestamo: PrestamoDetalle) -> str:
+        if prestamo.estado == 'devuelto':
+            return "green"
+        return "red" if prestamo.esta_vencido else "blue"
+
+    @staticmethod
+    def _texto_dias_historial(prestamo: PrestamoDetalle) -> str:
+        if prestamo.estado == 'devuelto' and prestamo.fecha_devolucion_real:
+            return f"{(prestamo.fecha_devolucion_real - prestamo.fecha_prestamo).days} días"
+        return f"{(date.today() - prestamo.fecha_prestamo).days} días (activo)"
 
     def mostrar_advertencia_sin_usuarios(self):
         """Muestra una advertencia amigable cuando no hay usuarios registrados."""
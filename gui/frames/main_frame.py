@@ -5,6 +5,7 @@ from PIL import Image
 import os
 
 # Importaciones de frames necesarios para la navegación
+from .base_frame import CargaEnSegundoPlano
 from .book_form_frame import BookFormFrame
 from .search_book_frame import SearchBookFrame
 from .list_frame import ListFrame
@@ -16,7 +17,7 @@ from .move_book_frame import MoveBookFrame
 if TYPE_CHECKING:
     from logic.library_manager import GestorBiblioteca
 
-class MainFrame(ctk.CTkFrame):
+class MainFrame(CargaEnSegundoPlano, ctk.CTkFrame):
     def __init__(self, master, gestor: 'GestorBiblioteca'):
         super().__init__(master, fg_color="#F8F9FA")
         self.master = master
@@ -147,32 +148,13 @@ class MainFrame(ctk.CTkFrame):
     def buscar_desde_header(self, event=None):
         """Realiza búsqueda inteligente desde el input del header."""
         termino = self.search_entry.get().strip()
+        self.master.switch_frame(SearchBookFrame)
         if termino:
-            try:
-                # Realizar la búsqueda directamente aquí
-                libros_encontrados = self.gestor.buscar_libros(termino)
-                
-                # Cambiar a SearchBookFrame con los resultados ya listos
-                self.master.switch_frame(SearchBookFrame)
-                
-                # Establecer el término y mostrar resultados inmediatamente
-                if hasattr(self.master.current_frame, 'entry_buscar'):
-                    self.master.current_frame.entry_buscar.delete(0, 'end')
-                    self.master.current_frame.entry_buscar.insert(0, termino)
-                
-                # Mostrar resultados directamente
-                if hasattr(self.master.current_frame, 'mostrar_resultados'):
-                    self.master.current_frame.mostrar_resultados(libros_encontrados, termino)
-                elif hasattr(self.master.current_frame, 'buscar_libros'):
-                    self.master.current_frame.buscar_libros()
-                
-            except Exception as e:
-                pass  
-            
-                self.master.switch_frame(SearchBookFrame)
-        else:
-            # Si no hay término, solo ir a la pantalla de búsqueda
-            self.master.switch_frame(SearchBookFrame)
+            # La pantalla de búsqueda lanza la consulta en segundo plano
+            frame_busqueda = self.master.current_frame
+            frame_busqueda.entry_buscar.delete(0, 'end')
+            frame_busqueda.entry_buscar.insert(0, termino)
+            frame_busqueda.buscar_libros()
 
     def create_feature_cards(self):
         """Crea las tarjetas de funcionalidades."""
@@ -311,116 +293,130 @@ class MainFrame(ctk.CTkFrame):
         stats_container.grid_columnconfigure(2, weight=1)
         stats_container.grid_columnconfigure(3, weight=1)
         
-        # Obtener estadísticas
-        try:
-            resumen = self.gestor.get_resumen_biblioteca()
-            stats_data = [
-                ('Total de Libros', resumen.get('total_libros', 0), self.colors['primary']),
-                ('Ejemplares Disponibles', resumen.get('ejemplares_disponibles', 0), self.colors['success']),
-                ('Préstamos Activos', resumen.get('prestamos_activos', 0), self.colors['warning']),
-                ('Préstamos Vencidos', resumen.get('prestamos_vencidos', 0), self.colors['danger'])
-            ]
-        except:
-            stats_data = [
-                ('Total de Libros', 0, self.colors['primary']),
-                ('Ejemplares Disponibles', 0, self.colors['success']),
-                ('Préstamos Activos', 0, self.colors['warning']),
-                ('Préstamos Vencidos', 0, self.colors['danger'])
-            ]
+        # Las cifras se muestran al terminar la consulta en segundo plano
+        stats_data = [
+            ('Total de Libros', 'total_libros', self.colors['primary']),
+            ('Ejemplares Disponibles', 'ejemplares_disponibles', self.colors['success']),
+            ('Préstamos Activos', 'prestamos_activos', self.colors['warning']),
+            ('Préstamos Vencidos', 'prestamos_vencidos', self.colors['danger'])
+        ]
         
         # Crear estadísticas
-        for i, (label, value, color) in enumerate(stats_data):
+        self.stat_labels = {}
+        for i, (label, clave, color) in enumerate(stats_data):
             stat_frame = ctk.CTkFrame(stats_container, fg_color=self.colors['light'], corner_radius=10)
             stat_frame.grid(row=0, column=i, padx=8, pady=10, sticky="ew")
             
-            ctk.CTkLabel(stat_frame, 
-                        text=str(value), 
+            self.stat_labels[clave] = ctk.CTkLabel(stat_frame, 
+                        text="⏳", 
                         font=("Segoe UI", 24, "bold"),
-                        text_color=color).pack(pady=(15, 5))
+                        text_color=color)
+            self.stat_labels[clave].pack(pady=(15, 5))
             
             ctk.CTkLabel(stat_frame, 
                         text=label, 
                         font=("Segoe UI", 10),
                         text_color=self.colors['secondary']).pack(pady=(0, 15))
 
+        self.cargar_en_segundo_plano(self.gestor.get_resumen_biblioteca,
+                                     self._mostrar_estadisticas,
+                                     al_fallar=lambda e: self._mostrar_estadisticas({}))
+
+    def _mostrar_estadisticas(self, resumen: dict):
+        """Completa las tarjetas de estadísticas con el resumen de la biblioteca."""
+        for clave, label in self.stat_labels.items():
+            label.configure(text=str(resumen.get(clave, 0)))
+
     def mostrar_disponibles(self):
-        try:
-            libros = self.gestor.get_libros_disponibles()
-            if not libros:
+        def al_terminar(pagina):
+            if not pagina.elementos:
                 messagebox.showinfo("Sin Libros Disponibles", 
                                   "📚 No hay libros disponibles en este momento.\n\n"
                                   "Para agregar libros:\n"
                                   "1. Primero crea una estantería (Gestionar Estanterías)\n"
                                   "2. Luego agrega libros (Agregar Libro)")
                 return
-            self.master.switch_frame(ListFrame, titulo="Libros Disponibles", libros=libros)
-        except Exception as e:
+            self.master.switch_frame(ListFrame, titulo="Libros Disponibles", libros=pagina.elementos,
+                                    siguiente=pagina.siguiente, estado_ejemplar='disponible')
+
+        def al_fallar(e):
             messagebox.showerror("Error", 
                                f"Error al cargar libros:\n{str(e)}\n\n"
                                "Asegúrate de haber creado al menos una estantería primero.")
 
+        self.cargar_en_segundo_plano(self.gestor.get_pagina_libros, al_terminar,
+                                     estado_ejemplar='disponible',
+                                     resumen=True,
+                                     clave="navegacion", al_fallar=al_fallar)
+
     def mostrar_prestados(self):
-        try:
-            libros = self.gestor.get_libros_prestados()
-            if not libros:
+        def al_terminar(pagina):
+            if not pagina.elementos:
                 messagebox.showinfo("Sin Préstamos", 
                                   "📤 No hay libros prestados actualmente.\n\n"
                                   "Los libros prestados aparecerán aquí cuando realices préstamos.")
                 return
-            self.master.switch_frame(ListFrame, titulo="Libros Prestados", libros=libros)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar libros prestados: {str(e)}")
+            self.master.switch_frame(ListFrame, titulo="Libros Prestados", libros=pagina.elementos,
+                                    siguiente=pagina.siguiente, estado_ejemplar='prestado')
+
+        self.cargar_en_segundo_plano(self.gestor.get_pagina_libros, al_terminar,
+                                     estado_ejemplar='prestado',
+                                     resumen=True,
+                                     clave="navegacion",
+                                     al_fallar=lambda e: messagebox.showerror("Error", f"Error al cargar libros prestados: {str(e)}"))
 
     def mostrar_mas_prestado(self):
-        try:
-            libro = self.gestor.get_libro_mas_prestado()
+        def al_terminar(libro):
             if libro:
                 autor_nombre = libro.autor.nombre_completo if libro.autor else "Autor Desconocido"
                 messagebox.showinfo("Libro Más Popular", f"El libro más prestado es:\n\n'{libro.titulo}' de {autor_nombre}\n\nHa sido prestado {libro.historial_prestamos} veces.")
             else:
                 messagebox.showinfo("Información", "Aún no se han registrado préstamos.")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+
+        self.cargar_en_segundo_plano(self.gestor.get_libro_mas_prestado, al_terminar,
+                                     al_fallar=lambda e: messagebox.showerror("Error", str(e)))
 
     def mostrar_reportes(self):
         """Muestra los reportes avanzados del sistema."""
-        try:
-            resumen = self.gestor.get_resumen_biblioteca()
-            
-            # Verificar si hay datos
-            if resumen['total_libros'] == 0:
-                messagebox.showinfo("Biblioteca Vacía", 
-                                  "📊 La biblioteca está vacía.\n\n"
-                                  "Para comenzar:\n"
-                                  "1. Crea estanterías (Gestionar Estanterías)\n"
-                                  "2. Agrega libros (Agregar Libro)\n"
-                                  "3. Registra usuarios (Gestionar Usuarios)\n"
-                                  "4. Realiza préstamos")
-                return
-            
-            reporte_text = "📊 RESUMEN DE LA BIBLIOTECA\n\n"
-            reporte_text += f"📚 Total de libros: {resumen['total_libros']}\n"
-            reporte_text += f"📖 Total de ejemplares: {resumen['total_ejemplares']}\n"
-            reporte_text += f"✅ Ejemplares disponibles: {resumen['ejemplares_disponibles']}\n"
-            reporte_text += f"📤 Ejemplares prestados: {resumen['ejemplares_prestados']}\n"
-            reporte_text += f"🔄 Préstamos activos: {resumen['prestamos_activos']}\n"
-            reporte_text += f"⚠️ Préstamos vencidos: {resumen['prestamos_vencidos']}\n"
-            reporte_text += f"👥 Usuarios activos: {resumen['usuarios_activos']}\n"
-            
-            # Agregar libro más prestado
-            reporte_text += "\n" + "="*20 + "\n\n"
-            libro_popular = self.gestor.get_libro_mas_prestado()
-            if libro_popular:
-                autor_nombre = libro_popular.autor.nombre_completo if libro_popular.autor else "Autor Desconocido"
-                reporte_text += f"🏆 LIBRO MÁS PRESTADO:\n"
-                reporte_text += f"   📖 Título: {libro_popular.titulo}\n"
-                reporte_text += f"   ✍️ Autor: {autor_nombre}\n"
-                reporte_text += f"   📊 Préstamos: {libro_popular.historial_prestamos} veces\n"
-            else:
-                reporte_text += "🏆 LIBRO MÁS PRESTADO:\n"
-                reporte_text += "   (Aún no se han registrado préstamos)\n"
-            
-            messagebox.showinfo("Reportes de la Biblioteca", reporte_text)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al generar reportes: {str(e)}")
\ No newline at end of file
+        def consultar():
+            # Ambas consultas corren en el mismo hilo de trabajo
+            return self.gestor.get_resumen_biblioteca(), self.gestor.get_libro_mas_prestado()
+
+        self.cargar_en_segundo_plano(consultar, lambda datos: self._mostrar_reporte(*datos),
+                                     al_fallar=lambda e: messagebox.showerror("Error", f"Error al generar reportes: {str(e)}"))
+
+    def _mostrar_reporte(self, resumen: dict, libro_popular):
+        """Arma y muestra el texto del reporte con los datos ya consultados."""
+        # Verificar si hay datos
+        if resumen['total_libros'] == 0:
+            messagebox.showinfo("Biblioteca Vacía", 
+                              "📊 La biblioteca está vacía.\n\n"
+                              "Para comenzar:\n"
+                              "1. Crea estanterías (Gestionar Estanterías)\n"
+                              "2. Agrega libros (Agregar Libro)\n"
+                              "3. Registra usuarios (Gestionar Usuarios)\n"
+                              "4. Realiza préstamos")
+            return
+        
+        reporte_text = "📊 RESUMEN DE LA BIBLIOTECA\n\n"
+        reporte_text += f"📚 Total de libros: {resumen['total_libros']}\n"
+        reporte_text += f"📖 Total de ejemplares: {resumen['total_ejemplares']}\n"
+        reporte_text += f"✅ Ejemplares disponibles: {resumen['ejemplares_disponibles']}\n"
+        reporte_text += f"📤 Ejemplares prestados: {resumen['ejemplares_prestados']}\n"
+        reporte_text += f"🔄 Préstamos activos: {resumen['prestamos_activos']}\n"
+        reporte_text += f"⚠️ Préstamos vencidos: {resumen['prestamos_vencidos']}\n"
+        reporte_text += f"👥 Usuarios activos: {resumen['usuarios_activos']}\n"
+        
+        # Agregar libro más prestado
+        reporte_text += "\n" + "="*20 + "\n\n"
+        if libro_popular:
+            autor_nombre = libro_popular.autor.nombre_completo if libro_popular.autor else "Autor Desconocido"
+            reporte_text += f"🏆 LIBRO MÁS PRESTADO:\n"
+            reporte_text += f"   📖 Título: {libro_popular.titulo}\n"
+            reporte_text += f"   ✍️ Autor: {autor_nombre}\n"
+            reporte_text += f"   📊 Préstamos: {libro_popular.historial_prestamos} veces\n"
+        else:
+            reporte_text += "🏆 LIBRO MÁS PRESTADO:\n"
+            reporte_text += "   (Aún no se han registrado préstamos)\n"
+        
+        messagebox.showinfo("Reportes de la Biblioteca", reporte_text)
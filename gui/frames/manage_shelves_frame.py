@@ -95,13 +95,19 @@ class ManageShelvesFrame(BaseFrame):
 
     def load_shelves(self):
         """Carga y muestra las estanterías existentes."""
+        # Capacidad y ocupación de todas las estanterías en una sola consulta
+        self.cargar_en_segundo_plano(lambda: list(self.gestor.get_ocupacion_estanterias().values()),
+                                     self._dibujar_estanterias,
+                                     contenedor=self.list_frame,
+                                     texto_carga="⏳ Cargando estanterías...",
+                                     clave="estanterias",
+                                     al_fallar=lambda e: messagebox.showerror("Error", f"Error al cargar estanterías: {str(e)}"))
+
+    def _dibujar_estanterias(self, estanterias):
         # Limpiar contenido anterior
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
+        self.limpiar_contenedor(self.list_frame)
         
         try:
-            estanterias = self.gestor.get_todas_estanterias()
-            
             if not estanterias:
                 ctk.CTkLabel(self.list_frame, 
                            text="No hay estanterías registradas",
@@ -131,13 +137,8 @@ class ManageShelvesFrame(BaseFrame):
 
     def create_shelf_row(self, estanteria: Estanteria):
         """Crea una fila para una estantería."""
-        # Obtener estadísticas
-        try:
-            ocupados = self.gestor.get_count_ejemplares_en_estanteria(estanteria.id)
-            libres = estanteria.capacidad - ocupados
-        except:
-            ocupados = 0
-            libres = estanteria.capacidad
+        ocupados = estanteria.ocupados
+        libres = estanteria.libres
         
         # Frame para la fila
         row_frame = ctk.CTkFrame(self.list_frame, fg_color="white", corner_radius=8)
@@ -266,20 +267,26 @@ class ManageShelvesFrame(BaseFrame):
         capacidad_entry.insert(0, str(estanteria.capacidad))
         
         # Información actual
-        try:
-            ocupados = self.gestor.get_count_ejemplares_en_estanteria(estanteria.id)
-            info_text = f"📊 Actualmente: {ocupados} ejemplares ocupados"
-            if ocupados > 0:
-                info_text += f"\n⚠️ Capacidad mínima: {ocupados} (no puede ser menor)"
-        except:
-            info_text = "📊 No se pudo obtener información de ocupación"
-        
         info_frame = ctk.CTkFrame(form_frame, fg_color="#FFF3CD", corner_radius=8)
         info_frame.pack(fill="x", padx=20, pady=(10, 20))
-        ctk.CTkLabel(info_frame, text=info_text, 
+        info_label = ctk.CTkLabel(info_frame, text="⏳ Consultando ocupación...", 
                     text_color="#856404",
                     font=("Segoe UI", 11),
-                    justify="left").pack(pady=12, padx=12)
+                    justify="left")
+        info_label.pack(pady=12, padx=12)
+
+        def mostrar_ocupacion(ocupados):
+            info_text = f"📊 Actualmente: {ocupados} ejemplares ocupados"
+            if ocupados > 0:
+                info_text += f"\n⚠️ Capacidad mínima: {ocupados} (no puede ser menor)"
+            info_label.configure(text=info_text)
+
+        self.master.tareas.ejecutar(
+            self.gestor.get_count_ejemplares_en_estanteria, estanteria.id,
+            al_terminar=mostrar_ocupacion,
+            al_fallar=lambda e: info_label.configure(text="📊 No se pudo obtener información de ocupación"),
+            propietario=edit_window
+        )
         
         # Botones 
         buttons_frame = ctk.CTkFrame(main_scroll, fg_color="transparent")
@@ -3,18 +3,42 @@ from tkinter import messagebox
 from typing import TYPE_CHECKING, List, Optional
 from logic.models import Libro, Estanteria
 from gui.frames.base_frame import BaseFrame
+from gui.utils.autocompletado import Autocompletado
 
 if TYPE_CHECKING:
     from gui.app import App
     from logic.library_manager import GestorBiblioteca
 
+# Resultados que se muestran como máximo; para ver otros hay que afinar la búsqueda
+RESULTADOS_VISIBLES = 50
+
 class MoveBookFrame(BaseFrame):
     def __init__(self, master: 'App', gestor: 'GestorBiblioteca'):
         super().__init__(master, gestor)
-        self.estanterias = self.gestor.get_todas_estanterias()
+        self.estanterias: List[Estanteria] = []
         self.libro_seleccionado: Optional[Libro] = None
         self.libros_encontrados: List[Libro] = []
         self.setup_interface()
+        self.cargar_estanterias()
+
+    def cargar_estanterias(self):
+        """Carga en segundo plano las estanterías destino posibles."""
+        def al_terminar(estanterias):
+            self.estanterias = estanterias
+            # Si ya se eligió un libro mientras cargaban, actualizar las opciones
+            if self.libro_seleccionado:
+                self.move_button.configure(state="normal")
+                self.crear_opciones_estanterias(self.libro_seleccionado.estanteria_id)
+                self.estanteria_actual_label.configure(text=self._nombre_estanteria(self.libro_seleccionado.estanteria_id))
+
+        self.cargar_en_segundo_plano(
+            self.gestor.get_todas_estanterias, al_terminar,
+            al_fallar=lambda e: messagebox.showerror("Error", f"Error al cargar estanterías: {str(e)}")
+        )
+
+    def _nombre_estanteria(self, estanteria_id: Optional[int]) -> str:
+        estanteria = next((e for e in self.estanterias if e.id == estanteria_id), None)
+        return estanteria.nombre if estanteria else "Sin estantería"
 
     def setup_interface(self):
         """Configura la interfaz del formulario de mover libro."""
@@ -40,7 +64,6 @@ class MoveBookFrame(BaseFrame):
                                          placeholder_text="Buscar por título, autor o código...",
                                          height=40)
         self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
-        self.search_entry.bind("<KeyRelease>", self.buscar_libro_en_tiempo_real)
         
         ctk.CTkButton(search_container, text="🔍 Buscar", 
                      command=self.buscar_libros,
@@ -52,6 +75,23 @@ class MoveBookFrame(BaseFrame):
         self.results_frame = ctk.CTkScrollableFrame(step1_frame, height=150, fg_color="white")
         self.results_frame.pack(fill="both", padx=20, pady=(0, 15))
         self.results_frame.pack_forget()
+        self.aviso_resultados = ctk.CTkLabel(self.results_frame, text="", font=("Segoe UI", 12))
+        # Filas de resultado reutilizables: [marco, título, autor, código]
+        self.filas_resultado = []
+
+        # Búsqueda mientras se escribe: con dos caracteres, esperando una pausa
+        # entre teclas y filtrando en memoria cuando el término se alarga
+        self.autocompletado = Autocompletado(
+            self.search_entry, self.master.tareas,
+            buscar=lambda termino: self.gestor.buscar_libros(termino, resumen=True),
+            al_resultados=self._mostrar_resultados,
+            al_vaciar=self._ocultar_resultados,
+            refinar=self.gestor.refinar_busqueda_libros,
+            visibles=RESULTADOS_VISIBLES,
+            minimo=2,
+            interrumpible=self.gestor.lectura_interrumpible,
+            al_fallar=lambda e: messagebox.showerror("Error", f"Error al buscar libros: {str(e)}")
+        )
         
         # --- PASO 2: Información del libro seleccionado ---
         self.step2_frame = ctk.CTkFrame(form_frame, fg_color=self.colors['light'], corner_radius=10)
@@ -120,103 +160,107 @@ class MoveBookFrame(BaseFrame):
         # Botón volver
         self.create_back_button()
 
-    def buscar_libro_en_tiempo_real(self, event=None):
-        """Búsqueda en tiempo real mientras el usuario escribe."""
-        termino = self.search_entry.get().strip()
-        if len(termino) >= 2: 
-            self.buscar_libros()
-        elif len(termino) == 0:
-            self.results_frame.pack_forget()
-    
+    def _ocultar_resultados(self):
+        self.results_frame.pack_forget()
+
     def buscar_libros(self):
-        """Realiza la búsqueda de libros."""
+        """Busca el término escrito sin esperar a que el usuario deje de teclear."""
         termino = self.search_entry.get().strip()
         
         if not termino:
             messagebox.showwarning("Advertencia", "Por favor ingresa un término de búsqueda")
             return
         
-        try:
-            # Buscar libros
-            self.libros_encontrados = self.gestor.buscar_libros(termino)
-            
-            # Limpiar resultados anteriores
-            for widget in self.results_frame.winfo_children():
-                widget.destroy()
-            
-            if not self.libros_encontrados:
-                self.results_frame.pack(fill="both", padx=20, pady=(0, 15))
-                ctk.CTkLabel(self.results_frame, 
-                           text="❌ No se encontraron libros",
-                           text_color=self.colors['danger'],
-                           font=("Segoe UI", 12)).pack(pady=20)
-            else:
-                self.results_frame.pack(fill="both", padx=20, pady=(0, 15))
-                
-                # Mostrar resultados
-                for libro in self.libros_encontrados:
-                    self.crear_fila_resultado(libro)
-                    
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al buscar libros: {str(e)}")
+        self.autocompletado.buscar_ahora()
+
+    def _mostrar_resultados(self, libros: List[Libro]):
+        """Muestra los libros encontrados reutilizando las filas ya creadas."""
+        self.libros_encontrados = libros
+        self.results_frame.pack(fill="both", padx=20, pady=(0, 15))
+
+        if libros:
+            self.aviso_resultados.pack_forget()
+        else:
+            self.aviso_resultados.configure(text="❌ No se encontraron libros", text_color=self.colors['danger'])
+            self.aviso_resultados.pack(pady=20)
+
+        while len(self.filas_resultado) < len(libros):
+            self.filas_resultado.append(self.crear_fila_resultado(len(self.filas_resultado)))
+
+        # Las filas ocultas son siempre las últimas: al volver a mostrarlas conservan el orden
+        for i, fila in enumerate(self.filas_resultado):
+            marco = fila[0]
+            if i < len(libros):
+                self.llenar_fila_resultado(fila, libros[i])
+                if not marco.winfo_manager():
+                    marco.pack(fill="x", pady=5, padx=10)
+            elif marco.winfo_manager():
+                marco.pack_forget()
     
-    def crear_fila_resultado(self, libro: Libro):
-        """Crea una fila con el resultado de búsqueda."""
+    def crear_fila_resultado(self, indice: int) -> list:
+        """Crea una fila de resultado vacía; el libro que muestra lo decide llenar_fila_resultado."""
         row_frame = ctk.CTkFrame(self.results_frame, fg_color=self.colors['light'], corner_radius=8)
-        row_frame.pack(fill="x", pady=5, padx=10)
         
         # Información del libro
         info_frame = ctk.CTkFrame(row_frame, fg_color="transparent")
         info_frame.pack(side="left", fill="both", expand=True, padx=15, pady=10)
         
-        titulo_text = f"📚 {libro.titulo}"
-        ctk.CTkLabel(info_frame, text=titulo_text, 
-                    font=("Segoe UI", 12, "bold"),
-                    anchor="w").pack(anchor="w")
+        titulo_label = ctk.CTkLabel(info_frame, text="", 
+                                    font=("Segoe UI", 12, "bold"),
+                                    anchor="w")
+        titulo_label.pack(anchor="w")
         
-        autor_text = f"✍️ {libro.autor.nombre} {libro.autor.apellido}" if libro.autor else "Autor desconocido"
-        ctk.CTkLabel(info_frame, text=autor_text, 
-                    font=("Segoe UI", 10),
-                    text_color=self.colors['secondary'],
-                    anchor="w").pack(anchor="w")
+        autor_label = ctk.CTkLabel(info_frame, text="", 
+                                   font=("Segoe UI", 10),
+                                   text_color=self.colors['secondary'],
+                                   anchor="w")
+        autor_label.pack(anchor="w")
         
-        codigo_text = f"🔢 Código: {libro.codigo}"
-        ctk.CTkLabel(info_frame, text=codigo_text, 
-                    font=("Segoe UI", 9),
-                    text_color=self.colors['muted'],
-                    anchor="w").pack(anchor="w")
+        codigo_label = ctk.CTkLabel(info_frame, text="", 
+                                    font=("Segoe UI", 9),
+                                    text_color=self.colors['muted'],
+                                    anchor="w")
+        codigo_label.pack(anchor="w")
         
         # Botón seleccionar
         ctk.CTkButton(row_frame, text="Seleccionar", 
-                     command=lambda: self.seleccionar_libro(libro),
+                     command=lambda: self.seleccionar_libro(self.libros_encontrados[indice]),
                      width=120,
                      fg_color=self.colors['success'],
                      hover_color="#1e5f4e").pack(side="right", padx=15, pady=10)
+        return [row_frame, titulo_label, autor_label, codigo_label]
+
+    @staticmethod
+    def llenar_fila_resultado(fila: list, libro: Libro):
+        """Cambia solo los textos de la fila que difieren del libro anterior."""
+        textos = (
+            f"📚 {libro.titulo}",
+            f"✍️ {libro.autor.nombre} {libro.autor.apellido}" if libro.autor else "Autor desconocido",
+            f"🔢 Código: {libro.codigo}",
+        )
+        for etiqueta, texto in zip(fila[1:], textos):
+            if etiqueta.cget("text") != texto:
+                etiqueta.configure(text=texto)
     
     def seleccionar_libro(self, libro: Libro):
         """Selecciona un libro y muestra su información."""
         self.libro_seleccionado = libro
         
-        # Obtener estantería actual
-        estanteria_actual = next((e for e in self.estanterias if e.id == libro.estanteria_id), None)
-        
         # Actualizar información del libro
         self.titulo_label.configure(text=libro.titulo)
         autor_nombre = f"{libro.autor.nombre} {libro.autor.apellido}" if libro.autor else "Desconocido"
         self.autor_label.configure(text=autor_nombre)
-        self.estanteria_actual_label.configure(
-            text=estanteria_actual.nombre if estanteria_actual else "Sin estantería"
-        )
+        self.estanteria_actual_label.configure(text=self._nombre_estanteria(libro.estanteria_id))
         
         # Mostrar cantidad de ejemplares
-        num_ejemplares = len(libro.ejemplares) if libro.ejemplares else 0
+        num_ejemplares = libro.cantidad_total
         self.ejemplares_label.configure(text=f"{num_ejemplares} ejemplar(es) se moverán")
         
         # Mostrar paso 2
         self.step2_frame.pack(fill="x", padx=20, pady=10)
         
         # Crear opciones de estanterías destino (todas menos la actual)
-        self.crear_opciones_estanterias(estanteria_actual.id if estanteria_actual else None)
+        self.crear_opciones_estanterias(libro.estanteria_id)
         
         # Mostrar paso 3
         self.step3_frame.pack(fill="x", padx=20, pady=10)
@@ -278,7 +322,7 @@ class MoveBookFrame(BaseFrame):
             # Mover el libro
             self.gestor.mover_libro(self.libro_seleccionado.id, estanteria_destino.id)
             
-            num_ejemplares = len(self.libro_seleccionado.ejemplares) if self.libro_seleccionado.ejemplares else 0
+            num_ejemplares = self.libro_seleccionado.cantidad_total
             
             messagebox.showinfo("✅ Éxito", 
                               f"El libro '{self.libro_seleccionado.titulo}' y sus {num_ejemplares} ejemplar(es)\n"
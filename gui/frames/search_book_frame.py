@@ -4,6 +4,8 @@ from typing import TYPE_CHECKING, List
 from .base_frame import BaseFrame
 from logic.models import Libro, Ejemplar
 from gui.utils.dialogs import confirmar
+from gui.utils.tabla_virtual import TablaVirtual, ProveedorLista, Columna, Accion
+from database.normalizacion import clave_orden_es
 
 if TYPE_CHECKING:
     from gui.app import App
@@ -17,14 +19,16 @@ class SearchBookFrame(BaseFrame):
     def setup_interface(self):
         """Configura la interfaz de búsqueda."""
         # Header
-        self.create_header("🔍 Buscar Libros", "Encuentra libros por título, autor, código o ISBN")
+        self.create_header("🔍 Buscar Libros", "Encuentra libros por título, autor, código o ISBN, "
+                                               "o con campos: autor:borges anio:1940..1960 disponible:si")
 
         # Panel de Búsqueda
         search_panel = ctk.CTkFrame(self.content_frame, fg_color=self.colors['white'], corner_radius=15)
         search_panel.pack(pady=(10, 5), fill="x", padx=20)
         
         ctk.CTkLabel(search_panel, text="Término de Búsqueda:", font=("Segoe UI", 14, "bold"), text_color=self.colors['primary']).pack(side="left", padx=(20, 10), pady=15)
-        self.entry_buscar = ctk.CTkEntry(search_panel, width=300, placeholder_text="Escribe aquí y presiona Enter...", font=("Segoe UI", 12))
+        self.entry_buscar = ctk.CTkEntry(search_panel, width=300, font=("Segoe UI", 12),
+                                         placeholder_text='Escribe aquí y presiona Enter... (p. ej. genero:ensayo estante:"Literatura Clásica")')
         self.entry_buscar.pack(side="left", padx=10, expand=True, fill="x", pady=15)
         self.entry_buscar.bind("<Return>", lambda event: self.buscar_libros())
         
@@ -32,6 +36,11 @@ class SearchBookFrame(BaseFrame):
                      command=self.buscar_libros,
                      font=("Segoe UI", 12, "bold"),
                      fg_color=self.colors['primary'],
+                     hover_color=self.colors['accent']).pack(side="left", padx=(0, 10), pady=15)
+        ctk.CTkButton(search_panel, text="🧭 Ver plan", width=100,
+                     command=self.mostrar_plan,
+                     font=("Segoe UI", 12),
+                     fg_color=self.colors['secondary'],
                      hover_color=self.colors['accent']).pack(side="left", padx=(0, 20), pady=15)
      
         # Panel de Resultados (dinámico)
@@ -49,28 +58,48 @@ class SearchBookFrame(BaseFrame):
         """Inicia el proceso de búsqueda y actualiza la UI."""
         termino = self.entry_buscar.get().strip()
         if not termino:
+            self.master.tareas.cancelar("busqueda_libros")
             for widget in self.results_panel.winfo_children():
                 widget.destroy()
             ctk.CTkLabel(self.results_panel, text="Por favor, ingrese un término de búsqueda.", 
                         font=("Segoe UI", 14), text_color=self.colors['warning']).pack(pady=40)
             return
 
-        # Mostrar indicador de búsqueda
-        for widget in self.results_panel.winfo_children():
-            widget.destroy()
-        ctk.CTkLabel(self.results_panel, text=f"🔍 Buscando '{termino}'...", 
-                    font=("Segoe UI", 14), text_color=self.colors['secondary']).pack(pady=40)
-        
-        # Usar 'after' para permitir que la UI se actualice antes de la búsqueda
-        self.after(50, lambda: self._perform_search(termino))
+        # La búsqueda corre en segundo plano; una nueva búsqueda reemplaza a la anterior
+        self.cargar_en_segundo_plano(
+            self.gestor.buscar_libros,
+            lambda resultados: self.mostrar_resultados(resultados, termino),
+            termino,
+            resumen=True,
+            contenedor=self.results_panel,
+            texto_carga=f"🔍 Buscando '{termino}'...",
+            clave="busqueda_libros",
+            al_fallar=lambda e: self.mostrar_resultados([], termino, error=str(e))
+        )
+
+    def mostrar_plan(self):
+        """Muestra cómo se resuelve una consulta con campos: índice de cada cláusula y plan de SQLite."""
+        consulta = self.entry_buscar.get().strip()
+        if not consulta:
+            return
 
-    def _perform_search(self, termino):
-        """Ejecuta la búsqueda en segundo plano y llama a mostrar_resultados."""
-        try:
-            resultados = self.gestor.buscar_libros(termino)
-            self.mostrar_resultados(resultados, termino)
-        except Exception as e:
-            self.mostrar_resultados([], termino, error=str(e))
+        def al_terminar(texto: str):
+            ventana = ctk.CTkToplevel(self)
+            ventana.title("Plan de la consulta")
+            ventana.geometry("800x500")
+            ventana.transient(self)
+            caja = ctk.CTkTextbox(ventana, font=("Consolas", 12), wrap="none")
+            caja.pack(fill="both", expand=True, padx=10, pady=10)
+            caja.insert("1.0", texto)
+            caja.configure(state="disabled")
+            ctk.CTkButton(ventana, text="Cerrar", command=ventana.destroy).pack(pady=(0, 10))
+
+        self.master.tareas.ejecutar(
+            self.gestor.explicar_consulta_catalogo, consulta,
+            al_terminar=al_terminar,
+            al_fallar=lambda e: messagebox.showerror("Consulta no válida", str(e), parent=self),
+            propietario=self
+        )
 
     def mostrar_resultados(self, resultados: List[Libro], termino: str, error: str = None):
         """Muestra los resultados de la búsqueda o un mensaje de error/no encontrado."""
@@ -101,55 +130,33 @@ class SearchBookFrame(BaseFrame):
                     text=f"✅ {len(resultados)} resultado(s) encontrado(s) para '{termino}'", 
                     text_color="white", font=("Segoe UI", 14, "bold")).pack(pady=10)
 
-        # --- Tabla de resultados ---
-        table_container = ctk.CTkScrollableFrame(self.results_panel, fg_color=self.colors['light'], corner_radius=10)
-        table_container.pack(fill="both", expand=True)
-
-        # Configurar columnas para que se expandan
-        table_container.grid_columnconfigure(1, weight=3) 
-        table_container.grid_columnconfigure(2, weight=2) 
-
-        # Encabezados
-        headers = ["Código", "Título", "Autor", "Disponibles", "Acciones"]
-        column_paddings = [(10, 5), (5, 5), (5, 5), (5, 5), (5, 20)]
-
-        header_frame = ctk.CTkFrame(table_container, fg_color=self.colors['primary'], corner_radius=0)
-        header_frame.grid(row=0, column=0, columnspan=len(headers), sticky="ew", pady=(0, 5))
-        header_frame.grid_columnconfigure(1, weight=3)
-        header_frame.grid_columnconfigure(2, weight=2)
-
-        for i, header in enumerate(headers):
-            ctk.CTkLabel(header_frame, text=header, font=("Segoe UI", 12, "bold"), text_color="white").grid(
-                row=0, column=i, padx=column_paddings[i], pady=10, sticky="w")
-
-        # Filas de datos
-        for i, libro in enumerate(resultados, start=1):
-            row_color = self.colors['white'] if i % 2 == 0 else "transparent"
-            
-            # Código
-            ctk.CTkLabel(table_container, text=libro.codigo, wraplength=100, justify="left", fg_color=row_color).grid(
-                row=i, column=0, padx=column_paddings[0], pady=5, sticky="w")
-            
-            # Título
-            ctk.CTkLabel(table_container, text=libro.titulo, wraplength=300, justify="left", fg_color=row_color).grid(
-                row=i, column=1, padx=column_paddings[1], pady=5, sticky="w")
-            
-            # Autor
-            autor_nombre = libro.autor.nombre_completo if libro.autor else "N/A"
-            ctk.CTkLabel(table_container, text=autor_nombre, wraplength=200, justify="left", fg_color=row_color).grid(
-                row=i, column=2, padx=column_paddings[2], pady=5, sticky="w")
-            
-            # Disponibles/Prestados
-            disponibles_text = f"{libro.cantidad_disponibles} de {len(libro.ejemplares)}"
-            color = self.colors['success'] if libro.cantidad_disponibles > 0 else self.colors['danger']
-            ctk.CTkLabel(table_container, text=disponibles_text, text_color=color, fg_color=row_color).grid(
-                row=i, column=3, padx=column_paddings[3], pady=5, sticky="w")
-            
-            # Botón Detalles
-            ctk.CTkButton(table_container, text="📋 Detalles", width=80, height=30,
-                         fg_color=self.colors['accent'], hover_color=self.colors['primary'],
-                         command=lambda l=libro: self.ver_ejemplares(l)).grid(
-                row=i, column=4, padx=column_paddings[4], pady=5, sticky="e")
+        # Tabla virtualizada: una búsqueda amplia (p. ej. disponible:si) puede
+        # traer todo el catálogo, pero solo se crean widgets para las filas visibles.
+        # Los resultados conservan el orden de la búsqueda hasta que se pulse un encabezado
+        tabla = TablaVirtual(
+            self.results_panel, self.master.tareas,
+            columnas=[
+                Columna("Código", lambda libro: libro.codigo, ancho=110, orden='codigo'),
+                Columna("Título", lambda libro: libro.titulo, ancho=300, orden='titulo'),
+                Columna("Autor", lambda libro: libro.autor.nombre_completo if libro.autor else "N/A", ancho=200),
+                Columna("Disponibles", lambda libro: f"{libro.cantidad_disponibles} de {libro.cantidad_total}",
+                        ancho=100,
+                        color=lambda libro: (self.colors['success'] if libro.cantidad_disponibles > 0
+                                             else self.colors['danger'])),
+            ],
+            acciones=[Accion("📋 Detalles", self.ver_ejemplares, color=self.colors['accent'],
+                             color_hover=self.colors['primary'])],
+            proveedor=ProveedorLista(resultados, claves={'codigo': lambda libro: libro.codigo,
+                                                         'titulo': lambda libro: clave_orden_es(libro.titulo)}),
+            orden=None,
+            fg_color=self.colors['light'],
+            corner_radius=10,
+            height=460
+        )
+        # El panel está dentro del área con scroll, que no le limita el alto:
+        # la tabla conserva el suyo y se desplaza por sí misma
+        tabla.pack_propagate(False)
+        tabla.pack(fill="x")
 
     def ver_ejemplares(self, libro: Libro):
         """Muestra una ventana con los detalles y ejemplares del libro."""
@@ -159,13 +166,23 @@ class SearchBookFrame(BaseFrame):
         ejemplares_window.transient(self)
         ejemplares_window.grab_set()
 
-        try:
-            ejemplares = self.gestor.get_ejemplares_por_libro(libro.id)
-        except Exception as e:
+        cargando = ctk.CTkLabel(ejemplares_window, text="⏳ Cargando ejemplares...", font=("Segoe UI", 12))
+        cargando.pack(pady=40)
+
+        def al_fallar(e):
             messagebox.showerror("Error", f"No se pudieron cargar los ejemplares: {e}", parent=ejemplares_window)
             ejemplares_window.destroy()
-            return
-            
+
+        def al_terminar(ejemplares):
+            cargando.destroy()
+            self._mostrar_ejemplares(ejemplares_window, libro, ejemplares)
+
+        self.master.tareas.ejecutar(self.gestor.get_ejemplares_por_libro, libro.id,
+                                    al_terminar=al_terminar, al_fallar=al_fallar,
+                                    propietario=ejemplares_window)
+
+    def _mostrar_ejemplares(self, ejemplares_window, libro: Libro, ejemplares: List[Ejemplar]):
+        """Dibuja la información del libro y sus ejemplares en la ventana de detalles."""
         # Info General
         info_frame = ctk.CTkFrame(ejemplares_window, fg_color=self.colors['light'])
         info_frame.pack(fill="x", padx=20, pady=20)
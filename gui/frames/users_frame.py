@@ -1,14 +1,20 @@
 import customtkinter as ctk
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 from tkinter import messagebox
 from logic.models import Usuario
+from database.normalizacion import clave_orden_es
 from gui.utils.dialogs import confirmar
+from gui.utils.tabla_virtual import TablaVirtual, ProveedorLista, Columna, Accion
+from .base_frame import CargaEnSegundoPlano
 
 if TYPE_CHECKING:
     from gui.app import App
     from logic.library_manager import GestorBiblioteca
 
-class UsersFrame(ctk.CTkFrame):
+# Usuarios como máximo por búsqueda; los más relevantes primero
+LIMITE_BUSQUEDA_USUARIOS = 200
+
+class UsersFrame(CargaEnSegundoPlano, ctk.CTkFrame):
     def __init__(self, master: 'App', gestor: 'GestorBiblioteca'):
         super().__init__(master)
         self.master = master
@@ -46,6 +52,8 @@ class UsersFrame(ctk.CTkFrame):
 
     def mostrar_agregar_usuario(self):
         """Muestra el formulario para agregar usuario."""
+        # Descarta cualquier carga pendiente de otra vista
+        self.master.tareas.cancelar("vista_usuarios")
         for widget in self.content_frame.winfo_children():
             widget.destroy()
         
@@ -109,106 +117,78 @@ class UsersFrame(ctk.CTkFrame):
 
     def mostrar_lista_usuarios(self):
         """Muestra la lista de todos los usuarios."""
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+        self.master.tareas.cancelar("vista_usuarios")
+        self.limpiar_contenedor(self.content_frame)
         
         ctk.CTkLabel(self.content_frame, text="Lista de Usuarios", 
                     font=("Arial", 16, "bold")).pack(pady=10)
         
-        try:
-            usuarios = self.gestor.get_todos_usuarios()
-            
-            if not usuarios:
-                ctk.CTkLabel(self.content_frame, text="No hay usuarios registrados.", 
-                           fg_color="orange").pack(pady=20)
-                return
-            
-            # Frame con scroll para la tabla
-            scroll_frame = ctk.CTkScrollableFrame(self.content_frame)
-            scroll_frame.pack(pady=10, padx=10, fill="both", expand=True)
-            
-            # Encabezados
-            headers = ["ID", "Nombre", "Email", "Teléfono", "Fecha Registro", "Estado", "Acciones"]
-            for i, header in enumerate(headers):
-                ctk.CTkLabel(scroll_frame, text=header, font=("Arial", 12, "bold")).grid(
-                    row=0, column=i, padx=10, pady=5, sticky="w")
-            
-            # Datos de usuarios
-            for row_num, usuario in enumerate(usuarios, start=1):
-                ctk.CTkLabel(scroll_frame, text=str(usuario.id)).grid(row=row_num, column=0, padx=10, pady=2)
-                ctk.CTkLabel(scroll_frame, text=usuario.nombre).grid(row=row_num, column=1, padx=10, pady=2)
-                ctk.CTkLabel(scroll_frame, text=usuario.email or "N/A").grid(row=row_num, column=2, padx=10, pady=2)
-                ctk.CTkLabel(scroll_frame, text=usuario.telefono or "N/A").grid(row=row_num, column=3, padx=10, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(usuario.fecha_registro)).grid(row=row_num, column=4, padx=10, pady=2)
-                
-                estado_color = "green" if usuario.activo else "red"
-                estado_texto = "Activo" if usuario.activo else "Inactivo"
-                ctk.CTkLabel(scroll_frame, text=estado_texto, text_color=estado_color).grid(
-                    row=row_num, column=5, padx=10, pady=2)
-                
-                # Botones de acción
-                actions_frame = ctk.CTkFrame(scroll_frame, fg_color="transparent")
-                actions_frame.grid(row=row_num, column=6, padx=10, pady=2)
-                
-                ctk.CTkButton(actions_frame, text="Ver Préstamos", width=100,
-                             command=lambda u=usuario: self.ver_prestamos_usuario(u)).pack(side="left", padx=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar usuarios: {str(e)}")
+        self._tabla_usuarios(
+            self.content_frame,
+            lambda cursor, orden, descendente: self.gestor.get_pagina_usuarios(
+                cursor, orden=orden, descendente=descendente),
+            texto_vacio="No hay usuarios registrados."
+        ).pack(pady=10, padx=10, fill="both", expand=True)
+
+    def _tabla_usuarios(self, contenedor, proveedor, texto_vacio: str,
+                        orden: Optional[str] = 'nombre') -> TablaVirtual:
+        """Tabla de usuarios con la acción de ver sus préstamos (orden=None: el del proveedor)."""
+        return TablaVirtual(
+            contenedor, self.master.tareas,
+            columnas=[
+                Columna("ID", lambda u: str(u.id), ancho=50, orden='id'),
+                Columna("Nombre", lambda u: u.nombre, ancho=180, orden='nombre'),
+                Columna("Email", lambda u: u.email or "N/A", ancho=180),
+                Columna("Teléfono", lambda u: u.telefono or "N/A", ancho=110),
+                Columna("Fecha Registro", lambda u: str(u.fecha_registro), ancho=100),
+                Columna("Estado", lambda u: "Activo" if u.activo else "Inactivo", ancho=70,
+                        color=lambda u: "green" if u.activo else "red"),
+            ],
+            acciones=[Accion("Ver Préstamos", self.ver_prestamos_usuario, ancho=100)],
+            proveedor=proveedor,
+            orden=orden,
+            texto_vacio=texto_vacio
+        )
 
     def ver_prestamos_usuario(self, usuario: Usuario):
-        """Muestra los préstamos de un usuario específico."""
-        try:
-            prestamos = self.gestor.get_prestamos_usuario(usuario.id)
-            
-            # Crear ventana emergente
-            prestamos_window = ctk.CTkToplevel(self)
-            prestamos_window.title(f"Préstamos de {usuario.nombre}")
-            prestamos_window.geometry("800x600")
-            
-            ctk.CTkLabel(prestamos_window, text=f"Préstamos de {usuario.nombre}", 
-                        font=("Arial", 16, "bold")).pack(pady=10)
-            
-            if not prestamos:
-                ctk.CTkLabel(prestamos_window, text="Este usuario no tiene préstamos.", 
-                           fg_color="blue").pack(pady=20)
-                return
-            
-            # Frame con scroll
-            scroll_frame = ctk.CTkScrollableFrame(prestamos_window)
-            scroll_frame.pack(pady=10, padx=10, fill="both", expand=True)
-            
-            # Encabezados
-            headers = ["ID", "Ejemplar", "Fecha Préstamo", "Fecha Vencimiento", "Estado", "Acciones"]
-            for i, header in enumerate(headers):
-                ctk.CTkLabel(scroll_frame, text=header, font=("Arial", 12, "bold")).grid(
-                    row=0, column=i, padx=10, pady=5)
-            
-            # Datos de préstamos
-            for row_num, prestamo in enumerate(prestamos, start=1):
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.id)).grid(row=row_num, column=0, padx=10, pady=2)
-                ctk.CTkLabel(scroll_frame, text=f"Ejemplar #{prestamo.ejemplar_id}").grid(row=row_num, column=1, padx=10, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.fecha_prestamo)).grid(row=row_num, column=2, padx=10, pady=2)
-                ctk.CTkLabel(scroll_frame, text=str(prestamo.fecha_devolucion_esperada)).grid(row=row_num, column=3, padx=10, pady=2)
-                
-                # Estado con color
-                estado_color = "green" if prestamo.estado == "devuelto" else ("red" if prestamo.esta_vencido else "blue")
-                ctk.CTkLabel(scroll_frame, text=prestamo.estado.title(), text_color=estado_color).grid(
-                    row=row_num, column=4, padx=10, pady=2)
-                
-                # Botón devolver si está activo
-                if prestamo.estado == "activo":
-                    ctk.CTkButton(scroll_frame, text="Devolver", width=80,
-                                 command=lambda p=prestamo: self.devolver_prestamo(p, prestamos_window)).grid(
-                                 row=row_num, column=5, padx=10, pady=2)
-                else:
-                    ctk.CTkLabel(scroll_frame, text="—").grid(row=row_num, column=5, padx=10, pady=2)
-            
-            ctk.CTkButton(prestamos_window, text="Cerrar", 
-                         command=prestamos_window.destroy).pack(pady=10)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar préstamos: {str(e)}")
+        """Muestra los préstamos de un usuario específico, del más reciente al más antiguo."""
+        prestamos_window = ctk.CTkToplevel(self)
+        prestamos_window.title(f"Préstamos de {usuario.nombre}")
+        prestamos_window.geometry("800x600")
+        
+        ctk.CTkLabel(prestamos_window, text=f"Préstamos de {usuario.nombre}", 
+                    font=("Arial", 16, "bold")).pack(pady=10)
+        
+        TablaVirtual(
+            prestamos_window, self.master.tareas,
+            columnas=[
+                Columna("ID", lambda p: str(p.id), ancho=50),
+                Columna("Libro/Ejemplar", self._texto_libro_ejemplar, ancho=240, orden='titulo'),
+                Columna("Fecha Préstamo", lambda p: str(p.fecha_prestamo), ancho=100, orden='fecha_prestamo'),
+                Columna("Fecha Vencimiento", lambda p: str(p.fecha_devolucion_esperada), ancho=110,
+                        orden='vencimiento'),
+                Columna("Estado", lambda p: p.estado.title(), ancho=80,
+                        color=lambda p: "green" if p.estado == "devuelto" else ("red" if p.esta_vencido else "blue")),
+            ],
+            acciones=[
+                Accion("Devolver", lambda p: self.devolver_prestamo(p, prestamos_window),
+                       activa=lambda p: p.estado == "activo", texto_inactiva="—"),
+            ],
+            proveedor=lambda cursor, orden, descendente: self.gestor.get_pagina_prestamos(
+                cursor, usuario_id=usuario.id, orden=orden, descendente=descendente),
+            orden='fecha_prestamo',
+            descendente=True,
+            texto_vacio="Este usuario no tiene préstamos."
+        ).pack(pady=10, padx=10, fill="both", expand=True)
+        
+        ctk.CTkButton(prestamos_window, text="Cerrar", 
+                     command=prestamos_window.destroy).pack(pady=10)
+
+    @staticmethod
+    def _texto_libro_ejemplar(prestamo) -> str:
+        if not prestamo.codigo_ejemplar:
+            return f"Ejemplar #{prestamo.ejemplar_id}"
+        return f"{prestamo.libro_titulo or 'N/A'} ({prestamo.codigo_ejemplar})"
 
     def devolver_prestamo(self, prestamo, window):
         """Devuelve un préstamo específico."""
@@ -228,49 +208,55 @@ class UsersFrame(ctk.CTkFrame):
 
     def mostrar_buscar_usuario(self):
         """Muestra el formulario para buscar usuario."""
+        self.master.tareas.cancelar("vista_usuarios")
         for widget in self.content_frame.winfo_children():
             widget.destroy()
         
         search_panel = ctk.CTkFrame(self.content_frame)
         search_panel.pack(pady=10, padx=10, fill="x")
         
-        ctk.CTkLabel(search_panel, text="Buscar por nombre:").pack(side="left", padx=10)
+        ctk.CTkLabel(search_panel, text="Buscar por nombre, email o teléfono:").pack(side="left", padx=10)
         self.entry_buscar = ctk.CTkEntry(search_panel, width=300)
         self.entry_buscar.pack(side="left", padx=10, expand=True, fill="x")
+        self.entry_buscar.bind("<Return>", lambda event: self.buscar_usuario())
         ctk.CTkButton(search_panel, text="Buscar", command=self.buscar_usuario).pack(side="left", padx=10)
         
-        self.results_panel = ctk.CTkScrollableFrame(self.content_frame)
+        self.results_panel = ctk.CTkFrame(self.content_frame)
         self.results_panel.pack(pady=10, padx=10, fill="both", expand=True)
         ctk.CTkLabel(self.results_panel, text="Ingrese un término de búsqueda y presione 'Buscar'").pack(pady=20)
 
     def buscar_usuario(self):
-        """Busca usuarios por nombre."""
-        for widget in self.results_panel.winfo_children():
-            widget.destroy()
+        """Busca usuarios por nombre, email o teléfono en el índice de usuarios."""
+        termino = self.entry_buscar.get().strip()
+        if not termino:
+            messagebox.showwarning("Advertencia", "Ingrese un término de búsqueda")
+            return
 
-        try:
-            termino = self.entry_buscar.get().strip().lower()
-            if not termino:
-                messagebox.showwarning("Advertencia", "Ingrese un término de búsqueda")
-                return
-            
-            usuarios = self.gestor.get_todos_usuarios()
-            resultados = [u for u in usuarios if termino in u.nombre.lower()]
-            
-            if not resultados:
-                ctk.CTkLabel(self.results_panel, text="No se encontraron usuarios.", 
-                           fg_color="orange").pack(pady=20)
-                return
-            
-            headers = ["ID", "Nombre", "Email", "Acciones"]
-            for i, header in enumerate(headers):
-                 ctk.CTkLabel(self.results_panel, text=header, font=("Arial", 12, "bold")).grid(row=0, column=i, padx=10, pady=5)
+        self.cargar_en_segundo_plano(self.gestor.buscar_usuarios, self._mostrar_resultados_busqueda,
+                                     termino, limite=LIMITE_BUSQUEDA_USUARIOS,
+                                     contenedor=self.results_panel,
+                                     texto_carga="🔍 Buscando usuarios...",
+                                     clave="vista_usuarios")
 
-            for row_num, usuario in enumerate(resultados, start=1):
-                ctk.CTkLabel(self.results_panel, text=str(usuario.id)).grid(row=row_num, column=0, padx=10, pady=2)
-                ctk.CTkLabel(self.results_panel, text=usuario.nombre).grid(row=row_num, column=1, padx=10, pady=2)
-                ctk.CTkLabel(self.results_panel, text=usuario.email or "N/A").grid(row=row_num, column=2, padx=10, pady=2)
-                ctk.CTkButton(self.results_panel, text="Ver Préstamos", width=100, command=lambda u=usuario: self.ver_prestamos_usuario(u)).grid(row=row_num, column=3, padx=10, pady=2)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Error en la búsqueda: {str(e)}")
+    def _mostrar_resultados_busqueda(self, resultados):
+        self.limpiar_contenedor(self.results_panel)
+
+        if not resultados:
+            ctk.CTkLabel(self.results_panel, text="No se encontraron usuarios.", 
+                       fg_color="orange").pack(pady=20)
+            return
+
+        if len(resultados) >= LIMITE_BUSQUEDA_USUARIOS:
+            ctk.CTkLabel(self.results_panel,
+                         text=f"Se muestran los {LIMITE_BUSQUEDA_USUARIOS} resultados más relevantes; "
+                              "precise la búsqueda para ver otros.",
+                         text_color="orange").pack(pady=5)
+
+        # Los resultados ya están en memoria y por relevancia: la tabla los
+        # pagina y solo los reordena si se pulsa un encabezado
+        self._tabla_usuarios(
+            self.results_panel,
+            ProveedorLista(resultados, claves={'id': lambda u: u.id, 'nombre': lambda u: clave_orden_es(u.nombre)}),
+            texto_vacio="No se encontraron usuarios.",
+            orden=None
+        ).pack(fill="both", expand=True)
@@ -0,0 +1,297 @@
+"""
+Búsqueda mientras se escribe (type-ahead) para campos de texto.
+
+Consultar en cada <KeyRelease> lanza una consulta por tecla y redibuja las
+sugerencias aunque el usuario siga escribiendo. Autocompletado:
+
+* Espera `retardo_ms` sin teclas antes de consultar (debounce).
+* Al cambiar el texto cancela la búsqueda anterior: la tarea se descarta y,
+  si la consulta SQL sigue corriendo, se corta con
+  sqlite3.Connection.interrupt() (ver database/conexiones.Interrupcion).
+* Guarda los resultados de cada término del campo. Si el término nuevo
+  extiende a uno ya respondido ("gar" → "garc"), `refinar` filtra en memoria
+  ese resultado en lugar de volver a la base de datos. Filtrar corre en el
+  hilo de Tk, así que solo se hace sobre resultados de hasta `max_refinar`
+  elementos; con más, la consulta (con sus índices) sale más barata.
+
+Un resultado recortado por `limite` no contiene todas las coincidencias,
+pero sí las primeras en orden: si al refinarlo quedan al menos `visibles`
+elementos, esos son los que devolvería la consulta y también se usan. Eso
+solo vale si el orden no depende del término; cuando sí depende (p. ej.
+coincidencias exactas primero), `refinar_recortados=False` vuelve a
+consultar.
+
+ListaSugerencias muestra los resultados bajo el campo reutilizando sus
+botones: entre una tecla y la siguiente solo cambia el texto de cada uno.
+
+Uso típico desde un frame:
+
+    self.sugerencias = ListaSugerencias(form, texto=lambda libro: libro.titulo,
+                                        al_elegir=self.seleccionar_libro)
+    self.autocompletado = Autocompletado(
+        self.search_entry, self.master.tareas,
+        buscar=lambda termino: self.gestor.buscar_libros(termino, resumen=True),
+        al_resultados=self.sugerencias.mostrar,
+        refinar=self.gestor.refinar_busqueda_libros,
+        interrumpible=self.gestor.lectura_interrumpible
+    )
+"""
+
+import sqlite3
+from collections import OrderedDict
+from typing import Any, Callable, ContextManager, List, Optional, Tuple
+
+import customtkinter as ctk
+
+from database.conexiones import Interrupcion
+
+# Milisegundos sin teclas antes de consultar
+RETARDO_MS = 250
+
+# Términos guardados por campo
+MAX_TERMINOS = 64
+
+# Elementos como máximo de un resultado que se filtra en memoria
+MAX_REFINAR = 2000
+
+# refinar(resultado_anterior, termino_anterior, termino_nuevo) -> resultado nuevo o None
+Refinar = Callable[[List[Any], str, str], Optional[List[Any]]]
+
+
+def refinar_por(coincide: Callable[[Any, str], bool]) -> Refinar:
+    """Refinar para búsquedas por subcadena: conserva los elementos que coinciden con el término nuevo."""
+    def refinar(elementos: List[Any], anterior: str, nuevo: str) -> List[Any]:
+        return [elemento for elemento in elementos if coincide(elemento, nuevo)]
+    return refinar
+
+
+class Autocompletado:
+    """Motor de búsqueda mientras se escribe para un campo de texto."""
+
+    def __init__(self, campo, tareas, buscar: Callable[[str], List[Any]],
+                 al_resultados: Callable[[List[Any]], None],
+                 al_vaciar: Optional[Callable[[], None]] = None,
+                 refinar: Optional[Refinar] = None,
+                 limite: Optional[int] = None, visibles: Optional[int] = None,
+                 minimo: int = 1, retardo_ms: int = RETARDO_MS, max_refinar: int = MAX_REFINAR,
+                 refinar_recortados: bool = True,
+                 interrumpible: Optional[Callable[[Interrupcion], ContextManager]] = None,
+                 al_fallar: Optional[Callable[[Exception], None]] = None):
+        """
+        Args:
+            campo: CTkEntry del que se lee el término.
+            tareas: EjecutorTareas de la App (master.tareas).
+            buscar: termino -> resultados; corre en un hilo de trabajo.
+            al_resultados: Recibe los resultados en el hilo de Tk.
+            al_vaciar: Se llama cuando el término tiene menos de `minimo` caracteres.
+            refinar: Deduce en memoria el resultado de un término que extiende
+                a otro ya respondido; None = solo se reutilizan términos iguales.
+            limite: Máximo de resultados que devuelve `buscar` (None = todos);
+                un resultado de ese tamaño se considera recortado.
+            visibles: Cuántos resultados se entregan a al_resultados.
+            minimo: Caracteres necesarios para buscar mientras se escribe.
+            max_refinar: Tamaño máximo de un resultado guardado para refinarlo.
+            refinar_recortados: Si un resultado recortado se puede refinar. Con
+                False solo se refinan resultados completos: hace falta cuando
+                el término nuevo reordena el resultado y una coincidencia que
+                quedó fuera del recorte podría pasar delante.
+            interrumpible: Context manager que recibe la Interrupcion de cada
+                búsqueda (p. ej. GestorBiblioteca.lectura_interrumpible).
+            al_fallar: Error de una búsqueda no cancelada; por defecto se imprime.
+        """
+        self._campo = campo
+        self._tareas = tareas
+        self._buscar = buscar
+        self._al_resultados = al_resultados
+        self._al_vaciar = al_vaciar
+        self._refinar = refinar
+        self._limite = limite
+        self._visibles = visibles
+        self._minimo = minimo
+        self._retardo_ms = retardo_ms
+        self._max_refinar = max_refinar
+        self._refinar_recortados = refinar_recortados
+        self._interrumpible = interrumpible
+        self._al_fallar = al_fallar
+
+        # termino -> (resultados, completo)
+        self._resultados: 'OrderedDict[str, Tuple[List[Any], bool]]' = OrderedDict()
+        self._termino: Optional[str] = None
+        self._temporizador = None
+        self._interrupcion: Optional[Interrupcion] = None
+        self._clave = f"autocompletado_{id(self)}"
+
+        self.consultas = 0
+        self.aciertos = 0
+        self.refinados = 0
+
+        campo.bind("<KeyRelease>", lambda evento: self.actualizar(), add="+")
+
+    # ============ API ============
+    def actualizar(self):
+        """Reacciona al texto actual del campo (se llama sola en cada tecla)."""
+        termino = self._campo.get().strip()
+        if termino == self._termino:
+            return
+        self._termino = termino
+        self.cancelar()
+
+        if len(termino) < self._minimo:
+            if self._al_vaciar:
+                self._al_vaciar()
+            return
+
+        resultados = self._desde_memoria(termino)
+        if resultados is not None:
+            self._entregar(resultados)
+        else:
+            self._temporizador = self._campo.after(self._retardo_ms, self._consultar, termino)
+
+    def buscar_ahora(self):
+        """Busca el texto actual sin esperar ni exigir `minimo` (p. ej. desde un botón)."""
+        termino = self._campo.get().strip()
+        self._termino = termino
+        self.cancelar()
+        resultados = self._desde_memoria(termino)
+        if resultados is not None:
+            self._entregar(resultados)
+        else:
+            self._consultar(termino)
+
+    def cancelar(self):
+        """Descarta la búsqueda programada o en curso."""
+        if self._temporizador is not None:
+            self._campo.after_cancel(self._temporizador)
+            self._temporizador = None
+        if self._interrupcion is not None:
+            self._interrupcion.interrumpir()
+            self._interrupcion = None
+        self._tareas.cancelar(self._clave)
+
+    def olvidar(self):
+        """Vacía los resultados guardados (p. ej. tras un cambio en los datos)."""
+        self._resultados.clear()
+        self._termino = None
+
+    # ============ RESULTADOS GUARDADOS ============
+    def _desde_memoria(self, termino: str) -> Optional[List[Any]]:
+        guardado = self._resultados.get(termino)
+        if guardado is not None:
+            self._resultados.move_to_end(termino)
+            self.aciertos += 1
+            return guardado[0]
+        if self._refinar is None:
+            return None
+
+        # El término respondido más largo que es prefijo del actual
+        for anterior in sorted(self._resultados, key=len, reverse=True):
+            if len(anterior) >= len(termino) or not termino.startswith(anterior):
+                continue
+            elementos, completo = self._resultados[anterior]
+            if len(elementos) > self._max_refinar:
+                continue
+            refinados = self._refinar(elementos, anterior, termino)
+            if refinados is None:
+                continue
+            if not completo and (not self._refinar_recortados or self._visibles is None
+                                 or len(refinados) < self._visibles):
+                continue
+            self._guardar(termino, refinados, completo)
+            self.refinados += 1
+            return refinados
+        return None
+
+    def _guardar(self, termino: str, resultados: List[Any], completo: bool):
+        self._resultados[termino] = (resultados, completo)
+        self._resultados.move_to_end(termino)
+        while len(self._resultados) > MAX_TERMINOS:
+            self._resultados.popitem(last=False)
+
+    # ============ CONSULTA ============
+    def _consultar(self, termino: str):
+        self._temporizador = None
+        interrupcion = self._interrupcion = Interrupcion()
+        self.consultas += 1
+        self._tareas.ejecutar(
+            self._buscar_interrumpible, termino, interrupcion,
+            al_terminar=lambda resultados: self._recibir(termino, resultados, interrupcion),
+            al_fallar=lambda error: self._fallo(error, interrupcion),
+            clave=self._clave,
+            propietario=self._campo
+        )
+
+    def _buscar_interrumpible(self, termino: str, interrupcion: Interrupcion) -> List[Any]:
+        """Corre en el hilo de trabajo."""
+        if self._interrumpible is None:
+            return self._buscar(termino)
+        with self._interrumpible(interrupcion):
+            return self._buscar(termino)
+
+    def _recibir(self, termino: str, resultados: List[Any], interrupcion: Interrupcion):
+        if self._interrupcion is interrupcion:
+            self._interrupcion = None
+        completo = self._limite is None or len(resultados) < self._limite
+        self._guardar(termino, list(resultados), completo)
+        if termino == self._termino:
+            self._entregar(resultados)
+
+    def _fallo(self, error: Exception, interrupcion: Interrupcion):
+        if self._interrupcion is interrupcion:
+            self._interrupcion = None
+        if interrupcion.cancelada and isinstance(error, sqlite3.OperationalError):
+            return
+        if self._al_fallar:
+            self._al_fallar(error)
+        else:
+            print(f"⚠️ Error en la búsqueda: {error}")
+
+    def _entregar(self, resultados: List[Any]):
+        if self._visibles is not None:
+            resultados = resultados[:self._visibles]
+        self._al_resultados(resultados)
+
+
+class ListaSugerencias(ctk.CTkScrollableFrame):
+    """Lista de sugerencias que reutiliza sus botones entre una búsqueda y otra."""
+
+    def __init__(self, master, texto: Callable[[Any], str], al_elegir: Callable[[Any], None], **kwargs):
+        """
+        Args:
+            texto: Texto del botón de cada sugerencia.
+            al_elegir: Se llama con la sugerencia elegida.
+        """
+        super().__init__(master, **kwargs)
+        self._texto = texto
+        self._al_elegir = al_elegir
+        self._botones: List[ctk.CTkButton] = []
+        self._textos: List[Optional[str]] = []
+        self._elementos: List[Any] = []
+
+    @property
+    def elementos(self) -> List[Any]:
+        return list(self._elementos)
+
+    def mostrar(self, elementos: List[Any]):
+        """Muestra las sugerencias: reconfigura los botones existentes y crea solo los que falten."""
+        self._elementos = list(elementos)
+        while len(self._botones) < len(self._elementos):
+            indice = len(self._botones)
+            self._botones.append(ctk.CTkButton(self, text="", anchor="w",
+                                               command=lambda i=indice: self._elegir(i)))
+            self._textos.append(None)
+
+        for i, boton in enumerate(self._botones):
+            if i < len(self._elementos):
+                texto = self._texto(self._elementos[i])
+                if self._textos[i] != texto:
+                    boton.configure(text=texto)
+                    self._textos[i] = texto
+                # Los ocultos son siempre los últimos: al volver a mostrarlos conservan el orden
+                if not boton.winfo_manager():
+                    boton.pack(fill="x", padx=2, pady=2)
+            elif boton.winfo_manager():
+                boton.pack_forget()
+
+    def _elegir(self, indice: int):
+        if indice < len(self._elementos):
+            self._al_elegir(self._elementos[indice])
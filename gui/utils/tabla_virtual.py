@@ -0,0 +1,455 @@
+"""
+Tabla virtualizada para listados grandes.
+
+Dibujar una fila de widgets por elemento dentro de un CTkScrollableFrame
+crea decenas de miles de widgets en un catálogo grande y tarda minutos.
+TablaVirtual solo mantiene las filas que caben en pantalla: al desplazarse,
+las mismas filas de widgets se vuelven a llenar con los elementos de la
+nueva posición, así que la cantidad de widgets no depende del tamaño del
+listado.
+
+Los datos llegan por páginas (Pagina, ver database/paginacion.py) de un
+proveedor que corre en el ejecutor de tareas de la App; la página
+siguiente se pide sola cuando el desplazamiento se acerca al final de lo
+ya cargado. Las columnas con clave de orden se ordenan al hacer clic en su
+encabezado: la tabla vuelve a pedir la primera página con ese orden.
+
+Cuando cambia un solo elemento (un préstamo, una devolución) no hace falta
+recargar: reemplazar() cambia el elemento y, si está a la vista, solo
+reconfigura las celdas de su fila; quitar() lo saca del listado.
+
+Uso típico desde un frame:
+
+    self.tabla = TablaVirtual(
+        contenedor, self.master.tareas,
+        columnas=[
+            Columna("Código", lambda libro: libro.codigo, ancho=110, orden='codigo'),
+            Columna("Título", lambda libro: libro.titulo, ancho=300, orden='titulo'),
+        ],
+        acciones=[Accion("✏️ Editar", self.editar_libro)],
+        proveedor=lambda cursor, orden, descendente: self.gestor.get_pagina_libros(
+            cursor, orden=orden, descendente=descendente, resumen=True),
+        orden='titulo'
+    )
+    self.tabla.pack(fill="both", expand=True)
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import customtkinter as ctk
+
+from database.paginacion import Pagina, TAMANIO_PAGINA
+
+# Proveedor de datos: (cursor, orden, descendente) -> Pagina. Corre fuera del hilo de Tk.
+Proveedor = Callable[[Optional[str], Optional[str], bool], Pagina]
+
+# Filas de margen: al quedar menos por mostrar se pide la página siguiente
+MARGEN_PAGINA = 10
+
+# Estado de un botón recién creado (visible y con su configuración inicial)
+_SIN_CONFIGURAR = object()
+
+
+class Columna:
+    """Una columna de texto de la tabla."""
+
+    def __init__(self, titulo: str, texto: Callable[[Any], str], ancho: int = 120,
+                 orden: Optional[str] = None, color: Optional[Callable[[Any], Optional[str]]] = None):
+        """
+        Args:
+            titulo: Encabezado.
+            texto: Texto de la celda para un elemento.
+            ancho: Ancho en píxeles; el texto que no entra se recorta con "…".
+            orden: Clave de orden que se pasa al proveedor; None = no ordenable.
+            color: Color del texto para un elemento (None = color del tema).
+        """
+        self.titulo = titulo
+        self.texto = texto
+        self.ancho = ancho
+        self.orden = orden
+        self.color = color
+
+
+class Accion:
+    """Un botón por fila que recibe el elemento de esa fila."""
+
+    def __init__(self, texto: str, comando: Callable[[Any], None], ancho: int = 80,
+                 color: Optional[str] = None, color_hover: Optional[str] = None,
+                 activa: Optional[Callable[[Any], bool]] = None, texto_inactiva: Optional[str] = None):
+        """
+        Args:
+            activa: Indica si la acción aplica al elemento. Si no aplica, el
+                botón se muestra deshabilitado con texto_inactiva o, si no
+                hay texto_inactiva, se oculta.
+        """
+        self.texto = texto
+        self.comando = comando
+        self.ancho = ancho
+        self.color = color
+        self.color_hover = color_hover
+        self.activa = activa
+        self.texto_inactiva = texto_inactiva
+
+
+class ProveedorLista:
+    """
+    Proveedor para resultados que ya están en memoria (p. ej. una búsqueda):
+    los ordena según la clave pedida y los entrega por páginas. El cursor es
+    la posición de la siguiente página dentro de la lista ordenada.
+    """
+
+    def __init__(self, elementos: List[Any], claves: Optional[Dict[str, Callable[[Any], Any]]] = None,
+                 tamanio: int = TAMANIO_PAGINA):
+        self._elementos = list(elementos)
+        self._claves = claves or {}
+        self._tamanio = tamanio
+        self._ordenados: Dict[tuple, List[Any]] = {}
+
+    def __call__(self, cursor: Optional[str], orden: Optional[str], descendente: bool) -> Pagina:
+        if orden is not None and orden not in self._claves:
+            raise ValueError(f"Orden no válido: {orden}")
+        lista = self._ordenados.get((orden, descendente))
+        if lista is None:
+            lista = self._elementos
+            if orden is not None:
+                clave = self._claves[orden]
+
+                def sin_nulos(elemento):
+                    valor = clave(elemento)
+                    return (valor is None, valor)
+                lista = sorted(lista, key=sin_nulos, reverse=descendente)
+            self._ordenados[(orden, descendente)] = lista
+        inicio = int(cursor) if cursor else 0
+        fin = inicio + self._tamanio
+        return Pagina(lista[inicio:fin], str(fin) if fin < len(lista) else None)
+
+
+class _Fila:
+    """Widgets reutilizables de una fila visible y el elemento que muestran."""
+
+    def __init__(self, tabla: 'TablaVirtual'):
+        self.marco = ctk.CTkFrame(tabla._cuerpo, fg_color="transparent", corner_radius=0)
+        self.elemento = None
+        self.visible = False
+        # Último (texto, color) de cada celda: solo se reconfigura lo que cambia
+        self.celdas = []
+        self.etiquetas = []
+        for i, columna in enumerate(tabla.columnas):
+            etiqueta = ctk.CTkLabel(self.marco, text="", width=columna.ancho, anchor="w")
+            etiqueta.grid(row=0, column=i, padx=5)
+            self.etiquetas.append(etiqueta)
+            self.celdas.append(None)
+
+        self.botones = []
+        self.estados_botones = []
+        if tabla.acciones:
+            acciones_frame = ctk.CTkFrame(self.marco, fg_color="transparent")
+            acciones_frame.grid(row=0, column=len(tabla.columnas), padx=5)
+            for i, accion in enumerate(tabla.acciones):
+                boton = ctk.CTkButton(acciones_frame, text=accion.texto, width=accion.ancho,
+                                      command=lambda a=accion: self._ejecutar(a))
+                boton.grid(row=0, column=i, padx=2)
+                self.botones.append(boton)
+                self.estados_botones.append(_SIN_CONFIGURAR)
+
+        for widget in [self.marco] + self.etiquetas + self.botones:
+            tabla._enlazar_rueda(widget)
+
+    def _ejecutar(self, accion: Accion):
+        if self.elemento is not None:
+            accion.comando(self.elemento)
+
+
+class TablaVirtual(ctk.CTkFrame):
+    """Tabla que solo crea widgets para las filas visibles y carga los datos por páginas."""
+
+    def __init__(self, master, tareas, columnas: List[Columna], proveedor: Proveedor,
+                 acciones: Optional[List[Accion]] = None, orden: Optional[str] = None,
+                 descendente: bool = False, inicial: Optional[Pagina] = None,
+                 alto_fila: int = 34, texto_vacio: str = "No hay elementos para mostrar.",
+                 al_cargar: Optional[Callable[['TablaVirtual'], None]] = None,
+                 id_elemento: Callable[[Any], Any] = lambda elemento: elemento.id, **kwargs):
+        """
+        Args:
+            tareas: EjecutorTareas de la App (master.tareas).
+            proveedor: (cursor, orden, descendente) -> Pagina; corre en un hilo de trabajo.
+            orden / descendente: Orden inicial que se pasa al proveedor.
+            inicial: Primera página ya consultada; evita repetir la consulta.
+            alto_fila: Alto en píxeles de cada fila.
+            texto_vacio: Mensaje cuando el listado no tiene elementos.
+            al_cargar: Se llama tras recibir cada página (p. ej. para mostrar
+                cuántos elementos hay cargados).
+            id_elemento: Identificador con el que reemplazar() y quitar()
+                encuentran un elemento (por defecto, su atributo id).
+        """
+        super().__init__(master, **kwargs)
+        self._tareas = tareas
+        self.columnas = columnas
+        self.acciones = acciones or []
+        self._proveedor = proveedor
+        self._orden = orden
+        self._descendente = descendente
+        self._alto_fila = alto_fila
+        self._texto_vacio = texto_vacio
+        self._al_cargar = al_cargar
+        self._id_elemento = id_elemento
+
+        self._elementos: List[Any] = []
+        self._siguiente: Optional[str] = None
+        self._cargando = False
+        # Aumenta en cada recarga: descarta las páginas pedidas con un orden anterior
+        self._generacion = 0
+        self._primera = 0
+        self._filas: List[_Fila] = []
+        self._color_texto = ctk.ThemeManager.theme["CTkLabel"]["text_color"]
+        self._color_boton = ctk.ThemeManager.theme["CTkButton"]["fg_color"]
+        self._color_boton_hover = ctk.ThemeManager.theme["CTkButton"]["hover_color"]
+
+        self._crear_encabezado()
+        self._barra = ctk.CTkScrollbar(self, command=self._al_mover_barra)
+        self._barra.pack(side="right", fill="y")
+        self._cuerpo = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self._cuerpo.pack(side="left", fill="both", expand=True)
+        self._cuerpo.bind("<Configure>", lambda evento: self._dibujar())
+        self._enlazar_rueda(self._cuerpo)
+        self._aviso = ctk.CTkLabel(self._cuerpo, text="", font=("Segoe UI", 13))
+
+        if inicial is not None:
+            self._recibir_pagina(inicial, self._generacion)
+        else:
+            self.recargar()
+
+    # ============ API ============
+    @property
+    def elementos(self) -> List[Any]:
+        """Elementos cargados hasta ahora, en el orden en que se muestran."""
+        return list(self._elementos)
+
+    @property
+    def hay_mas(self) -> bool:
+        return self._siguiente is not None
+
+    def recargar(self):
+        """Vuelve a pedir la primera página con el orden actual."""
+        self._generacion += 1
+        self._elementos = []
+        self._siguiente = None
+        self._primera = 0
+        self._mostrar_aviso("⏳ Cargando...")
+        self._dibujar()
+        self._pedir_pagina(None)
+
+    def reemplazar(self, id_elemento: Any, nuevo: Any) -> bool:
+        """
+        Reemplaza el elemento cargado con ese identificador. Si su fila está
+        a la vista se reconfiguran solo las celdas que cambiaron; el resto de
+        la tabla no se toca. Devuelve False si el elemento no está cargado.
+        """
+        indice = self._indice_de(id_elemento)
+        if indice is None:
+            return False
+        self._elementos[indice] = nuevo
+        posicion = indice - self._primera
+        if 0 <= posicion < len(self._filas) and self._filas[posicion].visible:
+            self._llenar(self._filas[posicion], nuevo)
+        return True
+
+    def quitar(self, id_elemento: Any) -> bool:
+        """Saca del listado el elemento con ese identificador; False si no está cargado."""
+        indice = self._indice_de(id_elemento)
+        if indice is None:
+            return False
+        del self._elementos[indice]
+        if not self._elementos and self._siguiente is None:
+            self._mostrar_aviso(self._texto_vacio)
+        self._dibujar()
+        return True
+
+    def ordenar_por(self, orden: str):
+        """Ordena por una clave; si ya era la actual, invierte el sentido."""
+        if orden == self._orden:
+            self._descendente = not self._descendente
+        else:
+            self._orden = orden
+            self._descendente = False
+        self._actualizar_encabezado()
+        self.recargar()
+
+    def _indice_de(self, id_elemento: Any) -> Optional[int]:
+        for indice, elemento in enumerate(self._elementos):
+            if self._id_elemento(elemento) == id_elemento:
+                return indice
+        return None
+
+    # ============ ENCABEZADO ============
+    def _crear_encabezado(self):
+        encabezado = ctk.CTkFrame(self, fg_color="transparent")
+        encabezado.pack(side="top", fill="x")
+        self._titulos = {}
+        for i, columna in enumerate(self.columnas):
+            if columna.orden:
+                titulo = ctk.CTkButton(encabezado, text=columna.titulo, width=columna.ancho, anchor="w",
+                                       font=("Arial", 12, "bold"), fg_color="transparent",
+                                       text_color=ctk.ThemeManager.theme["CTkLabel"]["text_color"],
+                                       hover_color=("gray80", "gray30"),
+                                       command=lambda c=columna: self.ordenar_por(c.orden))
+                self._titulos[columna.orden] = (titulo, columna.titulo)
+            else:
+                titulo = ctk.CTkLabel(encabezado, text=columna.titulo, width=columna.ancho, anchor="w",
+                                      font=("Arial", 12, "bold"))
+            titulo.grid(row=0, column=i, padx=5, pady=5)
+        if self.acciones:
+            ancho = sum(accion.ancho + 4 for accion in self.acciones)
+            ctk.CTkLabel(encabezado, text="Acciones", width=ancho, anchor="w",
+                         font=("Arial", 12, "bold")).grid(row=0, column=len(self.columnas), padx=5, pady=5)
+        self._actualizar_encabezado()
+
+    def _actualizar_encabezado(self):
+        for orden, (boton, titulo) in self._titulos.items():
+            if orden == self._orden:
+                titulo = f"{titulo} {'▼' if self._descendente else '▲'}"
+            boton.configure(text=titulo)
+
+    # ============ DATOS ============
+    def _pedir_pagina(self, cursor: Optional[str]):
+        self._cargando = True
+        generacion = self._generacion
+        self._tareas.ejecutar(
+            self._proveedor, cursor, self._orden, self._descendente,
+            al_terminar=lambda pagina: self._recibir_pagina(pagina, generacion),
+            al_fallar=lambda error: self._fallo_pagina(error, generacion),
+            clave=f"tabla_virtual_{id(self)}",
+            propietario=self
+        )
+
+    def _recibir_pagina(self, pagina: Pagina, generacion: int):
+        if generacion != self._generacion:
+            return
+        self._cargando = False
+        self._elementos.extend(pagina.elementos)
+        self._siguiente = pagina.siguiente
+        if self._elementos:
+            self._ocultar_aviso()
+        else:
+            self._mostrar_aviso(self._texto_vacio)
+        self._dibujar()
+        if self._al_cargar:
+            self._al_cargar(self)
+
+    def _fallo_pagina(self, error: Exception, generacion: int):
+        if generacion != self._generacion:
+            return
+        self._cargando = False
+        self._mostrar_aviso(f"❌ No se pudieron cargar los datos:\n{error}")
+
+    def _mostrar_aviso(self, texto: str):
+        self._aviso.configure(text=texto)
+        self._aviso.place(relx=0.5, y=20, anchor="n")
+        self._aviso.lift()
+
+    def _ocultar_aviso(self):
+        self._aviso.place_forget()
+
+    # ============ DIBUJO ============
+    def _filas_completas(self) -> int:
+        return max(1, self._cuerpo.winfo_height() // self._alto_fila)
+
+    def _dibujar(self):
+        """Llena las filas visibles con los elementos desde self._primera."""
+        alto = max(self._cuerpo.winfo_height(), self._alto_fila)
+        necesarias = -(-alto // self._alto_fila)
+        completas = self._filas_completas()
+        while len(self._filas) < necesarias:
+            fila = _Fila(self)
+            self._filas.append(fila)
+
+        total = len(self._elementos)
+        self._primera = max(0, min(self._primera, total - completas))
+        for i, fila in enumerate(self._filas):
+            indice = self._primera + i
+            if i < necesarias and indice < total:
+                self._llenar(fila, self._elementos[indice])
+                if not fila.visible:
+                    fila.marco.place(x=0, y=i * self._alto_fila, relwidth=1, height=self._alto_fila)
+                    fila.visible = True
+            elif fila.visible:
+                fila.marco.place_forget()
+                fila.visible = False
+                fila.elemento = None
+
+        if total <= completas:
+            self._barra.set(0.0, 1.0)
+        else:
+            self._barra.set(self._primera / total, (self._primera + completas) / total)
+
+        if (self._siguiente is not None and not self._cargando
+                and self._primera + necesarias >= total - MARGEN_PAGINA):
+            self._pedir_pagina(self._siguiente)
+
+    def _llenar(self, fila: _Fila, elemento: Any):
+        if fila.elemento is elemento:
+            return
+        fila.elemento = elemento
+        for i, columna in enumerate(self.columnas):
+            texto = self._recortar(str(columna.texto(elemento)), columna.ancho)
+            color = (columna.color(elemento) if columna.color else None) or self._color_texto
+            if fila.celdas[i] != (texto, color):
+                fila.etiquetas[i].configure(text=texto, text_color=color)
+                fila.celdas[i] = (texto, color)
+
+        for i, accion in enumerate(self.acciones):
+            activa = accion.activa(elemento) if accion.activa else True
+            if activa:
+                estado = (accion.texto, "normal", accion.color or self._color_boton,
+                          accion.color_hover or accion.color or self._color_boton_hover)
+            elif accion.texto_inactiva is not None:
+                estado = (accion.texto_inactiva, "disabled", "gray", "gray")
+            else:
+                estado = None
+            anterior = fila.estados_botones[i]
+            if anterior == estado:
+                continue
+            boton = fila.botones[i]
+            if estado is None:
+                boton.grid_remove()
+            else:
+                texto, habilitado, color, color_hover = estado
+                boton.configure(text=texto, state=habilitado, fg_color=color, hover_color=color_hover)
+                if anterior is None:
+                    boton.grid()
+            fila.estados_botones[i] = estado
+
+    @staticmethod
+    def _recortar(texto: str, ancho: int) -> str:
+        """Recorta el texto a lo que entra aproximadamente en el ancho de la columna."""
+        texto = texto.replace("\n", " ")
+        maximo = max(4, ancho // 7)
+        return texto if len(texto) <= maximo else texto[:maximo - 1] + "…"
+
+    # ============ DESPLAZAMIENTO ============
+    def _desplazar(self, filas: int):
+        self._primera += filas
+        self._dibujar()
+
+    def _al_mover_barra(self, accion: str, valor, unidad: Optional[str] = None):
+        if accion == 'moveto':
+            self._primera = int(float(valor) * len(self._elementos))
+            self._dibujar()
+        elif accion == 'scroll':
+            paso = self._filas_completas() if unidad == 'pages' else 1
+            self._desplazar(int(valor) * paso)
+
+    def _al_girar_rueda(self, evento):
+        if evento.num == 4:
+            self._desplazar(-3)
+        elif evento.num == 5:
+            self._desplazar(3)
+        elif evento.delta:
+            self._desplazar(-3 if evento.delta > 0 else 3)
+        return "break"
+
+    def _enlazar_rueda(self, widget):
+        """La rueda del ratón desplaza la tabla sobre cualquiera de sus widgets."""
+        widget.bind("<MouseWheel>", self._al_girar_rueda)
+        widget.bind("<Button-4>", self._al_girar_rueda)
+        widget.bind("<Button-5>", self._al_girar_rueda)
@@ -0,0 +1,168 @@
+"""
+Ejecutor de tareas en segundo plano para la interfaz.
+
+Tkinter no es seguro entre hilos: solo el hilo principal puede tocar los
+widgets. EjecutorTareas ejecuta las consultas en un pool de hilos y deja los
+resultados en una cola que el hilo principal revisa con after(), de modo que
+los callbacks siempre corren en el hilo de Tk.
+
+Uso típico desde un frame:
+
+    self.master.tareas.ejecutar(
+        self.gestor.get_prestamos_activos,
+        al_terminar=self._mostrar_prestamos,
+        clave="prestamos",          # una nueva tarea con la misma clave reemplaza a la anterior
+        propietario=self            # si el frame se destruye, el resultado se descarta
+    )
+"""
+
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class Tarea:
+    """Referencia a un trabajo enviado al ejecutor."""
+
+    def __init__(self, clave: Optional[str], propietario=None):
+        self.clave = clave
+        self.propietario = propietario
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        """Descarta el resultado. Si la tarea aún no empezó, no llega a ejecutarse."""
+        self._cancelada.set()
+
+
+class EjecutorTareas:
+    """Pool de hilos con entrega de resultados en el hilo de Tk mediante after()."""
+
+    def __init__(self, raiz: tk.Misc, max_hilos: int = 4, intervalo_ms: int = 25):
+        """
+        Args:
+            raiz: Widget raíz (la App) sobre el que se programan los after().
+            max_hilos: Hilos de trabajo simultáneos.
+            intervalo_ms: Cada cuánto se revisa la cola de resultados mientras hay tareas pendientes.
+        """
+        self._raiz = raiz
+        self._intervalo_ms = intervalo_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="bibliohub-tarea")
+        self._resultados = queue.Queue()
+        self._vigentes: Dict[str, Tarea] = {}
+        self._pendientes = 0
+        self._revisando = False
+        self._cerrado = False
+
+    def ejecutar(self, funcion: Callable[..., Any], *args,
+                 al_terminar: Optional[Callable[[Any], None]] = None,
+                 al_fallar: Optional[Callable[[Exception], None]] = None,
+                 clave: Optional[str] = None,
+                 propietario: Optional[tk.Misc] = None,
+                 **kwargs) -> Tarea:
+        """
+        Ejecuta funcion(*args, **kwargs) en un hilo de trabajo.
+
+        Args:
+            al_terminar: Se llama en el hilo de Tk con el resultado.
+            al_fallar: Se llama en el hilo de Tk con la excepción. Si no se
+                indica, el error se imprime por consola.
+            clave: Si ya hay una tarea con la misma clave, se cancela (p. ej.
+                una búsqueda anterior mientras el usuario sigue escribiendo).
+            propietario: Widget dueño del resultado; si ya fue destruido al
+                terminar la tarea, no se llama a ningún callback.
+
+        Returns:
+            Tarea: Permite cancelar la tarea.
+        """
+        if self._cerrado:
+            raise RuntimeError("El ejecutor de tareas está cerrado")
+
+        tarea = Tarea(clave, propietario)
+        if clave is not None:
+            anterior = self._vigentes.get(clave)
+            if anterior is not None:
+                anterior.cancelar()
+            self._vigentes[clave] = tarea
+
+        def trabajo():
+            if tarea.cancelada:
+                self._resultados.put((tarea, None, None, None, None))
+                return
+            try:
+                resultado = funcion(*args, **kwargs)
+                self._resultados.put((tarea, al_terminar, resultado, al_fallar, None))
+            except Exception as e:
+                self._resultados.put((tarea, al_terminar, None, al_fallar, e))
+
+        self._pendientes += 1
+        self._pool.submit(trabajo)
+        self._programar_revision()
+        return tarea
+
+    def cancelar(self, clave: str):
+        """Cancela la tarea vigente con esa clave, si la hay."""
+        tarea = self._vigentes.pop(clave, None)
+        if tarea is not None:
+            tarea.cancelar()
+
+    def _programar_revision(self):
+        if not self._revisando and not self._cerrado:
+            self._revisando = True
+            self._raiz.after(self._intervalo_ms, self._revisar_cola)
+
+    def _revisar_cola(self):
+        """Entrega en el hilo de Tk los resultados que ya terminaron."""
+        self._revisando = False
+        while True:
+            try:
+                tarea, al_terminar, resultado, al_fallar, error = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            self._pendientes -= 1
+            self._entregar(tarea, al_terminar, resultado, al_fallar, error)
+
+        if self._pendientes > 0:
+            self._programar_revision()
+
+    def _entregar(self, tarea: Tarea, al_terminar, resultado, al_fallar, error):
+        if tarea.clave is not None and self._vigentes.get(tarea.clave) is tarea:
+            del self._vigentes[tarea.clave]
+        if tarea.cancelada or self._cerrado or not self._propietario_vivo(tarea.propietario):
+            return
+
+        if error is not None:
+            if al_fallar:
+                al_fallar(error)
+            else:
+                print(f"⚠️ Error en tarea en segundo plano: {error}")
+        elif al_terminar:
+            al_terminar(resultado)
+
+    @staticmethod
+    def _propietario_vivo(propietario) -> bool:
+        if propietario is None:
+            return True
+        try:
+            return bool(propietario.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def cerrar(self):
+        """
+        Cancela lo pendiente sin esperar a las tareas en curso, para no
+        congelar la ventana al cerrarla. Sus resultados se descartan; las
+        lecturas en curso las corta después gestor.cerrar() (ver App.destroy).
+        """
+        if self._cerrado:
+            return
+        self._cerrado = True
+        for tarea in self._vigentes.values():
+            tarea.cancelar()
+        self._vigentes.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Importación masiva del catálogo de BiblioHub desde CSV o JSONL.
+
+Uso:
+    python importar_catalogo.py libros.csv
+    python importar_catalogo.py libros.jsonl --lote 5000 --rechazos rechazos.csv
+    python importar_catalogo.py libros.csv --checkpoint libros.checkpoint.json
+
+Columnas: codigo, titulo, autor_nombre, autor_apellido, anio, estanteria
+(nombre o id) y opcionalmente cantidad_ejemplares, genero, isbn y editorial.
+Si la importación se interrumpe, volver a ejecutarla con el mismo
+--checkpoint la reanuda desde el último lote confirmado.
+"""
+
+import argparse
+import os
+import sys
+from database.db_manager import DBManager
+from logic.importador import ImportadorCatalogo, ResultadoImportacion, leer_filas
+
+def mostrar_progreso(resultado: ResultadoImportacion):
+    """Imprime el avance acumulado tras cada lote."""
+    print(f"📦 {resultado.importados} importados, {resultado.rechazados} rechazados "
+          f"({resultado.filas_por_segundo:,.0f} filas/s)")
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Importa libros y ejemplares al catálogo de BiblioHub")
+    parser.add_argument("archivo", help="Archivo CSV (con encabezado) o JSONL")
+    parser.add_argument("--formato", choices=["csv", "jsonl"],
+                        help="Formato del archivo (por defecto, según la extensión)")
+    parser.add_argument("--lote", type=int, default=1000, help="Filas por transacción (por defecto 1000)")
+    parser.add_argument("--rechazos", help="CSV donde anotar las filas rechazadas "
+                                           "(por defecto <archivo>.rechazos.csv)")
+    parser.add_argument("--checkpoint", help="Archivo de checkpoint para reanudar "
+                                             "(por defecto <archivo>.checkpoint.json)")
+    parser.add_argument("--perfil", default="bulk-import",
+                        help="Perfil de rendimiento durante la importación (por defecto bulk-import)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.archivo):
+        print(f"❌ No existe el archivo {args.archivo}")
+        sys.exit(1)
+    rechazos = args.rechazos or f"{args.archivo}.rechazos.csv"
+    checkpoint = args.checkpoint or f"{args.archivo}.checkpoint.json"
+    if os.path.exists(checkpoint):
+        print(f"↩️  Reanudando desde {checkpoint}")
+
+    db = DBManager()
+    try:
+        with db.perfil_temporal(args.perfil):
+            importador = ImportadorCatalogo(db, tamanio_lote=args.lote, ruta_rechazos=rechazos,
+                                            ruta_checkpoint=checkpoint, al_progresar=mostrar_progreso)
+            resultado = importador.importar(leer_filas(args.archivo, args.formato),
+                                            origen=os.path.abspath(args.archivo))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.cerrar()
+
+    print(f"✅ Importación completa en {resultado.segundos:.1f} s: {resultado.importados} libros, "
+          f"{resultado.ejemplares} ejemplares ({resultado.filas_por_segundo:,.0f} filas/s)")
+    if resultado.omitidas:
+        print(f"⏭️  {resultado.omitidas} filas ya importadas en una ejecución anterior")
+    if resultado.rechazados:
+        print(f"⚠️  {resultado.rechazados} filas rechazadas, ver {rechazos}")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
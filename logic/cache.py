@@ -0,0 +1,137 @@
+"""
+Caché de entidades de GestorBiblioteca.
+
+Guarda en memoria las tablas de referencia pequeñas (estanterías, géneros,
+autores) y las entidades que la interfaz vuelve a pedir en cada pantalla
+(usuarios, autores y géneros por id). Cada entrada vence a los `ttl`
+segundos y, si se supera `max_entradas`, se descarta la usada hace más
+tiempo (LRU).
+
+La coherencia se mantiene de dos maneras:
+
+* GestorBiblioteca invalida las entradas afectadas cada vez que un método de
+  escritura de DBManager confirma su transacción (DBManager.suscribir_cambios).
+* Antes de cada consulta se compara PRAGMA data_version (DBManager.version_datos):
+  si otro proceso modificó la base de datos se vacía la caché entera.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Clave de la entrada que guarda el listado completo de un espacio
+TODOS = '*'
+
+
+class CacheEntidades:
+    """Caché LRU con vencimiento por TTL, agrupada en espacios (uno por tabla)."""
+
+    def __init__(self, max_entradas: int = 1000, ttl: float = 300.0,
+                 version_datos: Optional[Callable[[], Optional[int]]] = None):
+        """
+        Args:
+            max_entradas (int): Entradas como máximo antes de descartar la menos usada.
+            ttl (float): Segundos que vive una entrada.
+            version_datos (Optional[Callable]): Devuelve la versión de los datos
+                (o None si no se puede consultar en este momento); si cambia,
+                se vacía la caché.
+        """
+        if max_entradas < 1:
+            raise ValueError("La caché necesita al menos una entrada")
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._version_datos = version_datos
+        self._version = None
+        self._entradas: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Aumenta con cada invalidación: un valor cargado antes de una
+        # invalidación ya no se guarda, porque puede estar desactualizado
+        self._generacion = 0
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.vencidas = 0
+        self.descartadas = 0
+        self.invalidaciones = 0
+        self.cambios_externos = 0
+
+    def obtener(self, espacio: str, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor guardado para (espacio, clave) o lo carga con
+        cargar() y lo guarda. También se guardan los None (entidad inexistente).
+        """
+        self._comprobar_version()
+        llave = (espacio, clave)
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if entrada is not None:
+                vence, valor = entrada
+                if vence > time.monotonic():
+                    self._entradas.move_to_end(llave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[llave]
+                self.vencidas += 1
+            self.fallos += 1
+            generacion = self._generacion
+
+        valor = cargar()
+
+        with self._lock:
+            if generacion == self._generacion:
+                self._entradas[llave] = (time.monotonic() + self.ttl, valor)
+                self._entradas.move_to_end(llave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+                    self.descartadas += 1
+        return valor
+
+    def invalidar(self, espacio: str, clave: Optional[Hashable] = None):
+        """
+        Descarta una entidad y el listado de su espacio o, con clave=None,
+        el espacio completo.
+        """
+        with self._lock:
+            self._generacion += 1
+            self.invalidaciones += 1
+            if clave is None:
+                for llave in [llave for llave in self._entradas if llave[0] == espacio]:
+                    del self._entradas[llave]
+            else:
+                self._entradas.pop((espacio, clave), None)
+                self._entradas.pop((espacio, TODOS), None)
+
+    def limpiar(self):
+        """Vacía la caché completa."""
+        with self._lock:
+            self._generacion += 1
+            self._entradas.clear()
+
+    def _comprobar_version(self):
+        if self._version_datos is None:
+            return
+        version = self._version_datos()
+        if version is None:
+            return
+        if self._version is not None and version != self._version:
+            self.cambios_externos += 1
+            self.limpiar()
+        self._version = version
+
+    def estadisticas(self) -> dict:
+        """Aciertos, fallos y descartes acumulados, y entradas actuales."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "vencidas": self.vencidas,
+                "descartadas": self.descartadas,
+                "invalidaciones": self.invalidaciones,
+                "cambios_externos": self.cambios_externos,
+            }
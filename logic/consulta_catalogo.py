@@ -0,0 +1,445 @@
+"""
+Lenguaje de consulta del catálogo con campos.
+
+    autor:borges anio:1940..1960 genero:ensayo estante:"Literatura Clásica" disponible:si
+
+Cada palabra es una cláusula y todas deben cumplirse. Las que llevan
+`campo:` filtran por ese campo; las demás son texto libre (título, código,
+ISBN o autor, como en buscar_libros). Las comillas agrupan varias palabras
+en una frase. Campos:
+
+    isbn:978-84-376-0494-7  ISBN exacto (con o sin guiones)
+    codigo:LIB0             código que empieza así (sin distinguir mayúsculas)
+    anio:1950  anio:1940..1960  anio:1940..  anio:..1960
+    estante:3  estante:"Literatura Clásica"   estantería por id o por nombre
+    genero:ensayo           género por nombre (sin acentos ni mayúsculas)
+    autor:borges  titulo:"cien años"           palabras del autor o del título
+    disponible:si / disponible:no              con o sin ejemplares disponibles
+
+compilar() traduce la consulta a SQL parametrizado. El plan depende solo de
+la forma de la consulta (qué campos y de qué tipo), no de sus valores, así
+que se compila una vez por forma y se guarda en una caché LRU; cada
+consulta solo arma sus parámetros.
+
+Cada cláusula sabe qué índice puede usar. La más selectiva conduce la
+consulta (ISBN exacto, prefijo de código, estantería, FTS5 para el texto,
+género, autor, rango de años) y las demás se escriben con el operador
+unario + delante de la columna, que impide a SQLite usar su índice: se
+evalúan como filtro sobre las filas que trae la conductora. explicar()
+muestra esa elección junto con el EXPLAIN QUERY PLAN de SQLite.
+"""
+
+import re
+import string
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from database.normalizacion import normalizar
+
+# Nombre aceptado -> campo
+CAMPOS = {
+    'isbn': 'isbn',
+    'codigo': 'codigo', 'código': 'codigo', 'cod': 'codigo',
+    'anio': 'anio', 'año': 'anio',
+    'estante': 'estante', 'estanteria': 'estante', 'estantería': 'estante',
+    'genero': 'genero', 'género': 'genero',
+    'autor': 'autor',
+    'titulo': 'titulo', 'título': 'titulo',
+    'disponible': 'disponible',
+}
+
+SI = ('si', 's', 'true', '1')
+NO = ('no', 'n', 'false', '0')
+
+# Planes compilados guardados (uno por forma de consulta)
+MAX_PLANES = 128
+
+# campo:valor, campo:"frase", "frase" o palabra. El campo exige un valor
+# pegado a los dos puntos: "Dune: la saga" es texto libre
+_CLAUSULA = re.compile(r'(?:([^\s:"]+):(?=\S))?(?:"([^"]*)"?|(\S+))')
+_CAMPO = re.compile(r'(?:^|\s)(' + '|'.join(sorted(CAMPOS, key=len, reverse=True)) + r'):\S', re.IGNORECASE)
+_ANIOS = re.compile(r'^(\d{1,4})?\.\.(\d{1,4})?$')
+_SIN_GUIONES = str.maketrans('', '', '- ')
+# La collation NOCASE de SQLite solo iguala mayúsculas y minúsculas ASCII
+_MINUSCULAS_ASCII = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Columnas que necesita DBManager.consultar_libros para hidratar los libros
+_SELECT = """
+    SELECT l.*,
+           a.nombre AS autor_nombre, a.apellido AS autor_apellido,
+           g.nombre AS genero_nombre
+    FROM libros l
+"""
+_JOINS = """
+    LEFT JOIN autores a ON l.autor_id = a.id
+    LEFT JOIN generos g ON l.genero_id = g.id
+"""
+_JOIN_FTS = """
+    JOIN (SELECT rowid AS libro_id,
+                 bm25(libros_fts, 10.0, 8.0, 8.0, 4.0) AS relevancia
+          FROM libros_fts
+          WHERE libros_fts MATCH ?
+          LIMIT -1) fts ON fts.libro_id = l.id
+"""
+
+
+# ============ CLÁUSULAS ============
+class Clausula:
+    """
+    Una condición de la consulta ya interpretada: `variante` distingue las
+    formas SQL de un mismo campo y `valores` son sus parámetros.
+    """
+
+    def __init__(self, campo: str, variante: str, valores: Tuple, texto: str):
+        self.campo = campo
+        self.variante = variante
+        self.valores = valores
+        self.texto = texto
+
+    @property
+    def forma(self) -> Tuple[str, str]:
+        return self.campo, self.variante
+
+    def __repr__(self) -> str:
+        return f"Clausula({self.texto!r} -> {self.campo}/{self.variante})"
+
+
+class Estrategia:
+    """
+    Traducción a SQL de una (campo, variante).
+
+    Args:
+        prioridad: Orden de selectividad del índice (menor = más selectivo);
+            None si la condición no tiene índice y solo puede filtrar.
+        con_indice: Condición que SQLite puede resolver con el índice.
+        filtro: La misma condición con el índice desactivado (+columna).
+        descripcion: Qué hace y con qué índice, para explicar().
+    """
+
+    def __init__(self, prioridad: Optional[int], con_indice: str, filtro: Optional[str], descripcion: str):
+        self.prioridad = prioridad
+        self.con_indice = con_indice
+        self.filtro = filtro or con_indice
+        self.descripcion = descripcion
+
+
+ESTRATEGIAS: Dict[Tuple[str, str], Estrategia] = {
+    ('isbn', 'exacto'): Estrategia(
+        0, "upper(replace(replace(l.isbn, '-', ''), ' ', '')) = ?",
+        "+upper(replace(replace(l.isbn, '-', ''), ' ', '')) = ?",
+        "ISBN exacto sin guiones (idx_libros_isbn_sin_guiones)"),
+    ('codigo', 'prefijo'): Estrategia(
+        1, "l.codigo COLLATE NOCASE >= ? AND l.codigo COLLATE NOCASE < ?",
+        "+l.codigo COLLATE NOCASE >= ? AND +l.codigo COLLATE NOCASE < ?",
+        "código por prefijo sin distinguir mayúsculas (idx_libros_codigo_nocase)"),
+    ('estante', 'id'): Estrategia(
+        2, "l.estanteria_id = ?", "+l.estanteria_id = ?",
+        "estantería por id (idx_libros_estanteria)"),
+    ('estante', 'nombre'): Estrategia(
+        2, "l.estanteria_id IN (SELECT id FROM estanterias WHERE nombre_norm = ?)",
+        "+l.estanteria_id IN (SELECT id FROM estanterias WHERE nombre_norm = ?)",
+        "estantería por nombre (idx_estanterias_nombre_norm -> idx_libros_estanteria)"),
+    ('texto', 'fts'): Estrategia(
+        3, "", "+l.id IN (SELECT rowid FROM libros_fts WHERE libros_fts MATCH ?)",
+        "texto en el índice FTS5 (libros_fts)"),
+    ('genero', 'nombre'): Estrategia(
+        4, "l.genero_id IN (SELECT id FROM generos WHERE nombre_norm = ?)",
+        "+l.genero_id IN (SELECT id FROM generos WHERE nombre_norm = ?)",
+        "género por nombre (idx_generos_nombre_norm -> idx_libros_genero)"),
+    ('autor', 'like'): Estrategia(
+        5, """l.autor_id IN (SELECT id FROM autores
+                             WHERE nombre_norm LIKE ? OR apellido_norm LIKE ?
+                                OR nombre_norm || ' ' || apellido_norm LIKE ?)""",
+        """+l.autor_id IN (SELECT id FROM autores
+                              WHERE nombre_norm LIKE ? OR apellido_norm LIKE ?
+                                 OR nombre_norm || ' ' || apellido_norm LIKE ?)""",
+        "autor por subcadena (recorre autores -> idx_libros_autor)"),
+    ('anio', 'rango'): Estrategia(
+        6, "l.anio BETWEEN ? AND ?", "+l.anio BETWEEN ? AND ?",
+        "rango de años (idx_libros_anio)"),
+    ('anio', 'desde'): Estrategia(
+        6, "l.anio >= ?", "+l.anio >= ?",
+        "años desde (idx_libros_anio)"),
+    ('anio', 'hasta'): Estrategia(
+        6, "l.anio <= ?", "+l.anio <= ?",
+        "años hasta (idx_libros_anio)"),
+    ('titulo', 'like'): Estrategia(
+        None, "l.titulo_norm LIKE ?", None,
+        "título por subcadena (sin índice: filtro)"),
+    ('texto', 'like'): Estrategia(
+        None, """(l.titulo_norm LIKE ?
+                  OR LOWER(l.codigo) LIKE ?
+                  OR LOWER(l.isbn) LIKE ?
+                  OR a.nombre_norm LIKE ?
+                  OR a.apellido_norm LIKE ?
+                  OR a.nombre_norm || ' ' || a.apellido_norm LIKE ?)""", None,
+        "texto por subcadena en título, código, ISBN y autor (sin índice: filtro)"),
+    ('disponible', 'si'): Estrategia(
+        None, "l.ejemplares_disponibles > 0", None,
+        "con ejemplares disponibles (contador de libros: filtro)"),
+    ('disponible', 'no'): Estrategia(
+        None, "l.ejemplares_disponibles = 0", None,
+        "sin ejemplares disponibles (contador de libros: filtro)"),
+}
+
+
+def tiene_campos(texto: str) -> bool:
+    """True si la consulta usa algún campo (autor:, anio:, ...); si no, es texto libre."""
+    return bool(texto) and _CAMPO.search(texto) is not None
+
+
+def _palabras(texto: str) -> List[str]:
+    """Palabras de un texto libre que el índice puede buscar (con algún carácter alfanumérico)."""
+    return [palabra for palabra in texto.split() if any(c.isalnum() for c in palabra)]
+
+
+def _frase_fts(texto: str, frase: bool) -> Optional[str]:
+    """Texto de una cláusula en sintaxis FTS5: cada palabra (o la frase) se busca como prefijo."""
+    if frase:
+        return '"' + texto.replace('"', '""') + '"*' if _palabras(texto) else None
+    palabras = _palabras(texto)
+    if not palabras:
+        return None
+    return ' '.join('"' + palabra.replace('"', '""') + '"*' for palabra in palabras)
+
+
+def _siguiente(prefijo: str) -> str:
+    """Menor texto mayor que todos los que empiezan por prefijo (cota superior del rango)."""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+def _clausula_anio(valor: str, texto: str) -> Clausula:
+    if valor.isdigit() and len(valor) <= 4:
+        return Clausula('anio', 'rango', (int(valor), int(valor)), texto)
+    rango = _ANIOS.match(valor)
+    if not rango or rango.groups() == (None, None):
+        raise ValueError(f"Año no válido en '{texto}': use anio:1950, anio:1940..1960, anio:1940.. o anio:..1960")
+    desde, hasta = rango.group(1), rango.group(2)
+    if desde is None:
+        return Clausula('anio', 'hasta', (int(hasta),), texto)
+    if hasta is None:
+        return Clausula('anio', 'desde', (int(desde),), texto)
+    if int(desde) > int(hasta):
+        raise ValueError(f"Rango de años invertido en '{texto}'")
+    return Clausula('anio', 'rango', (int(desde), int(hasta)), texto)
+
+
+def _clausula_campo(campo: str, valor: str, texto: str) -> Clausula:
+    if campo == 'isbn':
+        # El dígito de control puede ser una X
+        return Clausula('isbn', 'exacto', (valor.translate(_SIN_GUIONES).upper(),), texto)
+    if campo == 'codigo':
+        # Cotas en minúsculas, como compara NOCASE: con "Z" la cota "[" quedaría
+        # por debajo de "z"
+        minusculas = valor.translate(_MINUSCULAS_ASCII)
+        return Clausula('codigo', 'prefijo', (minusculas, _siguiente(minusculas)), texto)
+    if campo == 'anio':
+        return _clausula_anio(valor, texto)
+    if campo == 'estante':
+        if valor.isdigit():
+            return Clausula('estante', 'id', (int(valor),), texto)
+        return Clausula('estante', 'nombre', (normalizar(valor),), texto)
+    if campo == 'genero':
+        return Clausula('genero', 'nombre', (normalizar(valor),), texto)
+    if campo == 'disponible':
+        respuesta = normalizar(valor)
+        if respuesta in SI:
+            return Clausula('disponible', 'si', (), texto)
+        if respuesta in NO:
+            return Clausula('disponible', 'no', (), texto)
+        raise ValueError(f"Valor no válido en '{texto}': use disponible:si o disponible:no")
+    raise ValueError(f"Campo sin traducción: {campo}")
+
+
+def parsear(texto: str, fts_disponible: bool) -> List[Clausula]:
+    """
+    Interpreta la consulta. Con FTS5, el texto libre, autor: y titulo: se
+    juntan en una sola cláusula MATCH (con filtros de columna); sin él, cada
+    palabra es una condición LIKE sobre las claves normalizadas.
+
+    Raises:
+        ValueError: Si un campo no existe, le falta el valor o el valor no es válido.
+    """
+    clausulas = []
+    expresiones_fts = []
+    textos_fts = []
+    for encontrada in _CLAUSULA.finditer(texto or ''):
+        nombre, entre_comillas, palabra = encontrada.groups()
+        frase = entre_comillas is not None
+        valor = (entre_comillas if frase else palabra).strip()
+        original = encontrada.group(0)
+        campo = None
+        if nombre is not None:
+            campo = CAMPOS.get(nombre.lower())
+            if campo is None:
+                raise ValueError(f"Campo de búsqueda desconocido: '{nombre}' "
+                                 f"(campos: {', '.join(sorted(set(CAMPOS.values())))})")
+            if not valor:
+                raise ValueError(f"El campo '{nombre}' necesita un valor")
+
+        if campo in (None, 'autor', 'titulo'):
+            if fts_disponible:
+                expresion = _frase_fts(valor, frase)
+                if expresion is None:
+                    continue
+                # libros_fts indexa título, código, ISBN y "nombre apellido" del autor
+                expresiones_fts.append(f"{campo} : ({expresion})" if campo else expresion)
+                textos_fts.append(original)
+            else:
+                for palabra in ([valor] if frase else _palabras(valor)):
+                    like = f"%{normalizar(palabra)}%"
+                    if campo == 'autor':
+                        clausulas.append(Clausula('autor', 'like', (like,) * 3, original))
+                    elif campo == 'titulo':
+                        clausulas.append(Clausula('titulo', 'like', (like,), original))
+                    else:
+                        clausulas.append(Clausula('texto', 'like', (like,) * 6, original))
+            continue
+
+        clausulas.append(_clausula_campo(campo, valor, original))
+
+    if expresiones_fts:
+        clausulas.append(Clausula('texto', 'fts', (' AND '.join(expresiones_fts),), ' '.join(textos_fts)))
+    return clausulas
+
+
+# ============ PLANES ============
+class PlanConsulta:
+    """
+    SQL compilado para una forma de consulta.
+
+    Attributes:
+        forma: Tupla (campo, variante) de cada cláusula, en el orden del plan.
+        sql: Consulta completa, sin LIMIT.
+        orden_parametros: Índice (en `forma`) de la cláusula de cada grupo de
+            parámetros, en el orden en que aparecen en `sql`.
+        conductora: Posición en `forma` de la cláusula que usa su índice, o None.
+    """
+
+    def __init__(self, forma: Tuple[Tuple[str, str], ...], sql: str,
+                 orden_parametros: List[int], conductora: Optional[int]):
+        self.forma = forma
+        self.sql = sql
+        self.orden_parametros = orden_parametros
+        self.conductora = conductora
+
+
+def _ordenar(clausulas: Sequence[Clausula]) -> List[Clausula]:
+    """Orden canónico: por selectividad del índice y después por forma (las que no tienen, al final)."""
+    def clave(clausula: Clausula):
+        prioridad = ESTRATEGIAS[clausula.forma].prioridad
+        return (prioridad is None, prioridad or 0, clausula.forma)
+    return sorted(clausulas, key=clave)
+
+
+def _compilar_forma(forma: Tuple[Tuple[str, str], ...]) -> PlanConsulta:
+    """Arma el SQL de una forma ya en orden canónico: la primera cláusula con índice conduce."""
+    conductora = next((i for i, f in enumerate(forma) if ESTRATEGIAS[f].prioridad is not None), None)
+
+    sql = _SELECT
+    orden_parametros = []
+    con_relevancia = conductora is not None and forma[conductora] == ('texto', 'fts')
+    if con_relevancia:
+        # El LIMIT -1 evita que SQLite aplane la subconsulta: bm25() solo
+        # puede evaluarse dentro del recorrido del índice FTS
+        sql += _JOIN_FTS
+        orden_parametros.append(conductora)
+    sql += _JOINS
+
+    condiciones = []
+    for i, f in enumerate(forma):
+        estrategia = ESTRATEGIAS[f]
+        if i == conductora:
+            if con_relevancia:
+                continue
+            condiciones.append(estrategia.con_indice)
+        else:
+            condiciones.append(estrategia.filtro)
+        orden_parametros.append(i)
+    if condiciones:
+        sql += " WHERE " + "\n      AND ".join(condiciones)
+    sql += f" ORDER BY {'fts.relevancia, ' if con_relevancia else ''}l.titulo COLLATE es, l.id"
+    return PlanConsulta(forma, sql, orden_parametros, conductora)
+
+
+class CachePlanes:
+    """Planes compilados por forma de consulta (LRU)."""
+
+    def __init__(self, max_planes: int = MAX_PLANES):
+        self.max_planes = max_planes
+        self._planes: 'OrderedDict[tuple, PlanConsulta]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, forma: Tuple[Tuple[str, str], ...]) -> Tuple[PlanConsulta, bool]:
+        """Plan de la forma y si ya estaba compilado."""
+        with self._lock:
+            plan = self._planes.get(forma)
+            if plan is not None:
+                self._planes.move_to_end(forma)
+                self.aciertos += 1
+                return plan, True
+            self.fallos += 1
+        plan = _compilar_forma(forma)
+        with self._lock:
+            self._planes[forma] = plan
+            while len(self._planes) > self.max_planes:
+                self._planes.popitem(last=False)
+        return plan, False
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {'planes': len(self._planes), 'aciertos': self.aciertos, 'fallos': self.fallos}
+
+
+PLANES = CachePlanes()
+
+
+class ConsultaCompilada:
+    """Una consulta lista para ejecutar: su plan, sus parámetros y sus cláusulas en el orden del plan."""
+
+    def __init__(self, texto: str, clausulas: List[Clausula], plan: PlanConsulta, desde_cache: bool):
+        self.texto = texto
+        self.clausulas = clausulas
+        self.plan = plan
+        self.desde_cache = desde_cache
+
+    @property
+    def sql(self) -> str:
+        return self.plan.sql
+
+    @property
+    def parametros(self) -> list:
+        return [valor for i in self.plan.orden_parametros for valor in self.clausulas[i].valores]
+
+
+def compilar(texto: str, fts_disponible: bool, planes: CachePlanes = PLANES) -> ConsultaCompilada:
+    """
+    Compila una consulta con campos (ver el docstring del módulo).
+
+    Raises:
+        ValueError: Si la consulta no es válida o no tiene ninguna condición.
+    """
+    clausulas = _ordenar(parsear(texto, fts_disponible))
+    if not clausulas:
+        raise ValueError("La consulta no tiene ninguna condición")
+    plan, desde_cache = planes.obtener(tuple(c.forma for c in clausulas))
+    return ConsultaCompilada(texto, clausulas, plan, desde_cache)
+
+
+def explicar(consulta: ConsultaCompilada, plan_sqlite: Sequence[str]) -> str:
+    """Texto con la estrategia de cada cláusula, el SQL, sus parámetros y el plan de SQLite."""
+    lineas = [f"🔎 Consulta: {consulta.texto}", "📋 Cláusulas (en orden de selectividad):"]
+    for i, clausula in enumerate(consulta.clausulas):
+        papel = "conduce" if i == consulta.plan.conductora else "filtro"
+        lineas.append(f"   {clausula.texto} -> {ESTRATEGIAS[clausula.forma].descripcion} [{papel}]")
+    forma = ', '.join(f"{campo}/{variante}" for campo, variante in consulta.plan.forma)
+    lineas.append(f"🧩 Forma: {forma} (plan {'en caché' if consulta.desde_cache else 'compilado ahora'})")
+    lineas.append("📝 SQL:")
+    lineas.extend(f"   {linea.strip()}" for linea in consulta.sql.strip().splitlines() if linea.strip())
+    lineas.append(f"📎 Parámetros: {consulta.parametros}")
+    lineas.append("🗺️  Plan de SQLite:")
+    lineas.extend(f"   {detalle}" for detalle in plan_sqlite)
+    return '\n'.join(lineas)
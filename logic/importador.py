@@ -0,0 +1,264 @@
+"""
+Importación masiva del catálogo desde archivos CSV o JSONL.
+
+Las filas se leen en streaming y se procesan por lotes: cada lote se valida en
+memoria (autores, géneros, códigos, ISBN y ocupación de estanterías se cargan
+una sola vez al empezar) y se inserta con DBManager.insertar_lote_catalogo en
+una única transacción. Las filas rechazadas se anotan en un CSV con el motivo,
+y tras cada lote confirmado se guarda un checkpoint para poder reanudar una
+importación interrumpida sin repetir lo ya cargado.
+
+Columnas de cada fila: codigo, titulo, autor_nombre, autor_apellido, anio,
+estanteria (nombre o id) y opcionalmente cantidad_ejemplares (1 por defecto),
+genero, isbn y editorial.
+"""
+
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+CAMPOS_OBLIGATORIOS = ('codigo', 'titulo', 'autor_nombre', 'autor_apellido', 'anio', 'estanteria')
+
+
+# ============ LECTURA DE ARCHIVOS ============
+def leer_filas(ruta: str, formato: Optional[str] = None) -> Iterator[Tuple[int, dict]]:
+    """
+    Recorre un archivo CSV (con encabezado) o JSONL sin cargarlo entero.
+
+    Yields:
+        Tuple[int, dict]: Número de línea en el archivo y la fila.
+
+    Raises:
+        ValueError: Si el formato no es csv ni jsonl.
+    """
+    formato = (formato or os.path.splitext(ruta)[1].lstrip('.')).lower()
+    if formato == 'csv':
+        with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+            lector = csv.DictReader(archivo)
+            for fila in lector:
+                yield lector.line_num, fila
+    elif formato in ('jsonl', 'ndjson'):
+        with open(ruta, encoding='utf-8') as archivo:
+            for numero, linea in enumerate(archivo, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    fila = json.loads(linea)
+                except json.JSONDecodeError as e:
+                    fila = {'_error': f"JSON inválido: {e}"}
+                yield numero, fila if isinstance(fila, dict) else {'_error': "La línea no es un objeto JSON"}
+    else:
+        raise ValueError(f"Formato de importación no soportado: {formato}")
+
+
+# ============ RESULTADO ============
+class ResultadoImportacion:
+    def __init__(self):
+        self.leidas = 0
+        self.importados = 0
+        self.ejemplares = 0
+        self.rechazados = 0
+        self.omitidas = 0
+        self.inicio = time.perf_counter()
+        self.fin: Optional[float] = None
+
+    @property
+    def segundos(self) -> float:
+        return (self.fin or time.perf_counter()) - self.inicio
+
+    @property
+    def filas_por_segundo(self) -> float:
+        """Filas procesadas (importadas o rechazadas) por segundo."""
+        procesadas = self.importados + self.rechazados
+        return procesadas / self.segundos if self.segundos > 0 else 0.0
+
+
+# ============ IMPORTADOR ============
+class ImportadorCatalogo:
+    def __init__(self, db, tamanio_lote: int = 1000, ruta_rechazos: Optional[str] = None,
+                 ruta_checkpoint: Optional[str] = None,
+                 al_progresar: Optional[Callable[[ResultadoImportacion], None]] = None):
+        """
+        Args:
+            db: DBManager sobre el que se importa.
+            tamanio_lote: Filas por transacción.
+            ruta_rechazos: CSV donde se anotan las filas rechazadas (se agrega al final).
+            ruta_checkpoint: JSON con la última línea confirmada; si existe, la
+                importación se reanuda desde ahí.
+            al_progresar: Se llama tras cada lote con el resultado parcial.
+        """
+        if tamanio_lote < 1:
+            raise ValueError("El tamaño de lote debe ser un entero positivo")
+        self.db = db
+        self.tamanio_lote = tamanio_lote
+        self.ruta_rechazos = ruta_rechazos
+        self.ruta_checkpoint = ruta_checkpoint
+        self.al_progresar = al_progresar
+
+        mapas = db.get_mapas_importacion()
+        self.autores = mapas['autores']
+        self.generos = mapas['generos']
+        self.codigos = mapas['codigos']
+        self.isbns = mapas['isbns']
+        self.estanterias = db.get_ocupacion_estanterias()
+        self.estanterias_por_nombre = {e.nombre: e for e in self.estanterias.values()}
+        # Lugares libres por estantería, descontando lo ya aceptado en esta importación
+        self.libres = {e.id: e.libres for e in self.estanterias.values()}
+        self.anio_maximo = datetime.now().year
+
+    def importar(self, filas: Iterable[Tuple[int, dict]], origen: str = '') -> ResultadoImportacion:
+        """
+        Importa las filas (número de línea, dict) por lotes.
+
+        Args:
+            origen: Identifica el archivo en el checkpoint; al reanudar debe coincidir.
+        """
+        resultado = ResultadoImportacion()
+        desde_linea = self._leer_checkpoint(origen)
+
+        lote = []
+        for numero, fila in filas:
+            if numero <= desde_linea:
+                resultado.omitidas += 1
+                continue
+            resultado.leidas += 1
+            lote.append((numero, fila))
+            if len(lote) >= self.tamanio_lote:
+                self._procesar_lote(lote, resultado, origen)
+                lote = []
+        if lote:
+            self._procesar_lote(lote, resultado, origen)
+
+        resultado.fin = time.perf_counter()
+        # Importación completa: el checkpoint ya no hace falta
+        if self.ruta_checkpoint and os.path.exists(self.ruta_checkpoint):
+            os.remove(self.ruta_checkpoint)
+        return resultado
+
+    def _procesar_lote(self, lote: List[Tuple[int, dict]], resultado: ResultadoImportacion, origen: str):
+        validos = []
+        rechazos = []
+        for numero, fila in lote:
+            try:
+                validos.append((numero, self._validar(fila)))
+            except ValueError as e:
+                rechazos.append((numero, str(e), fila))
+
+        if validos:
+            try:
+                resultado.ejemplares += self.db.insertar_lote_catalogo(
+                    [libro for _, libro in validos], self.autores, self.generos)
+                resultado.importados += len(validos)
+            except Exception:
+                # Algún libro falló en la base de datos: se reintenta uno por uno
+                # para rechazar solo los que tienen problemas
+                for numero, libro in validos:
+                    try:
+                        resultado.ejemplares += self.db.insertar_lote_catalogo(
+                            [libro], self.autores, self.generos)
+                        resultado.importados += 1
+                    except Exception as e:
+                        self._deshacer_reserva(libro)
+                        rechazos.append((numero, f"Error de base de datos: {e}", libro))
+
+        resultado.rechazados += len(rechazos)
+        self._anotar_rechazos(rechazos)
+        self._guardar_checkpoint(origen, lote[-1][0], resultado)
+        if self.al_progresar:
+            self.al_progresar(resultado)
+
+    def _validar(self, fila: dict) -> dict:
+        """Normaliza una fila y reserva su código, ISBN y lugar en la estantería."""
+        if '_error' in fila:
+            raise ValueError(fila['_error'])
+
+        datos = {clave: str(valor).strip() for clave, valor in fila.items()
+                 if clave is not None and valor is not None and str(valor).strip()}
+        faltantes = [campo for campo in CAMPOS_OBLIGATORIOS if campo not in datos]
+        if faltantes:
+            raise ValueError(f"Faltan campos obligatorios: {', '.join(faltantes)}")
+
+        try:
+            anio = int(datos['anio'])
+        except ValueError:
+            raise ValueError(f"Año no numérico: {datos['anio']}")
+        if not 1500 <= anio <= self.anio_maximo:
+            raise ValueError(f"Año debe estar entre 1500 y {self.anio_maximo}")
+
+        try:
+            cantidad = int(datos.get('cantidad_ejemplares', 1))
+        except ValueError:
+            raise ValueError(f"Cantidad de ejemplares no numérica: {datos['cantidad_ejemplares']}")
+        if cantidad < 1:
+            raise ValueError("Cantidad de ejemplares debe ser un entero positivo")
+
+        estanteria = self.estanterias_por_nombre.get(datos['estanteria'])
+        if estanteria is None and datos['estanteria'].isdigit():
+            estanteria = self.estanterias.get(int(datos['estanteria']))
+        if estanteria is None:
+            raise ValueError(f"Estantería '{datos['estanteria']}' no existe")
+
+        codigo = datos['codigo']
+        isbn = datos.get('isbn')
+        if codigo in self.codigos:
+            raise ValueError(f"Ya existe un libro con el código '{codigo}'")
+        if isbn and isbn in self.isbns:
+            raise ValueError(f"Ya existe un libro con el ISBN '{isbn}'")
+        if cantidad > self.libres[estanteria.id]:
+            raise ValueError(f"No hay suficiente espacio en la estantería '{estanteria.nombre}'. "
+                             f"Libres: {self.libres[estanteria.id]}, Intentando agregar: {cantidad}")
+
+        self.codigos.add(codigo)
+        if isbn:
+            self.isbns.add(isbn)
+        self.libres[estanteria.id] -= cantidad
+
+        return {
+            'codigo': codigo, 'titulo': datos['titulo'], 'anio': anio,
+            'autor_nombre': datos['autor_nombre'], 'autor_apellido': datos['autor_apellido'],
+            'estanteria_id': estanteria.id, 'cantidad_ejemplares': cantidad,
+            'genero': datos.get('genero'), 'isbn': isbn, 'editorial': datos.get('editorial'),
+        }
+
+    def _deshacer_reserva(self, libro: dict):
+        self.codigos.discard(libro['codigo'])
+        if libro.get('isbn'):
+            self.isbns.discard(libro['isbn'])
+        self.libres[libro['estanteria_id']] += libro['cantidad_ejemplares']
+
+    # ============ REPORTE Y CHECKPOINT ============
+    def _anotar_rechazos(self, rechazos: List[Tuple[int, str, dict]]):
+        if not rechazos or not self.ruta_rechazos:
+            return
+        nuevo = not os.path.exists(self.ruta_rechazos) or os.path.getsize(self.ruta_rechazos) == 0
+        with open(self.ruta_rechazos, 'a', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            if nuevo:
+                escritor.writerow(['linea', 'motivo', 'fila'])
+            for numero, motivo, fila in rechazos:
+                escritor.writerow([numero, motivo, json.dumps(fila, ensure_ascii=False, default=str)])
+
+    def _leer_checkpoint(self, origen: str) -> int:
+        """Última línea confirmada de una importación anterior del mismo origen (0 si no hay)."""
+        if not self.ruta_checkpoint or not os.path.exists(self.ruta_checkpoint):
+            return 0
+        with open(self.ruta_checkpoint, encoding='utf-8') as archivo:
+            checkpoint = json.load(archivo)
+        if checkpoint.get('origen') != origen:
+            raise ValueError(f"El checkpoint {self.ruta_checkpoint} corresponde a otra importación "
+                             f"({checkpoint.get('origen')})")
+        return int(checkpoint.get('linea', 0))
+
+    def _guardar_checkpoint(self, origen: str, linea: int, resultado: ResultadoImportacion):
+        if not self.ruta_checkpoint:
+            return
+        temporal = self.ruta_checkpoint + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump({'origen': origen, 'linea': linea,
+                       'importados': resultado.importados, 'rechazados': resultado.rechazados},
+                      archivo)
+        # Reemplazo atómico: un corte nunca deja el checkpoint a medio escribir
+        os.replace(temporal, self.ruta_checkpoint)
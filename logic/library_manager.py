@@ -1,12 +1,71 @@
-from typing import List, Optional
+import configparser
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 from database.db_manager import DBManager, EstanteriaLlenaError
-from logic.models import Libro, Estanteria, Usuario, Autor, Genero, Ejemplar, Prestamo
+from database.conexiones import Interrupcion
+from database.paginacion import Pagina, TAMANIO_PAGINA
+from logic.models import Libro, Estanteria, Usuario, Autor, Genero, Ejemplar, Prestamo, PrestamoDetalle
+from logic.importador import ImportadorCatalogo, ResultadoImportacion, leer_filas
+from logic.cache import CacheEntidades, TODOS
+from logic.consulta_catalogo import compilar, explicar, tiene_campos, PLANES
 
 class GestorBiblioteca:
     def __init__(self):
         self.db = DBManager()
 
+        # Caché de tablas de referencia y entidades frecuentes (ver logic/cache.py)
+        config = configparser.ConfigParser()
+        config.read('config.ini')
+        self.cache = CacheEntidades(
+            max_entradas=config.getint('cache', 'max_entradas', fallback=1000),
+            ttl=config.getfloat('cache', 'ttl', fallback=300.0),
+            version_datos=self.db.version_datos
+        )
+        self.db.suscribir_cambios(self._invalidar_cache)
+        self._suscriptores_libros: List[Callable[[int, Optional[Libro]], None]] = []
+
+    def _invalidar_cache(self, tabla: str, id: Optional[int]):
+        """Descarta de la caché lo que pudo cambiar con una escritura confirmada."""
+        if tabla in ('libros', 'ejemplares'):
+            # Altas, bajas y traslados cambian la ocupación de las estanterías
+            self.cache.invalidar('estanterias')
+        elif tabla in ('estanterias', 'usuarios', 'autores', 'generos'):
+            self.cache.invalidar(tabla, id)
+
+    # ============ AVISOS DE CAMBIOS EN LIBROS ============
+    def suscribir_libros(self, callback: Callable[[int, Optional[Libro]], None]):
+        """
+        Registra un callback que se llama con (libro_id, resumen) cada vez que
+        una acción del gestor cambia un libro o sus ejemplares. resumen es el
+        libro tal como quedó, con sus contadores y sin ejemplares, o None si
+        se eliminó. Se llama en el hilo que hizo el cambio (el de Tk para las
+        acciones de la interfaz).
+        """
+        self._suscriptores_libros.append(callback)
+
+    def cancelar_suscripcion_libros(self, callback: Callable[[int, Optional[Libro]], None]):
+        if callback in self._suscriptores_libros:
+            self._suscriptores_libros.remove(callback)
+
+    def get_resumen_libro(self, libro_id: int) -> Optional[Libro]:
+        """Un libro con sus contadores de ejemplares, sin cargar los ejemplares."""
+        return self.db.get_libro_por_id(libro_id, resumen=True)
+
+    def _libro_cambiado(self, libro_id: int) -> Optional[Libro]:
+        """Avisa a los suscriptores con el resumen actual del libro y lo devuelve."""
+        resumen = self.get_resumen_libro(libro_id)
+        self._avisar_libro(libro_id, resumen)
+        return resumen
+
+    def _avisar_libro(self, libro_id: int, resumen: Optional[Libro]):
+        for callback in list(self._suscriptores_libros):
+            callback(libro_id, resumen)
+
+    def get_estadisticas_cache(self) -> dict:
+        """Aciertos, fallos e invalidaciones de la caché de entidades."""
+        return self.cache.estadisticas()
+
     def validar_anio(self, anio: int) -> bool:
         try:
             return 1500 <= anio <= datetime.now().year
@@ -59,18 +118,45 @@ class GestorBiblioteca:
     
     def get_todas_estanterias(self) -> List[Estanteria]:
         """Obtiene todas las estanterías."""
-        return self.db.get_todas_las_estanterias()
+        return list(self.cache.obtener('estanterias', TODOS, self.db.get_todas_las_estanterias))
     
     def get_count_ejemplares_en_estanteria(self, estanteria_id: int) -> int:
         """Obtiene la cantidad de ejemplares en una estantería."""
         return self.db.get_count_ejemplares_en_estanteria(estanteria_id)
 
+    def get_ocupacion_estanterias(self) -> Dict[int, Estanteria]:
+        """Capacidad, ocupados y libres de cada estantería, por id."""
+        return self.db.get_ocupacion_estanterias()
+
+    def reparar_ocupacion_estanterias(self) -> int:
+        """Recalcula los contadores de ocupación; devuelve cuántos se corrigieron."""
+        return self.db.reparar_ocupacion_estanterias()
+
+    def reparar_conteos_libros(self) -> int:
+        """Recalcula los contadores de ejemplares por libro; devuelve cuántos se corrigieron."""
+        return self.db.reparar_conteos_libros()
+
+    def reparar_circulacion(self) -> int:
+        """Reconstruye la circulación por libro y por mes; devuelve cuántos libros tienen préstamos."""
+        return self.db.reparar_circulacion()
+
+    def verificar_estadisticas(self) -> Dict[str, Tuple[int, int]]:
+        """Contadores del dashboard desfasados: {campo: (guardado, real)}."""
+        return self.db.verificar_estadisticas()
+
+    def reparar_estadisticas(self) -> int:
+        """Recalcula los contadores del dashboard; devuelve cuántos se corrigieron."""
+        return self.db.reparar_estadisticas()
+
     # ============ ATAJOS DE PRÉSTAMOS (Para GUI) ============
-    def prestar_libro(self, codigo: str) -> None:
+    def prestar_libro(self, codigo: str) -> Optional[Libro]:
         """Presta automáticamente el primer ejemplar disponible de un libro.
         
         Esta es una función de conveniencia para la GUI que simplifica
         el préstamo cuando solo se conoce el código del libro.
+
+        Returns:
+            Libro: Resumen del libro tras el préstamo (ver suscribir_libros).
         """
         libro = self.db.get_libro_por_codigo(codigo)
         if not libro:
@@ -87,13 +173,18 @@ class GestorBiblioteca:
         primer_ejemplar = ejemplares_disponibles[0]
         
         # Usar usuario por defecto (ID: 1) para préstamos simples desde GUI
-        self.prestar_ejemplar(primer_ejemplar.id, usuario_id=1)
+        self._validar_prestamo(primer_ejemplar.id, usuario_id=1)
+        self.db.insertar_prestamo(primer_ejemplar.id, 1)
+        return self._libro_cambiado(libro.id)
 
-    def devolver_libro(self, codigo: str) -> None:
+    def devolver_libro(self, codigo: str) -> Optional[Libro]:
         """Devuelve automáticamente el primer ejemplar prestado de un libro.
         
         Esta es una función de conveniencia para la GUI que simplifica
         la devolución cuando solo se conoce el código del libro.
+
+        Returns:
+            Libro: Resumen del libro tras la devolución (ver suscribir_libros).
         """
         libro = self.db.get_libro_por_codigo(codigo)
         if not libro:
@@ -108,7 +199,8 @@ class GestorBiblioteca:
         
         # Devolver el primer ejemplar prestado
         primer_prestado = ejemplares_prestados[0]
-        self.devolver_ejemplar(primer_prestado.id)
+        self.db.devolver_ejemplar_por_id(primer_prestado.id)
+        return self._libro_cambiado(libro.id)
 
     def get_libros_disponibles(self) -> List[Libro]:
         return self.db.get_libros_disponibles()
@@ -119,12 +211,52 @@ class GestorBiblioteca:
     def get_libro_mas_prestado(self) -> Optional[Libro]:
         return self.db.get_libro_mas_prestado()
 
+    def get_top_prestados(self, k: int = 10, desde=None, hasta=None,
+                          genero_id: Optional[int] = None) -> List[Libro]:
+        """Ranking de los k libros más prestados, opcionalmente por período (meses completos) y género."""
+        return self.db.get_top_prestados(k, desde=desde, hasta=hasta, genero_id=genero_id)
+
     def get_libros_por_estanteria(self, estanteria_id: int) -> List[Libro]:
         return self.db.get_libros_por_estanteria(estanteria_id)
 
     def cerrar(self):
         self.db.cerrar()
 
+    def reconstruir_indice_busqueda(self) -> int:
+        """Regenera el índice de búsqueda del catálogo y devuelve los libros indexados."""
+        return self.db.reconstruir_indice_busqueda()
+
+    def reconstruir_indice_usuarios(self) -> int:
+        """Regenera el índice de búsqueda de usuarios y devuelve los usuarios indexados."""
+        return self.db.reconstruir_indice_usuarios()
+
+    def reparar_claves_busqueda(self) -> int:
+        """Recalcula las claves de búsqueda normalizadas y devuelve las filas corregidas."""
+        return self.db.reparar_claves_busqueda()
+
+    def cambiar_perfil_rendimiento(self, nombre: str):
+        """Cambia el perfil de rendimiento de SQLite (ver [database.performance] en config.ini)."""
+        self.db.cambiar_perfil(nombre)
+
+    def perfil_rendimiento_temporal(self, nombre: str):
+        """Context manager que aplica un perfil solo durante el bloque 'with'."""
+        return self.db.perfil_temporal(nombre)
+
+    def get_diagnostico_bd(self) -> dict:
+        """Devuelve el perfil activo y los ajustes efectivos de la base de datos."""
+        return self.db.get_diagnostico()
+
+    def importar_catalogo(self, ruta: str, formato: Optional[str] = None, tamanio_lote: int = 1000,
+                          ruta_rechazos: Optional[str] = None, ruta_checkpoint: Optional[str] = None,
+                          al_progresar=None) -> ResultadoImportacion:
+        """
+        Importa libros con sus ejemplares desde un CSV o JSONL (ver logic/importador.py).
+        Las filas inválidas se rechazan sin detener la importación.
+        """
+        importador = ImportadorCatalogo(self.db, tamanio_lote=tamanio_lote, ruta_rechazos=ruta_rechazos,
+                                        ruta_checkpoint=ruta_checkpoint, al_progresar=al_progresar)
+        return importador.importar(leer_filas(ruta, formato), origen=os.path.abspath(ruta))
+
     # ============ GESTIÓN DE USUARIOS ============
     def agregar_usuario(self, nombre: str, email: Optional[str] = None, 
                        telefono: Optional[str] = None, direccion: Optional[str] = None) -> int:
@@ -135,10 +267,19 @@ class GestorBiblioteca:
         return self.db.insertar_usuario(nombre, email, telefono, direccion)
 
     def get_usuario(self, id: int) -> Optional[Usuario]:
-        return self.db.get_usuario(id)
+        return self.cache.obtener('usuarios', id, lambda: self.db.get_usuario(id))
 
     def get_todos_usuarios(self) -> List[Usuario]:
-        return self.db.get_todos_usuarios()
+        return list(self.cache.obtener('usuarios', TODOS, self.db.get_todos_usuarios))
+
+    def buscar_usuarios(self, termino: str, limite: Optional[int] = 20) -> List[Usuario]:
+        """Usuarios activos por nombre, email o teléfono (prefijo de palabra), los más relevantes primero."""
+        return self.db.buscar_usuarios(termino, limite=limite)
+
+    def refinar_busqueda_usuarios(self, usuarios: List[Usuario], anterior: str,
+                                  nuevo: str) -> Optional[List[Usuario]]:
+        """buscar_usuarios(nuevo) calculado en memoria a partir de buscar_usuarios(anterior), si se puede."""
+        return self.db.refinar_busqueda_usuarios(usuarios, anterior, nuevo)
 
     # ============ GESTIÓN DE AUTORES ============
     def agregar_autor(self, nombre: str, apellido: str, nacionalidad: Optional[str] = None,
@@ -148,10 +289,10 @@ class GestorBiblioteca:
         return self.db.insertar_autor(nombre, apellido, nacionalidad, fecha_nacimiento, biografia)
 
     def get_autor(self, id: int) -> Optional[Autor]:
-        return self.db.get_autor(id)
+        return self.cache.obtener('autores', id, lambda: self.db.get_autor(id))
 
     def get_todos_autores(self) -> List[Autor]:
-        return self.db.get_todos_autores()
+        return list(self.cache.obtener('autores', TODOS, self.db.get_todos_autores))
 
     # ============ GESTIÓN DE GÉNEROS ============
     def agregar_genero(self, nombre: str, descripcion: Optional[str] = None) -> int:
@@ -160,10 +301,10 @@ class GestorBiblioteca:
         return self.db.insertar_genero(nombre, descripcion)
 
     def get_genero(self, id: int) -> Optional[Genero]:
-        return self.db.get_genero(id)
+        return self.cache.obtener('generos', id, lambda: self.db.get_genero(id))
 
     def get_todos_generos(self) -> List[Genero]:
-        return self.db.get_todos_generos()
+        return list(self.cache.obtener('generos', TODOS, self.db.get_todos_generos))
 
     # ============ GESTIÓN DE EJEMPLARES ============
     def agregar_ejemplar(self, libro_id: int, codigo_ejemplar: str, 
@@ -176,13 +317,21 @@ class GestorBiblioteca:
     def get_ejemplares_por_libro(self, libro_id: int) -> List[Ejemplar]:
         return self.db.get_ejemplares_por_libro(libro_id)
 
+    def get_ejemplares_en_estanteria(self, estanteria_id: int, nivel: Optional[int] = None) -> List[Ejemplar]:
+        """Ejemplares de una estantería (o de uno de sus niveles) por nivel y posición."""
+        return self.db.get_ejemplares_en_estanteria(estanteria_id, nivel)
+
     def get_ejemplar_por_codigo(self, codigo: str) -> Optional[Ejemplar]:
         """Busca un ejemplar por su código."""
         return self.db.get_ejemplar_por_codigo(codigo)
 
-    def buscar_ejemplares_disponibles(self, termino: str) -> List[tuple]:
+    def buscar_ejemplares_disponibles(self, termino: str, limite: int = 10) -> List[tuple]:
         """Busca ejemplares disponibles por término."""
-        return self.db.buscar_ejemplares_disponibles(termino)
+        return self.db.buscar_ejemplares_disponibles(termino, limite)
+
+    def refinar_busqueda_ejemplares(self, resultados: List[tuple], anterior: str,
+                                    nuevo: str) -> Optional[List[tuple]]:
+        return self.db.refinar_busqueda_ejemplares(resultados, anterior, nuevo)
 
     def get_ejemplares_disponibles(self) -> List[Ejemplar]:
         return self.db.get_ejemplares_disponibles()
@@ -203,6 +352,7 @@ class GestorBiblioteca:
 
         # Llamar a insertar_ejemplar sin `ubicacion_fisica`.
         self.db.insertar_ejemplar(libro_id, nuevo_codigo)
+        self._libro_cambiado(libro_id)
 
     def eliminar_ejemplar(self, ejemplar_id: int):
         """Elimina un ejemplar, con validación de estado."""
@@ -213,11 +363,19 @@ class GestorBiblioteca:
             raise ValueError("No se puede eliminar un ejemplar que está actualmente prestado.")
 
         self.db.eliminar_ejemplar_por_id(ejemplar_id)
+        self._libro_cambiado(ejemplar.libro_id)
 
     # ============ SISTEMA DE PRÉSTAMOS NUEVO ============
     def prestar_ejemplar(self, ejemplar_id: int, usuario_id: int, 
                         dias_prestamo: int = 15, observaciones: Optional[str] = None) -> int:
         """Nuevo sistema de préstamos por ejemplar individual."""
+        ejemplar = self._validar_prestamo(ejemplar_id, usuario_id)
+        prestamo_id = self.db.insertar_prestamo(ejemplar_id, usuario_id, dias_prestamo, observaciones)
+        self._libro_cambiado(ejemplar.libro_id)
+        return prestamo_id
+
+    def _validar_prestamo(self, ejemplar_id: int, usuario_id: int) -> Ejemplar:
+        """Comprueba que el ejemplar esté disponible y el usuario activo; devuelve el ejemplar."""
         ejemplar = self.db.get_ejemplar(ejemplar_id)
         if not ejemplar:
             raise ValueError(f"No se encontró ejemplar con id {ejemplar_id}")
@@ -229,16 +387,24 @@ class GestorBiblioteca:
             raise ValueError(f"No se encontró usuario con id {usuario_id}")
         if not usuario.activo:
             raise ValueError("Usuario no está activo")
-        
-        return self.db.insertar_prestamo(ejemplar_id, usuario_id, dias_prestamo, observaciones)
+        return ejemplar
 
     def devolver_ejemplar(self, ejemplar_id: int) -> bool:
         """Devuelve un ejemplar específico por su ID."""
-        return self.db.devolver_ejemplar_por_id(ejemplar_id)
+        ejemplar = self.db.get_ejemplar(ejemplar_id)
+        devuelto = self.db.devolver_ejemplar_por_id(ejemplar_id)
+        if devuelto and ejemplar:
+            self._libro_cambiado(ejemplar.libro_id)
+        return devuelto
     
     def devolver_prestamo(self, prestamo_id: int) -> bool:
         """Devuelve un préstamo específico por su ID."""
-        return self.db.devolver_prestamo(prestamo_id)
+        prestamo = self.db.get_prestamo(prestamo_id)
+        devuelto = self.db.devolver_prestamo(prestamo_id)
+        ejemplar = self.db.get_ejemplar(prestamo.ejemplar_id) if devuelto and prestamo else None
+        if ejemplar:
+            self._libro_cambiado(ejemplar.libro_id)
+        return devuelto
 
     def get_prestamos_activos(self) -> List[Prestamo]:
         return self.db.get_prestamos_activos()
@@ -253,6 +419,15 @@ class GestorBiblioteca:
         """Obtiene el historial completo de préstamos."""
         return self.db.get_todos_prestamos(limite, solo_devueltos)
 
+    def get_prestamos_detallados(self, estado: Optional[str] = None, usuario_id: Optional[int] = None,
+                                 desde: Optional[date] = None, hasta: Optional[date] = None,
+                                 orden: str = 'fecha_prestamo', descendente: bool = False,
+                                 limite: Optional[int] = None,
+                                 despues_de: Optional[PrestamoDetalle] = None) -> List[PrestamoDetalle]:
+        """Listado de préstamos con usuario, ejemplar y libro en una sola consulta."""
+        return self.db.get_prestamos_detallados(estado, usuario_id, desde, hasta, orden,
+                                                descendente, limite, despues_de)
+
     # ============ FUNCIONES DE COMPATIBILIDAD  ============
     def _find_or_create_autor(self, nombre: str, apellido: str) -> Autor:
         """Busca un autor por nombre y apellido, o lo crea si no existe."""
@@ -294,7 +469,7 @@ class GestorBiblioteca:
         if self.db.get_libro_por_codigo(codigo):
             raise ValueError(f"Ya existe un libro con el código '{codigo}'")
         
-        ejemplares_actuales = self.get_count_ejemplares_en_estanteria(estanteria_id)
+        ejemplares_actuales = estanteria.ocupados
         if (ejemplares_actuales + cantidad_ejemplares) > estanteria.capacidad:
             raise ValueError(f"No hay suficiente espacio en la estantería '{estanteria.nombre}'. "
                            f"Capacidad: {estanteria.capacidad}, Ocupados: {ejemplares_actuales}, "
@@ -336,9 +511,40 @@ class GestorBiblioteca:
         """Obtiene un resumen completo de la biblioteca."""
         return self.db.get_resumen_dashboard()
 
-    def get_todos_los_libros(self) -> List[Libro]:
-        """Obtiene una lista de todos los libros en el sistema."""
-        return self.db.get_todos_los_libros()
+    def get_todos_los_libros(self, resumen: bool = False) -> List[Libro]:
+        """Obtiene una lista de todos los libros en el sistema (resumen=True: solo contadores)."""
+        return self.db.get_todos_los_libros(resumen=resumen)
+
+    # ============ LISTADOS PAGINADOS ============
+    # cursor es el Pagina.siguiente de la página anterior (None = primera página).
+    # resumen=True trae solo los contadores de ejemplares de cada libro.
+    def get_pagina_libros(self, cursor: Optional[str] = None, tamanio: int = TAMANIO_PAGINA,
+                          estado_ejemplar: Optional[str] = None, orden: str = 'titulo',
+                          descendente: bool = False, resumen: bool = False) -> Pagina:
+        return self.db.get_pagina_libros(tamanio=tamanio, cursor=cursor, orden=orden, descendente=descendente,
+                                         estado_ejemplar=estado_ejemplar, resumen=resumen)
+
+    def get_pagina_ejemplares(self, cursor: Optional[str] = None, tamanio: int = TAMANIO_PAGINA,
+                              libro_id: Optional[int] = None, estado: Optional[str] = None) -> Pagina:
+        return self.db.get_pagina_ejemplares(tamanio=tamanio, cursor=cursor, libro_id=libro_id, estado=estado)
+
+    def get_pagina_usuarios(self, cursor: Optional[str] = None, tamanio: int = TAMANIO_PAGINA,
+                            orden: str = 'nombre', descendente: bool = False) -> Pagina:
+        return self.db.get_pagina_usuarios(tamanio=tamanio, cursor=cursor, orden=orden, descendente=descendente)
+
+    def get_pagina_prestamos(self, cursor: Optional[str] = None, tamanio: int = TAMANIO_PAGINA,
+                             estado: Optional[str] = None, usuario_id: Optional[int] = None,
+                             orden: str = 'fecha_prestamo', descendente: bool = False) -> Pagina:
+        return self.db.get_pagina_prestamos(tamanio=tamanio, cursor=cursor, estado=estado,
+                                            usuario_id=usuario_id, orden=orden, descendente=descendente)
+
+    def iter_libros(self, **filtros) -> Iterator[Libro]:
+        """Recorre todo el catálogo en memoria constante (exportaciones, reportes)."""
+        return self.db.iter_libros(**filtros)
+
+    def iter_prestamos(self, **filtros) -> Iterator[PrestamoDetalle]:
+        """Recorre los préstamos detallados en memoria constante."""
+        return self.db.iter_prestamos_detallados(**filtros)
 
     def mover_libro(self, libro_id: int, nueva_estanteria_id: int) -> None:
         """Mueve un libro y todos sus ejemplares a una nueva estantería."""
@@ -351,12 +557,49 @@ class GestorBiblioteca:
             raise ValueError("El libro ya se encuentra en esa estantería.")
 
         self.db.mover_libro(libro_id, nueva_estanteria_id)
+        self._libro_cambiado(libro_id)
 
-    def buscar_libros(self, termino: str) -> List[Libro]:
-        """Búsqueda inteligente de libros."""
+    def buscar_libros(self, termino: str, resumen: bool = False) -> List[Libro]:
+        """
+        Búsqueda inteligente de libros (resumen=True: sin cargar los ejemplares).
+        Un término con campos (autor:, anio:, ...) se resuelve con consultar_catalogo.
+        """
         if not isinstance(termino, str) or not termino.strip():
             return []
-        return self.db.buscar_libros(termino=termino.strip())
+        if tiene_campos(termino):
+            return self.consultar_catalogo(termino, resumen=resumen)
+        return self.db.buscar_libros(termino=termino.strip(), resumen=resumen)
+
+    def consultar_catalogo(self, consulta: str, resumen: bool = False,
+                           limite: Optional[int] = None) -> List[Libro]:
+        """
+        Libros que cumplen una consulta con campos, p. ej.
+        'autor:borges anio:1940..1960 disponible:si' (ver logic/consulta_catalogo.py).
+
+        Raises:
+            ValueError: Si la consulta no es válida.
+        """
+        compilada = compilar(consulta, self.db.fts_disponible)
+        return self.db.consultar_libros(compilada.sql, compilada.parametros, limite=limite, resumen=resumen)
+
+    def explicar_consulta_catalogo(self, consulta: str) -> str:
+        """Plan elegido para una consulta con campos: índice de cada cláusula, SQL y EXPLAIN QUERY PLAN."""
+        compilada = compilar(consulta, self.db.fts_disponible)
+        return explicar(compilada, self.db.explicar_consulta(compilada.sql, compilada.parametros))
+
+    def get_estadisticas_planes(self) -> dict:
+        """Planes de consulta compilados en caché, aciertos y fallos."""
+        return PLANES.estadisticas()
+
+    def refinar_busqueda_libros(self, libros: List[Libro], anterior: str, nuevo: str) -> Optional[List[Libro]]:
+        """buscar_libros(nuevo) calculado en memoria a partir de buscar_libros(anterior), si se puede."""
+        if tiene_campos(anterior) or tiene_campos(nuevo):
+            return None
+        return self.db.refinar_busqueda_libros(libros, anterior, nuevo)
+
+    def lectura_interrumpible(self, interrupcion: Interrupcion):
+        """Bloque cuyas consultas se pueden cortar desde otro hilo (ver database/conexiones.py)."""
+        return self.db.lectura_interrumpible(interrupcion)
 
     def eliminar_libro_y_ejemplares(self, libro_id: int) -> None:
         """Elimina un libro y todos sus ejemplares en cascada."""
@@ -367,7 +610,9 @@ class GestorBiblioteca:
                 raise ValueError(f"No se puede eliminar. El ejemplar {ejemplar.codigo_ejemplar} está prestado.")
         
         self.db.eliminar_libro_por_id(libro_id)
+        self._avisar_libro(libro_id, None)
 
     def modificar_libro_completo(self, libro_id: int, datos_nuevos: dict) -> None:
         """Modifica los datos de un libro."""
-        self.db.modificar_libro_completo(libro_id, datos_nuevos)
\ No newline at end of file
+        self.db.modificar_libro_completo(libro_id, datos_nuevos)
+        self._libro_cambiado(libro_id)
\ No newline at end of file
@@ -1,14 +1,27 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import datetime
 from datetime import date
 
+# Los modelos declaran __slots__: sin __dict__ por instancia, cada objeto
+# ocupa bastante menos memoria, lo que se nota al hidratar catálogos grandes.
+
 class Estanteria:
-    def __init__(self, id: int, nombre: str, capacidad: int):
+    __slots__ = ('id', 'nombre', 'capacidad', 'ocupados')
+
+    def __init__(self, id: int, nombre: str, capacidad: int, ocupados: int = 0):
         self.id = id
         self.nombre = nombre
         self.capacidad = int(capacidad)
+        self.ocupados = int(ocupados)
+
+    @property
+    def libres(self) -> int:
+        """Espacios disponibles en la estantería."""
+        return self.capacidad - self.ocupados
 
 class Usuario:
+    __slots__ = ('id', 'nombre', 'email', 'telefono', 'direccion', 'fecha_registro', 'activo')
+
     def __init__(self, id: int, nombre: str, email: Optional[str] = None, 
                  telefono: Optional[str] = None, direccion: Optional[str] = None,
                  fecha_registro: Optional[date] = None, activo: bool = True):
@@ -21,12 +34,16 @@ class Usuario:
         self.activo = activo
 
 class Genero:
+    __slots__ = ('id', 'nombre', 'descripcion')
+
     def __init__(self, id: int, nombre: str, descripcion: Optional[str] = None):
         self.id = id
         self.nombre = nombre
         self.descripcion = descripcion
 
 class Autor:
+    __slots__ = ('id', 'nombre', 'apellido', 'nacionalidad', 'fecha_nacimiento', 'biografia')
+
     def __init__(self, id: int, nombre: str, apellido: str, 
                  nacionalidad: Optional[str] = None, fecha_nacimiento: Optional[date] = None,
                  biografia: Optional[str] = None):
@@ -42,6 +59,10 @@ class Autor:
         return f"{self.nombre} {self.apellido}"
 
 class Libro:
+    __slots__ = ('id', 'codigo', 'titulo', 'isbn', 'anio', 'editorial', 'numero_paginas',
+                 'descripcion', 'autor_id', 'genero_id', 'estanteria_id', 'fecha_adquisicion',
+                 'autor', 'genero', 'ejemplares', 'historial_prestamos', 'conteos')
+
     def __init__(self, id: int, codigo: str, titulo: str, isbn: Optional[str] = None,
                  anio: int = 0, editorial: Optional[str] = None, numero_paginas: Optional[int] = None,
                  descripcion: Optional[str] = None, autor_id: int = 0, genero_id: Optional[int] = None,
@@ -65,18 +86,37 @@ class Libro:
         self.ejemplares: List[Ejemplar] = []
         self.historial_prestamos: int = 0 
 
+        # Contadores leídos de la base de datos (total, disponibles, prestados).
+        # Un libro listado en modo resumen los trae sin cargar sus ejemplares.
+        self.conteos: Optional[Tuple[int, int, int]] = None
+
+    @property
+    def cantidad_total(self) -> int:
+        if self.conteos is not None:
+            return self.conteos[0]
+        return len(self.ejemplares)
+
     @property
     def cantidad_disponibles(self) -> int:
-        return len([e for e in self.ejemplares if e.estado == 'disponible'])
+        if self.conteos is not None:
+            return self.conteos[1]
+        return sum(1 for e in self.ejemplares if e.estado == 'disponible')
     
     @property
     def cantidad_prestados(self) -> int:
-        return len([e for e in self.ejemplares if e.estado == 'prestado'])
+        if self.conteos is not None:
+            return self.conteos[2]
+        return sum(1 for e in self.ejemplares if e.estado == 'prestado')
 
 class Ejemplar:
+    __slots__ = ('id', 'libro_id', 'codigo_ejemplar', 'estado', 'observaciones', 'fecha_adquisicion',
+                 'ubicacion_fisica', 'estanteria_id', 'nivel', 'posicion', '_libro')
+
     def __init__(self, id: int, libro_id: int, codigo_ejemplar: str,
                  estado: str = 'disponible', observaciones: Optional[str] = None,
-                 fecha_adquisicion: Optional[date] = None, ubicacion_fisica: Optional[str] = None):
+                 fecha_adquisicion: Optional[date] = None, ubicacion_fisica: Optional[str] = None,
+                 estanteria_id: Optional[int] = None, nivel: Optional[int] = None,
+                 posicion: Optional[int] = None):
         self.id = id
         self.libro_id = libro_id
         self.codigo_ejemplar = codigo_ejemplar
@@ -84,6 +124,10 @@ class Ejemplar:
         self.observaciones = observaciones
         self.fecha_adquisicion = fecha_adquisicion or date.today()
         self.ubicacion_fisica = ubicacion_fisica
+        # Hueco asignado en la estantería (None si la ubicación es manual)
+        self.estanteria_id = estanteria_id
+        self.nivel = nivel
+        self.posicion = posicion
         
         # Relación con libro
         self._libro = None
@@ -115,6 +159,10 @@ class Ejemplar:
         return False
 
 class Prestamo:
+    __slots__ = ('id', 'ejemplar_id', 'usuario_id', 'fecha_prestamo', 'fecha_devolucion_esperada',
+                 'fecha_devolucion_real', 'estado', 'observaciones', 'renovaciones',
+                 '_ejemplar', '_usuario')
+
     def __init__(self, id: int, ejemplar_id: int, usuario_id: int,
                  fecha_prestamo: Optional[date] = None, fecha_devolucion_esperada: Optional[date] = None,
                  fecha_devolucion_real: Optional[date] = None, estado: str = 'activo',
@@ -127,7 +175,7 @@ class Prestamo:
         self.fecha_devolucion_real = fecha_devolucion_real
         self.estado = estado 
         self.observaciones = observaciones
-        self.renovaciones = renovaciones
+        self.renovaciones = renovaciones or 0
         
         # Relaciones
         self._ejemplar = None
@@ -182,4 +230,68 @@ class Prestamo:
             self.estado = 'devuelto'
             self.fecha_devolucion_real = date.today()
             return True
-        return False
\ No newline at end of file
+        return False
+
+
+class PrestamoDetalle(Prestamo):
+    """
+    Fila plana de un listado de préstamos: el préstamo más los datos del
+    usuario, el ejemplar, el libro y el autor obtenidos en una sola consulta.
+    """
+    __slots__ = ('usuario_nombre', 'usuario_email', 'usuario_telefono', 'usuario_direccion',
+                 'codigo_ejemplar', 'libro_id', 'libro_codigo', 'libro_titulo', 'autor_nombre_completo')
+
+    def __init__(self, id: int, ejemplar_id: int, usuario_id: int,
+                 fecha_prestamo: Optional[date] = None, fecha_devolucion_esperada: Optional[date] = None,
+                 fecha_devolucion_real: Optional[date] = None, estado: str = 'activo',
+                 observaciones: Optional[str] = None, renovaciones: int = 0,
+                 usuario_nombre: Optional[str] = None, usuario_email: Optional[str] = None,
+                 usuario_telefono: Optional[str] = None, usuario_direccion: Optional[str] = None,
+                 codigo_ejemplar: Optional[str] = None, libro_id: Optional[int] = None,
+                 libro_codigo: Optional[str] = None, libro_titulo: Optional[str] = None,
+                 autor_nombre_completo: Optional[str] = None):
+        super().__init__(id, ejemplar_id, usuario_id, fecha_prestamo, fecha_devolucion_esperada,
+                         fecha_devolucion_real, estado, observaciones, renovaciones)
+        self.usuario_nombre = usuario_nombre
+        self.usuario_email = usuario_email
+        self.usuario_telefono = usuario_telefono
+        self.usuario_direccion = usuario_direccion
+        self.codigo_ejemplar = codigo_ejemplar
+        self.libro_id = libro_id
+        self.libro_codigo = libro_codigo
+        self.libro_titulo = libro_titulo
+        self.autor_nombre_completo = autor_nombre_completo
+
+    @property
+    def dias_restantes(self) -> int:
+        """Días que faltan para la devolución esperada (negativo si está vencido)."""
+        return -self.dias_vencimiento
+
+
+class MapaIdentidad:
+    """
+    Registro de instancias compartidas durante una consulta o sesión: cada
+    autor o género se crea una sola vez por id y todas las filas
+    que lo referencian reciben el mismo objeto. Las instancias compartidas
+    no deben modificarse en el lugar.
+    """
+    __slots__ = ('_autores', '_generos')
+
+    def __init__(self):
+        self._autores = {}
+        self._generos = {}
+
+    def autor(self, id: int, nombre: str, apellido: str) -> Autor:
+        autor = self._autores.get(id)
+        if autor is None:
+            autor = self._autores[id] = Autor(id=id, nombre=nombre, apellido=apellido)
+        return autor
+
+    def genero(self, id: int, nombre: str) -> Genero:
+        genero = self._generos.get(id)
+        if genero is None:
+            genero = self._generos[id] = Genero(id=id, nombre=nombre)
+        return genero
+
+    def __len__(self):
+        return len(self._autores) + len(self._generos)
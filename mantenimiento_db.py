@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Tareas de mantenimiento de la base de datos de BiblioHub.
+
+Uso:
+    python mantenimiento_db.py reconstruir-indice
+    python mantenimiento_db.py reparar-ocupacion
+    python mantenimiento_db.py verificar-estadisticas [--reparar]
+    python mantenimiento_db.py corte-vencidos
+    python mantenimiento_db.py migrar [--check]
+    python mantenimiento_db.py diagnostico [--perfil NOMBRE] [--integridad]
+    python mantenimiento_db.py shell [-c "SENTENCIA SQL"]
+    python mantenimiento_db.py explicar-busqueda 'autor:borges anio:1940..1960 disponible:si'
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from database.db_manager import DBManager
+from database.normalizacion import explicar_error_funciones, registrar_funciones
+from database.migraciones import MIGRACIONES, version_esquema, version_objetivo
+from logic.consulta_catalogo import compilar, explicar
+
+def reconstruir_indice(db: DBManager) -> int:
+    """Regenera los índices de búsqueda FTS5 y las claves normalizadas de búsqueda."""
+    print("🔄 Verificando claves de búsqueda normalizadas...")
+    corregidas = db.reparar_claves_busqueda()
+    if corregidas:
+        print(f"✅ {corregidas} filas con clave desfasada corregidas")
+    else:
+        print("✅ Todas las claves de búsqueda están al día")
+
+    print("🔄 Reconstruyendo índices de búsqueda...")
+    try:
+        libros = db.reconstruir_indice_busqueda()
+        usuarios = db.reconstruir_indice_usuarios()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Índices reconstruidos: {libros} libros y {usuarios} usuarios indexados")
+    return 0
+
+def reparar_ocupacion(db: DBManager) -> int:
+    """Recalcula la ocupación de las estanterías, los ejemplares por libro y la circulación."""
+    print("🔄 Verificando ocupación de estanterías...")
+    corregidas = db.reparar_ocupacion_estanterias()
+    if corregidas:
+        print(f"✅ {corregidas} estanterías con contador desfasado corregidas")
+    else:
+        print("✅ Todos los contadores de ocupación están al día")
+
+    print("🔄 Verificando contadores de ejemplares por libro...")
+    corregidos = db.reparar_conteos_libros()
+    if corregidos:
+        print(f"✅ {corregidos} libros con contadores desfasados corregidos")
+    else:
+        print("✅ Todos los contadores de ejemplares están al día")
+
+    print("🔄 Reconstruyendo circulación de préstamos por libro...")
+    libros = db.reparar_circulacion()
+    print(f"✅ Circulación reconstruida: {libros} libros con préstamos")
+    return 0
+
+def verificar_estadisticas(db: DBManager, reparar: bool = False) -> int:
+    """Compara los contadores del dashboard con los conteos reales."""
+    print("🔄 Verificando estadísticas del dashboard...")
+    desfasados = db.verificar_estadisticas()
+    if not desfasados:
+        print("✅ Todas las estadísticas coinciden con los conteos reales")
+        return 0
+    for campo, (guardado, real) in desfasados.items():
+        print(f"⚠️  {campo}: guardado {guardado}, real {real}")
+    if not reparar:
+        print("ℹ️  Ejecutar con --reparar para corregirlas")
+        return 1
+    corregidos = db.reparar_estadisticas()
+    print(f"✅ {corregidos} contadores corregidos")
+    return 0
+
+def corte_vencidos(db: DBManager) -> int:
+    """Cuenta como vencidos los préstamos que vencieron desde el último corte."""
+    nuevos = db.avanzar_corte_vencidos()
+    print(f"✅ Corte de vencidos al día ({nuevos:+d} préstamos vencidos)")
+    return 0
+
+def diagnostico(db: DBManager, integridad: bool = False) -> int:
+    """Muestra el perfil de rendimiento activo y los ajustes efectivos de SQLite."""
+    info = db.get_diagnostico()
+    print(f"🗄️  Base de datos: {info['db_file']} (SQLite {info['sqlite_version']}, esquema v{info['version_esquema']})")
+    print(f"⚙️  Perfil activo: {info['perfil']}")
+    for clave, efectivo in info['ajustes_efectivos'].items():
+        configurado = info['perfil_configurado'].get(clave)
+        aviso = "" if configurado is None or str(efectivo).lower() == configurado else f"  (configurado: {configurado})"
+        print(f"   {clave:<13} {efectivo}{aviso}")
+    print(f"🔍 Índice FTS5: {'disponible' if info['fts_disponible'] else 'no disponible'}")
+    if not integridad:
+        return 0
+
+    print("🔄 Verificando la integridad (PRAGMA integrity_check)...")
+    problemas = db.verificar_integridad()
+    if problemas == ['ok']:
+        print("✅ La base de datos está íntegra")
+        return 0
+    for problema in problemas:
+        print(f"   ⚠️  {problema}")
+    return 1
+
+def _imprimir_resultado(cursor: sqlite3.Cursor):
+    """Filas de una sentencia separadas por |, o cuántas filas cambió."""
+    if cursor.description:
+        print(" | ".join(columna[0] for columna in cursor.description))
+        for fila in cursor:
+            print(" | ".join("NULL" if valor is None else str(valor) for valor in fila))
+    elif cursor.rowcount >= 0:
+        print(f"✅ {cursor.rowcount} filas afectadas")
+
+def shell(db: DBManager, sentencia: str = None) -> int:
+    """
+    Consola SQL sobre la base de datos con la collation "es" y normalizar()
+    registradas: el cliente sqlite3 no las tiene y falla al escribir en las
+    tablas con índices "es". Con `sentencia` ejecuta solo esa y termina.
+    """
+    conn = sqlite3.connect(db.db_file, isolation_level=None)
+    registrar_funciones(conn)
+    try:
+        if sentencia is not None:
+            try:
+                _imprimir_resultado(conn.execute(sentencia))
+            except sqlite3.Error as e:
+                print(f"❌ {e}")
+                return 1
+            return 0
+
+        print(f"🗄️  {db.db_file}: termine cada sentencia con ';' y salga con .salir o Ctrl+D")
+        print("💡 Las filas escritas aquí no calculan sus claves *_norm: después ejecute reconstruir-indice")
+        pendiente = ""
+        while True:
+            try:
+                linea = input("sql> " if not pendiente else "...> ")
+            except EOFError:
+                print()
+                return 0
+            if not pendiente and linea.strip() in (".salir", ".quit", ".exit"):
+                return 0
+            pendiente += linea + "\n"
+            if not sqlite3.complete_statement(pendiente):
+                continue
+            try:
+                _imprimir_resultado(conn.execute(pendiente))
+            except sqlite3.Error as e:
+                print(f"❌ {e}")
+            pendiente = ""
+    finally:
+        conn.close()
+
+def explicar_busqueda(db: DBManager, consulta: str) -> int:
+    """Muestra el plan que elige la consulta con campos del catálogo y cuántos libros devuelve."""
+    try:
+        compilada = compilar(consulta, db.fts_disponible)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(explicar(compilada, db.explicar_consulta(compilada.sql, compilada.parametros)))
+    libros = db.consultar_libros(compilada.sql, compilada.parametros, resumen=True)
+    print(f"📊 {len(libros)} libros")
+    return 0
+
+# ============ MIGRACIONES ============
+def migrar(db: DBManager, check: bool = False) -> int:
+    """
+    Muestra el estado del esquema. Las migraciones pendientes ya se aplicaron
+    al abrir la conexión (DBManager las ejecuta al iniciar).
+    """
+    version = version_esquema(db.conn)
+    print(f"📦 Versión de esquema: {version} (última conocida: {version_objetivo()})")
+    for numero, descripcion, _ in MIGRACIONES:
+        marca = "✅" if numero <= version else "⏳"
+        print(f"  {marca} {numero:03d} - {descripcion}")
+
+    if check:
+        return revisar_planes_consulta(db)
+    return 0
+
+def _ejercitar_consultas(db: DBManager):
+    """
+    Invoca cada método de DBManager con argumentos representativos para que
+    el trace callback capture sus sentencias SQL. Se ejecuta siempre sobre
+    una copia en memoria, así que los métodos de escritura no tocan la base real.
+    """
+    cursor = db.conn.cursor()
+
+    def primer_id(tabla: str) -> int:
+        return cursor.execute(f"SELECT MIN(id) FROM {tabla}").fetchone()[0] or 1
+
+    libro_id = primer_id('libros')
+    estanteria_id = primer_id('estanterias')
+    usuario_id = primer_id('usuarios')
+    ejemplar_id = primer_id('ejemplares')
+    prestamo_id = primer_id('prestamos')
+    libro = db.get_libro_por_id(libro_id)
+    codigo = libro.codigo if libro else 'LIB001'
+    ejemplar = db.get_ejemplar(ejemplar_id)
+    codigo_ejemplar = ejemplar.codigo_ejemplar if ejemplar else 'LIB001-001'
+
+    def consultar(consulta: str):
+        compilada = compilar(consulta, db.fts_disponible)
+        return db.consultar_libros(compilada.sql, compilada.parametros)
+
+    llamadas = [
+        # Lecturas
+        lambda: db.buscar_libros(),
+        lambda: db.buscar_libros(termino='soledad'),
+        lambda: db.buscar_libros(termino='001'),
+        lambda: db.buscar_libros(termino='a', estanteria_id=estanteria_id, estado_ejemplar='disponible'),
+        lambda: db.get_libros_por_estanteria(estanteria_id),
+        lambda: db.get_libros_disponibles(),
+        lambda: db.get_libros_prestados(),
+        lambda: db.get_libro_mas_prestado(),
+        lambda: db.get_top_prestados(10, genero_id=1),
+        lambda: db.get_top_prestados(10, desde='2020-01-01', hasta='2030-12-31'),
+        lambda: db.get_libro_por_codigo(codigo),
+        lambda: db.get_libro_por_id(libro_id),
+        lambda: db.get_estanteria(estanteria_id),
+        lambda: db.get_todas_las_estanterias(),
+        lambda: db.get_count_ejemplares_en_estanteria(estanteria_id),
+        lambda: db.get_ocupacion_estanterias(),
+        lambda: db.get_ejemplares_en_estanteria(estanteria_id),
+        lambda: db.get_ejemplares_en_estanteria(estanteria_id, nivel=1),
+        lambda: db.get_usuario(usuario_id),
+        lambda: db.get_todos_usuarios(),
+        lambda: db.buscar_usuarios('a'),
+        lambda: db.buscar_usuarios('600 1', limite=None, solo_activos=False),
+        lambda: db.get_autor(1),
+        lambda: db.get_todos_autores(),
+        lambda: db.find_autor_by_name('Gabriel', 'García Márquez'),
+        lambda: db.get_genero(1),
+        lambda: db.get_todos_generos(),
+        lambda: db.find_genero_by_name('Ensayo'),
+        lambda: db.get_ejemplar(ejemplar_id),
+        lambda: db.get_ejemplar_por_codigo(codigo_ejemplar),
+        lambda: db.get_ejemplares_por_libro(libro_id),
+        lambda: db.buscar_ejemplares_disponibles('a'),
+        lambda: db.get_ejemplares_disponibles(),
+        lambda: db.get_prestamo(prestamo_id),
+        lambda: db.get_prestamos_activos(),
+        lambda: db.get_prestamos_vencidos(),
+        lambda: db.get_prestamos_por_usuario(usuario_id),
+        lambda: db.get_todos_prestamos(limite=50),
+        lambda: db.get_todos_prestamos(solo_devueltos=True),
+        lambda: db.get_prestamos_detallados(estado='activo'),
+        lambda: db.get_prestamos_detallados(estado='vencido', orden='vencimiento'),
+        lambda: db.get_prestamos_detallados(usuario_id=usuario_id, orden='fecha_prestamo', descendente=True),
+        lambda: db.get_prestamos_detallados(estado='devuelto', orden='fecha_prestamo', descendente=True, limite=100),
+        lambda: db.get_resumen_dashboard(),
+        lambda: db.get_pagina_libros(cursor=db.get_pagina_libros(tamanio=2).siguiente),
+        lambda: db.get_pagina_libros(orden='codigo', descendente=True, estado_ejemplar='disponible'),
+        lambda: db.get_pagina_libros(estanteria_id=estanteria_id),
+        lambda: db.get_pagina_libros(resumen=True, estado_ejemplar='prestado'),
+        lambda: db.buscar_libros(termino='a', resumen=True),
+        lambda: consultar('autor:a anio:1900..2000 disponible:si'),
+        lambda: consultar(f'estante:{estanteria_id} genero:ensayo titulo:a'),
+        lambda: consultar(f'codigo:{codigo[:3]} anio:1950..'),
+        lambda: consultar('isbn:978-84-376-0494-7 a'),
+        lambda: consultar('estante:"Literatura Clásica" anio:..1960'),
+        lambda: db.get_pagina_ejemplares(cursor=db.get_pagina_ejemplares(tamanio=2).siguiente),
+        lambda: db.get_pagina_ejemplares(libro_id=libro_id),
+        lambda: db.get_pagina_ejemplares(orden='id', estanteria_id=estanteria_id),
+        lambda: db.get_pagina_usuarios(cursor=db.get_pagina_usuarios(tamanio=1).siguiente),
+        lambda: db.get_pagina_prestamos(estado='devuelto', descendente=True,
+                                        cursor=db.get_pagina_prestamos(tamanio=1, estado='devuelto',
+                                                                       descendente=True).siguiente),
+        lambda: list(db.iter_libros(tamanio_lote=100)),
+        lambda: list(db.iter_ejemplares(orden='id')),
+        lambda: list(db.iter_usuarios(solo_activos=False, orden='id')),
+        lambda: list(db.iter_prestamos_detallados()),
+        # Escrituras (sobre la copia en memoria)
+        lambda: db.modificar_estanteria(estanteria_id, 'Revisión de planes', 10_000),
+        lambda: db.insertar_ejemplar(libro_id, 'CHECK-PLAN-001'),
+        lambda: db.insertar_prestamo(ejemplar_id, usuario_id),
+        lambda: db.devolver_ejemplar_por_id(ejemplar_id),
+        lambda: db.devolver_prestamo(prestamo_id),
+        lambda: db.mover_libro(libro_id, estanteria_id),
+        lambda: db.modificar_libro_completo(libro_id, {'titulo': 'Revisión de planes',
+                                                       'estanteria_id': estanteria_id}),
+        lambda: db.get_mapas_importacion(),
+        lambda: db.insertar_lote_catalogo(
+            [{'codigo': 'CHECK-PLAN-LOTE', 'titulo': 'Revisión de planes', 'anio': 2000,
+              'autor_nombre': 'Revisión', 'autor_apellido': 'De Planes', 'genero': 'Revisión de planes',
+              'estanteria_id': estanteria_id, 'cantidad_ejemplares': 2}], {}, {}),
+        lambda: db.eliminar_ejemplar_por_id(ejemplar_id),
+        lambda: db.eliminar_libro_por_id(libro_id),
+        lambda: db.eliminar_estanteria(estanteria_id),
+        lambda: db.reparar_ocupacion_estanterias(),
+        lambda: db.reparar_conteos_libros(),
+        lambda: db.reparar_circulacion(),
+        lambda: db.avanzar_corte_vencidos(),
+        lambda: db.verificar_estadisticas(),
+        lambda: db.reparar_estadisticas(),
+        lambda: db.reparar_claves_busqueda(),
+    ]
+    for llamada in llamadas:
+        try:
+            llamada()
+        except Exception:
+            # Las validaciones de negocio pueden fallar según los datos; lo que
+            # interesa son las sentencias que se alcanzaron a ejecutar
+            pass
+
+def _escaneos_completos(plan) -> list:
+    """Devuelve las líneas del plan que recorren una tabla sin índice."""
+    # Las subconsultas materializadas se recorren completas por definición
+    materializadas = {re.sub(r'^(MATERIALIZE|CO-ROUTINE) ', '', fila['detail'])
+                      for fila in plan
+                      if fila['detail'].startswith(('MATERIALIZE', 'CO-ROUTINE'))}
+    escaneos = []
+    for fila in plan:
+        detalle = fila['detail']
+        if not detalle.startswith('SCAN ') or 'USING' in detalle:
+            continue
+        if 'VIRTUAL TABLE' in detalle or 'CONSTANT ROW' in detalle:
+            continue
+        if detalle.split()[1] in materializadas:
+            continue
+        escaneos.append(detalle)
+    return escaneos
+
+def revisar_planes_consulta(db: DBManager) -> int:
+    """
+    Imprime EXPLAIN QUERY PLAN para cada consulta que ejecuta DBManager y
+    marca las que recorren una tabla completa.
+    """
+    print("\n🔎 Revisando planes de consulta...")
+
+    # Copia en memoria para poder ejercitar también los métodos de escritura
+    copia = DBManager(':memory:')
+    db.conn.backup(copia.conn)
+    copia.fts_disponible = db.fts_disponible
+
+    sentencias = []
+    vistas = set()
+
+    def capturar(sql: str):
+        normalizada = ' '.join(sql.split())
+        primera = normalizada.split(' ', 1)[0].upper() if normalizada else ''
+        if primera not in ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH'):
+            return
+        if primera == 'INSERT' and ' SELECT ' not in normalizada.upper():
+            return
+        # Sentencias internas del módulo FTS5 sobre sus tablas auxiliares
+        if "'main'." in normalizada:
+            return
+        # El trace devuelve la sentencia con los valores ya expandidos; se
+        # agrupan las que solo difieren en los literales
+        forma = re.sub(r"'(?:[^']|'')*'|\b\d+\b", "?", normalizada)
+        if forma not in vistas:
+            vistas.add(forma)
+            sentencias.append(normalizada)
+
+    copia.conn.set_trace_callback(capturar)
+    try:
+        _ejercitar_consultas(copia)
+    finally:
+        copia.conn.set_trace_callback(None)
+
+    con_escaneo = 0
+    for sql in sentencias:
+        plan = copia.conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        escaneos = _escaneos_completos(plan)
+        if escaneos:
+            con_escaneo += 1
+        marca = "⚠️ " if escaneos else "✅"
+        print(f"\n{marca} {sql[:160]}{'...' if len(sql) > 160 else ''}")
+        for fila in plan:
+            aviso = "   <-- SCAN" if fila['detail'] in escaneos else ""
+            print(f"     {fila['detail']}{aviso}")
+
+    copia.cerrar()
+    print(f"\n📊 {len(sentencias)} consultas revisadas, {con_escaneo} con recorrido completo de tabla")
+    return 0
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos de BiblioHub")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    subparsers.add_parser("reconstruir-indice",
+                          help="Regenera los índices de búsqueda FTS5 (catálogo: título, código, ISBN "
+                               "y autor; usuarios: nombre, email y teléfono) y las claves "
+                               "normalizadas sin acentos")
+    subparsers.add_parser("reparar-ocupacion",
+                          help="Recalcula la ocupación de las estanterías, los contadores de ejemplares "
+                               "por libro y la circulación de préstamos")
+    parser_estadisticas = subparsers.add_parser("verificar-estadisticas",
+                                                help="Compara las estadísticas del dashboard con los conteos reales")
+    parser_estadisticas.add_argument("--reparar", action="store_true",
+                                     help="Corrige los contadores desfasados")
+    subparsers.add_parser("corte-vencidos",
+                          help="Actualiza el contador de préstamos vencidos hasta hoy (tarea diaria)")
+    parser_migrar = subparsers.add_parser("migrar",
+                                          help="Aplica las migraciones pendientes y muestra la versión del esquema")
+    parser_migrar.add_argument("--check", action="store_true",
+                               help="Imprime EXPLAIN QUERY PLAN de cada consulta de DBManager")
+
+    parser_diagnostico = subparsers.add_parser("diagnostico",
+                                               help="Muestra el perfil de rendimiento y los PRAGMAs efectivos")
+    parser_diagnostico.add_argument("--perfil", help="Perfil a aplicar antes de mostrar el diagnóstico")
+    parser_diagnostico.add_argument("--integridad", action="store_true",
+                                    help="Ejecuta PRAGMA integrity_check con la collation es registrada")
+    parser_shell = subparsers.add_parser("shell",
+                                         help="Consola SQL con la collation es y normalizar() registradas")
+    parser_shell.add_argument("-c", dest="sentencia", help="Ejecuta una sola sentencia y termina")
+    parser_explicar = subparsers.add_parser("explicar-busqueda",
+                                            help="Muestra el plan de una consulta con campos del catálogo "
+                                                 "(autor:, anio:, genero:, estante:, ...)")
+    parser_explicar.add_argument("consulta", help="Consulta, p. ej. 'autor:borges anio:1940..1960'")
+
+    args = parser.parse_args()
+
+    try:
+        db = DBManager(perfil=getattr(args, 'perfil', None))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    try:
+        if args.comando == "reconstruir-indice":
+            codigo_salida = reconstruir_indice(db)
+        elif args.comando == "reparar-ocupacion":
+            codigo_salida = reparar_ocupacion(db)
+        elif args.comando == "verificar-estadisticas":
+            codigo_salida = verificar_estadisticas(db, reparar=args.reparar)
+        elif args.comando == "corte-vencidos":
+            codigo_salida = corte_vencidos(db)
+        elif args.comando == "migrar":
+            codigo_salida = migrar(db, check=args.check)
+        elif args.comando == "diagnostico":
+            codigo_salida = diagnostico(db, integridad=args.integridad)
+        elif args.comando == "shell":
+            codigo_salida = shell(db, args.sentencia)
+        elif args.comando == "explicar-busqueda":
+            codigo_salida = explicar_busqueda(db, args.consulta)
+    except sqlite3.OperationalError as e:
+        mensaje = explicar_error_funciones(e)
+        if mensaje is None:
+            raise
+        print(f"❌ {mensaje}")
+        codigo_salida = 1
+    finally:
+        db.cerrar()
+
+    sys.exit(codigo_salida)
+
+if __name__ == "__main__":
+    main()
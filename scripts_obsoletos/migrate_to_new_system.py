@@ -4,15 +4,23 @@ Script de migración del sistema anterior al nuevo
 Crea ejemplares individuales para todos los libros existentes
 """
 
+import os
 import sqlite3
+import sys
 from datetime import date
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.normalizacion import registrar_funciones
+
 def migrar_sistema():
     """Migra del sistema anterior al nuevo creando ejemplares individuales."""
     print("🔄 Iniciando migración del sistema legacy al nuevo...")
     
     conn = sqlite3.connect('biblioteca.db')
     conn.row_factory = sqlite3.Row
+    # normalizar() y la collation es: las usan las migraciones y los índices del esquema
+    registrar_funciones(conn)
     cursor = conn.cursor()
     
     try:
@@ -106,6 +114,8 @@ def verificar_sistema():
     
     conn = sqlite3.connect('biblioteca.db')
     conn.row_factory = sqlite3.Row
+    # normalizar() y la collation es: las usan las migraciones y los índices del esquema
+    registrar_funciones(conn)
     cursor = conn.cursor()
     
     try:
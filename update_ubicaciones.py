@@ -5,7 +5,17 @@ Asigna ubicaciones automáticas basadas en la estantería del libro
 """
 
 import sqlite3
+import sys
 from typing import Dict, List
+from database.migraciones import aplicar_migraciones
+from database.normalizacion import explicar_error_funciones, registrar_funciones
+from database.ubicaciones import asignar_ubicaciones, ubicacion_de_fila
+
+def _mensaje_error(error: Exception) -> str:
+    """Explica los fallos por la collation es o normalizar() sin registrar."""
+    if isinstance(error, sqlite3.Error):
+        return explicar_error_funciones(error) or str(error)
+    return str(error)
 
 def actualizar_ubicaciones():
     """Actualiza las ubicaciones de todos los ejemplares existentes."""
@@ -13,6 +23,10 @@ def actualizar_ubicaciones():
     
     conn = sqlite3.connect('biblioteca.db')
     conn.row_factory = sqlite3.Row
+    # normalizar() y la collation es: las usan las migraciones y los índices del esquema
+    registrar_funciones(conn)
+    # Las columnas de ubicación (estanteria_id, nivel, posicion) las crea una migración
+    aplicar_migraciones(conn)
     cursor = conn.cursor()
     
     try:
@@ -31,7 +45,8 @@ def actualizar_ubicaciones():
             FROM ejemplares e
             JOIN libros l ON e.libro_id = l.id
             JOIN estanterias est ON l.estanteria_id = est.id
-            WHERE e.ubicacion_fisica IS NULL OR e.ubicacion_fisica = 'No especificada'
+            WHERE e.nivel IS NULL
+              AND (e.ubicacion_fisica IS NULL OR e.ubicacion_fisica = 'No especificada')
         """)
         
         ejemplares_sin_ubicacion = cursor.fetchall()
@@ -59,28 +74,16 @@ def actualizar_ubicaciones():
             # Ordenar ejemplares por código para ubicación consistente
             ejemplares.sort(key=lambda x: x['codigo_ejemplar'])
             
-            # Generar ubicaciones con formato: "Estantería [Nombre] - Nivel X - Pos Y"
-            for i, ejemplar in enumerate(ejemplares, 1):
-                # Calcular nivel y posición (asumiendo 10 libros por nivel)
-                nivel = ((i - 1) // 10) + 1
-                posicion = ((i - 1) % 10) + 1
-                
-                ubicacion = f"Estantería {est_nombre} - Nivel {nivel} - Pos {posicion}"
-                
-                # Actualizar en la base de datos
-                cursor.execute("""
-                    UPDATE ejemplares 
-                    SET ubicacion_fisica = ? 
-                    WHERE id = ?
-                """, (ubicacion, ejemplar['id']))
-                
+            # Ubicarlos en los huecos libres: "Estantería [Nombre] - Nivel X - Pos Y"
+            ubicaciones = asignar_ubicaciones(cursor, est_id, [ejemplar['id'] for ejemplar in ejemplares])
+            for ejemplar, ubicacion in zip(ejemplares, ubicaciones):
                 print(f"   ✅ {ejemplar['codigo_ejemplar']}: {ubicacion}")
                 ejemplares_actualizados += 1
         
         # 5. Verificar resultados
         cursor.execute("""
             SELECT COUNT(*) as total,
-                   SUM(CASE WHEN ubicacion_fisica IS NOT NULL AND ubicacion_fisica != 'No especificada' THEN 1 ELSE 0 END) as con_ubicacion
+                   SUM(CASE WHEN nivel IS NOT NULL OR (ubicacion_fisica IS NOT NULL AND ubicacion_fisica != 'No especificada') THEN 1 ELSE 0 END) as con_ubicacion
             FROM ejemplares
         """)
         
@@ -98,7 +101,7 @@ def actualizar_ubicaciones():
         print(f"   como 'Estantería A - Nivel 1 - Pos 3'")
         
     except Exception as e:
-        print(f"❌ Error durante la actualización: {e}")
+        print(f"❌ Error durante la actualización: {_mensaje_error(e)}")
         conn.rollback()
         raise
     finally:
@@ -110,6 +113,9 @@ def verificar_ubicaciones():
     
     conn = sqlite3.connect('biblioteca.db')
     conn.row_factory = sqlite3.Row
+    # normalizar() y la collation es: las usan las migraciones y los índices del esquema
+    registrar_funciones(conn)
+    aplicar_migraciones(conn)
     cursor = conn.cursor()
     
     try:
@@ -117,8 +123,8 @@ def verificar_ubicaciones():
         cursor.execute("""
             SELECT 
                 COUNT(*) as total,
-                SUM(CASE WHEN ubicacion_fisica IS NOT NULL AND ubicacion_fisica != 'No especificada' THEN 1 ELSE 0 END) as con_ubicacion,
-                SUM(CASE WHEN ubicacion_fisica IS NULL OR ubicacion_fisica = 'No especificada' THEN 1 ELSE 0 END) as sin_ubicacion
+                SUM(CASE WHEN nivel IS NOT NULL OR (ubicacion_fisica IS NOT NULL AND ubicacion_fisica != 'No especificada') THEN 1 ELSE 0 END) as con_ubicacion,
+                SUM(CASE WHEN nivel IS NULL AND (ubicacion_fisica IS NULL OR ubicacion_fisica = 'No especificada') THEN 1 ELSE 0 END) as sin_ubicacion
             FROM ejemplares
         """)
         
@@ -131,9 +137,12 @@ def verificar_ubicaciones():
         
         # Ejemplos de ubicaciones
         cursor.execute("""
-            SELECT codigo_ejemplar, ubicacion_fisica 
-            FROM ejemplares 
-            WHERE ubicacion_fisica IS NOT NULL AND ubicacion_fisica != 'No especificada'
+            SELECT e.codigo_ejemplar, e.ubicacion_fisica, e.nivel, e.posicion,
+                   s.nombre as ubicacion_estanteria
+            FROM ejemplares e
+            LEFT JOIN estanterias s ON s.id = e.estanteria_id
+            WHERE e.nivel IS NOT NULL
+               OR (e.ubicacion_fisica IS NOT NULL AND e.ubicacion_fisica != 'No especificada')
             LIMIT 5
         """)
         
@@ -141,10 +150,10 @@ def verificar_ubicaciones():
         if ejemplos:
             print(f"\n📋 EJEMPLOS DE UBICACIONES:")
             for ejemplo in ejemplos:
-                print(f"   {ejemplo['codigo_ejemplar']}: {ejemplo['ubicacion_fisica']}")
+                print(f"   {ejemplo['codigo_ejemplar']}: {ubicacion_de_fila(ejemplo)}")
                 
     except Exception as e:
-        print(f"❌ Error verificando ubicaciones: {e}")
+        print(f"❌ Error verificando ubicaciones: {_mensaje_error(e)}")
     finally:
         conn.close()
 
@@ -159,7 +168,11 @@ def main():
     print(f"\n" + "=" * 70)
     respuesta = input("\n¿Desea actualizar las ubicaciones? (s/N): ")
     if respuesta.lower() in ['s', 'si', 'sí', 'y', 'yes']:
-        actualizar_ubicaciones()
+        try:
+            actualizar_ubicaciones()
+        except sqlite3.Error:
+            # actualizar_ubicaciones ya ha mostrado el motivo y deshecho los cambios
+            sys.exit(1)
         print(f"\n" + "=" * 70)
         print("✅ Actualización completada. Reinicie la aplicación para ver los cambios.")
     else: